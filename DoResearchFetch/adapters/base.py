@@ -4,7 +4,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -112,13 +112,20 @@ class BaseAdapter(ABC):
         初始化适配器
 
         Args:
-            config: 配置字典，包含API密钥、基础URL等
+            config: 配置字典，包含API密钥、基础URL等；可通过http_pool传入自定义会话池
         """
+        from utils.http_session import http_pool
+        
         self.config = config
         self.base_url = config.get('base_url', '')
         self.api_key = config.get('api_key')
         self.timeout = config.get('timeout', 30)
         self.max_retries = config.get('max_retries', 3)
+        self.http_pool = config.get('http_pool') or http_pool
+    
+    def _session(self, url: str):
+        """获取url所在主机的共享会话，同一主机的请求复用keep-alive连接"""
+        return self.http_pool.get_session(url)
 
     @property
     @abstractmethod
@@ -175,6 +182,21 @@ class BaseAdapter(ABC):
         # 子类可以重写此方法来添加更多验证逻辑
         self._validate_specific_params(params)
 
+    def _validate_incremental_params(self, params: Dict[str, Any]) -> None:
+        """校验增量抓取参数since（YYYY-MM-DD）和watermark（上次返回的水位线）"""
+        from utils.exceptions import ValidationError
+
+        since = params.get('since')
+        if since is not None:
+            try:
+                datetime.strptime(str(since), '%Y-%m-%d')
+            except ValueError:
+                raise ValidationError("since必须是YYYY-MM-DD格式的日期")
+
+        watermark = params.get('watermark')
+        if watermark is not None and not isinstance(watermark, (str, int)):
+            raise ValidationError("watermark必须是字符串或整数")
+
     def _validate_specific_params(self, params: Dict[str, Any]) -> None:
         """
         子类特定的参数验证逻辑
@@ -208,85 +230,86 @@ class BaseAdapter(ABC):
         """
         pass
 
-    def _map_to_paper_data(self, raw_data: Dict[str, Any]) -> PaperData:
-        """
-        将原始数据映射为标准格式
-        子类必须实现此方法
-
-        Args:
-            raw_data: 从数据源获取的原始数据
-
-        Returns:
-            PaperData: 标准化的论文数据
+    def stream_papers(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
         """
-        raise NotImplementedError("子类必须实现 _map_to_paper_data 方法")
+        流式抓取论文数据，逐篇产出论文字典
 
-
-class BaseNewsAdapter(BaseAdapter):
-    """新闻适配器基类"""
-
-    @property
-    def adapter_type(self) -> str:
-        """适配器类型"""
-        return "news"
-
-    @abstractmethod
-    def fetch_news(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        抓取新闻数据的主要方法
+        生成器的返回值是papers以外的结果字段（total_count、has_more等）。
+        默认实现调用fetch_papers后逐篇产出；子类可以重写为边映射边产出，
+        再用_collect_papers实现fetch_papers
 
         Args:
             params: 查询参数
-
-        Returns:
-            包含以下字段的字典:
-            - news: List[NewsData] - 新闻列表
-            - total_count: int - 总数量
-            - has_more: bool - 是否还有更多数据
-            - next_cursor: Optional[str] - 下一页游标
-            - rate_limit_remaining: Optional[int] - 剩余API调用次数
-            - cache_hit: bool - 是否命中缓存
-
-        Raises:
-            FetchError: 抓取失败时抛出
-            RateLimitError: 达到API限制时抛出
-        """
-        pass
-
-    def fetch_papers(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """重写父类方法，转发到fetch_news"""
-        return self.fetch_news(params)
-
-    def _map_to_news_data(self, raw_data: Dict[str, Any]) -> NewsData:
         """
-        将原始数据映射为标准新闻格式
-        子类必须实现此方法
-
-        Args:
-            raw_data: 从数据源获取的原始数据
+        result = self.fetch_papers(params)
+        yield from result.get('papers', [])
+        return {key: value for key, value in result.items() if key != 'papers'}
+
+    @staticmethod
+    def _collect_papers(stream: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """读完stream_papers生成器，组装为fetch_papers的返回格式"""
+        papers = []
+        while True:
+            try:
+                papers.append(next(stream))
+            except StopIteration as stop:
+                return {'papers': papers, **(stop.value or {})}
+
+    @staticmethod
+    def _not_modified_result(watermark: Optional[str], items_key: str = 'papers') -> Dict[str, Any]:
+        """上游数据自调用方的水位线以来没有变化时的空结果"""
+        return {
+            items_key: [],
+            'total_count': 0,
+            'has_more': False,
+            'next_cursor': None,
+            'rate_limit_remaining': None,
+            'cache_hit': False,
+            'not_modified': True,
+            'watermark': watermark
+        }
 
-        Returns:
-            NewsData: 标准化的新闻数据
-        """
-        raise NotImplementedError("子类必须实现 _map_to_news_data 方法")
-    
-    def _make_request(self, url: str, **kwargs) -> Dict[str, Any]:
+    @staticmethod
+    def _conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """根据上次保存的校验值生成条件请求头"""
+        headers = {}
+        if validators and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators and validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    @staticmethod
+    def _update_validators(response, validators: Optional[Dict[str, str]]) -> None:
+        """用响应中的ETag/Last-Modified替换校验值"""
+        if validators is None:
+            return
+        validators.clear()
+        if response.headers.get('ETag'):
+            validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['last_modified'] = response.headers['Last-Modified']
+
+    def _make_request(self, url: str, validators: Optional[Dict[str, str]] = None,
+                      **kwargs) -> Optional[Dict[str, Any]]:
         """
         统一的HTTP请求方法
         子类可以使用此方法发送HTTP请求
         
         Args:
             url: 请求URL
+            validators: 条件请求的校验值（etag/last_modified），请求成功后更新为响应中的新值
             **kwargs: 其他请求参数
             
         Returns:
-            响应数据
+            响应数据；传入校验值且上游返回304时返回None
             
         Raises:
             FetchError: 请求失败时抛出
         """
         import requests
         from utils.exceptions import FetchError, RateLimitError
+        from utils.rate_limiter import rate_limiter
         import time
         
         # 设置默认超时
@@ -295,18 +318,27 @@ class BaseNewsAdapter(BaseAdapter):
         # 添加API密钥（如果需要）
         if self.api_key and 'headers' not in kwargs:
             kwargs['headers'] = {}
+        if validators:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self._conditional_headers(validators)}
         
         # 重试机制
         for attempt in range(self.max_retries + 1):
             try:
-                response = requests.get(url, **kwargs)
+                rate_limiter.acquire(url)
+                response = self._session(url).get(url, **kwargs)
+                pause = rate_limiter.update_from_response(url, response.status_code, response.headers)
                 
                 # 检查HTTP状态码
+                if response.status_code == 304 and validators:
+                    return None
+                
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get('Retry-After', 60))
+                    # 暂停时间不长时重试，下一次acquire会等到暂停结束
+                    if attempt < self.max_retries and pause <= rate_limiter.max_wait:
+                        continue
                     raise RateLimitError(
                         "API调用频率限制",
-                        details={'retry_after': retry_after}
+                        details={'retry_after': int(pause)}
                     )
                 
                 if response.status_code >= 400:
@@ -316,7 +348,9 @@ class BaseNewsAdapter(BaseAdapter):
                         details={'status_code': response.status_code, 'response': response.text}
                     )
                 
-                return response.json()
+                data = response.json()
+                self._update_validators(response, validators)
+                return data
                 
             except requests.exceptions.Timeout:
                 if attempt == self.max_retries:
@@ -340,6 +374,7 @@ class BaseNewsAdapter(BaseAdapter):
         """
         import requests
         from utils.exceptions import FetchError, RateLimitError
+        from utils.rate_limiter import rate_limiter
         import time
         
         kwargs.setdefault('timeout', self.timeout)
@@ -349,13 +384,17 @@ class BaseNewsAdapter(BaseAdapter):
         
         for attempt in range(self.max_retries + 1):
             try:
-                response = requests.post(url, **kwargs)
+                rate_limiter.acquire(url)
+                response = self._session(url).post(url, **kwargs)
+                pause = rate_limiter.update_from_response(url, response.status_code, response.headers)
                 
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get('Retry-After', 60))
+                    # 暂停时间不长时重试，下一次acquire会等到暂停结束
+                    if attempt < self.max_retries and pause <= rate_limiter.max_wait:
+                        continue
                     raise RateLimitError(
                         "API调用频率限制",
-                        details={'retry_after': retry_after}
+                        details={'retry_after': int(pause)}
                     )
                 
                 if response.status_code >= 400:
@@ -378,4 +417,87 @@ class BaseNewsAdapter(BaseAdapter):
                         f"网络请求失败: {str(e)}",
                         error_code='NETWORK_ERROR'
                     )
-                time.sleep(2 ** attempt)
\ No newline at end of file
+                time.sleep(2 ** attempt)
+
+    def _map_to_paper_data(self, raw_data: Dict[str, Any]) -> PaperData:
+        """
+        将原始数据映射为标准格式
+        子类必须实现此方法
+
+        Args:
+            raw_data: 从数据源获取的原始数据
+
+        Returns:
+            PaperData: 标准化的论文数据
+        """
+        raise NotImplementedError("子类必须实现 _map_to_paper_data 方法")
+
+
+class BaseNewsAdapter(BaseAdapter):
+    """新闻适配器基类"""
+
+    @property
+    def adapter_type(self) -> str:
+        """适配器类型"""
+        return "news"
+
+    @abstractmethod
+    def fetch_news(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        抓取新闻数据的主要方法
+
+        Args:
+            params: 查询参数
+
+        Returns:
+            包含以下字段的字典:
+            - news: List[NewsData] - 新闻列表
+            - total_count: int - 总数量
+            - has_more: bool - 是否还有更多数据
+            - next_cursor: Optional[str] - 下一页游标
+            - rate_limit_remaining: Optional[int] - 剩余API调用次数
+            - cache_hit: bool - 是否命中缓存
+
+        Raises:
+            FetchError: 抓取失败时抛出
+            RateLimitError: 达到API限制时抛出
+        """
+        pass
+
+    def fetch_papers(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """重写父类方法，转发到fetch_news"""
+        return self.fetch_news(params)
+
+    def _map_to_news_data(self, raw_data: Dict[str, Any]) -> NewsData:
+        """
+        将原始数据映射为标准新闻格式
+        子类必须实现此方法
+
+        Args:
+            raw_data: 从数据源获取的原始数据
+
+        Returns:
+            NewsData: 标准化的新闻数据
+        """
+        raise NotImplementedError("子类必须实现 _map_to_news_data 方法")
+
+    def _skip_seen_news(self, news_list: List[Dict[str, Any]],
+                        watermark: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        跳过发布日期早于水位线的原始新闻条目（调用方已看到），不再映射
+
+        水位线当天的条目仍会返回，同一天稍后发布的通知不会漏掉
+
+        Returns:
+            (未看到的条目, 新水位线)
+        """
+        from utils.fetch_state import fetch_state, max_watermark
+
+        dates = [self._parse_date(raw.get('date', ''))[:10] for raw in news_list]
+        new_watermark = max_watermark(watermark, *dates)
+        if watermark is None:
+            return news_list, new_watermark
+
+        unseen = [raw for raw, date in zip(news_list, dates) if date >= watermark]
+        fetch_state.record('skipped_items', len(news_list) - len(unseen))
+        return unseen, new_watermark
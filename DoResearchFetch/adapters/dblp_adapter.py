@@ -4,15 +4,33 @@ DBLP适配器
 """
 
 import re
-from typing import Dict, List, Any, Optional
+import json
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator
 from datetime import datetime
 from .base import BaseAdapter, PaperData
 from utils.exceptions import FetchError, ValidationError
+from utils.fetch_state import fetch_state
+from utils.tracing import span
+
+logger = logging.getLogger('do_research_fetch.dblp')
 
 
 class DBLPAdapter(BaseAdapter):
     """DBLP数据库数据源适配器"""
     
+    PAGE_SIZE = 1000    # DBLP API单页最大条数
+    MAX_OFFSET = 10000  # DBLP API可访问的最大结果位置
+    
+    KNOWN_JOURNALS = ['tse', 'tac', 'tosem', 'tpds', 'tc']
+    KNOWN_CONFERENCES = ['icse', 'fse', 'ase', 'pldi', 'oopsla', 'sigcomm']
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.page_concurrency = max(1, config.get('page_concurrency', 3))
+    
     @property
     def name(self) -> str:
         return "dblp"
@@ -31,7 +49,7 @@ class DBLPAdapter(BaseAdapter):
     
     @property
     def optional_params(self) -> List[str]:
-        return ["include_workshops", "limit", "format"]
+        return ["include_workshops", "limit", "format", "venue_type", "cursor", "since", "watermark"]
     
     def _validate_specific_params(self, params: Dict[str, Any]) -> None:
         """DBLP特定的参数验证"""
@@ -44,101 +62,204 @@ class DBLPAdapter(BaseAdapter):
             raise ValidationError(f"year必须是1950到{datetime.now().year + 1}之间的整数")
         
         limit = params.get('limit', 100)
-        if not isinstance(limit, int) or limit <= 0 or limit > 1000:
-            raise ValidationError("limit必须是1-1000之间的整数")
+        if not isinstance(limit, int) or limit <= 0 or limit > self.MAX_OFFSET:
+            raise ValidationError(f"limit必须是1-{self.MAX_OFFSET}之间的整数")
         
         include_workshops = params.get('include_workshops', False)
         if not isinstance(include_workshops, bool):
             raise ValidationError("include_workshops必须是布尔值")
+        
+        venue_type = params.get('venue_type')
+        if venue_type is not None and venue_type not in ('conf', 'journals'):
+            raise ValidationError("venue_type必须是conf或journals")
+        
+        if params.get('cursor') is not None:
+            self._decode_cursor(params['cursor'])
+        
+        self._validate_incremental_params(params)
     
     def fetch_papers(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """抓取DBLP论文数据，参数见stream_papers"""
+        return self._collect_papers(self.stream_papers(params))
+    
+    def stream_papers(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
         """
-        抓取DBLP论文数据
+        流式抓取DBLP论文数据，每转换完一页就逐篇产出该页的论文
+        
+        优先按venue和年份精确查询，没有结果时退回"{dblp_id} {year}"模糊查询；
+        第一页确定总数后，其余页面并发抓取（受共享限流器约束），按顺序产出
         
         Args:
             params: 包含dblp_id和年份的字典
                 - dblp_id: DBLP会议或期刊标识符 (例如: "icse", "tse", "pldi")
                 - year: 年份
                 - include_workshops: 是否包含workshop论文 (默认False)
-                - limit: 返回结果数量限制 (默认100, 最大1000)
+                - limit: 返回结果数量限制 (默认100, 最大10000)
                 - format: 返回格式 ("json"或"xml", 默认"json")
+                - venue_type: venue类型 ("conf"或"journals"，默认按dblp_id推断)
+                - cursor: 上次结果的next_cursor，从上次结束的位置继续抓取
+                - since: 只返回该日期（YYYY-MM-DD）及之后发表的论文
+                - watermark: 上次结果中的watermark（结果总数），结果没有变化时返回空结果
+        
+        DBLP的结果没有稳定的新旧顺序，水位线只用于第一页的条件请求
         """
         dblp_id = params['dblp_id'].strip().lower()
         year = params['year']
         include_workshops = params.get('include_workshops', False)
         limit = params.get('limit', 100)
         format_type = params.get('format', 'json')
+        since = params.get('since')
+        watermark = str(params['watermark']) if params.get('watermark') is not None else None
         
+        executor = None
+        futures = []
         try:
-            # 1. 构建查询URL和参数
-            query = f"{dblp_id} {year}"
+            # 1. 确定查询：游标中记录了上次使用的查询和位置
+            if params.get('cursor'):
+                query, offset = self._decode_cursor(params['cursor'])
+                queries = [query]
+            else:
+                queries = self._venue_queries(dblp_id, year, params.get('venue_type'))
+                offset = 0
             
-            # 2. 执行搜索
-            search_results = self._search_publications(query, limit, format_type)
-            
-            # 3. 过滤结果
-            filtered_results = self._filter_results(
-                search_results, 
-                dblp_id, 
-                year, 
-                include_workshops
-            )
+            # 2. 抓取第一页，精确查询没有结果时换下一个查询
+            first_size = min(limit, self.PAGE_SIZE)
+            for query in queries:
+                resource = f"{query}|{offset}|{first_size}"
+                with span('fetch_state'):
+                    validators = fetch_state.conditional_validators(self.name, params, resource, watermark)
+                with span('search'):
+                    first_page = self._search_publications(query, first_size, offset, format_type,
+                                                           validators=validators)
+                if first_page is None:
+                    fetch_state.record('not_modified')
+                    return {key: value for key, value in self._not_modified_result(watermark).items()
+                            if key != 'papers'}
+                total_hits = self._total_hits(first_page)
+                if total_hits > offset:
+                    break
             
-            # 4. 转换为标准格式
-            papers = []
-            hits = filtered_results.get('result', {}).get('hits', {})
-            hit_list = hits.get('hit', [])
+            # 3. 并发抓取其余页面
+            end = min(total_hits, offset + limit, self.MAX_OFFSET)
+            page_offsets = range(offset + first_size, end, self.PAGE_SIZE)
+            if page_offsets:
+                executor = ThreadPoolExecutor(max_workers=min(self.page_concurrency, len(page_offsets)),
+                                              thread_name_prefix='dblp-page')
+                futures = [executor.submit(self._search_publications, query,
+                                           min(self.PAGE_SIZE, end - page_offset), page_offset, format_type)
+                           for page_offset in page_offsets]
             
-            # 确保hit_list是列表
-            if isinstance(hit_list, dict):
-                hit_list = [hit_list]
-            elif not isinstance(hit_list, list):
-                hit_list = []
+            # 4. 按页面顺序过滤、转换并产出（计时不包含调用方处理论文的时间）
+            for page_index in range(len(futures) + 1):
+                if page_index == 0:
+                    page = first_page
+                else:
+                    with span('page_wait'):
+                        page = futures[page_index - 1].result()
+                with span('mapping'):
+                    filtered_results = self._filter_results(page, dblp_id, year, include_workshops)
+                    papers = [paper for paper in self._map_hits(filtered_results, dblp_id)
+                              if not since or paper['published_date'] >= since]
+                yield from papers
             
-            for hit in hit_list:
-                try:
-                    info = hit.get('info', {})
-                    paper = self._map_to_paper_data(info, dblp_id)
-                    papers.append(paper.to_dict())
-                except Exception as e:
-                    # 记录但不中断处理
-                    print(f"Warning: Failed to process DBLP entry: {e}")
-                    continue
-            
-            # 5. 构建响应
-            total_hits = int(hits.get('@total', len(papers)))
-            has_more = len(papers) >= limit and total_hits > limit
+            # 5. 构建响应，保存第一页的校验值供下次条件请求使用
+            has_more = end < min(total_hits, self.MAX_OFFSET)
+            with span('fetch_state'):
+                fetch_state.save(self.name, params, resource=resource, watermark=str(total_hits), **validators)
             
             return {
-                'papers': papers,
                 'total_count': total_hits,
                 'has_more': has_more,
-                'next_cursor': None,  # DBLP API支持分页，但这里简化处理
+                'next_cursor': self._encode_cursor(query, end) if has_more else None,
                 'rate_limit_remaining': None,  # DBLP通常无API限制
-                'cache_hit': False
+                'cache_hit': False,
+                'not_modified': False,
+                'watermark': str(total_hits)
             }
             
-        except FetchError:
+        except (FetchError, ValidationError):
             raise
         except Exception as e:
             raise FetchError(
                 f"DBLP数据抓取失败: {str(e)}",
                 error_code='DBLP_FETCH_ERROR'
             )
+        finally:
+            # 提前停止读取时取消尚未开始的页面
+            for future in futures:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+    
+    def _venue_queries(self, dblp_id: str, year: int, venue_type: Optional[str]) -> List[str]:
+        """按venue和年份精确查询的候选查询，最后是原有的模糊查询"""
+        if venue_type:
+            venue_types = [venue_type]
+        elif dblp_id in self.KNOWN_JOURNALS:
+            venue_types = ['journals', 'conf']
+        else:
+            venue_types = ['conf', 'journals']
+        
+        queries = [f"streamid:{venue_type}/{dblp_id}: year:{year}:" for venue_type in venue_types]
+        queries.append(f"{dblp_id} {year}")
+        return queries
+    
+    @staticmethod
+    def _encode_cursor(query: str, offset: int) -> str:
+        data = json.dumps({'q': query, 'f': offset}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
     
-    def _search_publications(self, query: str, limit: int, format_type: str) -> Dict[str, Any]:
-        """执行DBLP搜索"""
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        """解析游标，返回(查询, 起始位置)"""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return str(data['q']), int(data['f'])
+        except Exception:
+            raise ValidationError("cursor无效")
+    
+    @staticmethod
+    def _total_hits(results: Dict[str, Any]) -> int:
+        try:
+            return int(results.get('result', {}).get('hits', {}).get('@total', 0))
+        except (TypeError, ValueError):
+            return 0
+    
+    def _map_hits(self, results: Dict[str, Any], dblp_id: str) -> Iterator[Dict[str, Any]]:
+        """逐条将搜索结果转换为标准格式"""
+        hit_list = results.get('result', {}).get('hits', {}).get('hit', [])
+        
+        # 确保hit_list是列表
+        if isinstance(hit_list, dict):
+            hit_list = [hit_list]
+        elif not isinstance(hit_list, list):
+            hit_list = []
+        
+        for hit in hit_list:
+            try:
+                info = hit.get('info', {})
+                paper = self._map_to_paper_data(info, dblp_id).to_dict()
+            except Exception as e:
+                # 记录但不中断处理
+                logger.warning("Failed to process DBLP entry: %s", e)
+                continue
+            yield paper
+    
+    def _search_publications(self, query: str, page_size: int, offset: int, format_type: str,
+                             validators: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """执行DBLP搜索，取从offset开始的page_size条结果；条件请求返回304时返回None"""
         url = f"{self.base_url}"
         
         params = {
             'q': query,
-            'h': min(limit, 1000),  # DBLP API的最大限制
-            'c': 0,  # 起始位置
-            'f': format_type
+            'h': min(page_size, self.PAGE_SIZE),  # DBLP API的最大限制
+            'f': offset,  # 起始位置
+            'c': 0,  # 不需要补全词
+            'format': format_type
         }
         
         try:
-            response = self._make_request(url, params=params)
+            response = self._make_request(url, params=params, validators=validators)
             return response
         except Exception as e:
             raise FetchError(
@@ -351,12 +472,9 @@ class DBLPAdapter(BaseAdapter):
                 return 'conference'
         
         # 默认根据常见的venue_id判断
-        known_journals = ['tse', 'tac', 'tosem', 'tpds', 'tc']
-        known_conferences = ['icse', 'fse', 'ase', 'pldi', 'oopsla', 'sigcomm']
-        
-        if venue_id.lower() in known_journals:
+        if venue_id.lower() in self.KNOWN_JOURNALS:
             return 'journal'
-        elif venue_id.lower() in known_conferences:
+        elif venue_id.lower() in self.KNOWN_CONFERENCES:
             return 'conference'
         
         return 'unknown'
@@ -5,16 +5,22 @@ IEEE适配器
 """
 
 import re
-from typing import Dict, List, Any, Optional
+import logging
+from typing import Dict, Iterator, List, Any, Optional
 from datetime import datetime, timedelta
 from .base import BaseAdapter, PaperData
 from utils.exceptions import FetchError, ValidationError
 from utils.progress_monitor import create_progress_tracker
+from utils.fetch_state import fetch_state, watermark_reached, max_watermark
+from utils.tracing import span
+
+logger = logging.getLogger('do_research_fetch.ieee')
 
 # 尝试导入异步模块，如果失败则提供回退方案
 try:
-    import asyncio
     from utils.async_abstract_fetcher import create_async_service
+    from utils.async_runtime import abstract_runtime
+    from utils.rate_limiter import rate_limiter
     ASYNC_AVAILABLE = True
 except ImportError:
     ASYNC_AVAILABLE = False
@@ -42,7 +48,7 @@ class IEEEAdapter(BaseAdapter):
     
     @property
     def optional_params(self) -> List[str]:
-        return ["limit", "early_access", "fetch_full_abstract"]
+        return ["limit", "early_access", "fetch_full_abstract", "since", "watermark"]
     
     def _validate_specific_params(self, params: Dict[str, Any]) -> None:
         """IEEE特定的参数验证"""
@@ -53,10 +59,18 @@ class IEEEAdapter(BaseAdapter):
         limit = params.get('limit', 50)
         if not isinstance(limit, int) or limit <= 0 or limit > 100:
             raise ValidationError("limit必须是1-100之间的整数")
+        
+        self._validate_incremental_params(params)
     
     def fetch_papers(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """抓取IEEE论文数据，参数见stream_papers；论文按发表日期倒序排列（最新的在前面）"""
+        result = self._collect_papers(self.stream_papers(params))
+        result['papers'].sort(key=lambda paper: paper['published_date'], reverse=True)
+        return result
+    
+    def stream_papers(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
         """
-        抓取IEEE论文数据
+        流式抓取IEEE论文数据，每篇论文的完整摘要就绪后即产出（按摘要抓取完成的顺序）
         
         Args:
             params: 包含punumber和可选参数的字典
@@ -64,19 +78,22 @@ class IEEEAdapter(BaseAdapter):
                 - limit: 返回结果数量限制 (默认50, 最大100)
                 - early_access: 是否获取早期访问文章 (默认True)
                 - fetch_full_abstract: 是否抓取完整摘要 (默认True)
+                - since: 只返回该日期（YYYY-MM-DD）及之后发表的论文
+                - watermark: 上次结果中的watermark（最大文章编号），只返回之后新增的论文
         """
         punumber = str(params['punumber'])
         limit = params.get('limit', 50)
         early_access = params.get('early_access', True)
         fetch_full_abstract = params.get('fetch_full_abstract', True)  # 默认抓取完整摘要
+        since = params.get('since')
+        watermark = str(params['watermark']) if params.get('watermark') is not None else None
         
         # 创建进度追踪器
         with create_progress_tracker(f"ieee-{punumber}", limit, f"抓取IEEE论文 {punumber}") as tracker:
             try:
-                tracker.update(operation="获取期刊元数据...")
-                
                 # 1. 获取期刊元数据
-                metadata = self._fetch_metadata(punumber)
+                with tracker.stage('metadata', "获取期刊元数据..."):
+                    metadata = self._fetch_metadata(punumber)
                 display_title = metadata.get('displayTitle', f'IEEE Publication {punumber}')
                 
                 tracker.update(operation="分析期刊issue...")
@@ -103,88 +120,64 @@ class IEEEAdapter(BaseAdapter):
                         error_code='INCOMPLETE_ISSUE_INFO'
                     )
                 
-                tracker.update(operation="获取论文目录数据...")
-                
-                # 3. 获取TOC数据
-                toc_data = self._fetch_toc_data(punumber, issue_number, limit)
-                print(toc_data)
+                # 3. 获取TOC数据（调用方已看到上次的全部论文时发送条件请求）
+                toc_url = self._toc_url(punumber, issue_number)
+                with span('fetch_state'):
+                    validators = fetch_state.conditional_validators(self.name, params, toc_url, watermark)
+                with tracker.stage('toc', "获取论文目录数据..."):
+                    toc_data = self._fetch_toc_data(punumber, issue_number, limit, validators=validators)
+                if toc_data is None:
+                    fetch_state.record('not_modified')
+                    tracker.set_results({'papers_count': 0, 'not_modified': True})
+                    return {key: value for key, value in self._not_modified_result(watermark).items()
+                            if key != 'papers'}
                 records = toc_data.get('records', [])
+                new_watermark = max_watermark(watermark, *(record.get('articleNumber') for record in records))
+                
+                # 跳过调用方已看到的文章，不再映射和抓取摘要
+                if watermark is not None:
+                    unseen = [record for record in records
+                              if not watermark_reached(record.get('articleNumber'), watermark)]
+                    fetch_state.record('skipped_items', len(records) - len(unseen))
+                    records = unseen
                 
                 # 更新总数
                 actual_total = len(records)
-                tracker.update(operation=f"处理 {actual_total} 篇论文...")
                 
                 # 4. 转换为标准格式
                 papers = []
-                for i, record in enumerate(records):
-                    try:
-                        paper = self._map_to_paper_data(record, volume, display_title)
-                        papers.append(paper)
-                        tracker.increment(success=True, operation=f"处理论文 {i+1}/{actual_total}")
-                    except Exception as e:
-                        # 记录但不中断处理
-                        print(f"Warning: Failed to process paper record: {e}")
-                        tracker.increment(success=False, operation=f"处理论文失败 {i+1}/{actual_total}")
-                        continue
-                
-                # 5. 并行抓取完整摘要（如果启用且可用）
-                if fetch_full_abstract and papers:
-                    if ASYNC_AVAILABLE:
-                        tracker.update(operation=f"并行抓取 {len(papers)} 篇论文的完整摘要...")
-                        print(f"🔍 Starting parallel abstract fetching for {len(papers)} papers...")
+                with tracker.stage('mapping', f"处理 {actual_total} 篇论文..."):
+                    for i, record in enumerate(records):
                         try:
-                            # 转换为适合异步处理的格式
-                            paper_dicts = [paper.to_dict() for paper in papers]
-                            
-                            # 创建异步服务并执行并行抓取
-                            from config import Config
-                            async_service = create_async_service(
-                                concurrent_limit=Config.MAX_CONCURRENT_REQUESTS,
-                                request_delay=Config.ABSTRACT_REQUEST_DELAY
-                            )
-                            
-                            # 在新的事件循环中运行异步任务
-                            enhanced_papers = asyncio.run(async_service.fetch_abstracts_parallel(paper_dicts))
-                            
-                            # 更新论文对象
-                            for i, enhanced_dict in enumerate(enhanced_papers):
-                                if i < len(papers):
-                                    papers[i].abstract = enhanced_dict.get('abstract', papers[i].abstract)
-                            
-                            print(f"✅ Parallel abstract fetching completed!")
-                            tracker.update(operation="完整摘要抓取完成")
-                            
+                            paper = self._map_to_paper_data(record, volume, display_title)
+                            papers.append(paper)
+                            tracker.increment(success=True, operation=f"处理论文 {i+1}/{actual_total}")
                         except Exception as e:
-                            print(f"⚠️  Parallel abstract fetching failed, using original abstracts: {e}")
-                            tracker.update(operation="摘要抓取失败，使用基础摘要")
-                    else:
-                        print(f"ℹ️  Async not available, using basic abstracts (install aiohttp for parallel fetching)")
+                            # 记录但不中断处理
+                            logger.warning("Failed to process paper record: %s", e)
+                            tracker.increment(success=False, operation=f"处理论文失败 {i+1}/{actual_total}")
+                            continue
+                
+                if since:
+                    papers = [paper for paper in papers if paper.published_date >= since]
+                
+                # 5. 逐篇产出，启用完整摘要时每篇论文的摘要抓取完成后产出
+                paper_dicts = [paper.to_dict() for paper in papers[:limit]]
+                if fetch_full_abstract and paper_dicts and ASYNC_AVAILABLE:
+                    yield from self._stream_full_abstracts(paper_dicts, tracker)
+                else:
+                    if fetch_full_abstract and paper_dicts:
+                        logger.info("Async not available, using basic abstracts (install aiohttp for parallel fetching)")
                         tracker.update(operation="使用基础摘要（未安装并行抓取依赖）")
+                    yield from paper_dicts
                 
-                
-                tracker.update(operation="排序和整理结果...")
-                
-                # 6. 按发表日期倒序排序（最新的在前面）
-                papers.sort(key=lambda x: x.published_date, reverse=True)
-                
-                # 7. 应用limit限制
-                papers = papers[:limit]
-                
-                # 转换为字典格式
-                paper_dicts = [paper.to_dict() for paper in papers]
-                
-                # 8. 构建响应
+                # 6. 构建响应
                 total_count = toc_data.get('totalRecords', len(paper_dicts))
                 has_more = len(paper_dicts) >= limit and total_count > limit
                 
-                result = {
-                    'papers': paper_dicts,
-                    'total_count': total_count,
-                    'has_more': has_more,
-                    'next_cursor': None,  # IEEE API通常不支持分页游标
-                    'rate_limit_remaining': None,  # IEEE通常没有明确的限流信息
-                    'cache_hit': False
-                }
+                # 保存TOC的校验值和水位线，供下次条件请求使用
+                with span('fetch_state'):
+                    fetch_state.save(self.name, params, resource=toc_url, watermark=new_watermark, **validators)
                 
                 # 设置结果到进度追踪器
                 tracker.set_results({
@@ -193,7 +186,15 @@ class IEEEAdapter(BaseAdapter):
                     'enhanced_abstracts': fetch_full_abstract and ASYNC_AVAILABLE
                 })
                 
-                return result
+                return {
+                    'total_count': total_count,
+                    'has_more': has_more,
+                    'next_cursor': None,  # IEEE API通常不支持分页游标
+                    'rate_limit_remaining': None,  # IEEE通常没有明确的限流信息
+                    'cache_hit': False,
+                    'not_modified': False,
+                    'watermark': new_watermark
+                }
                 
             except FetchError:
                 raise
@@ -203,12 +204,54 @@ class IEEEAdapter(BaseAdapter):
                     error_code='IEEE_FETCH_ERROR'
                 )
     
-    def _make_request(self, url: str, **kwargs) -> Dict[str, Any]:
+    def _stream_full_abstracts(self, paper_dicts: List[Dict[str, Any]], tracker) -> Iterator[Dict[str, Any]]:
+        """并行抓取完整摘要，每篇完成后产出；抓取失败时其余论文使用基础摘要"""
+        from config import Config
+        tracker.update(operation=f"并行抓取 {len(paper_dicts)} 篇论文的完整摘要...")
+        logger.debug("Starting parallel abstract fetching for %d papers", len(paper_dicts))
+        pending = dict(enumerate(paper_dicts))
+        try:
+            async_service = create_async_service(
+                concurrent_limit=Config.MAX_CONCURRENT_REQUESTS,
+                request_delay=Config.ABSTRACT_REQUEST_DELAY,
+                base_url=Config.IEEE_BASE_URL,
+                rate_limiter=rate_limiter
+            )
+            
+            # 在常驻事件循环中执行，复用共享连接池（计时不包含调用方处理论文的时间）
+            abstracts = abstract_runtime.iterate(
+                lambda session: async_service.iter_abstracts_parallel(paper_dicts, session=session)
+            )
+            try:
+                while True:
+                    with span('abstracts'):
+                        index, paper = next(abstracts, (None, None))
+                    if index is None:
+                        break
+                    del pending[index]
+                    yield paper
+            finally:
+                abstracts.close()
+            
+            tracker.update(operation="完整摘要抓取完成")
+            
+        except Exception as e:
+            logger.warning("Parallel abstract fetching failed, using original abstracts: %s", e)
+            tracker.update(operation="摘要抓取失败，使用基础摘要")
+            yield from pending.values()
+    
+    def _make_request(self, url: str, validators: Optional[Dict[str, str]] = None,
+                      **kwargs) -> Optional[Dict[str, Any]]:
         """
         IEEE特定的HTTP请求方法，包含必要的请求头
+        
+        传入validators时发送条件请求，上游返回304时返回None；
+        TOC接口为POST，条件头可能得到412，此时丢弃校验值并发送普通请求
         """
         import requests
         from utils.exceptions import FetchError, RateLimitError
+        from utils.rate_limiter import rate_limiter
+        from utils.http_session import ACCEPT_ENCODING
         import time
         
         # 设置IEEE特定的请求头
@@ -217,41 +260,55 @@ class IEEEAdapter(BaseAdapter):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Referer': 'https://ieeexplore.ieee.org/',
             'Origin': 'https://ieeexplore.ieee.org'
         })
+        headers.update(self._conditional_headers(validators))
         kwargs['headers'] = headers
         
         # 设置默认超时
         kwargs.setdefault('timeout', self.timeout)
         
-        # 创建会话以保持cookie
-        session = requests.Session()
+        # 共享会话在请求之间保持cookie和连接
+        session = self._session(url)
         
         # 重试机制
         for attempt in range(self.max_retries + 1):
             try:
+                rate_limiter.acquire(url)
                 if 'json' in kwargs:
                     # POST请求
                     response = session.post(url, **kwargs)
                 else:
                     # GET请求
                     response = session.get(url, **kwargs)
+                pause = rate_limiter.update_from_response(url, response.status_code, response.headers)
                 
                 # 检查HTTP状态码
+                if response.status_code == 304 and validators:
+                    return None
+                
+                if response.status_code == 412 and validators:
+                    for header in self._conditional_headers(validators):
+                        headers.pop(header, None)
+                    validators.clear()
+                    return self._make_request(url, validators=validators, **kwargs)
+                
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get('Retry-After', 60))
+                    # 暂停时间不长时重试，下一次acquire会等到暂停结束
+                    if attempt < self.max_retries and pause <= rate_limiter.max_wait:
+                        continue
                     raise RateLimitError(
                         "API调用频率限制",
-                        details={'retry_after': retry_after}
+                        details={'retry_after': int(pause)}
                     )
                 
                 if response.status_code == 418:
-                    # 特殊处理418错误，增加延迟后重试
+                    # 特殊处理418错误：暂停该主机的所有请求（包括其他进程）后重试
                     if attempt < self.max_retries:
-                        time.sleep(2 ** attempt + 1)  # 更长的延迟
+                        rate_limiter.block(url, 2 ** attempt + 1)  # 更长的延迟
                         continue
                     else:
                         raise FetchError(
@@ -267,7 +324,9 @@ class IEEEAdapter(BaseAdapter):
                         details={'status_code': response.status_code, 'response': response.text[:500]}
                     )
                 
-                return response.json()
+                data = response.json()
+                self._update_validators(response, validators)
+                return data
                 
             except requests.exceptions.Timeout:
                 if attempt == self.max_retries:
@@ -284,8 +343,6 @@ class IEEEAdapter(BaseAdapter):
                         error_code='NETWORK_ERROR'
                     )
                 time.sleep(2 ** attempt)
-        
-        session.close()
     
     def _fetch_metadata(self, punumber: str) -> Dict[str, Any]:
         """获取期刊元数据"""
@@ -300,9 +357,13 @@ class IEEEAdapter(BaseAdapter):
                 error_code='METADATA_FETCH_ERROR'
             )
     
-    def _fetch_toc_data(self, punumber: str, issue_number: str, limit: int = 50) -> Dict[str, Any]:
-        """获取期刊目录数据"""
-        url = f"{self.base_url}/rest/search/pub/{punumber}/issue/{issue_number}/toc"
+    def _toc_url(self, punumber: str, issue_number: str) -> str:
+        return f"{self.base_url}/rest/search/pub/{punumber}/issue/{issue_number}/toc"
+    
+    def _fetch_toc_data(self, punumber: str, issue_number: str, limit: int = 50,
+                        validators: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """获取期刊目录数据，条件请求返回304时返回None"""
+        url = self._toc_url(punumber, issue_number)
         
         payload = {
             'punumber': punumber,
@@ -312,7 +373,7 @@ class IEEEAdapter(BaseAdapter):
         }
         
         try:
-            response = self._make_request(url, json=payload)
+            response = self._make_request(url, json=payload, validators=validators)
             return response
         except Exception as e:
             raise FetchError(
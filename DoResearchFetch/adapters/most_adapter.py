@@ -4,17 +4,24 @@
 """
 
 import re
+import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 from .base import BaseNewsAdapter, NewsData
 from utils.exceptions import FetchError, ValidationError
 from utils.progress_monitor import create_progress_tracker
+from utils.fetch_state import fetch_state
+from utils.tracing import span
+
+logger = logging.getLogger('do_research_fetch.most')
 
 
 class MOSTAdapter(BaseNewsAdapter):
     """国家科技管理信息系统（科技部）新闻适配器"""
 
+    NEWS_LIST_URL = "https://service.most.gov.cn/kjjh_tztg/"
+
     @property
     def name(self) -> str:
         return "most"
@@ -33,7 +40,7 @@ class MOSTAdapter(BaseNewsAdapter):
 
     @property
     def optional_params(self) -> List[str]:
-        return ["limit", "category_filter", "date_from", "date_to"]
+        return ["limit", "category_filter", "date_from", "date_to", "since", "watermark"]
 
     def _validate_specific_params(self, params: Dict[str, Any]) -> None:
         """科技部特定的参数验证"""
@@ -41,6 +48,8 @@ class MOSTAdapter(BaseNewsAdapter):
         if not isinstance(limit, int) or limit <= 0 or limit > 100:
             raise ValidationError("limit必须是1-100之间的整数")
 
+        self._validate_incremental_params(params)
+
     def fetch_news(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         抓取科技部新闻数据
@@ -51,52 +60,50 @@ class MOSTAdapter(BaseNewsAdapter):
                 - category_filter: 分类过滤 (funding_announcement, policy_update等)
                 - date_from: 开始日期 (YYYY-MM-DD)
                 - date_to: 结束日期 (YYYY-MM-DD)
+                - since: 未指定date_from时作为开始日期
+                - watermark: 上次结果中的watermark（最新发布日期），只返回当天及之后的新闻
         """
         limit = params.get('limit', 20)
         category_filter = params.get('category_filter')
-        date_from = params.get('date_from')
+        date_from = params.get('date_from') or params.get('since')
         date_to = params.get('date_to')
+        watermark = str(params['watermark']) if params.get('watermark') is not None else None
 
-        # 完全移除进度监控，直接执行
+        # 完全移除进度监控，直接执行（各阶段耗时见source_info.timings）
         try:
-            import time
-            total_start = time.time()
-
-            print(f"🔍 开始抓取科技部新闻...")
-
-            # 1. 获取主页数据
-            fetch_start = time.time()
-            news_list = self._fetch_news_list()
-            fetch_time = time.time() - fetch_start
-            print(f"⏱️  抓取新闻列表耗时: {fetch_time:.2f}秒, 获取到 {len(news_list)} 条")
+            # 1. 获取主页数据（调用方已看到上次的全部新闻时发送条件请求）
+            with span('fetch_state'):
+                validators = fetch_state.conditional_validators(self.name, params, self.NEWS_LIST_URL, watermark)
+            news_list = self._fetch_news_list(validators)
+            if news_list is None:
+                fetch_state.record('not_modified')
+                return self._not_modified_result(watermark, items_key='news')
+            logger.debug("Fetched %d MOST news rows", len(news_list))
+            news_list, new_watermark = self._skip_seen_news(news_list, watermark)
 
             # 2. 转换为标准格式
             news_items = []
-            for i, raw_news in enumerate(news_list):
-                try:
-                    news_data = self._map_to_news_data(raw_news)
-
-                    # 应用过滤条件
-                    if self._should_include_news(news_data, category_filter, date_from, date_to):
-                        news_items.append(news_data)
-
-                    # tracker.increment(success=True, operation=f"处理新闻 {i+1}/{len(news_list)}")
-                    pass
-                except Exception as e:
-                    print(f"Warning: Failed to process news item: {e}")
-                    # tracker.increment(success=False, operation=f"处理新闻失败 {i+1}/{len(news_list)}")
-                    continue
-
-            # tracker.update(operation="排序和应用限制...")
+            with span('mapping'):
+                for raw_news in news_list:
+                    try:
+                        news_data = self._map_to_news_data(raw_news)
+
+                        # 应用过滤条件
+                        if self._should_include_news(news_data, category_filter, date_from, date_to):
+                            news_items.append(news_data)
+                    except Exception as e:
+                        logger.warning("Failed to process news item: %s", e)
+                        continue
 
-            # 3. 按发布日期倒序排序
-            news_items.sort(key=lambda x: x.published_date, reverse=True)
+            with span('finalize'):
+                # 3. 按发布日期倒序排序
+                news_items.sort(key=lambda x: x.published_date, reverse=True)
 
-            # 4. 应用limit限制
-            news_items = news_items[:limit]
+                # 4. 应用limit限制
+                news_items = news_items[:limit]
 
-            # 转换为字典格式
-            news_dicts = [news.to_dict() for news in news_items]
+                # 转换为字典格式
+                news_dicts = [news.to_dict() for news in news_items]
 
             # 5. 构建响应
             total_count = len(news_dicts)
@@ -108,25 +115,12 @@ class MOSTAdapter(BaseNewsAdapter):
                 'has_more': has_more,
                 'next_cursor': None,  # 科技部网站通常不支持分页游标
                 'rate_limit_remaining': None,
-                'cache_hit': False
-            }
-
-            # 设置结果到进度追踪器
-            # tracker.set_results({
-            #     'news_count': len(news_dicts),
-            #     'total_available': len(news_list),
-            #     'filtered': bool(category_filter or date_from or date_to)
-            # })
-
-            total_time = time.time() - total_start
-            print(f"🎉 科技部新闻抓取完成，总耗时: {total_time:.2f}秒")
-
-            # 临时添加调试信息到返回结果中
-            result['debug_info'] = {
-                'fetch_time': f"{fetch_time:.2f}s",
-                'total_time': f"{total_time:.2f}s",
-                'news_count': len(news_list)
+                'cache_hit': False,
+                'not_modified': False,
+                'watermark': new_watermark
             }
+            with span('fetch_state'):
+                fetch_state.save(self.name, params, resource=self.NEWS_LIST_URL, watermark=new_watermark, **validators)
 
             return result
 
@@ -138,72 +132,80 @@ class MOSTAdapter(BaseNewsAdapter):
                 error_code='MOST_FETCH_ERROR'
             )
 
-    def _fetch_news_list(self) -> List[Dict[str, Any]]:
-        """获取新闻列表"""
-        url = "https://service.most.gov.cn/kjjh_tztg/"
+    def _fetch_news_list(self, validators: Optional[Dict[str, str]] = None) -> Optional[List[Dict[str, Any]]]:
+        """获取新闻列表，条件请求返回304时返回None"""
+        url = self.NEWS_LIST_URL
 
         try:
             # 使用父类的请求方法
-            response = self._make_request_html(url)
-            soup = BeautifulSoup(response, 'html.parser')
+            with span('news_list'):
+                response = self._make_request_html(url, validators=validators)
+            if response is None:
+                return None
+            with span('parsing'):
+                return self._parse_news_rows(response)
+
+        except Exception as e:
+            raise FetchError(
+                f"获取科技部新闻列表失败: {str(e)}",
+                error_code='NEWS_LIST_FETCH_ERROR'
+            )
 
-            items = []
+    def _parse_news_rows(self, html: str) -> List[Dict[str, Any]]:
+        """从通知公告页面的表格行中提取新闻"""
+        soup = BeautifulSoup(html, 'html.parser')
 
-            # 查找所有表格行
-            rows = soup.find_all('tr')
+        items = []
 
-            for row in rows:
-                try:
-                    # 提取标题
-                    title_cell = row.find('td', class_='table_gkgs_title')
-                    if not title_cell:
-                        continue
+        # 查找所有表格行
+        rows = soup.find_all('tr')
 
-                    title = title_cell.get_text(strip=True)
-                    if not title:
-                        continue
+        for row in rows:
+            try:
+                # 提取标题
+                title_cell = row.find('td', class_='table_gkgs_title')
+                if not title_cell:
+                    continue
 
-                    # 提取链接
-                    title_div = title_cell.find('div')
-                    if not title_div or not title_div.get('onclick'):
-                        continue
+                title = title_cell.get_text(strip=True)
+                if not title:
+                    continue
 
-                    onclick = title_div.get('onclick')
-                    link_match = re.search(r"['\"](.*?)['\"]", onclick)
-                    if not link_match:
-                        continue
+                # 提取链接
+                title_div = title_cell.find('div')
+                if not title_div or not title_div.get('onclick'):
+                    continue
 
-                    link = link_match.group(1)
-                    if not link.startswith('http'):
-                        link = f"https://service.most.gov.cn{link}" if link.startswith('/') else f"https://service.most.gov.cn/kjjh_tztg/{link}"
+                onclick = title_div.get('onclick')
+                link_match = re.search(r"['\"](.*?)['\"]", onclick)
+                if not link_match:
+                    continue
 
-                    # 提取发布单位
-                    unit_cell = row.find('td', class_='table_gkgs_unit')
-                    unit = unit_cell.get_text(strip=True) if unit_cell else "科技部"
+                link = link_match.group(1)
+                if not link.startswith('http'):
+                    link = f"https://service.most.gov.cn{link}" if link.startswith('/') else f"https://service.most.gov.cn/kjjh_tztg/{link}"
 
-                    # 提取日期
-                    date_cell = row.find('td', class_='table_gkgs_date')
-                    date_str = date_cell.get_text(strip=True) if date_cell else ""
+                # 提取发布单位
+                unit_cell = row.find('td', class_='table_gkgs_unit')
+                unit = unit_cell.get_text(strip=True) if unit_cell else "科技部"
 
-                    items.append({
-                        'title': title,
-                        'link': link,
-                        'unit': unit,
-                        'date': date_str,
-                        'raw_html': str(row)
-                    })
+                # 提取日期
+                date_cell = row.find('td', class_='table_gkgs_date')
+                date_str = date_cell.get_text(strip=True) if date_cell else ""
 
-                except Exception as e:
-                    print(f"Warning: Failed to parse row: {e}")
-                    continue
+                items.append({
+                    'title': title,
+                    'link': link,
+                    'unit': unit,
+                    'date': date_str,
+                    'raw_html': str(row)
+                })
 
-            return items
+            except Exception as e:
+                logger.warning("Failed to parse row: %s", e)
+                continue
 
-        except Exception as e:
-            raise FetchError(
-                f"获取科技部新闻列表失败: {str(e)}",
-                error_code='NEWS_LIST_FETCH_ERROR'
-            )
+        return items
 
     def _map_to_news_data(self, raw_data: Dict[str, Any]) -> NewsData:
         """将科技部原始数据映射为标准格式"""
@@ -409,29 +411,34 @@ class MOSTAdapter(BaseNewsAdapter):
 
         return True
 
-    def _make_request_html(self, url: str, **kwargs) -> str:
+    def _make_request_html(self, url: str, validators: Optional[Dict[str, str]] = None, **kwargs) -> Optional[str]:
         """
         发送HTTP请求并返回HTML内容 - 优化版requests
+
+        传入validators时发送条件请求，上游返回304时返回None
         """
-        import requests
         import time
+        from utils.rate_limiter import rate_limiter
+        from utils.http_session import ACCEPT_ENCODING
 
-        # 创建session以复用连接
-        session = requests.Session()
+        # 共享会话复用连接
+        session = self._session(url)
 
         # 设置基本请求头
         headers = {
             'User-Agent': 'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Mobile Safari/537.36 Edg/140.0.0.0',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive'
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+            **self._conditional_headers(validators)
         }
 
-        print(f"🌐 正在请求: {url}")
+        logger.debug("Requesting %s", url)
         start_time = time.time()
 
         try:
+            rate_limiter.acquire(url)
             # 优化的requests参数
             response = session.get(
                 url,
@@ -443,19 +450,21 @@ class MOSTAdapter(BaseNewsAdapter):
             )
 
             request_time = time.time() - start_time
-            print(f"⏱️  请求耗时: {request_time:.2f}秒")
+            logger.debug("Request to %s took %.2fs", url, request_time)
+            rate_limiter.update_from_response(url, response.status_code, response.headers)
 
             # 检查状态码
+            if response.status_code == 304 and validators:
+                return None
             if response.status_code == 200:
                 # 设置正确的编码
                 response.encoding = response.apparent_encoding or 'utf-8'
+                self._update_validators(response, validators)
                 return response.text
             else:
                 raise Exception(f"HTTP状态码错误: {response.status_code}")
 
         except Exception as e:
             request_time = time.time() - start_time
-            print(f"⚠️  请求失败，耗时: {request_time:.2f}秒，错误: {e}")
-            raise Exception(f"网络请求失败: {str(e)}")
-        finally:
-            session.close()
\ No newline at end of file
+            logger.warning("Request to %s failed after %.2fs: %s", url, request_time, e)
+            raise Exception(f"网络请求失败: {str(e)}")
\ No newline at end of file
@@ -4,17 +4,29 @@
 """
 
 import re
+import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 from .base import BaseNewsAdapter, NewsData
 from utils.exceptions import FetchError, ValidationError
 from utils.progress_monitor import create_progress_tracker
+from utils.fetch_state import fetch_state, max_watermark
+from utils.tracing import span
+
+logger = logging.getLogger('do_research_fetch.nsfc')
 
 
 class NSFCAdapter(BaseNewsAdapter):
     """国家自然科学基金委员会新闻适配器"""
 
+    # 新闻类型 -> (列表页URL, 默认分类)
+    NEWS_PAGES = {
+        'funding': ("https://www.nsfc.gov.cn/publish/portal0/tab434/", 'funding_announcement'),
+        'policy': ("https://www.nsfc.gov.cn/publish/portal0/tab442/", 'policy_update'),
+        'results': ("https://www.nsfc.gov.cn/publish/portal0/tab446/", 'results_announcement'),
+    }
+
     @property
     def name(self) -> str:
         return "nsfc"
@@ -33,7 +45,7 @@ class NSFCAdapter(BaseNewsAdapter):
 
     @property
     def optional_params(self) -> List[str]:
-        return ["limit", "category_filter", "date_from", "date_to", "news_type"]
+        return ["limit", "category_filter", "date_from", "date_to", "news_type", "since", "watermark"]
 
     def _validate_specific_params(self, params: Dict[str, Any]) -> None:
         """基金委特定的参数验证"""
@@ -45,6 +57,8 @@ class NSFCAdapter(BaseNewsAdapter):
         if news_type not in ['all', 'funding', 'policy', 'results']:
             raise ValidationError("news_type必须是: all, funding, policy, results")
 
+        self._validate_incremental_params(params)
+
     def fetch_news(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         抓取基金委新闻数据
@@ -56,60 +70,70 @@ class NSFCAdapter(BaseNewsAdapter):
                 - date_from: 开始日期 (YYYY-MM-DD)
                 - date_to: 结束日期 (YYYY-MM-DD)
                 - news_type: 新闻类型 (all, funding, policy, results)
+                - since: 未指定date_from时作为开始日期
+                - watermark: 上次结果中的watermark（最新发布日期），只返回当天及之后的新闻
         """
         limit = params.get('limit', 20)
         category_filter = params.get('category_filter')
-        date_from = params.get('date_from')
+        date_from = params.get('date_from') or params.get('since')
         date_to = params.get('date_to')
         news_type = params.get('news_type', 'all')
+        watermark = str(params['watermark']) if params.get('watermark') is not None else None
 
         # 创建进度追踪器
         with create_progress_tracker(f"nsfc-news", limit, "抓取基金委通知公告") as tracker:
             try:
                 tracker.update(operation="获取通知列表...")
 
-                # 1. 根据类型获取不同页面的数据
+                # 1. 根据类型获取不同页面的数据，每个列表页分别保存校验值，没有变化的页面跳过
                 news_list = []
-                if news_type in ['all', 'funding']:
-                    funding_news = self._fetch_funding_announcements()
-                    news_list.extend(funding_news)
-
-                if news_type in ['all', 'policy']:
-                    policy_news = self._fetch_policy_announcements()
-                    news_list.extend(policy_news)
-
-                if news_type in ['all', 'results']:
-                    result_news = self._fetch_result_announcements()
-                    news_list.extend(result_news)
+                new_watermark = watermark
+                page_states = []
+                for page_type, (url, default_category) in self.NEWS_PAGES.items():
+                    if news_type not in ['all', page_type]:
+                        continue
+                    page_params = {**params, 'page': page_type}
+                    with span('fetch_state'):
+                        validators = fetch_state.conditional_validators(self.name, page_params, url, watermark)
+                    with span('news_list'):
+                        page_news = self._fetch_news_from_url(url, default_category, validators)
+                    if page_news is None:
+                        fetch_state.record('not_modified')
+                        continue
+                    page_news, page_watermark = self._skip_seen_news(page_news, watermark)
+                    new_watermark = max_watermark(new_watermark, page_watermark)
+                    page_states.append((page_params, url, page_watermark, validators))
+                    news_list.extend(page_news)
 
-                tracker.update(operation=f"处理 {len(news_list)} 条新闻...")
+                if not page_states:
+                    return self._not_modified_result(watermark, items_key='news')
 
                 # 2. 转换为标准格式
                 news_items = []
-                for i, raw_news in enumerate(news_list):
-                    try:
-                        news_data = self._map_to_news_data(raw_news)
-
-                        # 应用过滤条件
-                        if self._should_include_news(news_data, category_filter, date_from, date_to):
-                            news_items.append(news_data)
-
-                        tracker.increment(success=True, operation=f"处理新闻 {i+1}/{len(news_list)}")
-                    except Exception as e:
-                        print(f"Warning: Failed to process NSFC news item: {e}")
-                        tracker.increment(success=False, operation=f"处理新闻失败 {i+1}/{len(news_list)}")
-                        continue
+                with tracker.stage('mapping', f"处理 {len(news_list)} 条新闻..."):
+                    for i, raw_news in enumerate(news_list):
+                        try:
+                            news_data = self._map_to_news_data(raw_news)
+
+                            # 应用过滤条件
+                            if self._should_include_news(news_data, category_filter, date_from, date_to):
+                                news_items.append(news_data)
 
-                tracker.update(operation="排序和应用限制...")
+                            tracker.increment(success=True, operation=f"处理新闻 {i+1}/{len(news_list)}")
+                        except Exception as e:
+                            logger.warning("Failed to process NSFC news item: %s", e)
+                            tracker.increment(success=False, operation=f"处理新闻失败 {i+1}/{len(news_list)}")
+                            continue
 
-                # 3. 按发布日期倒序排序
-                news_items.sort(key=lambda x: x.published_date, reverse=True)
+                with tracker.stage('finalize', "排序和应用限制..."):
+                    # 3. 按发布日期倒序排序
+                    news_items.sort(key=lambda x: x.published_date, reverse=True)
 
-                # 4. 应用limit限制
-                news_items = news_items[:limit]
+                    # 4. 应用limit限制
+                    news_items = news_items[:limit]
 
-                # 转换为字典格式
-                news_dicts = [news.to_dict() for news in news_items]
+                    # 转换为字典格式
+                    news_dicts = [news.to_dict() for news in news_items]
 
                 # 5. 构建响应
                 total_count = len(news_dicts)
@@ -121,8 +145,13 @@ class NSFCAdapter(BaseNewsAdapter):
                     'has_more': has_more,
                     'next_cursor': None,
                     'rate_limit_remaining': None,
-                    'cache_hit': False
+                    'cache_hit': False,
+                    'not_modified': False,
+                    'watermark': new_watermark
                 }
+                with span('fetch_state'):
+                    for page_params, url, page_watermark, validators in page_states:
+                        fetch_state.save(self.name, page_params, resource=url, watermark=page_watermark, **validators)
 
                 # 设置结果到进度追踪器
                 tracker.set_results({
@@ -144,23 +173,23 @@ class NSFCAdapter(BaseNewsAdapter):
 
     def _fetch_funding_announcements(self) -> List[Dict[str, Any]]:
         """抓取申报通知"""
-        url = "https://www.nsfc.gov.cn/publish/portal0/tab434/"
-        return self._fetch_news_from_url(url, 'funding_announcement')
+        return self._fetch_news_from_url(*self.NEWS_PAGES['funding'])
 
     def _fetch_policy_announcements(self) -> List[Dict[str, Any]]:
         """抓取政策文件"""
-        url = "https://www.nsfc.gov.cn/publish/portal0/tab442/"
-        return self._fetch_news_from_url(url, 'policy_update')
+        return self._fetch_news_from_url(*self.NEWS_PAGES['policy'])
 
     def _fetch_result_announcements(self) -> List[Dict[str, Any]]:
         """抓取评审结果"""
-        url = "https://www.nsfc.gov.cn/publish/portal0/tab446/"
-        return self._fetch_news_from_url(url, 'results_announcement')
+        return self._fetch_news_from_url(*self.NEWS_PAGES['results'])
 
-    def _fetch_news_from_url(self, url: str, default_category: str) -> List[Dict[str, Any]]:
-        """从指定URL抓取新闻列表"""
+    def _fetch_news_from_url(self, url: str, default_category: str,
+                             validators: Optional[Dict[str, str]] = None) -> Optional[List[Dict[str, Any]]]:
+        """从指定URL抓取新闻列表，条件请求返回304时返回None"""
         try:
-            response = self._make_request_html(url)
+            response = self._make_request_html(url, validators=validators)
+            if response is None:
+                return None
             soup = BeautifulSoup(response, 'html.parser')
 
             items = []
@@ -212,13 +241,13 @@ class NSFCAdapter(BaseNewsAdapter):
                     })
 
                 except Exception as e:
-                    print(f"Warning: Failed to parse NSFC news item: {e}")
+                    logger.warning("Failed to parse NSFC news item: %s", e)
                     continue
 
             return items
 
         except Exception as e:
-            print(f"Warning: Failed to fetch news from {url}: {e}")
+            logger.warning("Failed to fetch news from %s: %s", url, e)
             return []
 
     def _map_to_news_data(self, raw_data: Dict[str, Any]) -> NewsData:
@@ -465,10 +494,12 @@ class NSFCAdapter(BaseNewsAdapter):
 
         return True
 
-    def _make_request_html(self, url: str, **kwargs) -> str:
-        """发送HTTP请求并返回HTML内容"""
+    def _make_request_html(self, url: str, validators: Optional[Dict[str, str]] = None, **kwargs) -> Optional[str]:
+        """发送HTTP请求并返回HTML内容，传入validators时发送条件请求，上游返回304时返回None"""
         import requests
         from utils.exceptions import FetchError, RateLimitError
+        from utils.rate_limiter import rate_limiter
+        from utils.http_session import ACCEPT_ENCODING
         import time
 
         # 设置请求头
@@ -477,22 +508,30 @@ class NSFCAdapter(BaseNewsAdapter):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         })
+        headers.update(self._conditional_headers(validators))
         kwargs['headers'] = headers
         kwargs.setdefault('timeout', (3, 10))  # 连接超时3秒，读取超时10秒
 
         # 重试机制
         for attempt in range(2 + 1):  # 最多2次重试
             try:
-                response = requests.get(url, **kwargs)
+                rate_limiter.acquire(url)
+                response = self._session(url).get(url, **kwargs)
+                pause = rate_limiter.update_from_response(url, response.status_code, response.headers)
+
+                if response.status_code == 304 and validators:
+                    return None
 
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get('Retry-After', 60))
+                    # 暂停时间不长时重试，下一次acquire会等到暂停结束
+                    if attempt < 2 and pause <= rate_limiter.max_wait:
+                        continue
                     raise RateLimitError(
                         "API调用频率限制",
-                        details={'retry_after': retry_after}
+                        details={'retry_after': int(pause)}
                     )
 
                 if response.status_code >= 400:
@@ -503,6 +542,7 @@ class NSFCAdapter(BaseNewsAdapter):
                     )
 
                 response.encoding = response.apparent_encoding or 'utf-8'
+                self._update_validators(response, validators)
                 return response.text
 
             except requests.exceptions.Timeout:
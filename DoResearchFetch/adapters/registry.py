@@ -50,7 +50,8 @@ class SourceRegistry:
             dblp_config = {
                 'base_url': Config.DBLP_BASE_URL,
                 'timeout': Config.REQUEST_TIMEOUT,
-                'max_retries': Config.MAX_RETRIES
+                'max_retries': Config.MAX_RETRIES,
+                'page_concurrency': Config.DBLP_PAGE_CONCURRENCY
             }
             self.register('dblp', DBLPAdapter(dblp_config))
         except ImportError:
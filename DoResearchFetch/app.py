@@ -1,14 +1,23 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, g
 from datetime import datetime
 from adapters.registry import SourceRegistry
 from config import Config
-from utils.exceptions import FetchError, ValidationError, RateLimitError
+from utils.exceptions import FetchError, ValidationError, RateLimitError, QueueFullError
 from utils.response_formatter import format_response, format_error
 from utils.logging_config import LogConfig, metrics_collector, log_api_call
 from utils.cache import cache, get_cached_result, cache_result
-from utils.progress_monitor import progress_manager, create_progress_tracker
+from utils.progress_monitor import progress_manager, create_progress_tracker, bind_task, FINISHED_STATUSES
 from utils.abstract_cache import abstract_cache
+from utils.single_flight import SingleFlight
+from utils.rate_limiter import rate_limiter
+from utils.batch_executor import BatchExecutor, parse_source_concurrency
+from utils.fetch_state import fetch_state, INCREMENTAL_PARAMS
+from utils.http_session import http_pool
+from utils.job_queue import create_job_queue, job_to_progress
+from utils.tracing import Trace, activate, deactivate, current_trace, traced
 import traceback
+import threading
+import json
 import time
 
 app = Flask(__name__)
@@ -17,16 +26,295 @@ app.config.from_object(Config)
 # 初始化日志配置
 log_config = LogConfig(app)
 
+# 多进程部署时各工作进程的指标写入共享目录，/metrics返回所有进程的合计
+if Config.METRICS_MULTIPROC_DIR:
+    metrics_collector.enable_shared_store(Config.METRICS_MULTIPROC_DIR, Config.METRICS_FLUSH_INTERVAL)
+
 # 初始化数据源注册器
 source_registry = SourceRegistry()
 
 # 记录应用启动时间
 app_start_time = time.time()
 
+# 合并并发的相同抓取请求（键与抓取结果缓存一致）
+fetch_flight = SingleFlight()
+
+# 每个SSE连接在推送期间一直占用一个工作线程，限制同时推送的连接数，留出线程处理其他请求
+progress_stream_slots = threading.BoundedSemaphore(max(1, Config.PROGRESS_STREAM_MAX))
+
+# 批量抓取共用的执行器（按数据源限制并发）
+batch_executor = BatchExecutor(
+    max_workers=Config.BATCH_MAX_WORKERS,
+    source_concurrency=parse_source_concurrency(Config.BATCH_SOURCE_CONCURRENCY),
+    default_source_concurrency=Config.BATCH_DEFAULT_SOURCE_CONCURRENCY
+)
+
+
+def fetch_with_cache(source, adapter, source_params):
+    """
+    执行抓取并写入缓存，相同请求正在进行时等待并共享其结果
+    
+    Returns:
+        (抓取结果, 是否复用了其他请求的结果)
+    """
+    def do_fetch():
+        with metrics_collector.track_in_flight(source):
+            result = adapter.fetch_papers(source_params)
+        # 缓存结果
+        if app.config.get('ENABLE_CACHE', True):
+            cache_result(source, source_params, result, app.config.get('CACHE_TTL', 3600))
+        return result
+    
+    return fetch_flight.do(cache._generate_key(source, source_params), do_fetch)
+
+
+def run_fetch_job(job):
+    """执行异步抓取任务（在任务队列的工作线程中运行），返回的结果保存到队列存储"""
+    source, source_params = job['source'], job['params']
+    adapter = source_registry.get_adapter(source)
+    if not adapter:
+        raise ValidationError(f"不支持的数据源: {source}")
+    
+    # 工作线程中没有请求级的追踪，单独记录分阶段耗时
+    trace = Trace(source)
+    token = activate(trace)
+    try:
+        if app.config.get('ENABLE_CACHE', True):
+            cached_result = get_cached_result(source, source_params)
+            if cached_result:
+                log_api_call(source, source_params, True, trace.total_seconds,
+                             len(cached_result.get('papers', [])), cache_hit=True)
+                return cached_result
+        
+        start_time = time.time()
+        try:
+            # 适配器内部的进度追踪使用任务ID，执行期间可以跟随实时进度
+            with bind_task(job['job_id']):
+                result, _ = fetch_with_cache(source, adapter, source_params)
+        except Exception as e:
+            log_api_call(source, source_params, False, time.time() - start_time, 0, e)
+            raise
+    finally:
+        deactivate(token)
+        metrics_collector.record_stages(source, trace)
+    
+    log_api_call(
+        source=source,
+        params=source_params,
+        success=True,
+        response_time=time.time() - start_time,
+        papers_count=len(result.get('papers', []))
+    )
+    return result
+
+
+# 异步抓取任务队列（有界，任务和结果持久化，所有工作进程共享）
+job_queue = create_job_queue(
+    run_fetch_job,
+    db_file=Config.JOB_QUEUE_DB,
+    redis_url=Config.REDIS_URL,
+    use_redis=Config.JOB_QUEUE_BACKEND == 'redis',
+    workers=Config.JOB_QUEUE_WORKERS,
+    max_pending=Config.JOB_QUEUE_MAX_PENDING,
+    stale_after=Config.JOB_STALE_SECONDS,
+    retention=Config.JOB_RESULT_TTL
+)
+
+
+@app.before_request
+def start_job_workers():
+    """在处理请求的进程中启动任务队列的工作线程（重启前未完成的任务随之继续执行）"""
+    job_queue.start()
+
+
+@app.before_request
+def begin_trace():
+    """每个请求开启分阶段计时，抓取接口用trace_source()指定计入哪个数据源的汇总"""
+    g.trace_token = activate(Trace(None))
+
+
+@app.teardown_request
+def end_trace(error=None):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        trace = deactivate(token)
+        if trace.source:
+            metrics_collector.record_stages(trace.source, trace)
+
+
+def trace_source(source):
+    """当前请求的分阶段耗时计入source的汇总（None表示不汇总），返回当前请求的追踪"""
+    trace = current_trace()
+    trace.source = source
+    return trace
+
+
+def with_timings(data, source_info, trace):
+    """请求体中timings为true时，在source_info中返回各阶段耗时"""
+    if data.get('timings'):
+        source_info['timings'] = trace.to_dict()
+    return source_info
+
+
+def with_incremental_params(data, source_params):
+    """请求体顶层的since/watermark合并到数据源参数中（也可以直接写在source_params里）"""
+    merged = dict(source_params)
+    for key in INCREMENTAL_PARAMS:
+        if data.get(key) is not None:
+            merged[key] = data[key]
+    return merged
+
+
+def wants_ndjson(data):
+    """请求体中stream为true或Accept为application/x-ndjson时使用NDJSON流式返回"""
+    return bool(data.get('stream')) or 'application/x-ndjson' in request.headers.get('Accept', '')
+
+
+def ndjson_line(data):
+    return json.dumps(data, ensure_ascii=False, default=str) + '\n'
+
+
+def stream_response(lines, source):
+    """
+    NDJSON流式响应
+
+    响应体在请求结束后才逐行产出，因此使用单独的追踪，只在生成下一行时计时
+    """
+    trace_source(None)
+    return Response(traced(lines, Trace(source)), mimetype='application/x-ndjson')
+
+
+def stream_fetch_result(source, source_params, adapter=None, cached_result=None, timings=False):
+    """
+    流式抓取响应：每篇论文一行，最后一行为汇总信息，出错时最后一行为错误信息
+
+    未命中缓存时边抓取边返回，完整读取后写入缓存；与普通抓取共用fetch_flight，
+    相同请求正在进行时等待其完成并逐行回放结果，否则登记为执行者，
+    客户端中途断开时等待者重新发起抓取。已返回的论文超过CACHE_MAX_BYTES时不再保存，
+    结果不写入缓存，等待者各自重新抓取，内存占用不随结果数增长
+    """
+    trace = current_trace()
+    start_time = time.time()
+    papers = []
+    papers_count = 0
+    coalesced = False
+    try:
+        if cached_result is not None:
+            papers = cached_result.get('papers', [])
+            papers_count = len(papers)
+            info = cached_result
+            for paper in papers:
+                yield ndjson_line({"type": "paper", "data": paper})
+        else:
+            flight_key = cache._generate_key(source, source_params)
+            call, shared = fetch_flight.acquire(flight_key)
+            if call is None:
+                coalesced = True
+                papers = shared.get('papers', [])
+                papers_count = len(papers)
+                info = shared
+                for paper in papers:
+                    yield ndjson_line({"type": "paper", "data": paper})
+            else:
+                max_bytes = app.config.get('CACHE_MAX_BYTES')
+                collected_bytes = 0
+                oversized = False
+                try:
+                    with metrics_collector.track_in_flight(source):
+                        stream = adapter.stream_papers(source_params)
+                        while True:
+                            try:
+                                paper = next(stream)
+                            except StopIteration as stop:
+                                info = stop.value or {}
+                                break
+                            line = ndjson_line({"type": "paper", "data": paper})
+                            papers_count += 1
+                            if not oversized:
+                                collected_bytes += len(line.encode('utf-8'))
+                                if max_bytes and collected_bytes > max_bytes:
+                                    oversized = True
+                                    papers = []
+                                else:
+                                    papers.append(paper)
+                            yield line
+                    result = {'papers': papers, **info}
+                    if app.config.get('ENABLE_CACHE', True) and not oversized:
+                        cache_result(source, source_params, result, app.config.get('CACHE_TTL', 3600))
+                except GeneratorExit:
+                    fetch_flight.release(flight_key, call, abandoned=True)
+                    raise
+                except Exception as e:
+                    fetch_flight.release(flight_key, call, error=e)
+                    raise
+                if oversized:
+                    fetch_flight.release(flight_key, call, abandoned=True)
+                else:
+                    fetch_flight.release(flight_key, call, result=result)
+    except Exception as e:
+        log_api_call(source, source_params, False, time.time() - start_time, 0, e)
+        metrics_collector.record_stages(source, trace)
+        yield ndjson_line({
+            "type": "error",
+            "error": {"code": getattr(e, 'error_code', type(e).__name__), "message": str(e)}
+        })
+        return
+    
+    execution_time = time.time() - start_time
+    if cached_result is None:
+        log_api_call(
+            source=source,
+            params=source_params,
+            success=True,
+            response_time=execution_time,
+            papers_count=papers_count
+        )
+        metrics_collector.record_stages(source, trace)
+    else:
+        log_api_call(source, source_params, True, execution_time, papers_count, cache_hit=True)
+    
+    source_info = {
+        "source": source,
+        "query_params": source_params,
+        "execution_time_ms": 0 if cached_result is not None else int(execution_time * 1000),
+        "rate_limit_remaining": info.get('rate_limit_remaining'),
+        "cache_hit": cached_result is not None
+    }
+    if cached_result is None:
+        source_info['coalesced'] = coalesced
+    if timings:
+        source_info['timings'] = trace.to_dict()
+    
+    yield ndjson_line({
+        "type": "summary",
+        "papers_count": papers_count,
+        "total_count": info.get('total_count', papers_count),
+        "has_more": info.get('has_more', False),
+        "next_cursor": info.get('next_cursor'),
+        "watermark": info.get('watermark'),
+        "not_modified": info.get('not_modified', False),
+        "source_info": source_info
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus文本格式的请求数、耗时直方图、进行中的抓取和分阶段耗时"""
+    return Response(metrics_collector.render_prometheus(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/v1/metrics', methods=['GET'])
 def get_metrics():
     """获取服务指标"""
-    return format_response(metrics_collector.get_metrics())
+    metrics = metrics_collector.get_metrics()
+    metrics['fetch_coalescing'] = fetch_flight.get_stats()
+    metrics['rate_limits'] = rate_limiter.get_stats()
+    metrics['batch_fetch'] = batch_executor.get_stats()
+    metrics['incremental_fetch'] = fetch_state.get_stats()
+    metrics['http_sessions'] = http_pool.get_stats()
+    metrics['job_queue'] = job_queue.get_stats()
+    return format_response(metrics)
 
 
 # 添加摘要缓存管理端点
@@ -108,10 +396,32 @@ def get_running_tasks():
     })
 
 
+def queued_task(task_id):
+    """查询任务队列中的异步抓取任务（任何工作进程都能查询），不存在时返回None"""
+    job = job_queue.get(task_id)
+    return job_to_progress(job) if job else None
+
+
+def lookup_task(task_id):
+    """本进程中正在执行的任务返回实时进度，其余（包括已结束的异步抓取任务）以任务队列为准"""
+    task = progress_manager.get_task(task_id)
+    if task is not None and task.status not in FINISHED_STATUSES:
+        return task
+    return queued_task(task_id) or task
+
+
+def sse_event(event, data, event_id=None):
+    """格式化一条SSE消息"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
 @app.route('/api/v1/progress/tasks/<task_id>', methods=['GET'])
 def get_task_progress(task_id):
     """获取特定任务的进度"""
-    task = progress_manager.get_task(task_id)
+    task = lookup_task(task_id)
     if not task:
         return format_error("TASK_NOT_FOUND", f"任务 {task_id} 不存在"), 404
     
@@ -120,14 +430,63 @@ def get_task_progress(task_id):
     })
 
 
+@app.route('/api/v1/progress/tasks/<task_id>/stream', methods=['GET'])
+def stream_task_progress(task_id):
+    """
+    以SSE推送任务进度
+    
+    任务每次变化推送一条progress事件（短时间内的多次更新合并为一次），任务结束时推送
+    end事件后关闭连接；长时间没有变化时发送注释行保活。同时推送的连接数达到
+    PROGRESS_STREAM_MAX时返回429，客户端改为轮询进度接口
+    """
+    if not lookup_task(task_id):
+        return format_error("TASK_NOT_FOUND", f"任务 {task_id} 不存在"), 404
+    
+    if not progress_stream_slots.acquire(blocking=False):
+        details = {
+            'max_streams': Config.PROGRESS_STREAM_MAX,
+            'progress_url': f"/api/v1/progress/tasks/{task_id}",
+            'retry_after': 5
+        }
+        return format_error("TOO_MANY_STREAMS", "进度推送连接数已达上限，请轮询进度接口", details), 429, \
+            {'Retry-After': str(details['retry_after'])}
+    
+    def generate():
+        snapshots = progress_manager.watch(
+            task_id,
+            fallback=queued_task,
+            min_interval=app.config.get('PROGRESS_STREAM_INTERVAL', 0.25),
+            keepalive=app.config.get('PROGRESS_STREAM_KEEPALIVE', 15)
+        )
+        event_id = 0
+        for snapshot in snapshots:
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id += 1
+            finished = snapshot['status'] in ('completed', 'failed', 'cancelled')
+            yield sse_event('end' if finished else 'progress', snapshot, event_id)
+    
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # 连接结束（包括客户端断开）时服务器关闭响应，此时释放名额
+    response.call_on_close(progress_stream_slots.release)
+    return response
+
+
 @app.route('/api/v1/progress/tasks/<task_id>/cancel', methods=['POST'])
 def cancel_task(task_id):
     """取消任务"""
     task = progress_manager.get_task(task_id)
-    if not task:
+    job = job_queue.get(task_id)
+    if not task and not job:
         return format_error("TASK_NOT_FOUND", f"任务 {task_id} 不存在"), 404
     
-    progress_manager.cancel_task(task_id)
+    if task:
+        progress_manager.cancel_task(task_id)
+    if job:
+        job_queue.cancel(task_id)
+    
     return format_response({
         "message": f"任务 {task_id} 已取消",
         "task_id": task_id
@@ -203,7 +562,14 @@ def get_sources():
 
 @app.route('/api/v1/fetch', methods=['POST'])
 def fetch_papers():
-    """论文抓取接口"""
+    """
+    论文抓取接口
+
+    请求体中stream为true或Accept为application/x-ndjson时，以NDJSON格式边抓取边返回，
+    每篇论文一行（{"type": "paper", "data": {...}}），最后一行为汇总信息；
+    传入上次结果中的watermark时只返回之后新增的论文，since限制最早发表日期；
+    timings为true时在source_info.timings中返回各阶段耗时
+    """
     source = None
     source_params = {}
 
@@ -219,16 +585,26 @@ def fetch_papers():
         if not source:
             raise ValidationError("source 参数是必需的")
 
+        source_params = with_incremental_params(data, source_params)
+        stream = wants_ndjson(data)
+        trace = trace_source(source)
+
         # 检查缓存
         if app.config.get('ENABLE_CACHE', True):
             cached_result = get_cached_result(source, source_params)
             if cached_result:
+                if stream:
+                    return stream_response(stream_fetch_result(source, source_params, cached_result=cached_result,
+                                                               timings=data.get('timings')), source)
+
                 # 构建响应
                 response_data = {
                     "papers": cached_result.get('papers', []),
                     "total_count": cached_result.get('total_count', 0),
                     "has_more": cached_result.get('has_more', False),
-                    "next_cursor": cached_result.get('next_cursor')
+                    "next_cursor": cached_result.get('next_cursor'),
+                    "watermark": cached_result.get('watermark'),
+                    "not_modified": cached_result.get('not_modified', False)
                 }
 
                 source_info = {
@@ -238,8 +614,10 @@ def fetch_papers():
                     "rate_limit_remaining": cached_result.get('rate_limit_remaining'),
                     "cache_hit": True
                 }
+                log_api_call(source, source_params, True, trace.total_seconds,
+                             len(response_data['papers']), cache_hit=True)
 
-                return format_response(response_data, source_info=source_info)
+                return format_response(response_data, source_info=with_timings(data, source_info, trace))
 
         # 获取适配器
         adapter = source_registry.get_adapter(source)
@@ -249,15 +627,15 @@ def fetch_papers():
         # 验证参数
         adapter.validate_params(source_params)
 
-        # 执行抓取
+        if stream:
+            return stream_response(stream_fetch_result(source, source_params, adapter=adapter,
+                                                       timings=data.get('timings')), source)
+
+        # 执行抓取：相同请求正在进行时等待并共享其结果
         start_time = time.time()
-        result = adapter.fetch_papers(source_params)
+        result, coalesced = fetch_with_cache(source, adapter, source_params)
         execution_time_ms = int((time.time() - start_time) * 1000)
 
-        # 缓存结果
-        if app.config.get('ENABLE_CACHE', True):
-            cache_result(source, source_params, result, app.config.get('CACHE_TTL', 3600))
-
         # 记录API调用日志
         log_api_call(
             source=source,
@@ -272,7 +650,9 @@ def fetch_papers():
             "papers": result.get('papers', []),
             "total_count": result.get('total_count', len(result.get('papers', []))),
             "has_more": result.get('has_more', False),
-            "next_cursor": result.get('next_cursor')
+            "next_cursor": result.get('next_cursor'),
+            "watermark": result.get('watermark'),
+            "not_modified": result.get('not_modified', False)
         }
 
         source_info = {
@@ -280,22 +660,23 @@ def fetch_papers():
             "query_params": source_params,
             "execution_time_ms": execution_time_ms,
             "rate_limit_remaining": result.get('rate_limit_remaining'),
-            "cache_hit": False
+            "cache_hit": False,
+            "coalesced": coalesced
         }
 
-        return format_response(response_data, source_info=source_info)
+        return format_response(response_data, source_info=with_timings(data, source_info, trace))
 
     except ValidationError as e:
-        log_api_call(source or 'unknown', {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', {}, False, 0, 0, e)
         return format_error("INVALID_PARAMS", str(e)), 400
     except RateLimitError as e:
-        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, e)
         return format_error("RATE_LIMIT_EXCEEDED", str(e), e.details), 429
     except FetchError as e:
-        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, e)
         return format_error(e.error_code, str(e), e.details), 500
     except Exception as e:
-        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, e)
         app.logger.error(f"Unexpected error: {str(e)}\n{traceback.format_exc()}")
         return format_error("INTERNAL_ERROR", "服务内部错误"), 500
 
@@ -318,6 +699,9 @@ def fetch_news():
         if not source:
             raise ValidationError("source 参数是必需的")
 
+        source_params = with_incremental_params(data, source_params)
+        trace = trace_source(f"news_{source}")
+
         # 检查缓存
         if app.config.get('ENABLE_CACHE', True):
             cached_result = get_cached_result(f"news_{source}", source_params)
@@ -327,7 +711,9 @@ def fetch_news():
                     "news": cached_result.get('news', []),
                     "total_count": cached_result.get('total_count', 0),
                     "has_more": cached_result.get('has_more', False),
-                    "next_cursor": cached_result.get('next_cursor')
+                    "next_cursor": cached_result.get('next_cursor'),
+                    "watermark": cached_result.get('watermark'),
+                    "not_modified": cached_result.get('not_modified', False)
                 }
 
                 source_info = {
@@ -337,8 +723,10 @@ def fetch_news():
                     "rate_limit_remaining": cached_result.get('rate_limit_remaining'),
                     "cache_hit": True
                 }
+                log_api_call(f"news_{source}", source_params, True, trace.total_seconds,
+                             len(response_data['news']), cache_hit=True)
 
-                return format_response(response_data, source_info=source_info)
+                return format_response(response_data, source_info=with_timings(data, source_info, trace))
 
         # 获取适配器
         adapter = source_registry.get_adapter(source)
@@ -354,7 +742,8 @@ def fetch_news():
 
         # 执行抓取
         start_time = time.time()
-        result = adapter.fetch_news(source_params)
+        with metrics_collector.track_in_flight(f"news_{source}"):
+            result = adapter.fetch_news(source_params)
         execution_time_ms = int((time.time() - start_time) * 1000)
 
         # 缓存结果
@@ -375,7 +764,9 @@ def fetch_news():
             "news": result.get('news', []),
             "total_count": result.get('total_count', len(result.get('news', []))),
             "has_more": result.get('has_more', False),
-            "next_cursor": result.get('next_cursor')
+            "next_cursor": result.get('next_cursor'),
+            "watermark": result.get('watermark'),
+            "not_modified": result.get('not_modified', False)
         }
 
         source_info = {
@@ -386,47 +777,30 @@ def fetch_news():
             "cache_hit": False
         }
 
-        return format_response(response_data, source_info=source_info)
+        return format_response(response_data, source_info=with_timings(data, source_info, trace))
 
     except ValidationError as e:
-        log_api_call(source or 'unknown', {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', {}, False, 0, 0, e)
         return format_error("INVALID_PARAMS", str(e)), 400
     except RateLimitError as e:
-        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, e)
         return format_error("RATE_LIMIT_EXCEEDED", str(e), e.details), 429
     except FetchError as e:
-        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, e)
         return format_error(e.error_code, str(e), e.details), 500
     except Exception as e:
-        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, str(e))
+        log_api_call(source or 'unknown', source_params or {}, False, 0, 0, e)
         app.logger.error(f"Unexpected error: {str(e)}\n{traceback.format_exc()}")
         return format_error("INTERNAL_ERROR", "服务内部错误"), 500
 
 
 @app.route('/api/v1/fetch/async', methods=['POST'])  
 def fetch_papers_async():
-    """异步论文抓取接口（返回任务ID，可通过进度API查询状态）"""
-    import threading
-    
-    def async_fetch_worker(source, source_params, task_callback):
-        """异步抓取工作线程"""
-        try:
-            # 获取适配器
-            adapter = source_registry.get_adapter(source)
-            if not adapter:
-                task_callback(None, f"不支持的数据源: {source}")
-                return
-            
-            # 验证参数
-            adapter.validate_params(source_params)
-            
-            # 执行抓取（这里会自动创建进度追踪）
-            result = adapter.fetch_papers(source_params)
-            task_callback(result, None)
-            
-        except Exception as e:
-            task_callback(None, str(e))
+    """
+    异步论文抓取接口（返回任务ID，可通过进度API查询状态和结果）
     
+    任务进入有界队列，由固定数量的工作线程执行；等待中的任务数达到上限时返回429
+    """
     try:
         # 验证请求数据
         data = request.get_json()
@@ -439,41 +813,110 @@ def fetch_papers_async():
         if not source:
             raise ValidationError("source 参数是必需的")
         
-        # 创建进度任务（这里先创建一个占位任务）
-        task_id = progress_manager.create_task(source, source_params.get('limit', 50), f"异步抓取{source}数据")
-        
-        def task_callback(result, error):
-            if error:
-                progress_manager.fail_task(task_id, error)
-            else:
-                progress_manager.complete_task(task_id, result)
+        # 提交前校验参数，无效请求不进入队列
+        adapter = source_registry.get_adapter(source)
+        if not adapter:
+            raise ValidationError(f"不支持的数据源: {source}")
+        adapter.validate_params(source_params)
         
-        # 启动后台线程
-        thread = threading.Thread(
-            target=async_fetch_worker,
-            args=(source, source_params, task_callback)
-        )
-        thread.daemon = True
-        thread.start()
+        job = job_queue.submit(source, source_params, source_params.get('limit', 50), f"异步抓取{source}数据")
+        task_id = job['job_id']
         
         # 立即返回任务ID
         return format_response({
             "task_id": task_id,
-            "status": "started",
-            "message": "任务已开始，请使用task_id查询进度",
+            "status": job['status'],
+            "message": "任务已进入队列，请使用task_id查询进度",
             "progress_url": f"/api/v1/progress/tasks/{task_id}"
         })
         
     except ValidationError as e:
         return format_error("INVALID_PARAMS", str(e)), 400
+    except QueueFullError as e:
+        return format_error("QUEUE_FULL", str(e), e.details), 429, {'Retry-After': str(e.details['retry_after'])}
     except Exception as e:
         app.logger.error(f"Async fetch error: {str(e)}\n{traceback.format_exc()}")
         return format_error("INTERNAL_ERROR", "异步任务创建失败"), 500
 
 
+def batch_item_error(req_id, error):
+    """批量子请求的失败结果"""
+    return {
+        "id": req_id,
+        "success": False,
+        "error": {
+            "code": type(error).__name__,
+            "message": str(error)
+        }
+    }
+
+
+def make_batch_job(req_id, source, adapter, source_params, timings=False):
+    """构造在执行器中运行的批量子请求，返回子请求结果（不抛出异常）"""
+    submitted_at = time.time()
+    
+    def job():
+        start_time = time.time()
+        # 执行器线程中没有请求级的追踪，每个子请求单独记录分阶段耗时
+        trace = Trace(source)
+        token = activate(trace)
+        try:
+            result, coalesced = fetch_with_cache(source, adapter, source_params)
+        except Exception as e:
+            log_api_call(source, source_params, False, time.time() - start_time, 0, e)
+            return batch_item_error(req_id, e)
+        finally:
+            deactivate(token)
+            metrics_collector.record_stages(source, trace)
+        
+        elapsed = time.time() - start_time
+        log_api_call(
+            source=source,
+            params=source_params,
+            success=True,
+            response_time=elapsed,
+            papers_count=len(result.get('papers', []))
+        )
+        source_info = {
+            "source": source,
+            "cache_hit": False,
+            "coalesced": coalesced,
+            "queue_time_ms": int((start_time - submitted_at) * 1000),
+            "execution_time_ms": int(elapsed * 1000)
+        }
+        if timings:
+            source_info['timings'] = trace.to_dict()
+        return {
+            "id": req_id,
+            "success": True,
+            "data": result,
+            "source_info": source_info
+        }
+    
+    return job
+
+
+def batch_summary(results, start_time):
+    """批量请求的汇总信息"""
+    succeeded = sum(1 for item in results if item and item['success'])
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "cache_hits": sum(1 for item in results if item and item.get('source_info', {}).get('cache_hit')),
+        "execution_time_ms": int((time.time() - start_time) * 1000)
+    }
+
+
 @app.route('/api/v1/fetch/batch', methods=['POST'])
 def fetch_papers_batch():
-    """批量抓取接口"""
+    """
+    批量抓取接口
+    
+    先检查每个子请求的缓存，未命中的子请求并发抓取（受按数据源的并发上限约束），
+    结果按请求顺序返回；请求体中stream为true或Accept为application/x-ndjson时，
+    以NDJSON格式在每个子请求完成时立即返回一行
+    """
     try:
         data = request.get_json()
         if not data or 'requests' not in data:
@@ -483,37 +926,65 @@ def fetch_papers_batch():
         if not isinstance(requests_list, list) or len(requests_list) == 0:
             raise ValidationError("requests必须是非空数组")
         
-        results = []
-        for req in requests_list:
-            req_id = req.get('id')
-            source = req.get('source')
-            source_params = req.get('source_params', {})
-            
+        stream = wants_ndjson(data)
+        start_time = time.time()
+        use_cache = app.config.get('ENABLE_CACHE', True)
+        
+        # 参数校验和缓存查询在当前线程完成，只有未命中缓存的子请求进入执行器
+        results = [None] * len(requests_list)
+        jobs = []
+        job_indexes = []
+        for index, req in enumerate(requests_list):
+            req_id = req.get('id') if isinstance(req, dict) else None
             try:
+                if not isinstance(req, dict):
+                    raise ValidationError("批量子请求必须是对象")
+                source = req.get('source')
+                source_params = req.get('source_params', {})
+                
                 adapter = source_registry.get_adapter(source)
                 if not adapter:
                     raise ValidationError(f"不支持的数据源: {source}")
                 
                 adapter.validate_params(source_params)
-                result = adapter.fetch_papers(source_params)
-                
-                results.append({
-                    "id": req_id,
-                    "success": True,
-                    "data": result
-                })
-                
             except Exception as e:
-                results.append({
+                results[index] = batch_item_error(req_id, e)
+                continue
+            
+            lookup_start = time.time()
+            cached_result = get_cached_result(source, source_params) if use_cache else None
+            if cached_result:
+                log_api_call(source, source_params, True, time.time() - lookup_start,
+                             len(cached_result.get('papers', [])), cache_hit=True)
+                results[index] = {
                     "id": req_id,
-                    "success": False,
-                    "error": {
-                        "code": type(e).__name__,
-                        "message": str(e)
-                    }
-                })
+                    "success": True,
+                    "data": cached_result,
+                    "source_info": {"source": source, "cache_hit": True, "execution_time_ms": 0}
+                }
+                continue
+            
+            jobs.append((source, make_batch_job(req_id, source, adapter, source_params, data.get('timings'))))
+            job_indexes.append(index)
+        
+        if stream:
+            def generate():
+                # 缓存命中和校验失败的结果立即返回，其余按完成顺序返回
+                for index, item in enumerate(results):
+                    if item is not None:
+                        yield ndjson_line({"type": "result", "index": index, **item})
+                for job_index, future in batch_executor.run(jobs):
+                    index = job_indexes[job_index]
+                    results[index] = future.result()
+                    yield ndjson_line({"type": "result", "index": index, **results[index]})
+                yield ndjson_line({"type": "summary", **batch_summary(results, start_time)})
+            
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        for job_index, future in batch_executor.run(jobs):
+            results[job_indexes[job_index]] = future.result()
         
-        return format_response({"results": results})
+        return format_response({"results": results, "summary": batch_summary(results, start_time)})
         
     except ValidationError as e:
         return format_error("INVALID_PARAMS", str(e)), 400
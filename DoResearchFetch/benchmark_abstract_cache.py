@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+SQLite摘要缓存微基准测试
+在10k条缓存的数据库上，对比逐条读写（原实现：每次新建连接、单独提交）
+与批量get_many/set_many（线程内复用WAL连接、一次查询/一个事务）处理一整期论文的耗时
+
+使用方法：
+python benchmark_abstract_cache.py [--entries 10000] [--issue-size 50] [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.abstract_cache import SQLiteAbstractCache, AbstractCacheEntry
+
+ABSTRACT = "Benchmark abstract text for the SQLite cache micro benchmark. " * 6
+
+
+def legacy_get(db_file, article_id, source="ieee"):
+    """原实现：每次读取新建连接"""
+    conn = sqlite3.connect(db_file, timeout=30)
+    try:
+        row = conn.execute("""SELECT abstract, cached_time FROM abstract_cache
+                              WHERE article_id = ? AND source = ?""", (article_id, source)).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def legacy_set(db_file, article_id, abstract, source="ieee"):
+    """原实现：每次写入新建连接并单独提交"""
+    entry = AbstractCacheEntry(article_id, '', '', abstract, time.time(), source)
+    conn = sqlite3.connect(db_file, timeout=30)
+    try:
+        conn.execute("""INSERT OR REPLACE INTO abstract_cache
+                        (article_id, source, url, title, abstract, abstract_hash, cached_time)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                     (entry.article_id, entry.source, entry.url, entry.title,
+                      entry.abstract, entry.abstract_hash, entry.cached_time))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite摘要缓存微基准测试')
+    parser.add_argument('--entries', type=int, default=10000, help='预先缓存的条目数')
+    parser.add_argument('--issue-size', type=int, default=50, help='每期论文数')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, 'abstract_cache.db')
+        cache = SQLiteAbstractCache(db_file)
+        cache.set_many([{'article_id': str(i), 'abstract': ABSTRACT} for i in range(args.entries)])
+        print(f"🔧 已缓存 {args.entries} 条摘要，每期 {args.issue_size} 篇\n")
+
+        rng = random.Random(1)
+        # 一期中约80%命中缓存
+        issue = [str(rng.randrange(args.entries)) if rng.random() < 0.8 else f'miss-{i}'
+                 for i in range(args.issue_size)]
+        counter = iter(range(10 ** 9))
+
+        def new_entries():
+            batch = next(counter)
+            return [{'article_id': f'new-{batch}-{i}', 'abstract': ABSTRACT} for i in range(args.issue_size)]
+
+        legacy_read = measure(lambda: [legacy_get(db_file, article_id) for article_id in issue], args.repeat)
+        batch_read = measure(lambda: cache.get_many(issue), args.repeat)
+
+        def run_legacy_write():
+            for entry in new_entries():
+                legacy_set(db_file, entry['article_id'], entry['abstract'])
+
+        legacy_write = measure(run_legacy_write, args.repeat)
+        batch_write = measure(lambda: cache.set_many(new_entries()), args.repeat)
+
+        print(f"{'操作':<10} {'逐条(ms)':>10} {'批量(ms)':>10} {'加速比':>8}")
+        print(f"{'读取一期':<10} {legacy_read:>10.2f} {batch_read:>10.2f} {legacy_read / batch_read:>7.1f}x")
+        print(f"{'写入一期':<10} {legacy_write:>10.2f} {batch_write:>10.2f} {legacy_write / batch_write:>7.1f}x")
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+IEEE摘要抓取连接复用基准测试
+对比每次请求新建事件循环和连接池（原实现）与常驻事件循环+共享连接池，
+模拟连续抓取多个50篇论文的期刊，摘要页面由本地服务模拟
+
+使用方法：
+python benchmark_abstract_fetch.py [--issues 10] [--papers 50] [--concurrency 8]
+
+注意：本地服务只模拟TCP建连，不包含真实环境中的DNS解析和TLS握手，
+实际环境中两种方式的差距会更大
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+from contextlib import redirect_stdout
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.async_abstract_fetcher import IEEEAsyncService
+from utils.async_runtime import AsyncRuntime
+
+ABSTRACT = "This paper studies the benchmark behaviour of abstract scraping. " * 8
+FILLER = "<div class='nav'>" + "x" * 2000 + "</div>\n"
+
+
+def start_stub_server():
+    """启动模拟IEEE文章页面的本地服务，返回(base_url, 连接计数)"""
+    connections = set()
+    lock = threading.Lock()
+
+    async def document(request):
+        with lock:
+            connections.add(request.transport.get_extra_info('peername'))
+        metadata = {'abstract': ABSTRACT, 'articleNumber': request.match_info['number']}
+        html = ("<html><head></head><body>" + FILLER * 50 +
+                f"<script>xplGlobal.document.metadata={json.dumps(metadata)};</script>" +
+                FILLER * 50 + "</body></html>")
+        return web.Response(text=html, content_type='text/html')
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_get('/document/{number}', document)
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.SockSite(runner, sock).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{port}", connections, lock
+
+
+class IssueFactory:
+    """生成期刊论文列表，文章编号递增以避开摘要缓存"""
+
+    def __init__(self, papers_per_issue: int):
+        self.papers_per_issue = papers_per_issue
+        self.next_number = int(time.time() * 1000)
+
+    def __call__(self):
+        papers = []
+        for _ in range(self.papers_per_issue):
+            self.next_number += 1
+            papers.append({'title': f'Paper {self.next_number}', 'abstract': 'short',
+                           'source_specific': {'ieee_number': str(self.next_number)}})
+        return papers
+
+
+def run_mode(name, fetch_issue, make_issue, issues, connections, lock):
+    """依次抓取多个期刊，返回每期耗时列表（毫秒）和新建连接数"""
+    with lock:
+        before = len(connections)
+    timings = []
+    for _ in range(issues):
+        papers = make_issue()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = fetch_issue(papers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert sum(1 for paper in result if paper['abstract'] != 'short') == len(papers)
+    with lock:
+        opened = len(connections) - before
+    print(f"{name:<24} 中位 {statistics.median(timings):>8.1f} ms/期   "
+          f"首期 {timings[0]:>8.1f} ms   新建连接 {opened:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IEEE摘要抓取连接复用基准测试')
+    parser.add_argument('--issues', type=int, default=10, help='连续抓取的期刊数量')
+    parser.add_argument('--papers', type=int, default=50, help='每期论文数')
+    parser.add_argument('--concurrency', type=int, default=8, help='单主机并发连接数')
+    args = parser.parse_args()
+
+    # 摘要缓存数据库写到临时目录，不影响正式缓存
+    os.chdir(tempfile.mkdtemp())
+
+    base_url, connections, lock = start_stub_server()
+    make_issue = IssueFactory(args.papers)
+    print(f"🔧 连续抓取 {args.issues} 期，每期 {args.papers} 篇，并发 {args.concurrency}\n")
+
+    def make_service():
+        return IEEEAsyncService(concurrent_limit=args.concurrency, request_delay=0, base_url=base_url)
+
+    def cold_fetch(papers):
+        return asyncio.run(make_service().fetch_abstracts_parallel(papers))
+
+    runtime = AsyncRuntime(per_host_limit=args.concurrency)
+
+    def pooled_fetch(papers):
+        service = make_service()
+        return runtime.run(lambda session: service.fetch_abstracts_parallel(papers, session=session))
+
+    run_mode('每次新建（原实现）', cold_fetch, make_issue, args.issues, connections, lock)
+    run_mode('常驻循环+共享连接池', pooled_fetch, make_issue, args.issues, connections, lock)
+    runtime.close()
+
+
+if __name__ == '__main__':
+    main()
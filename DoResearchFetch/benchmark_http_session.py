@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+适配器同步请求连接复用基准测试
+对本地模拟服务连续发送100个请求，对比每次调用requests.get（原基类实现）、
+每次新建Session（原IEEE/科技部适配器实现）与共享会话池的耗时和新建连接数
+
+使用方法：
+python benchmark_http_session.py [--requests 100] [--payload-kb 64] [--handshake-ms 0]
+
+注意：本地服务建连几乎没有开销，可用--handshake-ms为每个新连接增加延迟，
+模拟真实环境中DNS解析、TCP和TLS握手的耗时
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.http_session import HTTPSessionPool
+
+
+def start_stub_server(payload_kb: int, handshake_seconds: float):
+    """启动返回JSON的本地服务（HTTP/1.1 keep-alive，支持gzip），返回(server, base_url, 连接计数)"""
+    record = {'articleNumber': '1', 'title': 'Benchmark', 'abstract': 'x' * 200}
+    body = json.dumps({'records': [record] * max(1, payload_kb * 1024 // 260)}).encode()
+    compressed = gzip.compress(body)
+    stats = {'connections': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # 避免keep-alive连接上头部和响应体分开发送时的延迟确认等待
+
+        def log_message(self, *args):
+            pass
+
+        def setup(self):
+            # 每个处理器实例对应一个TCP连接
+            super().setup()
+            with lock:
+                stats['connections'] += 1
+            time.sleep(handshake_seconds)
+
+        def do_GET(self):
+            use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+            payload = compressed if use_gzip else body
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            if use_gzip:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", stats, lock
+
+
+def bare_get(url: str):
+    """原基类实现：每次调用模块级requests.get"""
+    return requests.get(url, timeout=10).json()
+
+
+def session_per_call(url: str):
+    """原IEEE/科技部适配器实现：每次请求新建Session，用完关闭"""
+    session = requests.Session()
+    try:
+        return session.get(url, timeout=10).json()
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='适配器同步请求连接复用基准测试')
+    parser.add_argument('--requests', type=int, default=100, help='连续发送的请求数')
+    parser.add_argument('--payload-kb', type=int, default=64, help='响应体大小（KB，未压缩）')
+    parser.add_argument('--handshake-ms', type=int, default=0, help='每个新连接额外增加的延迟（毫秒）')
+    args = parser.parse_args()
+
+    server, base_url, stats, lock = start_stub_server(args.payload_kb, args.handshake_ms / 1000)
+    pool = HTTPSessionPool()
+
+    def pooled_get(url: str):
+        return pool.get_session(url).get(url, timeout=10).json()
+
+    print(f"🔧 连续发送 {args.requests} 个请求，响应 {args.payload_kb} KB，"
+          f"新连接延迟 {args.handshake_ms} ms\n")
+    try:
+        for name, runner in [
+            ('requests.get（原基类）', bare_get),
+            ('每次新建Session（原IEEE）', session_per_call),
+            ('共享会话池', pooled_get),
+        ]:
+            with lock:
+                stats['connections'] = 0
+            timings = []
+            start = time.perf_counter()
+            for i in range(args.requests):
+                request_start = time.perf_counter()
+                runner(f"{base_url}/rest/search?page={i}")
+                timings.append((time.perf_counter() - request_start) * 1000)
+            elapsed = time.perf_counter() - start
+
+            print(f"{name:<20} 总耗时 {elapsed * 1000:>8.1f} ms   "
+                  f"中位 {statistics.median(timings):>6.2f} ms   新建连接 {stats['connections']:>4}")
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
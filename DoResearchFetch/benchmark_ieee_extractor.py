@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+IEEE文章页面摘要解析基准测试
+对比读取完整页面后正则解析（原实现）与流式括号匹配、元数据读取完整后立即停止的
+读取字节数和解析耗时
+
+使用方法：
+python benchmark_ieee_extractor.py [--corpus DIR] [--pages 200] [--repeat 5]
+
+--corpus 指定保存的IEEE文章页面（*.html）目录；不指定时生成模拟页面
+（页首较大、元数据位于页面中部、页尾较大）
+"""
+
+import io
+import os
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+import statistics
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.async_abstract_fetcher import IEEEAsyncService, IEEEMetadataExtractor
+
+CHUNK_SIZE = IEEEAsyncService.STREAM_CHUNK_SIZE
+
+
+def synthetic_pages(count: int):
+    """生成模拟IEEE文章页面"""
+    rng = random.Random(13)
+    pages = []
+    for i in range(count):
+        metadata = {
+            'articleNumber': str(10000000 + i),
+            'title': f'Synthetic Article {i}',
+            'abstract': ' '.join(rng.choice(['graph', 'network', 'signal', 'learning', 'edge'])
+                                 for _ in range(200)),
+            'authors': [{'name': f'Author {j}', 'affiliation': ['Lab {x}']} for j in range(6)],
+            'keywords': [{'type': 'IEEE Keywords', 'kwd': ['a', 'b', 'c']}],
+        }
+        head = "<link rel='stylesheet' href='/assets/css/app.css'><script src='/assets/js/vendor.js'></script>\n" * 20
+        tail = "<div class='ref'><a href='/document/123'>Reference title, Journal, vol. 1, 2020</a></div>\n" * 20
+        html = ("<html><head>" + head * rng.randint(60, 120) + "</head><body>" +
+                f"<script>xplGlobal.document.metadata={json.dumps(metadata)};</script>" +
+                tail * rng.randint(150, 300) + "</body></html>")
+        pages.append(html.encode('utf-8'))
+    return pages
+
+
+def load_corpus(directory: str):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+
+def legacy_parse(service: IEEEAsyncService, page: bytes):
+    """原实现：读取完整页面，解码后正则提取"""
+    return len(page), service._extract_abstract_from_html(page.decode('utf-8', errors='replace'))
+
+
+def streaming_parse(service: IEEEAsyncService, page: bytes):
+    """流式实现：按块输入，元数据完整后停止读取"""
+    extractor = IEEEMetadataExtractor()
+    for offset in range(0, len(page), CHUNK_SIZE):
+        if extractor.feed(page[offset:offset + CHUNK_SIZE]):
+            break
+    abstract = extractor.get_abstract()
+    if abstract is None:
+        return len(page), service._extract_abstract_from_html(page.decode('utf-8', errors='replace'))
+    return extractor.bytes_read, abstract
+
+
+def run(parse, service: IEEEAsyncService, pages, repeat: int):
+    """返回（读取总字节数, 每页中位耗时毫秒列表, 成功提取数）"""
+    timings = []
+    total_bytes = 0
+    extracted = 0
+    for page in pages:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                bytes_read, abstract = parse(service, page)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings.append(statistics.median(samples))
+        total_bytes += bytes_read
+        extracted += abstract is not None
+    return total_bytes, timings, extracted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IEEE文章页面摘要解析基准测试')
+    parser.add_argument('--corpus', help='保存的IEEE文章页面目录（*.html）')
+    parser.add_argument('--pages', type=int, default=200, help='生成的模拟页面数量')
+    parser.add_argument('--repeat', type=int, default=5, help='每页重复解析次数')
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_pages(args.pages)
+    if not pages:
+        print("❌ 没有可用的页面")
+        return
+
+    service = IEEEAsyncService()
+    page_bytes = sum(len(page) for page in pages)
+    print(f"🔧 {len(pages)} 个页面，平均 {page_bytes / len(pages) / 1024:.0f} KB\n")
+
+    for name, parse in [('完整页面（原实现）', legacy_parse), ('流式提前终止', streaming_parse)]:
+        total_bytes, timings, extracted = run(parse, service, pages, args.repeat)
+        print(f"{name:<14} 读取 {total_bytes / len(pages) / 1024:>7.1f} KB/页   "
+              f"解析中位 {statistics.median(timings):>7.3f} ms   "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:>7.3f} ms   "
+              f"成功 {extracted}/{len(pages)}")
+
+
+if __name__ == '__main__':
+    main()
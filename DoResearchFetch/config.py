@@ -18,15 +18,25 @@ class Config:
     # 限流配置
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', 60))
     RATE_LIMIT_PER_HOUR = int(os.getenv('RATE_LIMIT_PER_HOUR', 1000))
+    # 按上游主机的限流（host=每分钟/每小时），未列出的主机使用上面的默认值
+    RATE_LIMIT_HOSTS = os.getenv('RATE_LIMIT_HOSTS', 'ieeexplore.ieee.org=600/20000,api.elsevier.com=120/7200')
+    RATE_LIMIT_BURST_SECONDS = float(os.getenv('RATE_LIMIT_BURST_SECONDS', 1))  # 允许突发的请求数按几秒的配额计算
+    RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 60))  # 单次请求最长等待时间（秒），超过时返回限流错误
     
     # 缓存配置
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
     CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))  # 1小时
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1000))  # 进程内缓存最大条目数
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 进程内缓存最大字节数
+    CACHE_L1_TTL = int(os.getenv('CACHE_L1_TTL', 60))  # 使用Redis时进程内一级缓存的保存时间
+    FETCH_STATE_DB = os.getenv('FETCH_STATE_DB', 'fetch_state.db')  # 增量抓取的校验值和水位线
+    ABSTRACT_CACHE_DB = os.getenv('ABSTRACT_CACHE_DB', 'abstract_cache.db')  # 已抓取的完整摘要
     
     # 数据源配置
     IEEE_BASE_URL = os.getenv('IEEE_BASE_URL', 'https://ieeexplore.ieee.org')
     ELSEVIER_BASE_URL = os.getenv('ELSEVIER_BASE_URL', 'https://api.elsevier.com')
     DBLP_BASE_URL = os.getenv('DBLP_BASE_URL', 'https://dblp.org/search/publ/api')
+    DBLP_PAGE_CONCURRENCY = int(os.getenv('DBLP_PAGE_CONCURRENCY', 3))  # DBLP分页并发抓取数
     
     # 超时配置
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 30))  # 30秒
@@ -44,6 +54,32 @@ class Config:
     ABSTRACT_REQUEST_DELAY = float(os.getenv('ABSTRACT_REQUEST_DELAY_MS', '150')) / 1000  # 转换为秒
     ABSTRACT_TIMEOUT = int(os.getenv('ABSTRACT_TIMEOUT_SECONDS', 15))
     ENABLE_PARALLEL_ABSTRACT = os.getenv('ENABLE_PARALLEL_ABSTRACT', 'true').lower() == 'true'
+    ABSTRACT_POOL_SIZE = int(os.getenv('ABSTRACT_POOL_SIZE', 32))  # 摘要抓取共享连接池总连接数
+    ABSTRACT_KEEPALIVE_TIMEOUT = int(os.getenv('ABSTRACT_KEEPALIVE_SECONDS', 60))  # 空闲连接保持时间
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))  # 每个主机会话缓存的连接池数
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))  # 单个主机保持的空闲连接数
+    
+    # 批量抓取配置
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 8))  # 所有批量请求共用的抓取线程数
+    BATCH_SOURCE_CONCURRENCY = os.getenv('BATCH_SOURCE_CONCURRENCY', 'ieee:2,elsevier:2,dblp:4')  # 按数据源的并发上限
+    BATCH_DEFAULT_SOURCE_CONCURRENCY = int(os.getenv('BATCH_DEFAULT_SOURCE_CONCURRENCY', 2))
+    
+    # 异步抓取任务队列配置
+    JOB_QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'sqlite')  # sqlite或redis（多台机器共用队列）
+    JOB_QUEUE_DB = os.getenv('JOB_QUEUE_DB', 'fetch_jobs.db')
+    JOB_QUEUE_WORKERS = int(os.getenv('JOB_QUEUE_WORKERS', 4))  # 每个进程执行任务的线程数
+    JOB_QUEUE_MAX_PENDING = int(os.getenv('JOB_QUEUE_MAX_PENDING', 100))  # 等待中任务数上限，超过时返回429
+    JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', 60))  # 心跳超时后重新执行任务
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 86400))  # 结束的任务保留时间（秒）
+    
+    # 指标配置
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')  # 多进程部署时各工作进程共享指标的目录，为空时指标只保存在进程内
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))  # 各进程写入指标快照的间隔（秒）
+    
+    # 进度推送配置
+    PROGRESS_STREAM_INTERVAL = float(os.getenv('PROGRESS_STREAM_INTERVAL_MS', '250')) / 1000  # 合并更新的最短推送间隔
+    PROGRESS_STREAM_KEEPALIVE = int(os.getenv('PROGRESS_STREAM_KEEPALIVE', 15))  # 没有变化时的保活间隔（秒）
+    PROGRESS_STREAM_MAX = int(os.getenv('PROGRESS_STREAM_MAX', 2))  # 每个进程同时推送的连接数上限，应小于gunicorn的线程数
 
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,13 @@
+"""
+pytest配置：测试使用临时目录中的SQLite文件，导入app时不在源码目录中生成数据库
+"""
+
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix='do_research_fetch_test_')
+
+for _name, _file_name in (('FETCH_STATE_DB', 'fetch_state.db'),
+                          ('JOB_QUEUE_DB', 'fetch_jobs.db'),
+                          ('ABSTRACT_CACHE_DB', 'abstract_cache.db')):
+    os.environ.setdefault(_name, os.path.join(_db_dir, _file_name))
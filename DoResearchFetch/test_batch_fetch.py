@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试批量抓取接口的并发执行、缓存和NDJSON流式返回
+
+python test_batch_fetch.py 或 pytest test_batch_fetch.py
+"""
+
+import sys
+import json
+import time
+import threading
+
+sys.path.append('.')
+
+from app import app, source_registry, batch_executor
+from adapters.base import BaseAdapter
+
+
+class SlowAdapter(BaseAdapter):
+    """按参数延迟返回的测试数据源"""
+    
+    def __init__(self):
+        super().__init__({})
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+    
+    name = 'slow_test'
+    display_name = 'Slow Test Source'
+    description = '测试用数据源'
+    required_params = ['key']
+    optional_params = ['delay']
+    
+    def fetch_papers(self, params):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(params.get('delay', 0.2))
+            if params['key'].endswith('-fail'):
+                raise RuntimeError('upstream failed')
+            return {'papers': [{'title': params['key']}], 'total_count': 1, 'has_more': False}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def setup_adapter():
+    adapter = SlowAdapter()
+    source_registry.register('slow_test', adapter)
+    batch_executor.source_concurrency['slow_test'] = 2
+    return adapter
+
+
+def make_requests(prefix, keys, delay=0.2):
+    return [{'id': key, 'source': 'slow_test', 'source_params': {'key': f'{prefix}-{key}', 'delay': delay}}
+            for key in keys]
+
+
+def test_batch_runs_concurrently_in_order():
+    """未命中缓存的子请求并发执行，受数据源并发上限约束，结果按请求顺序返回"""
+    adapter = setup_adapter()
+    prefix = f'concurrent-{time.time()}'
+    keys = ['a', 'b', 'c', 'd']
+    
+    with app.test_client() as client:
+        start = time.perf_counter()
+        response = client.post('/api/v1/fetch/batch', json={'requests': make_requests(prefix, keys)})
+        elapsed = time.perf_counter() - start
+    
+    body = response.get_json()
+    assert response.status_code == 200
+    results = body['data']['results']
+    assert [item['id'] for item in results] == keys
+    assert all(item['success'] and not item['source_info']['cache_hit'] for item in results)
+    assert adapter.max_running == 2
+    assert 0.35 <= elapsed < 0.7  # 4个0.2秒的子请求，并发2
+    assert body['data']['summary']['succeeded'] == 4
+    print(f"✓ 并发执行：4个子请求耗时 {elapsed:.2f}s，最大并发 {adapter.max_running}")
+
+
+def test_batch_uses_cache_and_reports_errors():
+    """缓存命中的子请求不再抓取；单个子请求失败不影响其他子请求"""
+    setup_adapter()
+    prefix = f'cache-{time.time()}'
+    
+    with app.test_client() as client:
+        client.post('/api/v1/fetch/batch', json={'requests': make_requests(prefix, ['a'])})
+        requests = make_requests(prefix, ['a', 'fail']) + [{'id': 'bad', 'source': 'unknown'}]
+        body = client.post('/api/v1/fetch/batch', json={'requests': requests}).get_json()
+    
+    cached, failed, invalid = body['data']['results']
+    assert cached['success'] and cached['source_info']['cache_hit']
+    assert not failed['success'] and failed['error']['code'] == 'RuntimeError'
+    assert not invalid['success'] and invalid['error']['code'] == 'ValidationError'
+    assert body['data']['summary']['cache_hits'] == 1
+    print("✓ 缓存命中和失败隔离")
+
+
+def test_batch_streams_ndjson():
+    """流式模式按完成顺序逐行返回，最后一行为汇总"""
+    setup_adapter()
+    prefix = f'stream-{time.time()}'
+    requests = (make_requests(prefix, ['slow'], delay=0.4) + make_requests(prefix, ['fast'], delay=0.05))
+    
+    with app.test_client() as client:
+        response = client.post('/api/v1/fetch/batch', json={'requests': requests, 'stream': True})
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    
+    assert response.mimetype == 'application/x-ndjson'
+    assert [line.get('id') for line in lines[:2]] == ['fast', 'slow']
+    assert [line['index'] for line in lines[:2]] == [1, 0]
+    assert lines[-1]['type'] == 'summary' and lines[-1]['succeeded'] == 2
+    print("✓ NDJSON按完成顺序返回")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing batch fetch")
+    print("=" * 50)
+    test_batch_runs_concurrently_in_order()
+    test_batch_uses_cache_and_reports_errors()
+    test_batch_streams_ndjson()
+    print("\n✅ All batch fetch tests passed")
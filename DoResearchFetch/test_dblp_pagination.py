@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试DBLP分页抓取：精确查询回退、并发分页、游标续取
+"""
+import threading
+
+from adapters.dblp_adapter import DBLPAdapter
+from utils.exceptions import ValidationError
+
+
+class FakeDBLP:
+    """模拟DBLP搜索接口，记录每次请求的查询和位置"""
+    
+    def __init__(self, total: int, venue_hits: bool = True, venue: str = 'icse'):
+        self.total = total
+        self.venue = venue
+        self.venue_hits = venue_hits
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, query, page_size, offset, format_type, validators=None):
+        with self.lock:
+            self.calls.append((query, page_size, offset))
+        total = self.total if self.venue_hits or not query.startswith('streamid:') else 0
+        end = min(total, offset + page_size)
+        hits = [{'info': {'title': f'Paper {i}', 'venue': self.venue.upper(), 'year': '2024',
+                          'key': f'conf/{self.venue}/p{i}', 'author': ['A']}} for i in range(offset, end)]
+        return {'result': {'hits': {'hit': hits, '@total': str(total)}}}
+
+
+def make_adapter(fake: FakeDBLP) -> DBLPAdapter:
+    adapter = DBLPAdapter({'base_url': 'http://dblp.invalid', 'page_concurrency': 3})
+    adapter._search_publications = fake
+    return adapter
+
+
+def test_parallel_pages_in_order():
+    """超过一页时其余页面并发抓取，结果按顺序返回"""
+    fake = FakeDBLP(total=3500)
+    result = make_adapter(fake).fetch_papers({'dblp_id': 'icse', 'year': 2024, 'limit': 5000})
+    
+    titles = [paper['title'] for paper in result['papers']]
+    assert titles == [f'Paper {i}' for i in range(3500)]
+    assert sorted(offset for _, _, offset in fake.calls) == [0, 1000, 2000, 3000]
+    assert all(query == 'streamid:conf/icse: year:2024:' for query, _, _ in fake.calls)
+    assert not result['has_more'] and result['next_cursor'] is None
+    print("✓ 并发分页按顺序返回")
+
+
+def test_cursor_resume():
+    """limit小于总数时返回游标，用游标从上次的位置继续"""
+    fake = FakeDBLP(total=2500)
+    adapter = make_adapter(fake)
+    first = adapter.fetch_papers({'dblp_id': 'icse', 'year': 2024, 'limit': 1500})
+    assert len(first['papers']) == 1500
+    assert first['has_more'] and first['next_cursor']
+    assert sorted((offset, size) for _, size, offset in fake.calls) == [(0, 1000), (1000, 500)]
+    
+    second = adapter.fetch_papers({'dblp_id': 'icse', 'year': 2024, 'limit': 1500,
+                                   'cursor': first['next_cursor']})
+    assert [paper['title'] for paper in second['papers']] == [f'Paper {i}' for i in range(1500, 2500)]
+    assert not second['has_more']
+    print("✓ 游标续取")
+
+
+def test_fallback_to_fuzzy_query():
+    """精确查询没有结果时退回模糊查询"""
+    fake = FakeDBLP(total=10, venue_hits=False, venue='tse')
+    result = make_adapter(fake).fetch_papers({'dblp_id': 'tse', 'year': 2024})
+    
+    queries = [query for query, _, _ in fake.calls]
+    assert queries == ['streamid:journals/tse: year:2024:', 'streamid:conf/tse: year:2024:', 'tse 2024']
+    assert len(result['papers']) == 10
+    print("✓ 退回模糊查询")
+
+
+def test_invalid_cursor():
+    adapter = make_adapter(FakeDBLP(total=0))
+    try:
+        adapter.validate_params({'dblp_id': 'icse', 'year': 2024, 'cursor': 'not-a-cursor'})
+        assert False, "invalid cursor accepted"
+    except ValidationError:
+        pass
+    print("✓ 无效游标被拒绝")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing DBLP pagination")
+    print("=" * 50)
+    test_parallel_pages_in_order()
+    test_cursor_resume()
+    test_fallback_to_fuzzy_query()
+    test_invalid_cursor()
+    print("\n✅ All DBLP pagination tests passed")
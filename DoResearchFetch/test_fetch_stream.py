@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+测试论文抓取接口的NDJSON流式返回
+
+python test_fetch_stream.py 或 pytest test_fetch_stream.py
+"""
+
+import sys
+import json
+import time
+import asyncio
+import threading
+
+sys.path.append('.')
+
+import adapters.ieee_adapter as ieee_module
+from app import app, source_registry
+from adapters.base import BaseAdapter
+from adapters.dblp_adapter import DBLPAdapter
+from adapters.ieee_adapter import IEEEAdapter
+from utils.async_abstract_fetcher import IEEEAsyncService
+from utils.exceptions import FetchError
+
+
+class StreamingAdapter(BaseAdapter):
+    """逐篇产出论文的测试数据源，fail_after指定产出几篇后失败"""
+    
+    name = 'stream_test'
+    display_name = 'Streaming Test Source'
+    description = '测试用数据源'
+    required_params = ['key']
+    optional_params = ['count', 'fail_after', 'delay']
+    
+    def __init__(self):
+        super().__init__({})
+        self.calls = 0
+    
+    def fetch_papers(self, params):
+        return self._collect_papers(self.stream_papers(params))
+    
+    def stream_papers(self, params):
+        self.calls += 1
+        for i in range(params.get('count', 3)):
+            if i == params.get('fail_after'):
+                raise FetchError('upstream failed', error_code='TEST_ERROR')
+            time.sleep(params.get('delay', 0))
+            yield {'title': f"{params['key']} paper {i}"}
+        return {'total_count': 10, 'has_more': True, 'next_cursor': None}
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_stream_then_cache():
+    """流式返回每篇论文和汇总，完整读取后写入缓存，再次请求从缓存流式返回"""
+    adapter = StreamingAdapter()
+    source_registry.register('stream_test', adapter)
+    payload = {'source': 'stream_test', 'source_params': {'key': f'k-{time.time()}'}, 'stream': True}
+    
+    with app.test_client() as client:
+        first = read_lines(client.post('/api/v1/fetch', json=payload))
+        second = read_lines(client.post('/api/v1/fetch', json=payload))
+        buffered = client.post('/api/v1/fetch', json={**payload, 'stream': False}).get_json()
+    
+    assert [line['type'] for line in first] == ['paper'] * 3 + ['summary']
+    assert first[-1]['papers_count'] == 3 and first[-1]['total_count'] == 10 and first[-1]['has_more']
+    assert not first[-1]['source_info']['cache_hit']
+    assert second[-1]['source_info']['cache_hit'] and second[:3] == first[:3]
+    assert buffered['data']['papers'] == [line['data'] for line in first[:3]]
+    assert adapter.calls == 1
+    print("✓ 流式返回并写入缓存")
+
+
+def test_stream_error_line():
+    """抓取中途失败时最后一行为错误信息，结果不写入缓存"""
+    adapter = StreamingAdapter()
+    source_registry.register('stream_test', adapter)
+    params = {'key': f'fail-{time.time()}', 'fail_after': 2}
+    
+    with app.test_client() as client:
+        for _ in range(2):
+            lines = read_lines(client.post('/api/v1/fetch', json={'source': 'stream_test', 'source_params': params},
+                                           headers={'Accept': 'application/x-ndjson'}))
+            assert [line['type'] for line in lines] == ['paper', 'paper', 'error']
+            assert lines[-1]['error']['code'] == 'TEST_ERROR'
+    assert adapter.calls == 2
+    print("✓ 中途失败返回错误行")
+
+
+def test_concurrent_streams_coalesced():
+    """并发的相同流式/普通抓取只请求一次上游，等待者回放执行者的结果"""
+    adapter = StreamingAdapter()
+    source_registry.register('stream_test', adapter)
+    payload = {'source': 'stream_test', 'source_params': {'key': f'co-{time.time()}', 'delay': 0.05}}
+    barrier = threading.Barrier(4)
+    responses = [None] * 4
+    
+    def request(index):
+        barrier.wait()
+        with app.test_client() as client:
+            response = client.post('/api/v1/fetch', json={**payload, 'stream': index != 3})
+            responses[index] = read_lines(response) if index != 3 else response.get_json()
+    
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert adapter.calls == 1
+    streams, buffered = responses[:3], responses[3]
+    assert all(lines[:3] == streams[0][:3] and lines[-1]['type'] == 'summary' for lines in streams)
+    coalesced = [lines[-1]['source_info']['coalesced'] for lines in streams] + [buffered['source_info']['coalesced']]
+    assert coalesced.count(False) == 1
+    assert buffered['data']['papers'] == [line['data'] for line in streams[0][:3]]
+    print("✓ 并发流式请求合并")
+
+
+def test_dblp_streams_mapped_hits():
+    """DBLP边映射边产出，fetch_papers结果与流式结果一致"""
+    hits = [{'info': {'title': f'Paper {i}', 'venue': 'ICSE', 'year': '2024',
+                      'key': f'conf/icse/p{i}', 'author': ['A']}} for i in range(5)]
+    adapter = DBLPAdapter({'base_url': 'http://dblp.invalid'})
+    adapter._search_publications = lambda *args, **kwargs: {'result': {'hits': {'hit': hits, '@total': '5'}}}
+    params = {'dblp_id': 'icse', 'year': 2024}
+    
+    stream = adapter.stream_papers(params)
+    first = next(stream)
+    assert first['title'] == 'Paper 0'
+    
+    result = adapter.fetch_papers(params)
+    assert [paper['title'] for paper in result['papers']] == [f'Paper {i}' for i in range(5)]
+    assert result['total_count'] == 5 and not result['has_more']
+    print("✓ DBLP流式映射")
+
+
+def test_oversized_stream_not_kept():
+    """已返回的论文超过CACHE_MAX_BYTES时不写入缓存，再次请求重新抓取"""
+    adapter = StreamingAdapter()
+    source_registry.register('stream_test', adapter)
+    payload = {'source': 'stream_test', 'source_params': {'key': f'big-{time.time()}', 'count': 5}, 'stream': True}
+    max_bytes = app.config.get('CACHE_MAX_BYTES')
+    app.config['CACHE_MAX_BYTES'] = 200
+    try:
+        with app.test_client() as client:
+            first = read_lines(client.post('/api/v1/fetch', json=payload))
+            second = read_lines(client.post('/api/v1/fetch', json=payload))
+    finally:
+        app.config['CACHE_MAX_BYTES'] = max_bytes
+    
+    assert adapter.calls == 2
+    assert [line['type'] for line in first] == ['paper'] * 5 + ['summary']
+    assert first[-1]['papers_count'] == 5 and not second[-1]['source_info']['cache_hit']
+    print("✓ 超过缓存上限的结果不保存")
+
+
+class SlowAbstractService(IEEEAsyncService):
+    """摘要抓取耗时与文章顺序相反：第一篇最慢"""
+    
+    async def _fetch_single_abstract_with_cache(self, session, paper, article_number, index):
+        await asyncio.sleep(0.1 * (3 - index))
+        paper['abstract'] = f'full abstract {article_number}'
+        return paper
+
+
+class TocOnlyIEEE(IEEEAdapter):
+    """返回固定期刊和目录的IEEE适配器"""
+    
+    def _make_request(self, url, validators=None, **kwargs):
+        if 'metadata' in url:
+            return {'displayTitle': 'Test Journal', 'currentIssue': {'issueNumber': '7', 'volume': '1'}}
+        return {'records': [{'articleNumber': str(900 + i), 'articleTitle': f'Paper {i}',
+                             'htmlLink': f'/document/{900 + i}/', 'publicationDate': f'2024-05-0{i + 1}'}
+                            for i in range(3)], 'totalRecords': 3}
+
+
+def test_ieee_streams_each_abstract():
+    """IEEE每篇论文的摘要抓取完成后即产出，fetch_papers按发表日期倒序"""
+    create_async_service = ieee_module.create_async_service
+    ieee_module.create_async_service = lambda **kwargs: SlowAbstractService(
+        request_delay=0, base_url='https://ieee.invalid')
+    try:
+        adapter = TocOnlyIEEE({'base_url': 'https://ieee.invalid'})
+        params = {'punumber': f'{time.time()}', 'early_access': False}
+        
+        start = time.perf_counter()
+        stream = adapter.stream_papers(params)
+        first = next(stream)
+        first_latency = time.perf_counter() - start
+        rest = list(stream)
+        total = time.perf_counter() - start
+        
+        assert first['title'] == 'Paper 2' and first['abstract'] == 'full abstract 902'
+        assert first_latency < total - 0.1
+        assert [paper['title'] for paper in rest] == ['Paper 1', 'Paper 0']
+        
+        result = adapter.fetch_papers(params)
+        assert [paper['title'] for paper in result['papers']] == ['Paper 2', 'Paper 1', 'Paper 0']
+        assert result['total_count'] == 3
+    finally:
+        ieee_module.create_async_service = create_async_service
+    print(f"✓ IEEE逐篇产出（首篇 {first_latency * 1000:.0f} ms / 全部 {total * 1000:.0f} ms）")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing streaming fetch")
+    print("=" * 50)
+    test_stream_then_cache()
+    test_stream_error_line()
+    test_concurrent_streams_coalesced()
+    test_dblp_streams_mapped_hits()
+    test_oversized_stream_not_kept()
+    test_ieee_streams_each_abstract()
+    print("\n✅ All streaming fetch tests passed")
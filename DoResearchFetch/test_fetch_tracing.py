@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试抓取流程的分阶段计时：追踪汇总、接口返回的timings和指标中的stage_timings
+
+python test_fetch_tracing.py 或 pytest test_fetch_tracing.py
+"""
+
+import sys
+import json
+import time
+
+sys.path.append('.')
+
+from app import app, source_registry
+from adapters.base import BaseAdapter
+from utils.tracing import Trace, span, start_trace, current_trace, traced
+
+
+class TracedAdapter(BaseAdapter):
+    """分两个阶段抓取的测试数据源"""
+    
+    name = 'trace_test'
+    display_name = 'Trace Test Source'
+    description = '测试用数据源'
+    required_params = ['key']
+    optional_params = []
+    
+    def __init__(self):
+        super().__init__({})
+    
+    def fetch_papers(self, params):
+        return self._collect_papers(self.stream_papers(params))
+    
+    def stream_papers(self, params):
+        with span('search'):
+            time.sleep(0.02)
+        for i in range(3):
+            with span('mapping'):
+                paper = {'title': f"{params['key']} paper {i}"}
+            yield paper
+        return {'total_count': 3}
+
+
+def test_span_without_trace_is_noop():
+    """没有开启追踪时span不记录任何内容"""
+    assert current_trace() is None
+    with span('toc'):
+        pass
+    
+    with start_trace('ieee') as trace:
+        with span('toc'):
+            time.sleep(0.01)
+        for _ in range(3):
+            with span('mapping'):
+                pass
+    assert current_trace() is None
+    
+    timings = trace.to_dict()
+    assert list(timings['stages']) == ['toc', 'mapping']
+    assert timings['stages']['toc']['ms'] >= 10 and timings['stages']['mapping']['count'] == 3
+    assert timings['total_ms'] >= timings['stages']['toc']['ms']
+    print("✓ 追踪汇总各阶段耗时")
+
+
+def test_traced_excludes_consumer_time():
+    """traced()只在生成器执行时计时，不计入调用方处理每一项的时间"""
+    def produce():
+        for i in range(3):
+            with span('produce'):
+                pass
+            yield i
+        return 'done'
+    
+    trace = Trace('stream')
+    for _ in traced(produce(), trace):
+        assert current_trace() is None
+        time.sleep(0.01)
+    assert trace.stages['produce'][1] == 3 and trace.stages['produce'][0] < 0.01
+    print("✓ 流式生成器单独计时")
+
+
+def test_fetch_returns_timings():
+    """timings为true时source_info中返回各阶段耗时，并按数据源汇总到指标"""
+    source_registry.register('trace_test', TracedAdapter())
+    params = {'key': f'k-{time.time()}'}
+    
+    with app.test_client() as client:
+        plain = client.post('/api/v1/fetch', json={'source': 'trace_test', 'source_params': params}).get_json()
+        cached = client.post('/api/v1/fetch', json={'source': 'trace_test', 'source_params': params,
+                                                    'timings': True}).get_json()
+        streamed = [json.loads(line) for line in client.post(
+            '/api/v1/fetch', json={'source': 'trace_test', 'source_params': {'key': f's-{time.time()}'},
+                                   'stream': True, 'timings': True}).get_data(as_text=True).splitlines()]
+        metrics = client.get('/api/v1/metrics').get_json()['data']
+    
+    assert 'timings' not in plain['source_info']
+    assert list(cached['source_info']['timings']['stages']) == ['cache_lookup']
+    
+    stages = streamed[-1]['source_info']['timings']['stages']
+    assert stages['search']['ms'] >= 20 and stages['mapping']['count'] == 3
+    assert 'cache_write' in stages
+    
+    summary = metrics['stage_timings']['trace_test']
+    assert summary['total']['count'] >= 3 and summary['search']['count'] == 2
+    assert summary['search']['avg_ms'] >= 20 and summary['search']['max_ms'] >= summary['search']['avg_ms']
+    print("✓ 接口返回timings并汇总到指标")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing fetch tracing")
+    print("=" * 50)
+    test_span_without_trace_is_noop()
+    test_traced_excludes_consumer_time()
+    test_fetch_returns_timings()
+    print("\n✅ All fetch tracing tests passed")
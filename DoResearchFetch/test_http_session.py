@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试按主机共享的HTTP会话池：连接复用、主机隔离和fork后的重建
+
+python test_http_session.py 或 pytest test_http_session.py
+"""
+
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append('.')
+
+from adapters.dblp_adapter import DBLPAdapter
+from utils.http_session import HTTPSessionPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    
+    def log_message(self, *args):
+        pass
+    
+    def setup(self):
+        super().setup()
+        KeepAliveHandler.connections += 1
+    
+    def do_GET(self):
+        body = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_adapter_requests_reuse_connection():
+    """适配器的请求经由注入的会话池发送，同一主机只建立一次连接"""
+    server, base_url = start_server()
+    pool = HTTPSessionPool()
+    KeepAliveHandler.connections = 0
+    try:
+        adapter = DBLPAdapter({'base_url': base_url, 'http_pool': pool, 'max_retries': 0})
+        for i in range(5):
+            assert adapter._make_request(f"{base_url}/search?page={i}") == {'ok': True}
+        
+        assert KeepAliveHandler.connections == 1
+        stats = pool.get_stats()
+        assert stats['hosts'] == [base_url] and stats['sessions_created'] == 1 and stats['requests'] == 5
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+    print("✓ 同一主机复用连接")
+
+
+def test_sessions_per_host():
+    """不同主机使用各自的会话，同一主机的不同路径共用会话"""
+    pool = HTTPSessionPool()
+    ieee = pool.get_session('https://ieeexplore.ieee.org/rest/search')
+    assert pool.get_session('https://IEEEXPLORE.ieee.org/document/1') is ieee
+    assert pool.get_session('https://dblp.org/search/publ/api') is not ieee
+    assert pool.get_session('http://ieeexplore.ieee.org/') is not ieee
+    pool.close()
+    assert pool.get_stats()['hosts'] == []
+    print("✓ 按主机划分会话")
+
+
+def test_recreated_after_fork():
+    """进程号变化后丢弃父进程的会话"""
+    pool = HTTPSessionPool()
+    session = pool.get_session('https://dblp.org/')
+    pool._pid = os.getpid() + 1  # 模拟fork出的子进程
+    assert pool.get_session('https://dblp.org/') is not session
+    assert pool.get_stats()['sessions_created'] == 2
+    pool.close()
+    print("✓ fork后重建会话")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing HTTP session pool")
+    print("=" * 50)
+    test_adapter_requests_reuse_connection()
+    test_sessions_per_host()
+    test_recreated_after_fork()
+    print("\n✅ All HTTP session pool tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+测试IEEE文章页面元数据流式提取
+
+python test_ieee_extractor.py 或 pytest test_ieee_extractor.py
+"""
+
+import sys
+import json
+
+sys.path.append('.')
+
+from utils.async_abstract_fetcher import IEEEMetadataExtractor
+
+METADATA = {
+    'title': 'Braces { and } with "quotes" and \\ backslash',
+    'abstract': 'An abstract that contains }; and {"nested": "text"} but is still long enough.',
+    'authors': [{'name': 'A', 'affiliation': ['Lab {1}']}],
+}
+PAGE = ("<html><head>" + "<script src='/a.js'></script>" * 500 +
+        f"<script>xplGlobal.document.metadata={json.dumps(METADATA)};</script>" +
+        "<div>tail</div>" * 5000 + "</html>").encode('utf-8')
+
+
+def feed_in_chunks(page, size):
+    extractor = IEEEMetadataExtractor()
+    for offset in range(0, len(page), size):
+        if extractor.feed(page[offset:offset + size]):
+            break
+    return extractor
+
+
+def test_extracts_metadata_across_chunk_boundaries():
+    """标记、字符串和转义符被分块截断时仍能正确提取"""
+    for size in (1, 5, 64, 4096):
+        extractor = feed_in_chunks(PAGE, size)
+        assert extractor.done
+        assert extractor.metadata == METADATA
+        assert extractor.get_abstract() == METADATA['abstract']
+    print("✓ 跨块边界提取元数据")
+
+
+def test_stops_after_metadata():
+    """元数据读取完整后不再需要后续内容"""
+    extractor = feed_in_chunks(PAGE, 4096)
+    assert extractor.bytes_read < len(PAGE) // 2
+    print(f"✓ 提前终止：读取 {extractor.bytes_read}/{len(PAGE)} 字节")
+
+
+def test_missing_metadata():
+    """页面中没有元数据时读取完整内容且不返回摘要"""
+    extractor = feed_in_chunks(b"<html>" + b"<p>no metadata</p>" * 100 + b"</html>", 64)
+    assert not extractor.done
+    assert extractor.get_abstract() is None
+    assert extractor.text.endswith("</html>")
+    print("✓ 缺少元数据时交给兜底解析")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing IEEE metadata extractor")
+    print("=" * 50)
+    test_extracts_metadata_across_chunk_boundaries()
+    test_stops_after_metadata()
+    test_missing_metadata()
+    print("\n✅ All extractor tests passed")
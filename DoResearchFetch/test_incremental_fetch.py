@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+测试增量抓取：水位线、条件请求和跳过已看到的条目
+
+python test_incremental_fetch.py 或 pytest test_incremental_fetch.py
+"""
+
+import os
+import sys
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append('.')
+
+import adapters.ieee_adapter as ieee_module
+import adapters.dblp_adapter as dblp_module
+from adapters.ieee_adapter import IEEEAdapter
+from adapters.dblp_adapter import DBLPAdapter
+from utils.fetch_state import FetchStateStore, watermark_reached, max_watermark
+
+
+def make_store():
+    return FetchStateStore(os.path.join(tempfile.mkdtemp(), 'fetch_state.db'))
+
+
+def test_watermark_compare():
+    """文章编号按数值比较，日期按字符串比较"""
+    assert watermark_reached('999', '1000')
+    assert not watermark_reached('10001', '9999')
+    assert watermark_reached('2024-05-01', '2024-05-01')
+    assert not watermark_reached('2024-05-02', '2024-05-01')
+    assert not watermark_reached('1', None)
+    assert max_watermark(None, '98', '100', '99') == '100'
+    print("✓ 水位线比较")
+
+
+def test_conditional_only_when_caller_is_current():
+    """调用方的水位线不早于保存的水位线、且是同一资源时才发送条件请求"""
+    store = make_store()
+    params = {'punumber': '1'}
+    store.save('ieee', params, resource='toc', etag='"v1"', watermark='100')
+    
+    assert store.conditional_validators('ieee', {**params, 'watermark': '100'}, 'toc', '100') == {'etag': '"v1"'}
+    assert store.conditional_validators('ieee', params, 'toc', '99') == {}
+    assert store.conditional_validators('ieee', params, 'toc', None) == {}
+    assert store.conditional_validators('ieee', params, 'other-issue', '100') == {}
+    
+    # 水位线只会前进
+    store.save('ieee', params, resource='toc', etag='"v2"', watermark='50')
+    assert store.get('ieee', params)['watermark'] == '100'
+    print("✓ 条件请求门控")
+
+
+class FakeIEEE(IEEEAdapter):
+    """模拟IEEE接口：TOC支持ETag，记录映射过的文章"""
+    
+    def __init__(self):
+        super().__init__({'base_url': 'https://ieee.invalid'})
+        self.records = []
+        self.version = 1
+        self.mapped = []
+    
+    def _make_request(self, url, validators=None, **kwargs):
+        if 'metadata' in url:
+            return {'displayTitle': 'Test Journal', 'currentIssue': {'issueNumber': '7', 'volume': '1'}}
+        etag = f'"v{self.version}"'
+        if validators and validators.get('etag') == etag:
+            return None
+        if validators is not None:
+            validators.clear()
+            validators['etag'] = etag
+        return {'records': list(self.records), 'totalRecords': len(self.records)}
+    
+    def _map_to_paper_data(self, record, volume, journal_name):
+        self.mapped.append(record['articleNumber'])
+        return super()._map_to_paper_data(record, volume, journal_name)
+
+
+def ieee_record(number, date='2024-05-01'):
+    return {'articleNumber': str(number), 'articleTitle': f'Paper {number}', 'publicationDate': date}
+
+
+def test_ieee_incremental_sync():
+    """第二次同步返回304时为空结果；有新文章时只映射新文章"""
+    ieee_module.fetch_state = make_store()
+    adapter = FakeIEEE()
+    adapter.records = [ieee_record(n) for n in (103, 102, 101)]
+    params = {'punumber': '1', 'fetch_full_abstract': False, 'early_access': False}
+    
+    first = adapter.fetch_papers(params)
+    assert len(first['papers']) == 3 and first['watermark'] == '103'
+    
+    unchanged = adapter.fetch_papers({**params, 'watermark': first['watermark']})
+    assert unchanged['not_modified'] and unchanged['papers'] == []
+    assert unchanged['watermark'] == '103'
+    
+    adapter.records.insert(0, ieee_record(104, '2024-06-01'))
+    adapter.version = 2
+    adapter.mapped.clear()
+    changed = adapter.fetch_papers({**params, 'watermark': '103'})
+    assert [paper['title'] for paper in changed['papers']] == ['Paper 104']
+    assert adapter.mapped == ['104']
+    assert changed['watermark'] == '104' and not changed['not_modified']
+    
+    # 调用方落后于保存的水位线时发送普通请求，返回其后的全部文章
+    behind = adapter.fetch_papers({**params, 'watermark': '101'})
+    assert sorted(paper['title'] for paper in behind['papers']) == ['Paper 102', 'Paper 103', 'Paper 104']
+    
+    since = adapter.fetch_papers({**params, 'since': '2024-06-01'})
+    assert [paper['title'] for paper in since['papers']] == ['Paper 104']
+    print("✓ IEEE增量同步")
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """返回固定DBLP结果并支持If-None-Match的本地服务"""
+    
+    requests = []
+    body = json.dumps({'result': {'hits': {'@total': '1', 'hit': [
+        {'info': {'title': 'Paper', 'venue': 'ICSE', 'year': '2024', 'key': 'conf/icse/p1', 'author': ['A']}}
+    ]}}}).encode()
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        ETagHandler.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"dblp-v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', '"dblp-v1"')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+
+def test_dblp_conditional_request():
+    """DBLP第一页通过真实HTTP请求发送If-None-Match，304时返回空结果"""
+    dblp_module.fetch_state = make_store()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        adapter = DBLPAdapter({'base_url': f'http://127.0.0.1:{server.server_address[1]}/search'})
+        params = {'dblp_id': 'icse', 'year': 2024}
+        
+        first = adapter.fetch_papers(params)
+        assert len(first['papers']) == 1 and first['watermark'] == '1'
+        
+        second = adapter.fetch_papers({**params, 'watermark': first['watermark']})
+        assert second['not_modified'] and second['papers'] == []
+        assert ETagHandler.requests == [None, '"dblp-v1"']
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✓ DBLP条件请求")
+
+
+class PreconditionHandler(BaseHTTPRequestHandler):
+    """IEEE TOC是POST接口，带条件头时返回412"""
+    
+    requests = []
+    
+    def log_message(self, *args):
+        pass
+    
+    def send_json(self, data, headers=()):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        self.send_json({'displayTitle': 'Test Journal', 'currentIssue': {'issueNumber': '7', 'volume': '1'}})
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        etag = self.headers.get('If-None-Match')
+        PreconditionHandler.requests.append(etag)
+        if etag:
+            self.send_response(412)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_json({'records': [ieee_record(101)], 'totalRecords': 1}, [('ETag', '"toc-v1"')])
+
+
+def test_ieee_toc_precondition_failed():
+    """TOC对条件POST返回412时改发普通请求，而不是每次同步都报TOC_FETCH_ERROR"""
+    ieee_module.fetch_state = make_store()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PreconditionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        adapter = IEEEAdapter({'base_url': f'http://127.0.0.1:{server.server_address[1]}'})
+        params = {'punumber': '1', 'fetch_full_abstract': False, 'early_access': False}
+        
+        first = adapter.fetch_papers(params)
+        assert len(first['papers']) == 1 and first['watermark'] == '101'
+        
+        for _ in range(2):
+            again = adapter.fetch_papers({**params, 'watermark': first['watermark']})
+            assert not again['not_modified'] and again['papers'] == []
+            assert again['watermark'] == '101'
+        assert PreconditionHandler.requests == [None, '"toc-v1"', None, '"toc-v1"', None]
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✓ IEEE TOC返回412时重新请求")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing incremental fetch")
+    print("=" * 50)
+    test_watermark_compare()
+    test_conditional_only_when_caller_is_current()
+    test_ieee_incremental_sync()
+    test_dblp_conditional_request()
+    test_ieee_toc_precondition_failed()
+    print("\n✅ All incremental fetch tests passed")
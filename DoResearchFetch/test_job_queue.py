@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+测试异步抓取任务队列：并发上限、排队上限、持久化和中断任务的重新执行
+
+python test_job_queue.py 或 pytest test_job_queue.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+sys.path.append('.')
+
+import app as app_module
+from app import app, source_registry
+from adapters.base import BaseAdapter
+from utils.exceptions import QueueFullError
+from utils.job_queue import JobQueue, SQLiteJobBackend, new_job, job_to_progress
+
+
+def make_backend():
+    return SQLiteJobBackend(os.path.join(tempfile.mkdtemp(), 'fetch_jobs.db'))
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class BlockingHandler:
+    """阻塞到release为止的任务处理函数，记录同时执行的任务数"""
+    
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+    
+    def __call__(self, job):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            self.release.wait(5)
+            if job['params'].get('fail'):
+                raise RuntimeError('upstream failed')
+            return {'papers': [{'title': job['params']['key']}], 'total_count': 1}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def test_bounded_workers_and_admission():
+    """工作线程数固定，等待中的任务超过上限时拒绝提交"""
+    handler = BlockingHandler()
+    queue = JobQueue(make_backend(), handler, workers=2, max_pending=3, poll_interval=0.05)
+    try:
+        running = [queue.submit('dblp', {'key': f'r{i}'}) for i in range(2)]
+        assert wait_for(lambda: handler.running == 2)
+        pending = [queue.submit('dblp', {'key': f'p{i}'}) for i in range(3)]
+        
+        try:
+            queue.submit('dblp', {'key': 'overflow'})
+            assert False, "队列已满时应拒绝提交"
+        except QueueFullError as e:
+            assert e.details['max_pending'] == 3
+        
+        handler.release.set()
+        assert wait_for(lambda: all(queue.get(job['job_id'])['status'] == 'completed'
+                                    for job in running + pending))
+        assert handler.max_running == 2
+        assert queue.get(pending[0]['job_id'])['result']['papers'][0]['title'] == 'p0'
+        stats = queue.get_stats()
+        assert stats['rejected'] == 1 and stats['completed'] == 5 and stats['jobs']['completed'] == 5
+    finally:
+        queue.close()
+    print("✓ 工作线程数和排队上限")
+
+
+def test_results_survive_restart():
+    """结果和未开始的任务保存在存储中，重启后的队列可以查询并继续执行"""
+    db_file = os.path.join(tempfile.mkdtemp(), 'fetch_jobs.db')
+    handler = BlockingHandler()
+    handler.release.set()
+    
+    first = JobQueue(SQLiteJobBackend(db_file), handler, workers=1, poll_interval=0.05)
+    done = first.submit('dblp', {'key': 'done'})
+    assert wait_for(lambda: first.get(done['job_id'])['status'] == 'completed')
+    first.close()
+    
+    # 模拟重启前已提交但未执行的任务
+    job = new_job('dblp', {'key': 'waiting'})
+    assert SQLiteJobBackend(db_file).enqueue(job, max_pending=10)
+    
+    second = JobQueue(SQLiteJobBackend(db_file), handler, workers=1, poll_interval=0.05)
+    try:
+        assert second.get(done['job_id'])['result']['papers'][0]['title'] == 'done'
+        second.start()
+        assert wait_for(lambda: second.get(job['job_id'])['status'] == 'completed')
+    finally:
+        second.close()
+    print("✓ 重启后保留结果并继续执行")
+
+
+def test_stale_jobs_requeued():
+    """所属进程退出（心跳过期）的任务重新排队，超过最大次数后标记失败"""
+    backend = make_backend()
+    job = new_job('dblp', {'key': 'orphan'})
+    backend.enqueue(job, max_pending=10)
+    assert backend.claim('dead-worker')['attempts'] == 1
+    
+    assert backend.requeue_stale(time.time() + 1, max_attempts=2) == 1
+    assert backend.get(job['job_id'])['status'] == 'pending'
+    
+    backend.claim('dead-worker')
+    assert backend.requeue_stale(time.time() + 1, max_attempts=2) == 0
+    failed = backend.get(job['job_id'])
+    assert failed['status'] == 'failed' and failed['error']
+    assert job_to_progress(failed).to_dict()['status'] == 'failed'
+    print("✓ 中断任务重新执行")
+
+
+class QuickAdapter(BaseAdapter):
+    name = 'job_test'
+    display_name = 'Job Test Source'
+    description = '测试用数据源'
+    required_params = ['key']
+    optional_params = []
+    
+    def __init__(self):
+        super().__init__({})
+    
+    def fetch_papers(self, params):
+        return {'papers': [{'title': params['key']}], 'total_count': 1, 'has_more': False}
+
+
+def test_async_endpoint():
+    """接口返回任务ID，进度API从队列存储查询结果，队列满时返回429"""
+    source_registry.register('job_test', QuickAdapter())
+    original = app_module.job_queue
+    app_module.job_queue = JobQueue(make_backend(), app_module.run_fetch_job,
+                                    workers=1, max_pending=1, poll_interval=0.05)
+    client = app.test_client()
+    try:
+        response = client.post('/api/v1/fetch/async', json={'source': 'job_test', 'source_params': {'key': 'a'}})
+        assert response.status_code == 200
+        task_id = response.get_json()['data']['task_id']
+        
+        def finished():
+            task = client.get(f'/api/v1/progress/tasks/{task_id}').get_json()['data']['task']
+            return task['status'] == 'completed' and task['results']['papers'][0]['title'] == 'a'
+        assert wait_for(finished)
+        
+        assert client.post('/api/v1/fetch/async', json={'source': 'job_test'}).status_code == 400
+        
+        # 没有工作线程时任务留在队列中，第二个任务超出上限
+        app_module.job_queue.close()
+        app_module.job_queue = JobQueue(make_backend(), app_module.run_fetch_job, workers=0, max_pending=1)
+        payload = {'source': 'job_test', 'source_params': {'key': 'b'}}
+        assert client.post('/api/v1/fetch/async', json=payload).status_code == 200
+        response = client.post('/api/v1/fetch/async', json=payload)
+        assert response.status_code == 429 and response.headers['Retry-After']
+        assert response.get_json()['error']['code'] == 'QUEUE_FULL'
+    finally:
+        app_module.job_queue.close()
+        app_module.job_queue = original
+    print("✓ 异步抓取接口")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing fetch job queue")
+    print("=" * 50)
+    test_bounded_workers_and_admission()
+    test_results_survive_restart()
+    test_stale_jobs_requeued()
+    test_async_endpoint()
+    print("\n✅ All job queue tests passed")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+测试进程内LRU缓存（SimpleCache）
+
+python test_memory_cache.py 或 pytest test_memory_cache.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.append('.')
+
+from utils.cache import SimpleCache
+
+
+def test_lru_eviction_by_entries():
+    """超过条目上限时淘汰最久未使用的条目"""
+    cache = SimpleCache(max_size=3, sweep_interval=0)
+    for i in range(3):
+        cache.set('ieee', {'page': i}, {'papers': [i]})
+
+    cache.get('ieee', {'page': 0})          # page 0 变为最近使用
+    cache.set('ieee', {'page': 3}, {'papers': [3]})
+
+    assert cache.get('ieee', {'page': 1}) is None
+    assert cache.get('ieee', {'page': 0}) == {'papers': [0]}
+    assert cache.get_stats()['evictions'] == 1
+    print("✓ 按条目数LRU淘汰")
+
+
+def test_eviction_by_bytes():
+    """超过字节上限时淘汰，超大条目不缓存"""
+    cache = SimpleCache(max_size=100, max_bytes=300, sweep_interval=0)
+    payload = {'abstract': 'x' * 100}
+    for i in range(3):
+        cache.set('dblp', {'page': i}, payload)
+
+    stats = cache.get_stats()
+    assert stats['memory_bytes'] <= 300
+    assert stats['total_entries'] == 2 and stats['evictions'] == 1
+
+    cache.set('dblp', {'page': 'huge'}, {'abstract': 'x' * 1000})
+    assert cache.get('dblp', {'page': 'huge'}) is None
+    assert cache.get_stats()['total_entries'] == 2
+
+    # 超大的新数据不缓存，同一键的旧数据也不再返回
+    cache.set('dblp', {'page': 2}, {'abstract': 'x' * 1000})
+    assert cache.get('dblp', {'page': 2}) is None
+    stats = cache.get_stats()
+    assert stats['total_entries'] == 1 and stats['memory_bytes'] <= 150
+    print("✓ 按字节数淘汰")
+
+
+def test_overwrite_keeps_accounting():
+    """覆盖写入不重复计算字节数和数据源分布"""
+    cache = SimpleCache(sweep_interval=0)
+    cache.set('ieee', {'punumber': '1'}, {'papers': [1, 2, 3]})
+    cache.set('ieee', {'punumber': '1'}, {'papers': []})
+
+    stats = cache.get_stats()
+    assert stats['total_entries'] == 1
+    assert stats['source_distribution'] == {'ieee': 1}
+    assert stats['memory_bytes'] == len('{"papers": []}')
+    print("✓ 覆盖写入统计正确")
+
+
+def test_hit_miss_and_background_sweep():
+    """命中/未命中计数，后台线程清理过期条目"""
+    cache = SimpleCache(sweep_interval=0.05)
+    try:
+        cache.set('ieee', {'punumber': '1'}, {'papers': []}, ttl=0.1)
+        assert cache.get('ieee', {'punumber': '1'}) == {'papers': []}
+        assert cache.get('ieee', {'punumber': '2'}) is None
+
+        time.sleep(0.3)
+        stats = cache.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        assert stats['total_entries'] == 0 and stats['expirations'] == 1
+        assert stats['memory_bytes'] == 0
+    finally:
+        cache.close()
+    print("✓ 命中统计与后台过期清理")
+
+
+def test_sweeper_started_per_process():
+    """清理线程在第一次写入时启动，fork出的子进程写入时启动自己的清理线程"""
+    cache = SimpleCache(sweep_interval=0.05)
+    try:
+        assert cache._sweeper is None
+        cache.set('ieee', {'punumber': '1'}, {'papers': []})
+        assert cache._sweeper.is_alive() and cache._sweeper_pid == os.getpid()
+
+        if hasattr(os, 'fork'):
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                # 子进程中父进程的清理线程不存在，写入过期条目后应由子进程自己的线程清理
+                ok = False
+                try:
+                    cache.set('ieee', {'punumber': '2'}, {'papers': []}, ttl=0.05)
+                    time.sleep(0.3)
+                    ok = cache._sweeper_pid == os.getpid() and cache.get_stats()['expirations'] == 1
+                finally:
+                    os.write(write_fd, b'1' if ok else b'0')
+                    os._exit(0)
+            os.close(write_fd)
+            result = os.read(read_fd, 1)
+            os.close(read_fd)
+            os.waitpid(pid, 0)
+            assert result == b'1'
+    finally:
+        cache.close()
+    print("✓ 按进程启动清理线程")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing in-memory LRU cache")
+    print("=" * 50)
+    test_lru_eviction_by_entries()
+    test_eviction_by_bytes()
+    test_overwrite_keeps_accounting()
+    test_hit_miss_and_background_sweep()
+    test_sweeper_started_per_process()
+    print("\n✅ All memory cache tests passed")
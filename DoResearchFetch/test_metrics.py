@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+测试请求指标：耗时直方图和分位数、并发计数、缓存命中率/上游错误率、Prometheus导出和多进程合并
+
+python test_metrics.py 或 pytest test_metrics.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import multiprocessing
+
+sys.path.append('.')
+
+from app import app, source_registry
+from adapters.base import BaseAdapter
+from utils.exceptions import FetchError, ValidationError
+from utils.logging_config import MetricsCollector, log_api_call, metrics_collector
+
+
+class CountingAdapter(BaseAdapter):
+    """key为fail时抓取失败的测试数据源"""
+    
+    name = 'metrics_test'
+    display_name = 'Metrics Test Source'
+    description = '测试用数据源'
+    required_params = ['key']
+    optional_params = []
+    
+    def __init__(self):
+        super().__init__({})
+    
+    def fetch_papers(self, params):
+        if params['key'] == 'fail':
+            raise FetchError('upstream failed', error_code='TEST_ERROR')
+        return {'papers': [{'title': params['key']}], 'total_count': 1}
+
+
+def test_latency_percentiles():
+    """分位数由直方图估算，落在对应的桶内"""
+    collector = MetricsCollector()
+    for i in range(1, 101):
+        collector.record_request('ieee', True, i * 10)  # 10ms ~ 1000ms
+    
+    metrics = collector.get_metrics()
+    latency = metrics['latency_ms']
+    assert metrics['requests_total'] == 100 and latency['avg'] == 505
+    assert 250 <= latency['p50'] <= 500
+    assert 500 <= latency['p95'] <= 1000 and latency['p95'] <= latency['p99'] <= 1000
+    assert metrics['sources']['ieee']['latency_ms'] == latency
+    print(f"✓ 分位数 p50={latency['p50']} p95={latency['p95']} p99={latency['p99']}")
+
+
+def test_concurrent_recording():
+    """多线程并发记录不丢失计数"""
+    collector = MetricsCollector(shards=4)
+    
+    def work():
+        for _ in range(2000):
+            collector.record_request('dblp', True, 12.5)
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    metrics = collector.get_metrics()
+    assert metrics['requests_total'] == 16000
+    assert metrics['sources']['dblp']['requests'] == 16000
+    print("✓ 并发记录16000次请求")
+
+
+def test_ratios_and_in_flight():
+    """缓存命中率只按请求数计算，上游错误率不包含缓存命中和参数错误"""
+    collector = MetricsCollector()
+    for outcome, count in [('success', 6), ('error', 2), ('cache_hit', 8), ('rejected', 4)]:
+        for _ in range(count):
+            collector.record_request('ieee', outcome != 'error', 5, outcome=outcome)
+    
+    with collector.track_in_flight('ieee'):
+        with collector.track_in_flight('ieee'):
+            assert collector.get_metrics()['sources']['ieee']['in_flight'] == 2
+    
+    source = collector.get_metrics()['sources']['ieee']
+    assert source['requests'] == 20 and source['cache_hit_ratio'] == 0.4
+    assert source['upstream_error_rate'] == 0.25 and source['in_flight'] == 0
+    print("✓ 缓存命中率、上游错误率和进行中的请求")
+
+
+def test_prometheus_endpoint():
+    """/metrics返回Prometheus文本格式，缓存命中和上游失败分别计数"""
+    source_registry.register('metrics_test', CountingAdapter())
+    key = f'k-{time.time()}'
+    
+    with app.test_client() as client:
+        for params in [{'key': key}, {'key': key}, {'key': 'fail'}]:
+            client.post('/api/v1/fetch', json={'source': 'metrics_test', 'source_params': params})
+        response = client.get('/metrics')
+    
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert '# TYPE do_research_fetch_request_duration_seconds histogram' in body
+    for outcome in ['success', 'cache_hit', 'error']:
+        assert f'do_research_fetch_requests_total{{source="metrics_test",outcome="{outcome}"}} 1' in body
+    assert 'do_research_fetch_errors_total{type="FetchError"}' in body
+    
+    buckets = [line for line in body.splitlines()
+               if line.startswith('do_research_fetch_request_duration_seconds_bucket{source="metrics_test",outcome="success"')]
+    assert buckets[-1].split('le="')[1].startswith('+Inf') and buckets[-1].endswith(' 1')
+    print("✓ Prometheus导出")
+
+
+def test_log_api_call_outcomes():
+    """参数校验失败计为rejected，按异常类型统计错误"""
+    before = metrics_collector.get_metrics()
+    log_api_call('metrics_test', {}, False, 0, 0, ValidationError('bad'))
+    after = metrics_collector.get_metrics()
+    
+    assert after['requests_error'] == before['requests_error'] + 1
+    assert after['error_types']['ValidationError'] == before['error_types'].get('ValidationError', 0) + 1
+    assert after['sources']['metrics_test']['upstream_errors'] == \
+        before['sources'].get('metrics_test', {}).get('upstream_errors', 0)
+    print("✓ 参数错误不计入上游错误")
+
+
+def test_shared_store_across_processes():
+    """共享目录下合并各进程的计数，已退出进程的计数归档后保留，进行中的请求数只统计存活进程"""
+    if not hasattr(os, 'fork'):
+        print("⚠️ 当前平台不支持fork，跳过")
+        return
+    directory = tempfile.mkdtemp()
+    collector = MetricsCollector()
+    collector.enable_shared_store(directory)
+    collector.record_request('shared', True, 10)
+    
+    def worker(count):
+        # 与gunicorn --preload相同，收集器在已记录过指标的进程中创建后被fork到工作进程
+        for _ in range(count):
+            collector.record_request('shared', False, 20, error_type='FetchError')
+        collector._add_in_flight('shared', 1)
+        collector.flush()
+    
+    context = multiprocessing.get_context('fork')
+    for count in (2, 3):
+        process = context.Process(target=worker, args=(count,))
+        process.start()
+        process.join()
+    
+    for _ in range(2):
+        metrics = collector.get_metrics()
+        shared = metrics['sources']['shared']
+        assert shared['requests'] == 6 and shared['upstream_errors'] == 5
+        assert shared['in_flight'] == 0 and metrics['error_types'] == {'FetchError': 5}
+    
+    assert os.path.exists(os.path.join(directory, 'archive.json'))
+    assert len([name for name in os.listdir(directory) if name.startswith('metrics_')]) == 1
+    body = collector.render_prometheus()
+    assert 'do_research_fetch_requests_total{source="shared",outcome="error"} 5' in body
+    assert 'do_research_fetch_requests_total{source="shared",outcome="success"} 1' in body
+    print("✓ 多进程指标合并")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing metrics")
+    print("=" * 50)
+    test_latency_percentiles()
+    test_concurrent_recording()
+    test_ratios_and_in_flight()
+    test_prometheus_endpoint()
+    test_log_api_call_outcomes()
+    test_shared_store_across_processes()
+    print("\n✅ All metrics tests passed")
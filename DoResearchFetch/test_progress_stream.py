@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+测试任务进度推送：更新合并、SSE接口、连接数上限和异步任务的进度关联
+
+python test_progress_stream.py 或 pytest test_progress_stream.py
+"""
+
+import sys
+import time
+import threading
+
+sys.path.append('.')
+
+import app as app_module
+from app import app
+from utils.progress_monitor import (ProgressManager, progress_manager, create_progress_tracker,
+                                    bind_task)
+
+
+def run_updates(manager, task_id, count, delay=0.0):
+    """在后台线程中快速更新进度后完成任务"""
+    def work():
+        time.sleep(0.05)
+        for i in range(count):
+            manager.increment_progress(task_id, operation=f"处理 {i + 1}/{count}")
+            time.sleep(delay)
+        manager.complete_task(task_id, {'papers_count': count})
+    thread = threading.Thread(target=work)
+    thread.start()
+    return thread
+
+
+def test_watch_coalesces_updates():
+    """短时间内的大量更新合并为少量快照，最后一个快照是结束状态"""
+    manager = ProgressManager()
+    task_id = manager.create_task('ieee-test', 500, "抓取")
+    manager.start_task(task_id, "抓取")
+    thread = run_updates(manager, task_id, 500, delay=0.001)
+    
+    snapshots = [s for s in manager.watch(task_id, min_interval=0.1, keepalive=5) if s is not None]
+    thread.join()
+    
+    assert 2 <= len(snapshots) < 50
+    assert snapshots[-1]['status'] == 'completed' and snapshots[-1]['processed_items'] == 500
+    print(f"✓ 500次更新合并为 {len(snapshots)} 个快照")
+
+
+def test_watch_uses_fallback():
+    """本进程中没有的任务通过fallback查询，结束后停止"""
+    manager = ProgressManager()
+    other = ProgressManager()
+    task_id = other.create_task('dblp', 10, "排队中")
+    
+    def finish():
+        time.sleep(0.1)
+        other.complete_task(task_id, {'papers_count': 10})
+    threading.Thread(target=finish).start()
+    
+    snapshots = list(manager.watch(task_id, fallback=other.get_task, poll_interval=0.05, keepalive=5))
+    assert [s['status'] for s in snapshots] == ['pending', 'completed']
+    print("✓ 查询其他进程的任务")
+
+
+def test_bound_tracker_uses_task_id():
+    """绑定任务ID后，适配器内部的进度追踪器使用该ID"""
+    with bind_task('job-abc'):
+        with create_progress_tracker('ieee-1', 10, "抓取") as tracker:
+            tracker.increment()
+    assert tracker.task_id == 'job-abc'
+    assert progress_manager.get_task('job-abc').processed_items == 1
+    
+    with create_progress_tracker('ieee-1', 10, "抓取") as tracker:
+        pass
+    assert tracker.task_id != 'job-abc'
+    print("✓ 进度追踪器关联异步任务")
+
+
+def test_sse_endpoint():
+    """SSE接口推送progress事件，任务结束时推送end事件"""
+    client = app.test_client()
+    assert client.get('/api/v1/progress/tasks/missing/stream').status_code == 404
+    
+    task_id = progress_manager.create_task('nsfc-news', 20, "抓取")
+    progress_manager.start_task(task_id, "抓取")
+    thread = run_updates(progress_manager, task_id, 20, delay=0.01)
+    
+    response = client.get(f'/api/v1/progress/tasks/{task_id}/stream')
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    thread.join()
+    
+    assert body.startswith('id: 1\nevent: progress\n')
+    assert body.count('event: end') == 1 and body.rstrip().endswith('}')
+    assert '"processed_items": 20' in body.split('event: end')[1]
+    print("✓ SSE进度推送")
+
+
+def test_sse_stream_limit():
+    """同时推送的连接数达到上限时返回429和进度接口地址，连接关闭后释放名额"""
+    slots = app_module.progress_stream_slots
+    app_module.progress_stream_slots = threading.BoundedSemaphore(1)
+    client = app.test_client()
+    task_id = progress_manager.create_task('nsfc-news', 5, "抓取")
+    progress_manager.start_task(task_id, "抓取")
+    try:
+        first = client.get(f'/api/v1/progress/tasks/{task_id}/stream', buffered=False)
+        assert first.status_code == 200
+        
+        rejected = client.get(f'/api/v1/progress/tasks/{task_id}/stream')
+        assert rejected.status_code == 429 and rejected.headers['Retry-After'] == '5'
+        body = rejected.get_json()
+        assert body['error']['code'] == 'TOO_MANY_STREAMS'
+        assert body['error']['details']['progress_url'] == f'/api/v1/progress/tasks/{task_id}'
+        
+        first.close()
+        second = client.get(f'/api/v1/progress/tasks/{task_id}/stream', buffered=False)
+        assert second.status_code == 200
+        second.close()
+    finally:
+        progress_manager.complete_task(task_id, {'papers_count': 5})
+        app_module.progress_stream_slots = slots
+    print("✓ 推送连接数上限")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing progress streaming")
+    print("=" * 50)
+    test_watch_coalesces_updates()
+    test_watch_uses_fallback()
+    test_bound_tracker_uses_task_id()
+    test_sse_endpoint()
+    test_sse_stream_limit()
+    print("\n✅ All progress streaming tests passed")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+测试上游请求限流
+
+python test_rate_limiter.py 或 pytest test_rate_limiter.py
+"""
+
+import sys
+import time
+import asyncio
+from email.utils import formatdate
+
+sys.path.append('.')
+
+from utils.exceptions import RateLimitError
+from utils.rate_limiter import (RateLimiter, MemoryRateLimitBackend, make_host_limit,
+                                parse_host_limits, parse_retry_after)
+
+URL = 'https://api.example.org/search?q=test'
+
+
+def make_limiter(per_minute=600, per_hour=100000, max_wait=5, host_limits=None):
+    return RateLimiter(MemoryRateLimitBackend(), make_host_limit(per_minute, per_hour),
+                       host_limits=host_limits, max_wait=max_wait)
+
+
+def test_token_bucket_paces_requests():
+    """突发配额用完后按速率放行"""
+    limiter = make_limiter(per_minute=600)  # 10次/秒，突发10次
+    start = time.perf_counter()
+    waits = [limiter.acquire(URL) for _ in range(15)]
+    elapsed = time.perf_counter() - start
+    
+    assert all(wait == 0 for wait in waits[:10])
+    assert 0.4 <= elapsed < 1.0
+    stats = limiter.get_stats()['hosts']['api.example.org']
+    assert stats['requests'] == 15 and stats['delayed'] == 5
+    print(f"✓ 令牌桶限速：15次请求耗时 {elapsed:.2f}s")
+
+
+def test_retry_after_blocks_host():
+    """429响应的Retry-After暂停该主机，超过最长等待时间时直接拒绝"""
+    limiter = make_limiter(max_wait=5)
+    assert limiter.update_from_response(URL, 429, {'Retry-After': '30'}) == 30
+    try:
+        limiter.acquire(URL)
+        assert False, "应当抛出RateLimitError"
+    except RateLimitError as e:
+        assert 29 <= e.details['retry_after'] <= 30
+    
+    # 其他主机不受影响
+    assert limiter.acquire('https://dblp.org/search') == 0
+    
+    # HTTP日期格式
+    assert 8 <= parse_retry_after(formatdate(time.time() + 10, usegmt=True), time.time()) <= 10
+    # 200响应的Retry-After不生效
+    assert make_limiter().update_from_response(URL, 200, {'Retry-After': '30'}) == 0
+    print("✓ Retry-After暂停主机")
+
+
+def test_elsevier_quota_headers():
+    """X-RateLimit-Remaining为0时暂停到X-RateLimit-Reset"""
+    limiter = make_limiter()
+    reset = time.time() + 120
+    headers = {'X-RateLimit-Limit': '20000', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(reset))}
+    pause = limiter.update_from_response('https://api.elsevier.com/content/search', 200, headers)
+    assert 118 <= pause <= 120
+    
+    headers['X-RateLimit-Remaining'] = '15'
+    assert make_limiter().update_from_response('https://api.elsevier.com/x', 200, headers) == 0
+    print("✓ Elsevier配额用尽时暂停")
+
+
+def test_short_block_waits():
+    """暂停时间在最长等待时间内时等待后放行"""
+    limiter = make_limiter()
+    limiter.block(URL, 0.3)
+    waited = limiter.acquire(URL)
+    assert 0.25 <= waited <= 0.5
+    print("✓ 短暂停等待后放行")
+
+
+def test_async_acquire_shares_buckets():
+    """异步取令牌与同步共用令牌桶"""
+    limiter = make_limiter(per_minute=600)
+    for _ in range(10):
+        limiter.acquire(URL)
+    
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire_async(URL) for _ in range(3)))
+        return time.perf_counter() - start
+    
+    elapsed = asyncio.run(run())
+    assert 0.2 <= elapsed < 0.6
+    print("✓ 异步取令牌")
+
+
+def test_host_limits_and_fallback():
+    """按主机和上级域名匹配限额；共享状态出错时退回进程内状态"""
+    limits = parse_host_limits('ieee.org=120/5000,api.elsevier.com=60', default_per_hour=1000)
+    assert limits['api.elsevier.com'].per_hour == 1000
+    limiter = make_limiter(host_limits=limits)
+    assert limiter.limit_for('ieeexplore.ieee.org').per_minute == 120
+    assert limiter.limit_for('dblp.org').per_minute == 600
+    
+    class BrokenBackend:
+        name = 'redis'
+        
+        def reserve(self, host, limit, now):
+            raise ConnectionError("redis down")
+        
+        def block(self, host, until, now):
+            raise ConnectionError("redis down")
+    
+    limiter = RateLimiter(BrokenBackend(), make_host_limit(600, 100000), max_wait=5)
+    assert limiter.acquire(URL) == 0
+    limiter.block(URL, 0.2)
+    assert limiter.acquire(URL) > 0
+    assert limiter.get_stats()['backend_errors'] >= 3
+    print("✓ 主机限额匹配和共享状态降级")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing upstream rate limiter")
+    print("=" * 50)
+    test_token_bucket_paces_requests()
+    test_retry_after_blocks_host()
+    test_elsevier_quota_headers()
+    test_short_block_waits()
+    test_async_acquire_shares_buckets()
+    test_host_limits_and_fallback()
+    print("\n✅ All rate limiter tests passed")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+测试Redis共享缓存与两级缓存
+
+使用进程内的FakeRedis代替真实Redis服务，无需启动Redis即可运行：
+python test_redis_cache.py 或 pytest test_redis_cache.py
+"""
+
+import sys
+import time
+import fnmatch
+
+sys.path.append('.')
+
+from utils import cache as cache_module
+from utils.cache import SimpleCache, RedisCache, TieredCache, create_cache
+
+
+class FakeRedis:
+    """实现缓存用到的Redis命令子集（GET/SET EX/TTL/DELETE/SCAN）"""
+
+    def __init__(self):
+        self.store = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("fake redis unavailable")
+
+    def _alive(self, key):
+        entry = self.store.get(key)
+        if entry and entry[1] is not None and time.time() >= entry[1]:
+            del self.store[key]
+            return None
+        return entry
+
+    def ping(self):
+        self._check()
+        return True
+
+    def get(self, key):
+        self._check()
+        entry = self._alive(key)
+        return entry[0].encode() if entry else None
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.store[key] = (value, time.time() + ex if ex else None)
+        return True
+
+    def ttl(self, key):
+        self._check()
+        entry = self._alive(key)
+        if not entry:
+            return -2
+        return -1 if entry[1] is None else int(entry[1] - time.time())
+
+    def delete(self, *keys):
+        self._check()
+        keys = [key.decode() if isinstance(key, bytes) else key for key in keys]
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+    def scan_iter(self, match='*', count=None):
+        self._check()
+        return [key.encode() for key in list(self.store) if self._alive(key) and fnmatch.fnmatch(key, match)]
+
+
+def make_worker(redis_client, l1_ttl=60):
+    """模拟一个工作进程：独立的L1 + 共享的Redis"""
+    return TieredCache(SimpleCache(default_ttl=3600, max_size=100),
+                       RedisCache(redis_client, default_ttl=3600), l1_ttl=l1_ttl)
+
+
+def test_shared_between_workers():
+    """一个工作进程写入的结果其他进程可以读取"""
+    redis_client = FakeRedis()
+    worker_a, worker_b = make_worker(redis_client), make_worker(redis_client)
+    params = {'punumber': '6287639', 'limit': 20}
+
+    worker_a.set('ieee', params, {'papers': [{'title': '论文'}], 'total_count': 1})
+    assert worker_b.get('ieee', params) == {'papers': [{'title': '论文'}], 'total_count': 1}
+    assert worker_b.get('ieee', params)['total_count'] == 1
+
+    stats = worker_b.get_stats()
+    assert stats['l2_hits'] == 1 and stats['l1_hits'] == 1
+    assert stats['l2']['source_distribution'] == {'ieee': 1}
+    print("✓ 工作进程之间共享缓存")
+
+
+def test_l1_bounded_by_remaining_ttl():
+    """回填L1时不超过L2中剩余的TTL"""
+    redis_client = FakeRedis()
+    writer, reader = make_worker(redis_client), make_worker(redis_client, l1_ttl=600)
+    writer.set('dblp', {'dblp_id': 'icse'}, {'papers': []}, ttl=5)
+
+    assert reader.get('dblp', {'dblp_id': 'icse'}) == {'papers': []}
+    key = reader.l1._generate_key('dblp', {'dblp_id': 'icse'})
+    assert reader.l1._cache[key]['expires_at'] - time.time() <= 5
+    print("✓ L1回填遵守L2剩余TTL")
+
+
+def test_clear():
+    """清空只删除本缓存的键"""
+    redis_client = FakeRedis()
+    redis_client.set('other:key', 'keep')
+    worker = make_worker(redis_client)
+    worker.set('ieee', {'punumber': '1'}, {'papers': []})
+    worker.set('elsevier', {'pnumber': '2'}, {'papers': []})
+
+    worker.clear()
+    assert worker.get('ieee', {'punumber': '1'}) is None
+    assert list(redis_client.store) == ['other:key']
+    print("✓ 清空缓存不影响其他键")
+
+
+def test_degrades_when_redis_fails():
+    """Redis出错时降级为进程内缓存，不抛出异常"""
+    redis_client = FakeRedis()
+    worker = make_worker(redis_client)
+    redis_client.fail = True
+
+    worker.set('ieee', {'punumber': '1'}, {'papers': [1]})
+    assert worker.get('ieee', {'punumber': '1'}) == {'papers': [1]}
+    assert worker.get('ieee', {'punumber': '2'}) is None
+    assert worker.get_stats()['l2_errors'] == 2
+    print("✓ Redis不可用时降级为进程内缓存")
+
+
+def test_create_cache_fallback():
+    """未配置或无法连接Redis时使用进程内缓存"""
+    assert isinstance(create_cache(None), SimpleCache)
+    assert isinstance(create_cache('redis://127.0.0.1:1/0'), SimpleCache)
+    print("✓ 无Redis时退回SimpleCache")
+
+
+def test_helpers_use_configured_backend():
+    """get_cached_result/cache_result使用当前配置的缓存后端"""
+    original = cache_module.cache
+    cache_module.cache = make_worker(FakeRedis())
+    try:
+        cache_module.cache_result('ieee', {'punumber': '1'}, {'papers': [], 'cache_hit': False})
+        result = cache_module.get_cached_result('ieee', {'punumber': '1'})
+        assert result == {'papers': [], 'cache_hit': True}
+    finally:
+        cache_module.cache = original
+    print("✓ 便捷函数使用配置的缓存后端")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing Redis-backed fetch cache")
+    print("=" * 50)
+    test_shared_between_workers()
+    test_l1_bounded_by_remaining_ttl()
+    test_clear()
+    test_degrades_when_redis_fails()
+    test_create_cache_fallback()
+    test_helpers_use_configured_backend()
+    print("\n✅ All cache tests passed")
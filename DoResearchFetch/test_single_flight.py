@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试抓取请求合并（SingleFlight）
+
+python test_single_flight.py 或 pytest test_single_flight.py
+"""
+
+import sys
+import time
+import threading
+
+sys.path.append('.')
+
+from utils.single_flight import SingleFlight
+
+
+def run_concurrently(flight, key, func, count):
+    """并发发起count个相同请求，返回各请求的(结果, 是否合并)或异常"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = flight.do(key, func)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_requests_share_one_call():
+    """并发的相同请求只执行一次"""
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'papers': [1, 2, 3]}
+
+    results = run_concurrently(flight, 'ieee:abc', fetch, 8)
+    assert len(calls) == 1
+    assert all(result == {'papers': [1, 2, 3]} for result, _ in results)
+    assert sum(1 for _, shared in results if shared) == 7
+
+    stats = flight.get_stats()
+    assert stats['executions'] == 1 and stats['coalesced'] == 7 and stats['in_flight'] == 0
+    print("✓ 并发相同请求只执行一次")
+
+
+def test_errors_propagate_to_waiters():
+    """执行失败时所有等待者收到同一异常，之后的请求重新执行"""
+    flight = SingleFlight()
+
+    def failing_fetch():
+        time.sleep(0.1)
+        raise RuntimeError("upstream timeout")
+
+    results = run_concurrently(flight, 'ieee:abc', failing_fetch, 4)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.get_stats()['errors'] == 1
+
+    assert flight.do('ieee:abc', lambda: 'ok') == ('ok', False)
+    print("✓ 异常传递给等待者，失败后可重新执行")
+
+
+def test_abandoned_call_reexecuted_by_waiter():
+    """执行者中途放弃（如流式客户端断开）时，等待者重新执行而不是共享失败"""
+    flight = SingleFlight()
+    call, _ = flight.acquire('ieee:abc')
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(flight.do('ieee:abc', lambda: 'fresh')))
+    waiter.start()
+    time.sleep(0.1)
+    flight.release('ieee:abc', call, abandoned=True)
+    waiter.join()
+
+    assert results == [('fresh', False)]
+    stats = flight.get_stats()
+    assert stats['abandoned'] == 1 and stats['in_flight'] == 0
+    print("✓ 执行者放弃后等待者重新执行")
+
+
+def test_different_keys_not_coalesced():
+    """不同的键互不影响"""
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.get_stats()['coalesced'] == 0
+    print("✓ 不同请求不合并")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing fetch request coalescing")
+    print("=" * 50)
+    test_concurrent_requests_share_one_call()
+    test_errors_propagate_to_waiters()
+    test_abandoned_call_reexecuted_by_waiter()
+    test_different_keys_not_coalesced()
+    print("\n✅ All single-flight tests passed")
@@ -140,9 +140,38 @@ def test_cache_performance():
         print(f"❌ Performance test failed: {e}")
         return False
 
+def test_thread_connections_released():
+    """测试短生命周期线程结束后其数据库连接被关闭，不会累积"""
+    print("\n🔌 Testing per-thread connection cleanup")
+    print("-" * 30)
+    
+    sys.path.append('.')
+    
+    import gc
+    import os
+    import tempfile
+    import threading
+    from utils.abstract_cache import SQLiteAbstractCache
+    
+    cache = SQLiteAbstractCache(os.path.join(tempfile.mkdtemp(), 'abstract_cache.db'))
+    cache.set_many([{'article_id': '1', 'url': 'u', 'title': 't', 'abstract': 'a' * 200}], 'test')
+    
+    for _ in range(200):
+        thread = threading.Thread(target=cache.get_many, args=(['1'], 'test'))
+        thread.start()
+        thread.join()
+    gc.collect()
+    
+    assert len(cache._connections) <= 1, len(cache._connections)
+    assert cache.get_many(['1'], 'test') == {'1': 'a' * 200}
+    cache.close()
+    print(f"✓ {len(cache._connections)} connection(s) tracked after 200 threads")
+    return True
+
 if __name__ == "__main__":
     # 运行基本功能测试
     basic_success = test_sqlite_cache()
+    test_thread_connections_released()
     
     # 运行性能测试
     if basic_success:
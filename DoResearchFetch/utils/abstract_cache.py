@@ -2,12 +2,17 @@
 摘要缓存管理器（SQLite版本）
 用于存储和管理已抓取的完整摘要，避免重复请求
 使用SQLite3数据库提供高性能存储和查询
+
+每个线程复用一个WAL模式的连接，线程结束后连接随之关闭；get_many/set_many用一次查询或一个事务
+处理一整期论文；过期条目在读取时跳过，累积到一定数量后批量删除
 """
 
+import os
 import sqlite3
 import time
 import hashlib
 import threading
+import weakref
 from typing import Dict, Optional, List, Any, Tuple
 from dataclasses import dataclass
 from pathlib import Path
@@ -42,20 +47,42 @@ class AbstractCacheEntry:
         }
 
 
+class _ThreadConnection:
+    """线程持有的数据库连接；线程结束、线程局部数据被回收时关闭连接"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.pid = os.getpid()
+        weakref.finalize(self, conn.close)
+
+
 class SQLiteAbstractCache:
     """基于SQLite的摘要缓存管理器"""
     
-    def __init__(self, db_file: str = "abstract_cache.db", max_age_days: int = 30):
+    # IN (...) 查询每批的参数个数，低于SQLite默认的变量数上限
+    QUERY_CHUNK_SIZE = 500
+    
+    def __init__(self, db_file: str = "abstract_cache.db", max_age_days: int = 30,
+                 expiry_batch_size: int = 200, expiry_interval: float = 3600):
         """
         初始化SQLite摘要缓存
         
         Args:
             db_file: 数据库文件路径
             max_age_days: 缓存最大保存天数
+            expiry_batch_size: 读取时累计发现多少条过期条目后批量删除
+            expiry_interval: 发现过期条目时，距上次批量删除超过该秒数也会触发删除
         """
         self.db_file = Path(db_file)
         self.max_age_seconds = max_age_days * 24 * 3600
-        self._lock = threading.RLock()  # 线程安全锁
+        self.expiry_batch_size = expiry_batch_size
+        self.expiry_interval = expiry_interval
+        self._lock = threading.RLock()  # 写操作锁
+        self._local = threading.local()
+        # 只弱引用各线程的连接，不阻止线程结束后连接被关闭
+        self._connections: 'weakref.WeakSet[_ThreadConnection]' = weakref.WeakSet()
+        self._expired_seen = 0
+        self._last_purge = time.time()
         
         # 确保数据库目录存在
         self.db_file.parent.mkdir(parents=True, exist_ok=True)
@@ -105,13 +132,35 @@ class SQLiteAbstractCache:
     
     @contextmanager
     def _get_connection(self):
-        """获取数据库连接（上下文管理器）"""
-        conn = sqlite3.connect(str(self.db_file), timeout=30)
-        conn.row_factory = sqlite3.Row  # 支持按列名访问
+        """获取当前线程的数据库连接（上下文管理器，连接在线程内复用）"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None or holder.pid != os.getpid():
+            conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row  # 支持按列名访问
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            holder = _ThreadConnection(conn)
+            self._local.holder = holder
+            with self._lock:
+                self._connections.add(holder)
+        
+        conn = holder.conn
         try:
             yield conn
-        finally:
-            conn.close()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def close(self) -> None:
+        """关闭所有线程的连接"""
+        with self._lock:
+            for holder in list(self._connections):
+                try:
+                    holder.conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+            self._local = threading.local()
     
     def get(self, article_id: str, source: str = "ieee") -> Optional[str]:
         """
@@ -124,35 +173,74 @@ class SQLiteAbstractCache:
         Returns:
             缓存的摘要文本，如果不存在或过期则返回None
         """
-        with self._lock:
-            try:
-                with self._get_connection() as conn:
-                    cursor = conn.execute("""
-                        SELECT abstract, cached_time FROM abstract_cache 
-                        WHERE article_id = ? AND source = ?
-                    """, (article_id, source))
+        return self.get_many([article_id], source).get(article_id)
+    
+    def get_many(self, article_ids: List[str], source: str = "ieee") -> Dict[str, str]:
+        """
+        批量获取缓存的摘要
+        
+        Args:
+            article_ids: 文章ID列表
+            source: 数据源
+            
+        Returns:
+            {文章ID: 摘要}，不包含不存在或已过期的条目
+        """
+        article_ids = list(dict.fromkeys(article_ids))
+        if not article_ids:
+            return {}
+        
+        try:
+            cutoff_time = time.time() - self.max_age_seconds
+            abstracts = {}
+            expired = 0
+            
+            with self._get_connection() as conn:
+                for start in range(0, len(article_ids), self.QUERY_CHUNK_SIZE):
+                    chunk = article_ids[start:start + self.QUERY_CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor = conn.execute(f"""
+                        SELECT article_id, abstract, cached_time FROM abstract_cache 
+                        WHERE source = ? AND article_id IN ({placeholders})
+                    """, [source, *chunk])
                     
-                    row = cursor.fetchone()
-                    if row:
-                        abstract, cached_time = row['abstract'], row['cached_time']
-                        
-                        # 检查是否过期
-                        if time.time() - cached_time < self.max_age_seconds:
-                            return abstract
+                    for row in cursor.fetchall():
+                        if row['cached_time'] >= cutoff_time:
+                            abstracts[row['article_id']] = row['abstract']
                         else:
-                            # 删除过期条目
-                            conn.execute("""
-                                DELETE FROM abstract_cache 
-                                WHERE article_id = ? AND source = ?
-                            """, (article_id, source))
-                            conn.commit()
-                            print(f"Removed expired cache entry: {source}:{article_id}")
-                
-                return None
-                
-            except Exception as e:
-                print(f"Error getting cached abstract: {e}")
-                return None
+                            expired += 1
+            
+            if expired:
+                self._note_expired(expired)
+            return abstracts
+            
+        except Exception as e:
+            print(f"Error getting cached abstracts: {e}")
+            return {}
+    
+    def _note_expired(self, count: int) -> None:
+        """记录读取时遇到的过期条目，累积足够多或间隔足够久时批量删除"""
+        with self._lock:
+            self._expired_seen += count
+            if (self._expired_seen < self.expiry_batch_size and
+                    time.time() - self._last_purge < self.expiry_interval):
+                return
+            self._expired_seen = 0
+            self._last_purge = time.time()
+        
+        try:
+            self._purge_expired()
+        except Exception as e:
+            print(f"Error purging expired cache entries: {e}")
+    
+    def _purge_expired(self) -> int:
+        """在一个事务中删除所有过期条目，返回删除数量"""
+        cutoff_time = time.time() - self.max_age_seconds
+        with self._lock:
+            with self._get_connection() as conn:
+                cursor = conn.execute("DELETE FROM abstract_cache WHERE cached_time < ?", (cutoff_time,))
+                conn.commit()
+                return cursor.rowcount
     
     def set(self, article_id: str, url: str, title: str, abstract: str, source: str = "ieee") -> bool:
         """
@@ -168,38 +256,61 @@ class SQLiteAbstractCache:
         Returns:
             是否成功缓存
         """
-        if not abstract or len(abstract) < 50:  # 过滤太短的摘要
-            return False
+        return self.set_many([{
+            'article_id': article_id,
+            'url': url,
+            'title': title,
+            'abstract': abstract
+        }], source) == 1
+    
+    def set_many(self, entries: List[Dict[str, str]], source: str = "ieee") -> int:
+        """
+        批量设置摘要缓存（一个事务）
+        
+        Args:
+            entries: 包含article_id、url、title、abstract的字典列表
+            source: 数据源
+            
+        Returns:
+            成功缓存的条目数
+        """
+        cached_time = time.time()
+        rows = []
+        for item in entries:
+            abstract = item.get('abstract')
+            if not abstract or len(abstract) < 50:  # 过滤太短的摘要
+                continue
+            entry = AbstractCacheEntry(
+                article_id=item['article_id'],
+                url=item.get('url', ''),
+                title=item.get('title', ''),
+                abstract=abstract,
+                cached_time=cached_time,
+                source=source
+            )
+            rows.append((
+                entry.article_id, entry.source, entry.url, entry.title,
+                entry.abstract, entry.abstract_hash, entry.cached_time
+            ))
+        
+        if not rows:
+            return 0
         
         with self._lock:
             try:
-                entry = AbstractCacheEntry(
-                    article_id=article_id,
-                    url=url,
-                    title=title,
-                    abstract=abstract,
-                    cached_time=time.time(),
-                    source=source
-                )
-                
                 with self._get_connection() as conn:
                     # 使用 INSERT OR REPLACE 语句
-                    conn.execute("""
+                    conn.executemany("""
                         INSERT OR REPLACE INTO abstract_cache 
                         (article_id, source, url, title, abstract, abstract_hash, cached_time)
                         VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        entry.article_id, entry.source, entry.url, entry.title,
-                        entry.abstract, entry.abstract_hash, entry.cached_time
-                    ))
-                    
+                    """, rows)
                     conn.commit()
-                    print(f"✓ Cached abstract for {source}:{article_id} ({len(abstract)} chars)")
-                    return True
+                    return len(rows)
                     
             except Exception as e:
-                print(f"Error caching abstract: {e}")
-                return False
+                print(f"Error caching abstracts: {e}")
+                return 0
     
     def has(self, article_id: str, source: str = "ieee") -> bool:
         """
@@ -383,8 +494,13 @@ class SQLiteAbstractCache:
                 return []
 
 
+def _create_abstract_cache() -> SQLiteAbstractCache:
+    from config import Config
+    return SQLiteAbstractCache(Config.ABSTRACT_CACHE_DB)
+
+
 # 全局缓存实例
-abstract_cache = SQLiteAbstractCache()
+abstract_cache = _create_abstract_cache()
 
 
 # 工具函数
@@ -398,6 +514,16 @@ def cache_abstract(article_id: str, url: str, title: str, abstract: str, source:
     return abstract_cache.set(article_id, url, title, abstract, source)
 
 
+def get_cached_abstracts(article_ids: List[str], source: str = "ieee") -> Dict[str, str]:
+    """批量获取缓存的摘要"""
+    return abstract_cache.get_many(article_ids, source)
+
+
+def cache_abstracts(entries: List[Dict[str, str]], source: str = "ieee") -> int:
+    """批量缓存摘要"""
+    return abstract_cache.set_many(entries, source)
+
+
 def has_cached_abstract(article_id: str, source: str = "ieee") -> bool:
     """检查是否有缓存摘要"""
     return abstract_cache.has(article_id, source)
\ No newline at end of file
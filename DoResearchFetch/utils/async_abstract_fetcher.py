@@ -5,13 +5,16 @@
 
 import asyncio
 import aiohttp
+import codecs
 import json
 import re
 import time
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+logger = logging.getLogger('do_research_fetch.abstracts')
+
 
 @dataclass
 class FetchMetrics:
@@ -22,20 +25,140 @@ class FetchMetrics:
     total_time: float
     avg_response_time: float
     error_count: int
+    bytes_read: int = 0
+
+
+class IEEEMetadataExtractor:
+    """
+    IEEE文章页面元数据的流式提取器
+
+    逐块接收页面内容，找到xplGlobal.document.metadata后按括号匹配扫描JSON对象，
+    对象完整读取后立即结束，无需下载和解析整个页面
+    """
+    
+    MARKER = 'xplGlobal.document.metadata='
+    # 扫描JSON时只需关注的字符：括号、引号和转义符
+    _TOKEN = re.compile(r'[{}"\\]')
+    
+    def __init__(self, encoding: str = 'utf-8'):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.text = ''
+        self.bytes_read = 0
+        self.metadata: Optional[Dict] = None
+        self.done = False
+        
+        self._search_from = 0
+        self._start: Optional[int] = None
+        self._scan_pos = 0
+        self._depth = 0
+        self._in_string = False
+    
+    def feed(self, chunk: bytes) -> bool:
+        """
+        输入一块页面内容
+        
+        Returns:
+            元数据对象是否已经读取完整（之后的内容不再需要）
+        """
+        if self.done:
+            return True
+        
+        self.bytes_read += len(chunk)
+        self.text += self._decoder.decode(chunk)
+        
+        if self._start is None and not self._find_start():
+            return False
+        return self._scan()
+    
+    def _find_start(self) -> bool:
+        """查找元数据JSON的起始位置"""
+        index = self.text.find(self.MARKER, self._search_from)
+        if index < 0:
+            # 保留可能被分块截断的标记前缀
+            self._search_from = max(0, len(self.text) - len(self.MARKER) + 1)
+            return False
+        
+        brace = self.text.find('{', index + len(self.MARKER))
+        if brace < 0:
+            self._search_from = index
+            return False
+        
+        self._start = self._scan_pos = brace
+        return True
+    
+    def _scan(self) -> bool:
+        """从上次停止的位置继续匹配括号，直到JSON对象结束"""
+        text = self.text
+        pos = self._scan_pos
+        while True:
+            match = self._TOKEN.search(text, pos)
+            if not match:
+                self._scan_pos = len(text)
+                return False
+            
+            char = match.group()
+            if self._in_string:
+                if char == '\\':
+                    # 转义符后的字符尚未到达，等待下一块
+                    if match.end() >= len(text):
+                        self._scan_pos = match.start()
+                        return False
+                    pos = match.end() + 1
+                    continue
+                if char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish(text[self._start:match.end()])
+                    return True
+            pos = match.end()
+    
+    def _finish(self, json_str: str):
+        self.done = True
+        try:
+            self.metadata = json.loads(json_str)
+        except json.JSONDecodeError as e:
+            logging.debug(f"Failed to parse streamed metadata: {e}")
+            self.metadata = None
+    
+    def get_abstract(self) -> Optional[str]:
+        """返回元数据中的有效摘要"""
+        if not self.metadata:
+            return None
+        abstract = self.metadata.get('abstract', '')
+        if abstract and len(abstract) > 50:  # 确保是有效的摘要
+            return abstract.strip()
+        return None
 
 
 class IEEEAsyncService:
     """IEEE异步摘要抓取服务"""
     
-    def __init__(self, concurrent_limit: int = 8, request_delay: float = 0.1):
+    # 流式读取页面的块大小
+    STREAM_CHUNK_SIZE = 16 * 1024
+    # 元数据读取完成后，剩余内容不超过该大小时读完，以便连接放回连接池复用
+    DRAIN_LIMIT = 64 * 1024
+    
+    def __init__(self, concurrent_limit: int = 8, request_delay: float = 0.1,
+                 base_url: str = 'https://ieeexplore.ieee.org', rate_limiter=None):
         self.concurrent_limit = concurrent_limit
         self.request_delay = request_delay
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip('/')
         self.semaphore = asyncio.Semaphore(concurrent_limit)
         self.session_timeout = aiohttp.ClientTimeout(total=15)
         
         # 性能监控
         self.metrics = FetchMetrics(0, 0, 0, 0.0, 0.0, 0)
         
+        # 本次调用新抓取、待批量写入缓存的摘要
+        self._new_abstracts: List[Dict] = []
+        
         # HTTP头设置
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -46,117 +169,95 @@ class IEEEAsyncService:
             'Referer': 'https://ieeexplore.ieee.org/'
         }
 
-    async def fetch_abstracts_parallel(self, papers: List[Dict]) -> List[Dict]:
+    async def fetch_abstracts_parallel(self, papers: List[Dict],
+                                       session: Optional[aiohttp.ClientSession] = None) -> List[Dict]:
         """
         并行获取论文完整摘要（支持缓存）
         
         Args:
             papers: 包含基本信息的论文列表
+            session: 共享的aiohttp会话（见utils.async_runtime），不传时为本次调用临时创建
             
         Returns:
-            包含完整摘要的论文列表
+            包含完整摘要的论文列表（保持原有顺序）
+        """
+        final_results = list(papers)
+        async for index, paper in self.iter_abstracts_parallel(papers, session=session):
+            final_results[index] = paper
+        return final_results
+
+    async def iter_abstracts_parallel(self, papers: List[Dict],
+                                      session: Optional[aiohttp.ClientSession] = None) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        并行获取论文完整摘要，每篇完成后产出(原序号, 论文)
+        
+        缓存命中和无法提取文章编号的论文先产出，其余按抓取完成的顺序产出；
+        新抓取的摘要在全部完成后一次写入缓存
+        
+        Args:
+            papers: 包含基本信息的论文列表
+            session: 共享的aiohttp会话（见utils.async_runtime），不传时为本次调用临时创建
         """
         if not papers:
-            return []
+            return
         
         # 导入缓存功能
-        from utils.abstract_cache import get_cached_abstract, cache_abstract
+        from utils.abstract_cache import get_cached_abstracts, cache_abstracts
         
         start_time = time.time()
         self.metrics = FetchMetrics(len(papers), 0, 0, 0.0, 0.0, 0)
+        self._new_abstracts = []
         
-        print(f"🚀 Starting parallel abstract fetching for {len(papers)} papers...")
+        logger.debug("Starting parallel abstract fetching for %d papers", len(papers))
+        
+        # 1. 一次查询整期论文的缓存，分离需要抓取的论文
+        #    SQLite操作放到线程池执行，避免阻塞共享事件循环
+        article_numbers = [self._extract_article_number(paper) for paper in papers]
+        cached_abstracts = await asyncio.to_thread(
+            get_cached_abstracts, [number for number in article_numbers if number], "ieee"
+        )
         
-        # 1. 检查缓存，分离需要抓取的论文
         papers_to_fetch = []
-        papers_with_cache = []
         cache_hits = 0
         
-        for i, paper in enumerate(papers):
-            article_number = self._extract_article_number(paper)
+        for i, (paper, article_number) in enumerate(zip(papers, article_numbers)):
             if article_number:
-                cached_abstract = get_cached_abstract(article_number, "ieee")
+                cached_abstract = cached_abstracts.get(article_number)
                 if cached_abstract:
                     # 使用缓存的摘要
                     paper['abstract'] = cached_abstract
-                    papers_with_cache.append(paper)
                     cache_hits += 1
-                    print(f"📋 Paper {i+1}: Using cached abstract ({len(cached_abstract)} chars)")
+                    yield i, paper
                 else:
                     # 需要抓取
                     papers_to_fetch.append((i, paper, article_number))
             else:
                 # 无法提取文章编号，保持原样
-                papers_with_cache.append(paper)
+                yield i, paper
         
         self.metrics.cache_hits = cache_hits
-        print(f"📊 Cache status: {cache_hits} hits, {len(papers_to_fetch)} need fetching")
-        
-        # 2. 如果所有摘要都已缓存，直接返回
-        if not papers_to_fetch:
-            self.metrics.total_time = time.time() - start_time
-            print(f"✅ All abstracts available from cache!")
-            self._log_performance_report()
-            return papers_with_cache
-        
-        # 3. 并行抓取未缓存的摘要
-        print(f"🔍 Fetching {len(papers_to_fetch)} uncached abstracts...")
-        
-        # 创建连接器，限制连接数
-        connector = aiohttp.TCPConnector(
-            limit=50,
-            limit_per_host=self.concurrent_limit,
-            ttl_dns_cache=300,
-            use_dns_cache=True,
-        )
+        logger.debug("Abstract cache: %d hits, %d need fetching", cache_hits, len(papers_to_fetch))
         
-        async with aiohttp.ClientSession(
-            connector=connector,
-            timeout=self.session_timeout,
-            headers=self.headers
-        ) as session:
-            
-            # 创建并发任务（只针对未缓存的论文）
-            tasks = [
-                self._fetch_single_abstract_with_cache(session, paper, article_number, original_index)
-                for original_index, paper, article_number in papers_to_fetch
-            ]
-            
-            # 执行所有任务，使用gather收集结果
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 2. 并行抓取未缓存的摘要
+        if papers_to_fetch:
+            if session is not None:
+                async for item in self._iter_fetched(session, papers_to_fetch):
+                    yield item
+            else:
+                # 未提供共享会话时临时创建连接器，限制连接数
+                connector = aiohttp.TCPConnector(
+                    limit=50,
+                    limit_per_host=self.concurrent_limit,
+                    ttl_dns_cache=300,
+                    use_dns_cache=True,
+                )
+                async with aiohttp.ClientSession(connector=connector) as own_session:
+                    async for item in self._iter_fetched(own_session, papers_to_fetch):
+                        yield item
             
-            # 处理结果和异常
-            processed_results = []
-            for i, result in enumerate(results):
-                original_index, paper, article_number = papers_to_fetch[i]
-                
-                if isinstance(result, Exception):
-                    logging.error(f"Task for paper {original_index+1} failed: {result}")
-                    self.metrics.error_count += 1
-                    processed_results.append((original_index, paper))
-                else:
-                    processed_results.append((original_index, result))
-        
-        # 4. 合并缓存的和新抓取的结果
-        final_results = [None] * len(papers)
-        
-        # 放置缓存的结果
-        cache_index = 0
-        for i, paper in enumerate(papers):
-            article_number = self._extract_article_number(paper)
-            if not article_number or get_cached_abstract(article_number, "ieee"):
-                if cache_index < len(papers_with_cache):
-                    final_results[i] = papers_with_cache[cache_index]
-                    cache_index += 1
-                else:
-                    final_results[i] = paper
-        
-        # 放置新抓取的结果
-        for original_index, paper in processed_results:
-            final_results[original_index] = paper
-        
-        # 过滤None值
-        final_results = [paper for paper in final_results if paper is not None]
+            # 3. 在一个事务中缓存新抓取的摘要
+            if self._new_abstracts:
+                await asyncio.to_thread(cache_abstracts, self._new_abstracts, "ieee")
         
         # 计算性能指标
         self.metrics.total_time = time.time() - start_time
@@ -164,8 +265,27 @@ class IEEEAsyncService:
         
         # 输出性能报告
         self._log_performance_report()
+
+    async def _iter_fetched(self, session: aiohttp.ClientSession,
+                            papers_to_fetch: List[Tuple]) -> AsyncIterator[Tuple[int, Dict]]:
+        """并发抓取未缓存的摘要，按完成顺序产出(原序号, 论文)，抓取失败时产出原论文"""
+        async def fetch(original_index: int, paper: Dict, article_number: str) -> Tuple[int, Dict]:
+            try:
+                return original_index, await self._fetch_single_abstract_with_cache(
+                    session, paper, article_number, original_index)
+            except Exception as e:
+                logging.error(f"Task for paper {original_index+1} failed: {e}")
+                self.metrics.error_count += 1
+                return original_index, paper
         
-        return final_results
+        tasks = [asyncio.ensure_future(fetch(*item)) for item in papers_to_fetch]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前停止读取时取消未完成的抓取
+            for task in tasks:
+                task.cancel()
 
     async def _fetch_single_abstract_with_cache(self, session: aiohttp.ClientSession, paper: Dict, article_number: str, index: int) -> Dict:
         """
@@ -182,43 +302,40 @@ class IEEEAsyncService:
         """
         async with self.semaphore:  # 控制并发数
             try:
-                # 导入缓存功能
-                from utils.abstract_cache import cache_abstract
-                
                 # 构建详细页面URL
-                detail_url = f"https://ieeexplore.ieee.org/document/{article_number}"
+                detail_url = f"{self.base_url}/document/{article_number}"
                 
-                # 添加延迟避免被限流
-                await asyncio.sleep(self.request_delay)
+                # 按主机限流，未配置限流器时使用固定延迟
+                await self._throttle(detail_url)
                 
                 # 发送HTTP请求
-                async with session.get(detail_url) as response:
+                async with session.get(detail_url, headers=self.headers,
+                                       timeout=self.session_timeout) as response:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.update_from_response(detail_url, response.status, response.headers)
                     if response.status != 200:
                         logging.warning(f"HTTP {response.status} for paper {index+1}: {article_number}")
                         return paper
                     
-                    html_content = await response.text()
-                    
-                    # 解析页面获取完整摘要
-                    full_abstract = self._extract_abstract_from_html(html_content)
+                    # 流式解析页面获取完整摘要
+                    full_abstract = await self._read_abstract(response)
                     
                     if full_abstract and len(full_abstract) > len(paper.get('abstract', '')):
                         # 更新论文摘要
                         paper['abstract'] = full_abstract
                         self.metrics.successful_abstracts += 1
                         
-                        # 缓存新的完整摘要
-                        cache_abstract(
-                            article_id=article_number,
-                            url=detail_url,
-                            title=paper.get('title', ''),
-                            abstract=full_abstract,
-                            source='ieee'
-                        )
+                        # 记录新的完整摘要，全部抓取完成后批量缓存
+                        self._new_abstracts.append({
+                            'article_id': article_number,
+                            'url': detail_url,
+                            'title': paper.get('title', ''),
+                            'abstract': full_abstract
+                        })
                         
-                        print(f"✓ Paper {index+1}: Updated and cached abstract ({len(full_abstract)} chars)")
+                        logger.debug("Paper %d: updated abstract (%d chars)", index + 1, len(full_abstract))
                     else:
-                        print(f"⚠ Paper {index+1}: No improvement found")
+                        logger.debug("Paper %d: no improvement found", index + 1)
                     
                     return paper
                     
@@ -252,29 +369,30 @@ class IEEEAsyncService:
                     return paper
                 
                 # 构建详细页面URL
-                detail_url = f"https://ieeexplore.ieee.org/document/{article_number}"
+                detail_url = f"{self.base_url}/document/{article_number}"
                 
-                # 添加延迟避免被限流
-                await asyncio.sleep(self.request_delay)
+                # 按主机限流，未配置限流器时使用固定延迟
+                await self._throttle(detail_url)
                 
                 # 发送HTTP请求
-                async with session.get(detail_url) as response:
+                async with session.get(detail_url, headers=self.headers,
+                                       timeout=self.session_timeout) as response:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.update_from_response(detail_url, response.status, response.headers)
                     if response.status != 200:
                         logging.warning(f"HTTP {response.status} for paper {index+1}: {article_number}")
                         return paper
                     
-                    html_content = await response.text()
-                    
-                    # 解析页面获取完整摘要
-                    full_abstract = self._extract_abstract_from_html(html_content)
+                    # 流式解析页面获取完整摘要
+                    full_abstract = await self._read_abstract(response)
                     
                     if full_abstract and len(full_abstract) > len(paper.get('abstract', '')):
                         paper['abstract'] = full_abstract
                         self.metrics.successful_abstracts += 1
                         
-                        print(f"✓ Paper {index+1}: Updated abstract ({len(full_abstract)} chars)")
+                        logger.debug("Paper %d: updated abstract (%d chars)", index + 1, len(full_abstract))
                     else:
-                        print(f"⚠ Paper {index+1}: No improvement found")
+                        logger.debug("Paper %d: no improvement found", index + 1)
                     
                     return paper
                     
@@ -288,18 +406,63 @@ class IEEEAsyncService:
                 self.metrics.error_count += 1
                 return paper
 
+    async def _throttle(self, url: str):
+        """请求前等待：使用共享限流器取令牌，否则固定延迟"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(url)
+        else:
+            await asyncio.sleep(self.request_delay)
+    
+    async def _read_abstract(self, response: aiohttp.ClientResponse) -> Optional[str]:
+        """
+        流式读取页面，元数据JSON读取完整后立即停止
+        
+        页面中找不到元数据时读取完整页面，交给_extract_abstract_from_html兜底
+        """
+        extractor = IEEEMetadataExtractor(response.charset or 'utf-8')
+        try:
+            async for chunk in response.content.iter_chunked(self.STREAM_CHUNK_SIZE):
+                if extractor.feed(chunk):
+                    break
+            
+            abstract = extractor.get_abstract()
+            if abstract:
+                extractor.bytes_read += await self._drain(response)
+                return abstract
+            
+            # 元数据中没有有效摘要时读取剩余内容，用原有方法兜底
+            html_content = extractor.text
+            if not response.content.at_eof():
+                rest = await response.content.read()
+                extractor.bytes_read += len(rest)
+                html_content += rest.decode(response.charset or 'utf-8', errors='replace')
+            return self._extract_abstract_from_html(html_content)
+        finally:
+            self.metrics.bytes_read += extractor.bytes_read
+    
+    async def _drain(self, response: aiohttp.ClientResponse) -> int:
+        """
+        读完较小的剩余内容使连接可以复用；剩余内容较大时放弃，连接随响应释放关闭
+        
+        Returns:
+            读取的字节数
+        """
+        drained = 0
+        while drained < self.DRAIN_LIMIT and not response.content.at_eof():
+            chunk = await response.content.read(min(self.STREAM_CHUNK_SIZE, self.DRAIN_LIMIT - drained))
+            if not chunk:
+                break
+            drained += len(chunk)
+        return drained
+    
     def _extract_article_number(self, paper: Dict) -> Optional[str]:
         """从论文信息中提取文章编号"""
-        # 调试：打印paper结构
-        print(f"Debug: Extracting article number from paper keys: {list(paper.keys())}")
-        
         # 1. 首先检查 source_specific 字段中的 ieee_number
         if 'source_specific' in paper and isinstance(paper['source_specific'], dict):
             ieee_number = paper['source_specific'].get('ieee_number')
             if ieee_number:
                 article_num = str(ieee_number).strip()
                 if article_num.isdigit():
-                    print(f"Debug: Found IEEE number in source_specific: {article_num}")
                     return article_num
         
         # 2. 尝试从URL中提取
@@ -307,13 +470,11 @@ class IEEEAsyncService:
         for field in url_fields:
             if field in paper and paper[field]:
                 value = str(paper[field])
-                print(f"Debug: Checking {field} = {value}")
                 
                 # 从 /document/12345678/ 或 https://ieeexplore.ieee.org/document/12345678/ 提取
                 match = re.search(r'/document/(\d+)', value)
                 if match:
                     article_num = match.group(1)
-                    print(f"Debug: Extracted article number from URL: {article_num}")
                     return article_num
         
         # 3. 尝试其他可能的字段
@@ -321,13 +482,10 @@ class IEEEAsyncService:
         for field in other_fields:
             if field in paper and paper[field]:
                 value = str(paper[field]).strip()
-                print(f"Debug: Found {field} = {value}")
                 
                 if value.isdigit():
-                    print(f"Debug: Direct article number: {value}")
                     return value
         
-        print("Debug: No article number found!")
         return None
 
     def _extract_abstract_from_html(self, html_content: str) -> Optional[str]:
@@ -348,16 +506,13 @@ class IEEEAsyncService:
                     abstract = metadata.get('abstract', '')
                     
                     if abstract and len(abstract) > 50:  # 确保是有效的摘要
-                        print(f"✓ Successfully extracted abstract ({len(abstract)} chars)")
                         return abstract.strip()
-                    else:
-                        print(f"⚠ Abstract too short or empty: {len(abstract)} chars")
+                    logger.debug("Abstract too short or empty: %d chars", len(abstract))
                         
                 except json.JSONDecodeError as e:
-                    print(f"✗ JSON decode error: {e}")
-                    logging.debug(f"Failed to parse JSON: {json_str[:200]}...")
+                    logger.debug("Failed to parse metadata JSON: %s", e)
             else:
-                print("✗ xplGlobal.document.metadata not found in HTML")
+                logger.debug("xplGlobal.document.metadata not found in HTML")
             
             # 备用方法1: 尝试其他可能的metadata变量
             backup_patterns = [
@@ -373,7 +528,6 @@ class IEEEAsyncService:
                         metadata = json.loads(json_str)
                         abstract = metadata.get('abstract', '')
                         if abstract and len(abstract) > 50:
-                            print(f"✓ Extracted from backup pattern ({len(abstract)} chars)")
                             return abstract.strip()
                     except json.JSONDecodeError:
                         continue
@@ -396,17 +550,15 @@ class IEEEAsyncService:
                     if element:
                         text = element.get_text(strip=True)
                         if len(text) > 50:
-                            print(f"✓ Extracted from HTML element ({len(text)} chars)")
                             return text
             except ImportError:
-                print("BeautifulSoup not available for HTML parsing")
+                logger.debug("BeautifulSoup not available for HTML parsing")
             
-            print("✗ No abstract found using any method")
+            logger.debug("No abstract found using any method")
             return None
             
         except Exception as e:
-            print(f"✗ Error extracting abstract: {e}")
-            logging.error(f"Error extracting abstract: {e}")
+            logger.error("Error extracting abstract: %s", e)
             return None
 
     def _decode_html_entities(self, text: str) -> str:
@@ -420,33 +572,28 @@ class IEEEAsyncService:
         error_rate = (self.metrics.error_count / self.metrics.total_papers * 100) if self.metrics.total_papers > 0 else 0
         cache_rate = (self.metrics.cache_hits / self.metrics.total_papers * 100) if self.metrics.total_papers > 0 else 0
         
-        print(f"""
-📊 并行抓取性能报告:
-   总论文数: {self.metrics.total_papers}
-   缓存命中: {self.metrics.cache_hits} ({cache_rate:.1f}%)
-   成功获取: {self.metrics.successful_abstracts} ({success_rate:.1f}%)
-   错误数量: {self.metrics.error_count} ({error_rate:.1f}%)
-   总耗时: {self.metrics.total_time:.2f}秒
-   平均耗时: {self.metrics.avg_response_time:.2f}秒/篇
-   并发数: {self.concurrent_limit}
-        """)
+        logger.info(
+            "并行抓取性能报告: 总论文数 %d, 缓存命中 %d (%.1f%%), 成功获取 %d (%.1f%%), "
+            "错误数量 %d (%.1f%%), 总耗时 %.2f秒, 平均耗时 %.2f秒/篇, 读取页面 %.1f KB, 并发数 %d",
+            self.metrics.total_papers, self.metrics.cache_hits, cache_rate,
+            self.metrics.successful_abstracts, success_rate, self.metrics.error_count, error_rate,
+            self.metrics.total_time, self.metrics.avg_response_time,
+            self.metrics.bytes_read / 1024, self.concurrent_limit
+        )
         
         # 性能建议
         if self.metrics.avg_response_time > 3.0:
-            print("💡 建议: 平均响应时间较慢，可以减少并发数")
+            logger.info("建议: 平均响应时间较慢，可以减少并发数")
         elif self.metrics.avg_response_time < 0.5:
-            print("💡 建议: 响应时间很快，可以适当增加并发数")
+            logger.info("建议: 响应时间很快，可以适当增加并发数")
         
         if error_rate > 20:
-            print("⚠️  警告: 错误率较高，可能触发了反爬虫机制")
-        
-        if cache_rate > 50:
-            print("🎉 缓存效果良好，大量重复请求被避免")
-        elif cache_rate < 10:
-            print("📋 缓存命中率较低，这是正常的首次抓取")
+            logger.warning("错误率较高，可能触发了反爬虫机制")
 
 
 # 工厂函数
-def create_async_service(concurrent_limit: int = 8, request_delay: float = 0.1) -> IEEEAsyncService:
+def create_async_service(concurrent_limit: int = 8, request_delay: float = 0.1,
+                         base_url: str = 'https://ieeexplore.ieee.org', rate_limiter=None) -> IEEEAsyncService:
     """创建异步服务实例"""
-    return IEEEAsyncService(concurrent_limit=concurrent_limit, request_delay=request_delay)
\ No newline at end of file
+    return IEEEAsyncService(concurrent_limit=concurrent_limit, request_delay=request_delay,
+                            base_url=base_url, rate_limiter=rate_limiter)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+常驻异步运行时
+在后台线程中运行一个持久的事件循环，并维护共享的aiohttp会话（keep-alive连接池），
+Flask工作线程把协程提交到该循环执行，避免每次请求重新进行DNS解析、TCP和TLS握手
+"""
+
+import os
+import queue
+import asyncio
+import atexit
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+import aiohttp
+
+
+class AsyncRuntime:
+    """后台事件循环 + 共享HTTP连接池"""
+    
+    def __init__(self, pool_size: int = 32, per_host_limit: int = 8,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 60):
+        """
+        初始化运行时（事件循环在首次使用时才启动）
+        
+        Args:
+            pool_size: 连接池总连接数上限
+            per_host_limit: 单个主机的连接数上限
+            dns_cache_ttl: DNS缓存时间（秒）
+            keepalive_timeout: 空闲连接保持时间（秒）
+        """
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pid = None
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'sessions_created': 0}
+    
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """启动后台事件循环；fork出的子进程会重新创建自己的循环"""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+            
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._run_loop, args=(loop,),
+                                      name='async-runtime', daemon=True)
+            thread.start()
+            
+            self._loop = loop
+            self._thread = thread
+            self._session = None
+            self._pid = os.getpid()
+            return loop
+    
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话（只在事件循环线程中调用，无需加锁）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._stats['sessions_created'] += 1
+        return self._session
+    
+    def run(self, coro_factory: Callable[[aiohttp.ClientSession], Awaitable[Any]],
+            timeout: Optional[float] = None) -> Any:
+        """
+        在后台事件循环中执行协程并等待结果
+        
+        Args:
+            coro_factory: 接收共享会话并返回协程的函数
+            timeout: 等待结果的超时时间（秒），超时后取消协程
+            
+        Returns:
+            协程的返回值
+        """
+        loop = self._ensure_started()
+        
+        async def runner():
+            session = await self._get_session()
+            return await coro_factory(session)
+        
+        future = asyncio.run_coroutine_threadsafe(runner(), loop)
+        with self._lock:
+            self._stats['submitted'] += 1
+        
+        try:
+            result = future.result(timeout)
+        except BaseException:
+            future.cancel()
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        
+        with self._lock:
+            self._stats['completed'] += 1
+        return result
+    
+    def iterate(self, agen_factory: Callable[[aiohttp.ClientSession], AsyncIterator[Any]]) -> Iterator[Any]:
+        """
+        在后台事件循环中执行异步生成器，逐个产出其结果
+        
+        Args:
+            agen_factory: 接收共享会话并返回异步生成器的函数
+            
+        调用方提前关闭返回的生成器时取消异步生成器；异步生成器抛出的异常在调用方重新抛出
+        """
+        loop = self._ensure_started()
+        items = queue.Queue()
+        finished = object()
+        
+        async def runner():
+            try:
+                session = await self._get_session()
+                async for item in agen_factory(session):
+                    items.put((True, item))
+            except Exception as e:
+                items.put((False, e))
+            finally:
+                items.put((True, finished))
+        
+        future = asyncio.run_coroutine_threadsafe(runner(), loop)
+        with self._lock:
+            self._stats['submitted'] += 1
+        
+        try:
+            while True:
+                ok, item = items.get()
+                if not ok:
+                    raise item
+                if item is finished:
+                    break
+                yield item
+        except BaseException:
+            future.cancel()
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        
+        with self._lock:
+            self._stats['completed'] += 1
+    
+    def close(self):
+        """关闭共享会话并停止事件循环"""
+        with self._lock:
+            loop, thread, session = self._loop, self._thread, self._session
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = self._session = None
+        
+        if session is not None and not session.closed:
+            try:
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
+            except Exception as e:
+                print(f"⚠️ 关闭共享HTTP会话失败: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取运行时统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['running'] = self._loop is not None and self._pid == os.getpid()
+        
+        connector = self._session.connector if self._session is not None else None
+        stats['pool_size'] = self.pool_size
+        stats['per_host_limit'] = self.per_host_limit
+        # aiohttp未公开空闲连接数接口，这里读取连接器内部状态用于观测
+        stats['idle_connections'] = (sum(len(conns) for conns in getattr(connector, '_conns', {}).values())
+                                     if connector is not None else 0)
+        return stats
+
+
+def _create_runtime() -> AsyncRuntime:
+    from config import Config
+    return AsyncRuntime(
+        pool_size=Config.ABSTRACT_POOL_SIZE,
+        per_host_limit=Config.MAX_CONCURRENT_REQUESTS,
+        keepalive_timeout=Config.ABSTRACT_KEEPALIVE_TIMEOUT,
+    )
+
+
+# 全局运行时实例（摘要抓取共用）
+abstract_runtime = _create_runtime()
+atexit.register(abstract_runtime.close)
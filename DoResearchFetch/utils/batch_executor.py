@@ -0,0 +1,123 @@
+"""
+批量抓取执行器
+
+批量请求中的子请求提交到共享线程池并发执行，同一数据源同时执行的子请求数受
+并发上限约束（跨所有批量请求共享），避免一个批次把某个上游打满
+"""
+
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def parse_source_concurrency(spec: str) -> Dict[str, int]:
+    """解析按数据源的并发上限配置，格式: ieee:2,elsevier:2,dblp:4"""
+    limits = {}
+    for item in (spec or '').split(','):
+        source, _, value = item.partition(':')
+        if source.strip() and value.strip().isdigit() and int(value) > 0:
+            limits[source.strip()] = int(value)
+    return limits
+
+
+class BatchExecutor:
+    """带按数据源并发上限的批量执行器"""
+    
+    # 名额被其他批次占满时重新检查的间隔（秒）
+    POLL_INTERVAL = 0.1
+    
+    def __init__(self, max_workers: int = 8, source_concurrency: Optional[Dict[str, int]] = None,
+                 default_source_concurrency: int = 2):
+        """
+        初始化执行器
+        
+        Args:
+            max_workers: 线程池大小，即所有批次同时执行的子请求总数
+            source_concurrency: 按数据源的并发上限
+            default_source_concurrency: 未单独配置的数据源的并发上限
+        """
+        self.max_workers = max_workers
+        self.source_concurrency = source_concurrency or {}
+        self.default_source_concurrency = default_source_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-fetch')
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._running: Dict[str, int] = {}
+        self._stats = {'batches': 0, 'jobs': 0, 'max_running': 0}
+    
+    def _source_limit(self, source: str) -> int:
+        return self.source_concurrency.get(source, self.default_source_concurrency)
+    
+    def _try_start(self, source: str) -> bool:
+        """在数据源并发上限内占用一个名额"""
+        with self._lock:
+            running = self._running.get(source, 0)
+            if running >= self._source_limit(source):
+                return False
+            self._running[source] = running + 1
+            self._stats['jobs'] += 1
+            self._stats['max_running'] = max(self._stats['max_running'], sum(self._running.values()))
+            return True
+    
+    def _run_job(self, source: str, func: Callable[[], Any]) -> Any:
+        try:
+            return func()
+        finally:
+            with self._released:
+                self._running[source] -= 1
+                self._released.notify_all()
+    
+    def run(self, jobs: List[Tuple[str, Callable[[], Any]]]) -> Iterator[Tuple[int, Future]]:
+        """
+        并发执行一批任务，按完成顺序逐个返回
+        
+        Args:
+            jobs: (数据源, 无参可调用对象) 列表
+            
+        Yields:
+            (任务在jobs中的下标, 已完成的Future)
+        
+        生成器提前关闭时尚未开始的任务不再执行，已经开始的任务会执行完毕
+        """
+        with self._lock:
+            self._stats['batches'] += 1
+        
+        pending: "OrderedDict[str, deque]" = OrderedDict()
+        for index, (source, _) in enumerate(jobs):
+            pending.setdefault(source, deque()).append(index)
+        
+        in_flight: Dict[Future, int] = {}
+        while pending or in_flight:
+            # 在各数据源的并发上限内提交任务
+            for source in list(pending):
+                queue = pending[source]
+                while queue and self._try_start(source):
+                    index = queue.popleft()
+                    in_flight[self._executor.submit(self._run_job, source, jobs[index][1])] = index
+                if not queue:
+                    del pending[source]
+            
+            if not in_flight:
+                # 名额都被其他批次占用，等待释放
+                with self._released:
+                    self._released.wait(self.POLL_INTERVAL)
+                continue
+            
+            done, _ = wait(in_flight, timeout=self.POLL_INTERVAL if pending else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行器统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['running'] = {source: count for source, count in self._running.items() if count}
+        stats['max_workers'] = self.max_workers
+        stats['default_source_concurrency'] = self.default_source_concurrency
+        stats['source_concurrency'] = dict(self.source_concurrency)
+        return stats
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
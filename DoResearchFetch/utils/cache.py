@@ -1,34 +1,96 @@
 """
-简单的内存缓存实现
+抓取结果缓存
+
+- SimpleCache: 进程内LRU内存缓存
+- RedisCache: 基于Redis的共享缓存，多个工作进程共用且重启后保留
+- TieredCache: 进程内L1缓存在前、共享L2缓存在后的两级缓存
+
+配置了REDIS_URL且Redis可用时使用两级缓存，否则退回进程内缓存
 """
 
+import os
 import time
 import hashlib
 import json
-from typing import Dict, Any, Optional
-from threading import RLock
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from threading import RLock, Event, Thread
+
+from utils.tracing import span
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+def generate_cache_key(source: str, params: Dict[str, Any]) -> str:
+    """根据数据源和查询参数生成缓存键"""
+    key_data = f"{source}:{json.dumps(params, sort_keys=True)}"
+    return hashlib.md5(key_data.encode()).hexdigest()
 
 
 class SimpleCache:
-    """简单的线程安全内存缓存"""
+    """
+    线程安全的内存LRU缓存
+
+    条目按最近访问顺序保存在OrderedDict中，读写和淘汰都是O(1)；
+    同时限制条目数和数据总字节数，后台线程定期清理过期条目
+    """
     
-    def __init__(self, default_ttl: int = 3600, max_size: int = 1000):
+    def __init__(self, default_ttl: int = 3600, max_size: int = 1000,
+                 max_bytes: Optional[int] = None, sweep_interval: float = 300):
         """
         初始化缓存
         
         Args:
             default_ttl: 默认TTL（秒）
             max_size: 最大缓存条目数
+            max_bytes: 缓存数据的最大总字节数（按JSON序列化后的大小计算），None表示不限制
+            sweep_interval: 后台清理过期条目的间隔（秒），0表示不启动清理线程；
+                清理线程在第一次写入时才启动
         """
         self.default_ttl = default_ttl
         self.max_size = max_size
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self._lock = RLock()
+        self._total_bytes = 0
+        self._source_counts: Dict[str, int] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'expirations': 0}
+        
+        self._sweeper = None
+        self._sweeper_pid = None
+        self._stop_sweeper = Event()
+    
+    def _ensure_sweeper(self) -> None:
+        """
+        启动后台清理线程（调用方需持有锁）
+        
+        模块导入时创建的缓存在gunicorn --preload下位于主进程，线程不会随fork复制到工作进程，
+        因此在写入时按进程ID检查，每个进程启动自己的清理线程
+        """
+        if not self.sweep_interval or self.sweep_interval <= 0 or self._stop_sweeper.is_set():
+            return
+        if self._sweeper_pid == os.getpid() and self._sweeper.is_alive():
+            return
+        self._sweeper = Thread(target=self._sweep_loop, name='cache-sweeper', daemon=True)
+        self._sweeper.start()
+        self._sweeper_pid = os.getpid()
     
     def _generate_key(self, source: str, params: Dict[str, Any]) -> str:
         """生成缓存键"""
-        key_data = f"{source}:{json.dumps(params, sort_keys=True)}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        return generate_cache_key(source, params)
+    
+    def _remove(self, key: str) -> None:
+        """删除条目并更新字节数和数据源计数（调用方需持有锁）"""
+        entry = self._cache.pop(key)
+        self._total_bytes -= entry['size']
+        source = entry['source']
+        self._source_counts[source] -= 1
+        if not self._source_counts[source]:
+            del self._source_counts[source]
     
     def get(self, source: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -44,18 +106,21 @@ class SimpleCache:
         key = self._generate_key(source, params)
         
         with self._lock:
-            if key not in self._cache:
+            cache_entry = self._cache.get(key)
+            if cache_entry is None:
+                self._stats['misses'] += 1
                 return None
             
-            cache_entry = self._cache[key]
-            
             # 检查是否过期
             if time.time() > cache_entry['expires_at']:
-                del self._cache[key]
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
                 return None
             
-            # 更新访问时间
-            cache_entry['accessed_at'] = time.time()
+            # 移到末尾，标记为最近使用
+            self._cache.move_to_end(key)
+            self._stats['hits'] += 1
             return cache_entry['data']
     
     def set(self, source: str, params: Dict[str, Any], data: Dict[str, Any], ttl: Optional[int] = None) -> None:
@@ -70,78 +135,334 @@ class SimpleCache:
         """
         key = self._generate_key(source, params)
         ttl = ttl or self.default_ttl
+        size = len(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
         
         with self._lock:
-            # 如果缓存已满，删除最旧的条目
-            if len(self._cache) >= self.max_size:
+            self._ensure_sweeper()
+            if key in self._cache:
+                self._remove(key)
+            
+            # 单个条目超过字节上限时不缓存，避免清空整个缓存；同一键的旧数据已删除，不会再返回
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            
+            # 淘汰最久未使用的条目，直到满足条目数和字节数限制
+            while self._cache and (
+                len(self._cache) >= self.max_size or
+                (self.max_bytes is not None and self._total_bytes + size > self.max_bytes)
+            ):
                 self._evict_oldest()
             
+            now = time.time()
             self._cache[key] = {
                 'data': data,
-                'created_at': time.time(),
-                'accessed_at': time.time(),
-                'expires_at': time.time() + ttl,
-                'source': source
+                'created_at': now,
+                'expires_at': now + ttl,
+                'source': source,
+                'size': size
             }
+            self._total_bytes += size
+            self._source_counts[source] = self._source_counts.get(source, 0) + 1
+            self._stats['sets'] += 1
     
     def _evict_oldest(self):
-        """删除最旧的缓存条目"""
+        """删除最久未使用的缓存条目（调用方需持有锁）"""
         if not self._cache:
             return
         
-        # 找到访问时间最早的条目
-        oldest_key = min(
-            self._cache.keys(),
-            key=lambda k: self._cache[k]['accessed_at']
-        )
-        del self._cache[oldest_key]
+        oldest_key = next(iter(self._cache))
+        self._remove(oldest_key)
+        self._stats['evictions'] += 1
     
     def clear(self):
         """清空所有缓存"""
         with self._lock:
             self._cache.clear()
+            self._total_bytes = 0
+            self._source_counts.clear()
     
     def clean_expired(self):
         """清理过期的缓存条目"""
         current_time = time.time()
-        expired_keys = []
         
         with self._lock:
-            for key, entry in self._cache.items():
-                if current_time > entry['expires_at']:
-                    expired_keys.append(key)
-            
+            expired_keys = [
+                key for key, entry in self._cache.items()
+                if current_time > entry['expires_at']
+            ]
             for key in expired_keys:
-                del self._cache[key]
+                self._remove(key)
+            self._stats['expirations'] += len(expired_keys)
         
         return len(expired_keys)
     
+    def _sweep_loop(self):
+        """后台定期清理过期条目"""
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            try:
+                self.clean_expired()
+            except Exception as e:
+                print(f"⚠️ 清理过期缓存失败: {e}")
+    
+    def close(self):
+        """停止后台清理线程"""
+        self._stop_sweeper.set()
+        if self._sweeper and self._sweeper_pid == os.getpid() and self._sweeper.is_alive():
+            self._sweeper.join(timeout=1)
+    
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         with self._lock:
             current_time = time.time()
-            active_count = sum(
+            expired_count = sum(
                 1 for entry in self._cache.values()
-                if current_time <= entry['expires_at']
+                if current_time > entry['expires_at']
             )
-            
-            source_counts = {}
-            for entry in self._cache.values():
-                source = entry['source']
-                source_counts[source] = source_counts.get(source, 0) + 1
+            lookups = self._stats['hits'] + self._stats['misses']
             
             return {
+                'backend': 'memory',
                 'total_entries': len(self._cache),
-                'active_entries': active_count,
-                'expired_entries': len(self._cache) - active_count,
+                'active_entries': len(self._cache) - expired_count,
+                'expired_entries': expired_count,
                 'max_size': self.max_size,
-                'source_distribution': source_counts,
-                'memory_usage_estimate': len(str(self._cache))  # 粗略估计
+                'max_bytes': self.max_bytes,
+                'memory_bytes': self._total_bytes,
+                'source_distribution': dict(self._source_counts),
+                'hit_rate': round(self._stats['hits'] / lookups * 100, 2) if lookups else 0.0,
+                **self._stats
             }
 
 
+class RedisCache:
+    """基于Redis的共享缓存，过期由Redis的TTL负责"""
+    
+    def __init__(self, client, default_ttl: int = 3600, key_prefix: str = 'doresearch_fetch:cache:'):
+        """
+        初始化缓存
+        
+        Args:
+            client: Redis客户端（redis.Redis或兼容接口）
+            default_ttl: 默认TTL（秒）
+            key_prefix: 键前缀，用于与其他数据隔离
+        """
+        self.client = client
+        self.default_ttl = default_ttl
+        self.key_prefix = key_prefix
+    
+    def _generate_key(self, source: str, params: Dict[str, Any]) -> str:
+        """生成缓存键（包含数据源名称，便于按数据源统计）"""
+        return f"{self.key_prefix}{source}:{generate_cache_key(source, params)}"
+    
+    def get_with_ttl(self, source: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """
+        获取缓存数据及其剩余TTL
+        
+        Returns:
+            (缓存的数据, 剩余秒数)，不存在时返回(None, None)
+        """
+        key = self._generate_key(source, params)
+        raw = self.client.get(key)
+        if raw is None:
+            return None, None
+        
+        remaining = self.client.ttl(key)
+        return json.loads(raw), (remaining if remaining and remaining > 0 else None)
+    
+    def get(self, source: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """获取缓存数据，不存在或已过期返回None"""
+        return self.get_with_ttl(source, params)[0]
+    
+    def set(self, source: str, params: Dict[str, Any], data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """设置缓存数据"""
+        key = self._generate_key(source, params)
+        self.client.set(key, json.dumps(data, ensure_ascii=False), ex=ttl or self.default_ttl)
+    
+    def _scan_keys(self):
+        """遍历本缓存的所有键"""
+        return self.client.scan_iter(match=f"{self.key_prefix}*", count=500)
+    
+    def clear(self):
+        """清空所有缓存"""
+        keys = list(self._scan_keys())
+        for start in range(0, len(keys), 500):
+            self.client.delete(*keys[start:start + 500])
+    
+    def clean_expired(self):
+        """Redis自动删除过期键，无需清理"""
+        return 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        source_counts = {}
+        total = 0
+        for key in self._scan_keys():
+            if isinstance(key, bytes):
+                key = key.decode()
+            source = key[len(self.key_prefix):].rsplit(':', 1)[0]
+            source_counts[source] = source_counts.get(source, 0) + 1
+            total += 1
+        
+        return {
+            'backend': 'redis',
+            'total_entries': total,
+            'active_entries': total,
+            'expired_entries': 0,
+            'source_distribution': source_counts
+        }
+
+
+class TieredCache:
+    """
+    两级缓存：进程内L1 + 共享L2
+    
+    L1只保存较短时间以限制各进程间的不一致；L2出错时降级为仅使用L1，
+    不影响抓取请求本身
+    """
+    
+    def __init__(self, l1: SimpleCache, l2: RedisCache, l1_ttl: int = 60):
+        """
+        初始化缓存
+        
+        Args:
+            l1: 进程内缓存
+            l2: 共享缓存
+            l1_ttl: L1条目的最长保存时间（秒）
+        """
+        self.l1 = l1
+        self.l2 = l2
+        self.l1_ttl = l1_ttl
+        self._lock = RLock()
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'l2_errors': 0}
+        self._last_error_logged = 0.0
+    
+    def _generate_key(self, source: str, params: Dict[str, Any]) -> str:
+        """生成缓存键"""
+        return self.l1._generate_key(source, params)
+    
+    def _record(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def _l2_error(self, operation: str, error: Exception):
+        """记录L2错误，Redis持续不可用时每分钟最多打印一次"""
+        with self._lock:
+            self._stats['l2_errors'] += 1
+            now = time.time()
+            if now - self._last_error_logged < 60:
+                return
+            self._last_error_logged = now
+        print(f"⚠️ 共享缓存{operation}失败，仅使用进程内缓存: {error}")
+    
+    def get(self, source: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """获取缓存数据，先查L1，未命中再查L2并回填L1"""
+        data = self.l1.get(source, params)
+        if data is not None:
+            self._record('l1_hits')
+            return data
+        
+        try:
+            data, remaining = self.l2.get_with_ttl(source, params)
+        except Exception as e:
+            self._l2_error('读取', e)
+            self._record('misses')
+            return None
+        
+        if data is None:
+            self._record('misses')
+            return None
+        
+        self._record('l2_hits')
+        self.l1.set(source, params, data, min(self.l1_ttl, remaining or self.l1_ttl))
+        return data
+    
+    def set(self, source: str, params: Dict[str, Any], data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """同时写入L1和L2"""
+        ttl = ttl or self.l2.default_ttl
+        self.l1.set(source, params, data, min(self.l1_ttl, ttl))
+        try:
+            self.l2.set(source, params, data, ttl)
+        except Exception as e:
+            self._l2_error('写入', e)
+    
+    def clear(self):
+        """清空两级缓存"""
+        self.l1.clear()
+        try:
+            self.l2.clear()
+        except Exception as e:
+            self._l2_error('清空', e)
+    
+    def clean_expired(self):
+        """清理L1中的过期条目（L2由Redis自动过期）"""
+        return self.l1.clean_expired()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+        
+        try:
+            l2_stats = self.l2.get_stats()
+        except Exception as e:
+            l2_stats = {'backend': 'redis', 'error': str(e)}
+        
+        return {
+            'backend': 'tiered',
+            'l1_ttl': self.l1_ttl,
+            'l1': self.l1.get_stats(),
+            'l2': l2_stats,
+            **stats
+        }
+
+
+def create_cache(redis_url: Optional[str] = None, default_ttl: int = 3600,
+                 max_size: int = 1000, max_bytes: Optional[int] = None, l1_ttl: int = 60):
+    """
+    创建缓存实例
+    
+    Args:
+        redis_url: Redis连接URL，为空时使用进程内缓存
+        default_ttl: 默认TTL（秒）
+        max_size: 进程内缓存最大条目数
+        max_bytes: 进程内缓存最大总字节数
+        l1_ttl: 使用Redis时L1条目的最长保存时间（秒）
+        
+    Returns:
+        Redis可用时返回TieredCache，否则返回SimpleCache
+    """
+    memory_cache = SimpleCache(default_ttl=default_ttl, max_size=max_size, max_bytes=max_bytes)
+    if not redis_url:
+        return memory_cache
+    
+    if redis is None:
+        print("⚠️ 未安装redis包，使用进程内缓存")
+        return memory_cache
+    
+    try:
+        client = redis.Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=1)
+        client.ping()
+    except Exception as e:
+        print(f"⚠️ 无法连接Redis ({redis_url})，使用进程内缓存: {e}")
+        return memory_cache
+    
+    print(f"✓ 抓取结果缓存使用Redis: {redis_url}")
+    return TieredCache(memory_cache, RedisCache(client, default_ttl=default_ttl), l1_ttl=l1_ttl)
+
+
+def _create_cache():
+    from config import Config
+    return create_cache(
+        redis_url=Config.REDIS_URL,
+        default_ttl=Config.CACHE_TTL,
+        max_size=Config.CACHE_MAX_ENTRIES,
+        max_bytes=Config.CACHE_MAX_BYTES,
+        l1_ttl=Config.CACHE_L1_TTL
+    )
+
+
 # 全局缓存实例
-cache = SimpleCache(default_ttl=3600, max_size=1000)
+cache = _create_cache()
 
 
 def get_cached_result(source: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -155,7 +476,8 @@ def get_cached_result(source: str, params: Dict[str, Any]) -> Optional[Dict[str,
     Returns:
         缓存的结果，包含cache_hit标记
     """
-    result = cache.get(source, params)
+    with span('cache_lookup'):
+        result = cache.get(source, params)
     if result:
         # 标记为缓存命中
         result = result.copy()
@@ -178,4 +500,5 @@ def cache_result(source: str, params: Dict[str, Any], result: Dict[str, Any], tt
     result_to_cache = result.copy()
     result_to_cache.pop('cache_hit', None)
     
-    cache.set(source, params, result_to_cache, ttl)
\ No newline at end of file
+    with span('cache_write'):
+        cache.set(source, params, result_to_cache, ttl)
\ No newline at end of file
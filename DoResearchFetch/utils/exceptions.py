@@ -28,6 +28,14 @@ class RateLimitError(Exception):
         self.details = details or {}
 
 
+class QueueFullError(Exception):
+    """任务队列已满异常"""
+    
+    def __init__(self, message: str, details: dict = None):
+        super().__init__(message)
+        self.details = details or {}
+
+
 class SourceUnavailableError(Exception):
     """数据源不可用异常"""
     
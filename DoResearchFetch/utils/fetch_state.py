@@ -0,0 +1,159 @@
+"""
+增量抓取状态（SQLite版本）
+
+按(数据源, 查询参数)保存上游资源的ETag/Last-Modified和水位线（已返回的最新
+文章编号或日期）。调用方带着上次返回的水位线再次抓取时：
+- 水位线不早于保存的水位线，说明调用方已看到上次的全部数据，可以发送条件请求，
+  上游返回304时直接返回空结果
+- 上游数据有变化时，适配器跳过不晚于水位线的条目，不再映射和补全摘要
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# 增量相关参数，不参与状态键的计算
+INCREMENTAL_PARAMS = ('since', 'watermark')
+
+
+def watermark_reached(value: Any, watermark: Any) -> bool:
+    """
+    value是否不晚于watermark（即已被调用方看到）
+
+    水位线是文章编号（数字）或YYYY-MM-DD日期，均为字符串；
+    两者都是数字时按数值比较，否则按字符串比较
+    """
+    if value is None or watermark is None or value == '' or watermark == '':
+        return False
+    value, watermark = str(value), str(watermark)
+    if value.isdigit() and watermark.isdigit():
+        return int(value) <= int(watermark)
+    return value <= watermark
+
+
+def max_watermark(*values: Any) -> Optional[str]:
+    """返回最新的水位线，忽略空值"""
+    result = None
+    for value in values:
+        if value is None or value == '':
+            continue
+        if result is None or not watermark_reached(value, result):
+            result = str(value)
+    return result
+
+
+class FetchStateStore:
+    """增量抓取状态存储"""
+    
+    def __init__(self, db_file: str = "fetch_state.db"):
+        self.db_file = Path(db_file)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._stats = {'conditional_requests': 0, 'not_modified': 0, 'skipped_items': 0}
+        
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._connection().execute("""
+                CREATE TABLE IF NOT EXISTS fetch_state (
+                    source TEXT NOT NULL,
+                    state_key TEXT NOT NULL,
+                    resource TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    watermark TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (source, state_key)
+                )
+            """)
+            self._conn.commit()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """获取共享连接（调用方需持有锁），fork后重新连接"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._conn
+    
+    @staticmethod
+    def state_key(params: Dict[str, Any]) -> str:
+        """根据查询参数生成状态键，忽略since和watermark"""
+        key_params = {key: value for key, value in params.items() if key not in INCREMENTAL_PARAMS}
+        return hashlib.md5(json.dumps(key_params, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def get(self, source: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """获取保存的状态，没有时返回空字典"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT resource, etag, last_modified, watermark FROM fetch_state "
+                "WHERE source = ? AND state_key = ?",
+                (source, self.state_key(params))
+            ).fetchone()
+        return dict(row) if row else {}
+    
+    def conditional_validators(self, source: str, params: Dict[str, Any], resource: str,
+                               watermark: Optional[str]) -> Dict[str, str]:
+        """
+        返回可用于条件请求的校验值
+        
+        只有调用方传入的水位线不早于保存的水位线、且请求的是同一资源时才返回上次的
+        ETag/Last-Modified，否则返回空字典（发送普通请求）。返回的字典可直接传给
+        适配器的_make_request(validators=...)，请求完成后其中是新的校验值
+        """
+        state = self.get(source, params)
+        if (watermark is None or state.get('resource') != resource
+                or not watermark_reached(state.get('watermark'), watermark)):
+            return {}
+        validators = {key: state[key] for key in ('etag', 'last_modified') if state.get(key)}
+        if validators:
+            self.record('conditional_requests')
+        return validators
+    
+    def save(self, source: str, params: Dict[str, Any], resource: Optional[str] = None,
+             etag: Optional[str] = None, last_modified: Optional[str] = None,
+             watermark: Optional[str] = None) -> None:
+        """保存抓取状态，水位线只会前进"""
+        key = self.state_key(params)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT watermark FROM fetch_state WHERE source = ? AND state_key = ?", (source, key)
+            ).fetchone()
+            watermark = max_watermark(row['watermark'] if row else None, watermark)
+            conn.execute(
+                "INSERT OR REPLACE INTO fetch_state "
+                "(source, state_key, resource, etag, last_modified, watermark, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, key, resource, etag, last_modified, watermark, time.time())
+            )
+            conn.commit()
+    
+    def record(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += count
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM fetch_state")
+            self._conn.commit()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM fetch_state").fetchone()[0]
+            return {'entries': entries, **self._stats}
+
+
+def _create_fetch_state() -> FetchStateStore:
+    from config import Config
+    return FetchStateStore(Config.FETCH_STATE_DB)
+
+
+# 全局增量抓取状态实例
+fetch_state = _create_fetch_state()
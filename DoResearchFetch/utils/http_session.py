@@ -0,0 +1,117 @@
+"""
+共享HTTP会话池
+按上游主机维护常驻的requests会话（keep-alive连接池），所有适配器的同步请求共用，
+避免每次请求重新进行DNS解析、TCP和TLS握手
+"""
+
+import os
+import atexit
+import threading
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+# urllib3能解码的压缩格式：安装brotli或brotlicffi后自动包含br
+ACCEPT_ENCODING = DEFAULT_ACCEPT_ENCODING
+
+
+class HTTPSessionPool:
+    """按主机划分的requests会话池"""
+    
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16, pool_block: bool = False):
+        """
+        初始化会话池（会话在首次请求对应主机时才创建）
+        
+        Args:
+            pool_connections: 每个会话缓存的连接池数量（跟随重定向到其他主机时使用）
+            pool_maxsize: 单个主机保持的空闲连接数上限，应不小于访问该主机的并发线程数
+            pool_block: 连接数达到上限时是否等待空闲连接，否则临时新建连接且用完即关闭
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._pid = None
+        self._stats = {'sessions_created': 0, 'requests': 0}
+    
+    @staticmethod
+    def host_key(url: str) -> str:
+        """会话按 scheme://host:port 划分，cookie也随之按主机隔离"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+    
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        session.headers['Connection'] = 'keep-alive'
+        return session
+    
+    def get_session(self, url: str) -> requests.Session:
+        """
+        获取url所在主机的共享会话
+        
+        Args:
+            url: 请求URL
+            
+        Returns:
+            该主机的requests会话（线程安全，可在多个线程中同时使用）
+        """
+        key = self.host_key(url)
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork出的子进程不能复用父进程的连接
+                self._sessions = {}
+                self._pid = os.getpid()
+            
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._new_session()
+                self._stats['sessions_created'] += 1
+            self._stats['requests'] += 1
+            return session
+    
+    def close(self):
+        """关闭所有会话及其连接"""
+        with self._lock:
+            sessions = list(self._sessions.values()) if self._pid == os.getpid() else []
+            self._sessions = {}
+        
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                print(f"⚠️ 关闭HTTP会话失败: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取会话池统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hosts'] = sorted(self._sessions) if self._pid == os.getpid() else []
+        stats['pool_maxsize'] = self.pool_maxsize
+        stats['accept_encoding'] = ACCEPT_ENCODING
+        return stats
+
+
+def _create_http_pool() -> HTTPSessionPool:
+    from config import Config
+    return HTTPSessionPool(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+    )
+
+
+# 全局会话池实例（所有适配器共用）
+http_pool = _create_http_pool()
+atexit.register(http_pool.close)
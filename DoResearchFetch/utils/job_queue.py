@@ -0,0 +1,592 @@
+"""
+持久化的有界抓取任务队列
+
+/api/v1/fetch/async提交的任务先写入队列存储，再由固定数量的工作线程领取执行：
+- 等待中的任务数达到上限时拒绝提交（接口返回429），而不是为每个请求新建线程
+- 任务状态和结果保存在SQLite（配置了REDIS_URL且可用时保存在Redis）中，服务重启后
+  仍可查询，未开始的任务重启后继续执行；使用同一存储的所有工作进程都能查询任意任务
+- 执行中的任务定期刷新心跳，所属进程退出后由其他进程（或重启后的进程）重新排队
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.exceptions import QueueFullError
+from utils.progress_monitor import TaskProgress, TaskStatus
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def new_job(source: str, params: Dict[str, Any], total_items: int = 0, operation: str = "") -> Dict[str, Any]:
+    """构造新任务记录"""
+    return {
+        'job_id': uuid.uuid4().hex[:12],
+        'source': source,
+        'params': params,
+        'status': 'pending',
+        'total_items': total_items,
+        'operation': operation,
+        'attempts': 0,
+        'worker': None,
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'heartbeat': None,
+        'result': None,
+        'error': None,
+    }
+
+
+def job_to_progress(job: Dict[str, Any]) -> TaskProgress:
+    """把任务记录转换为进度信息，与进度API中进程内任务的格式一致"""
+    status = TaskStatus(job['status'])
+    papers = len((job.get('result') or {}).get('papers', []))
+    return TaskProgress(
+        task_id=job['job_id'],
+        status=status,
+        source=job['source'],
+        total_items=job.get('total_items') or 0,
+        processed_items=papers,
+        success_items=papers,
+        failed_items=1 if status == TaskStatus.FAILED else 0,
+        start_time=job.get('started_at') or job['created_at'],
+        end_time=job.get('finished_at'),
+        current_operation=job.get('operation') or '',
+        error_message=job.get('error') or '',
+        results=job.get('result'),
+    )
+
+
+class SQLiteJobBackend:
+    """
+    SQLite任务存储
+
+    同一台机器上的多个工作进程共用数据库文件；提交和领取在BEGIN IMMEDIATE事务中完成，
+    保证等待数上限和每个任务只被领取一次
+    """
+    
+    name = 'sqlite'
+    
+    def __init__(self, db_file: str = "fetch_jobs.db"):
+        self.db_file = Path(db_file)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fetch_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    total_items INTEGER DEFAULT 0,
+                    operation TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat REAL,
+                    result TEXT,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_jobs_status ON fetch_jobs(status, created_at)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """获取共享连接（调用方需持有锁），fork后重新连接"""
+        if self._conn is None or self._pid != os.getpid():
+            # 自动提交模式，需要原子性的操作显式开启事务
+            self._conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._conn
+    
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+    
+    def enqueue(self, job: Dict[str, Any], max_pending: int) -> bool:
+        """写入新任务，等待中的任务数已达上限时返回False"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = conn.execute("SELECT COUNT(*) FROM fetch_jobs WHERE status = 'pending'").fetchone()[0]
+                if pending >= max_pending:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT INTO fetch_jobs (job_id, source, params, status, total_items, operation, created_at) "
+                    "VALUES (?, ?, ?, 'pending', ?, ?, ?)",
+                    (job['job_id'], job['source'], json.dumps(job['params'], default=str),
+                     job['total_items'], job['operation'], job['created_at'])
+                )
+                conn.execute("COMMIT")
+                return True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """领取最早提交的等待中任务，没有时返回None"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT job_id FROM fetch_jobs WHERE status = 'pending' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.execute(
+                    "UPDATE fetch_jobs SET status = 'running', worker = ?, started_at = ?, heartbeat = ?, "
+                    "attempts = attempts + 1 WHERE job_id = ?",
+                    (worker, now, now, row['job_id'])
+                )
+                job = conn.execute("SELECT * FROM fetch_jobs WHERE job_id = ?", (row['job_id'],)).fetchone()
+                conn.execute("COMMIT")
+                return self._to_job(job)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> bool:
+        """保存执行结果；任务已被取消或重新排队时不覆盖，返回False"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE fetch_jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE job_id = ? AND status = 'running'",
+                (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+            return cursor.rowcount == 1
+    
+    def cancel(self, job_id: str) -> bool:
+        """取消等待中或执行中的任务（执行中的任务结果将被丢弃）"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE fetch_jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE job_id = ? AND status IN ('pending', 'running')",
+                (time.time(), job_id)
+            )
+            return cursor.rowcount == 1
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM fetch_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+    
+    def heartbeat(self, job_ids: List[str]):
+        """刷新本进程执行中任务的心跳"""
+        if not job_ids:
+            return
+        with self._lock:
+            self._connection().execute(
+                f"UPDATE fetch_jobs SET heartbeat = ? WHERE status = 'running' "
+                f"AND job_id IN ({','.join('?' * len(job_ids))})",
+                (time.time(), *job_ids)
+            )
+    
+    def requeue_stale(self, stale_before: float, max_attempts: int) -> int:
+        """心跳过期的执行中任务重新排队，已达最大执行次数的标记为失败，返回重新排队的数量"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE fetch_jobs SET status = 'failed', error = '任务执行中断（工作进程退出）', finished_at = ? "
+                    "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                    (time.time(), stale_before, max_attempts)
+                )
+                requeued = conn.execute(
+                    "UPDATE fetch_jobs SET status = 'pending', worker = NULL "
+                    "WHERE status = 'running' AND heartbeat < ?",
+                    (stale_before,)
+                ).rowcount
+                conn.execute("COMMIT")
+                return requeued
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def purge(self, finished_before: float) -> int:
+        """删除结束时间早于指定时间的任务"""
+        with self._lock:
+            return self._connection().execute(
+                f"DELETE FROM fetch_jobs WHERE status IN {FINISHED_STATUSES} AND finished_at < ?",
+                (finished_before,)
+            ).rowcount
+    
+    def counts(self) -> Dict[str, int]:
+        """按状态统计任务数"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) AS count FROM fetch_jobs GROUP BY status"
+            ).fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+
+class RedisJobBackend:
+    """
+    基于Redis的共享任务存储，供多台机器上的工作进程共用
+
+    每个任务一个哈希，等待中的任务ID在列表中（LPOP保证只被领取一次），执行中的任务
+    在以心跳时间为分数的有序集合中；结束的任务按保留时间设置过期
+    """
+    
+    name = 'redis'
+    
+    def __init__(self, client, retention: int = 86400, key_prefix: str = 'doresearch_fetch:jobs:'):
+        self.client = client
+        self.retention = retention
+        self.key_prefix = key_prefix
+        self.pending_key = key_prefix + 'pending'
+        self.running_key = key_prefix + 'running'
+        self.stats_key = key_prefix + 'stats'
+    
+    def _job_key(self, job_id: str) -> str:
+        return self.key_prefix + 'job:' + job_id
+    
+    @staticmethod
+    def _decode(value):
+        return value.decode() if isinstance(value, bytes) else value
+    
+    def _to_job(self, data: Dict) -> Dict[str, Any]:
+        job = {self._decode(key): self._decode(value) for key, value in data.items()}
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job.get('result') else None
+        for key in ('created_at', 'started_at', 'finished_at', 'heartbeat'):
+            job[key] = float(job[key]) if job.get(key) else None
+        for key in ('total_items', 'attempts'):
+            job[key] = int(job.get(key) or 0)
+        for key in ('worker', 'error', 'operation'):
+            job[key] = job.get(key) or None
+        return job
+    
+    def enqueue(self, job: Dict[str, Any], max_pending: int) -> bool:
+        if self.client.llen(self.pending_key) >= max_pending:
+            return False
+        key = self._job_key(job['job_id'])
+        self.client.hset(key, mapping={
+            'job_id': job['job_id'], 'source': job['source'], 'status': 'pending',
+            'params': json.dumps(job['params'], default=str), 'total_items': job['total_items'],
+            'operation': job['operation'] or '', 'attempts': 0, 'created_at': job['created_at'],
+        })
+        # 并发提交可能同时通过上面的检查，入队后超出上限的撤回
+        if self.client.rpush(self.pending_key, job['job_id']) > max_pending:
+            self.client.lrem(self.pending_key, 1, job['job_id'])
+            self.client.delete(key)
+            return False
+        return True
+    
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        while True:
+            job_id = self.client.lpop(self.pending_key)
+            if job_id is None:
+                return None
+            job_id = self._decode(job_id)
+            key = self._job_key(job_id)
+            if self._decode(self.client.hget(key, 'status')) != 'pending':
+                continue  # 已取消
+            now = time.time()
+            self.client.hset(key, mapping={'status': 'running', 'worker': worker,
+                                           'started_at': now, 'heartbeat': now})
+            self.client.hincrby(key, 'attempts', 1)
+            self.client.zadd(self.running_key, {job_id: now})
+            return self._to_job(self.client.hgetall(key))
+    
+    def _close(self, job_id: str, fields: Dict[str, Any]):
+        key = self._job_key(job_id)
+        self.client.hset(key, mapping={**fields, 'finished_at': time.time()})
+        self.client.expire(key, self.retention)
+        self.client.zrem(self.running_key, job_id)
+        self.client.hincrby(self.stats_key, fields['status'], 1)
+    
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> bool:
+        if self._decode(self.client.hget(self._job_key(job_id), 'status')) != 'running':
+            return False
+        fields = {'status': status, 'error': error or ''}
+        if result is not None:
+            fields['result'] = json.dumps(result, ensure_ascii=False, default=str)
+        self._close(job_id, fields)
+        return True
+    
+    def cancel(self, job_id: str) -> bool:
+        status = self._decode(self.client.hget(self._job_key(job_id), 'status'))
+        if status not in ('pending', 'running'):
+            return False
+        self.client.lrem(self.pending_key, 1, job_id)
+        self._close(job_id, {'status': 'cancelled'})
+        return True
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.hgetall(self._job_key(job_id))
+        return self._to_job(data) if data else None
+    
+    def heartbeat(self, job_ids: List[str]):
+        if job_ids:
+            now = time.time()
+            self.client.zadd(self.running_key, {job_id: now for job_id in job_ids}, xx=True)
+    
+    def requeue_stale(self, stale_before: float, max_attempts: int) -> int:
+        requeued = 0
+        for job_id in self.client.zrangebyscore(self.running_key, 0, stale_before):
+            job_id = self._decode(job_id)
+            # 多个进程同时检查时只有移除成功的一方处理
+            if not self.client.zrem(self.running_key, job_id):
+                continue
+            key = self._job_key(job_id)
+            if int(self.client.hget(key, 'attempts') or 0) >= max_attempts:
+                self._close(job_id, {'status': 'failed', 'error': '任务执行中断（工作进程退出）'})
+                continue
+            self.client.hset(key, mapping={'status': 'pending', 'worker': ''})
+            self.client.rpush(self.pending_key, job_id)
+            requeued += 1
+        return requeued
+    
+    def purge(self, finished_before: float) -> int:
+        return 0  # 结束的任务由过期时间清理
+    
+    def counts(self) -> Dict[str, int]:
+        counts = {self._decode(key): int(value) for key, value in self.client.hgetall(self.stats_key).items()}
+        counts['pending'] = self.client.llen(self.pending_key)
+        counts['running'] = self.client.zcard(self.running_key)
+        return counts
+
+
+class JobQueue:
+    """有界任务队列 + 固定数量的工作线程"""
+    
+    def __init__(self, backend, handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 workers: int = 4, max_pending: int = 100, heartbeat_interval: float = 10,
+                 stale_after: float = 60, max_attempts: int = 2, retention: float = 86400,
+                 poll_interval: float = 2):
+        """
+        初始化任务队列（工作线程在首次调用start时启动）
+        
+        Args:
+            backend: 任务存储（SQLiteJobBackend或RedisJobBackend）
+            handler: 执行任务的函数，接收任务记录，返回可JSON序列化的结果
+            workers: 本进程的工作线程数
+            max_pending: 所有进程共享的等待中任务数上限
+            heartbeat_interval: 刷新心跳、检查过期任务的间隔（秒）
+            stale_after: 心跳超过该时间未刷新的执行中任务视为所属进程已退出（秒）
+            max_attempts: 任务最多执行的次数（包括进程退出后的重新执行）
+            retention: 结束的任务保留时间（秒）
+            poll_interval: 空闲工作线程检查其他进程提交的任务的间隔（秒）
+        """
+        self.backend = backend
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stop: Optional[threading.Event] = None
+        self._wakeup: Optional[threading.Semaphore] = None
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[str, float] = {}
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0,
+                       'requeued': 0, 'total_wait_time': 0.0, 'started': 0}
+    
+    def start(self):
+        """启动本进程的工作线程；已启动时直接返回，fork出的子进程会重新启动"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._wakeup = threading.Semaphore(0)
+            self._running = {}
+            self._threads = [
+                threading.Thread(target=self._worker_loop, args=(self._stop, self._wakeup),
+                                 name=f'fetch-job-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._maintenance_loop, args=(self._stop,),
+                                                  name='fetch-job-maintenance', daemon=True))
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+    
+    def submit(self, source: str, params: Dict[str, Any], total_items: int = 0,
+               operation: str = "") -> Dict[str, Any]:
+        """
+        提交任务
+        
+        Returns:
+            任务记录
+            
+        Raises:
+            QueueFullError: 等待中的任务数已达上限
+        """
+        self.start()
+        job = new_job(source, params, total_items, operation)
+        if not self.backend.enqueue(job, self.max_pending):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise QueueFullError(
+                "抓取任务队列已满，请稍后重试",
+                details={'max_pending': self.max_pending, 'retry_after': int(self.poll_interval * 5)}
+            )
+        with self._lock:
+            self._stats['submitted'] += 1
+        self._wakeup.release()
+        return job
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.backend.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        return self.backend.cancel(job_id)
+    
+    def _worker_loop(self, stop: threading.Event, wakeup: threading.Semaphore):
+        worker = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not stop.is_set():
+            try:
+                job = self.backend.claim(worker)
+            except Exception as e:
+                print(f"⚠️ 领取抓取任务失败: {e}")
+                job = None
+            
+            if job is None:
+                # 本进程提交任务时立即唤醒，否则定期检查其他进程提交的任务
+                wakeup.acquire(timeout=self.poll_interval)
+                continue
+            self._run_job(job)
+    
+    def _run_job(self, job: Dict[str, Any]):
+        job_id = job['job_id']
+        with self._lock:
+            self._running[job_id] = time.time()
+            self._stats['started'] += 1
+            self._stats['total_wait_time'] += max(0.0, job['started_at'] - job['created_at'])
+        
+        try:
+            result, error = self.handler(job), None
+        except Exception as e:
+            result, error = None, str(e)
+        
+        try:
+            self.backend.finish(job_id, 'failed' if error else 'completed', result, error)
+        except Exception as e:
+            print(f"⚠️ 保存抓取任务结果失败 {job_id}: {e}")
+        
+        with self._lock:
+            self._running.pop(job_id, None)
+            self._stats['failed' if error else 'completed'] += 1
+    
+    def _maintenance_loop(self, stop: threading.Event):
+        last_purge = 0.0
+        while True:
+            try:
+                with self._lock:
+                    running = list(self._running)
+                self.backend.heartbeat(running)
+                
+                requeued = self.backend.requeue_stale(time.time() - self.stale_after, self.max_attempts)
+                if requeued:
+                    with self._lock:
+                        self._stats['requeued'] += requeued
+                    for _ in range(requeued):
+                        self._wakeup.release()
+                
+                if time.time() - last_purge > self.retention / 24:
+                    self.backend.purge(time.time() - self.retention)
+                    last_purge = time.time()
+            except Exception as e:
+                print(f"⚠️ 抓取任务队列维护失败: {e}")
+            
+            if stop.wait(self.heartbeat_interval):
+                return
+    
+    def close(self, timeout: float = 5):
+        """停止本进程的工作线程（执行中的任务会在心跳过期后由其他进程重新执行）"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            stop, wakeup, threads = self._stop, self._wakeup, self._threads
+            self._pid = None
+        
+        stop.set()
+        for _ in range(self.workers):
+            wakeup.release()
+        for thread in threads:
+            thread.join(timeout=timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列统计信息"""
+        with self._lock:
+            stats = {key: value for key, value in self._stats.items() if key != 'total_wait_time'}
+            stats['avg_wait_time_ms'] = (int(self._stats['total_wait_time'] / self._stats['started'] * 1000)
+                                         if self._stats['started'] else 0)
+            stats['running_local'] = len(self._running)
+        stats['backend'] = self.backend.name
+        stats['workers'] = self.workers
+        stats['max_pending'] = self.max_pending
+        try:
+            stats['jobs'] = self.backend.counts()
+        except Exception as e:
+            stats['jobs'] = {'error': str(e)}
+        return stats
+
+
+def create_job_queue(handler: Callable[[Dict[str, Any]], Dict[str, Any]], db_file: str = "fetch_jobs.db",
+                     redis_url: Optional[str] = None, use_redis: bool = False, **options) -> JobQueue:
+    """
+    创建任务队列
+    
+    Args:
+        handler: 执行任务的函数
+        db_file: SQLite存储文件
+        redis_url: Redis连接URL
+        use_redis: 是否使用Redis存储（多台机器共用队列时开启），Redis不可用时退回SQLite
+        **options: 传给JobQueue的其他参数
+        
+    Returns:
+        任务队列
+    """
+    backend = None
+    if use_redis and redis_url:
+        if redis is None:
+            print("⚠️ 未安装redis包，抓取任务队列使用SQLite")
+        else:
+            try:
+                client = redis.Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=5)
+                client.ping()
+                backend = RedisJobBackend(client, retention=int(options.get('retention', 86400)))
+            except Exception as e:
+                print(f"⚠️ 无法连接Redis ({redis_url})，抓取任务队列使用SQLite: {e}")
+    
+    return JobQueue(backend or SQLiteJobBackend(db_file), handler, **options)
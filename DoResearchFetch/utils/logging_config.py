@@ -4,13 +4,26 @@
 
 import os
 import sys
+import glob
+import json
+import uuid
+import atexit
+import bisect
 import logging
+import threading
 import logging.handlers
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any
 from flask import request, g
+from utils.exceptions import ValidationError
 import time
 
+try:
+    import fcntl
+except ImportError:  # Windows上不归档已退出进程的指标快照
+    fcntl = None
+
 
 class LogConfig:
     """日志配置类"""
@@ -181,7 +194,8 @@ class LogConfig:
                 'url': request.url,
                 'protocol': request.environ.get('SERVER_PROTOCOL', 'HTTP/1.1'),
                 'status_code': response.status_code,
-                'response_size': response.calculate_content_length() or 0,
+                # 流式响应（SSE/NDJSON）没有Content-Length，计算长度会把整个响应读入内存
+                'response_size': response.content_length or 0,
                 'user_agent': request.headers.get('User-Agent', ''),
                 'response_time': response_time
             }
@@ -211,72 +225,481 @@ class LogConfig:
             app.logger.error(f"Failed to log error: {e}")
 
 
-class MetricsCollector:
-    """指标收集器"""
+# 请求耗时直方图的桶上界（毫秒），超过最后一个上界的计入+Inf桶
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+# 请求结果：success/error为向上游抓取成功/失败，cache_hit为由缓存返回，rejected为参数校验失败（未请求上游）
+OUTCOMES = ('success', 'error', 'cache_hit', 'rejected')
+
+PROMETHEUS_PREFIX = 'do_research_fetch'
+
+
+class _MetricsShard:
+    """一组线程共用的计数分片，写入时只和同一分片的线程竞争锁"""
+    
+    __slots__ = ('lock', 'requests', 'error_types', 'in_flight')
     
     def __init__(self):
+        self.lock = threading.Lock()
+        # (数据源, 结果) -> [请求数, 计时次数, 累计毫秒, 各桶计数...]
+        self.requests: Dict[tuple, list] = {}
+        self.error_types: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+
+
+def _latency_quantile(buckets: list, observed: int, q: float) -> float:
+    """按直方图估算分位数（毫秒），桶内线性插值"""
+    if not observed:
+        return 0.0
+    rank = q * observed
+    cumulative = 0
+    for index, count in enumerate(buckets):
+        if count and cumulative + count >= rank:
+            if index == len(LATENCY_BUCKETS_MS):
+                return float(LATENCY_BUCKETS_MS[-1])
+            lower = LATENCY_BUCKETS_MS[index - 1] if index else 0
+            upper = LATENCY_BUCKETS_MS[index]
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+def _latency_summary(entry: list) -> Dict[str, float]:
+    """平均耗时和p50/p95/p99（毫秒）"""
+    observed, total_ms, buckets = entry[1], entry[2], entry[3:]
+    return {
+        'avg': round(total_ms / observed, 2) if observed else 0,
+        'p50': round(_latency_quantile(buckets, observed, 0.50), 2),
+        'p95': round(_latency_quantile(buckets, observed, 0.95), 2),
+        'p99': round(_latency_quantile(buckets, observed, 0.99), 2)
+    }
+
+
+def _empty_totals() -> Dict[str, dict]:
+    return {'requests': {}, 'error_types': {}, 'in_flight': {}, 'stage_timings': {}}
+
+
+def _merge_snapshot(totals: Dict[str, dict], snapshot: Dict[str, Any], include_in_flight: bool = True):
+    """把一个进程的指标快照累加到totals（进行中的请求数是瞬时值，只统计存活的进程）"""
+    for source, outcome, entry in snapshot.get('requests', []):
+        merged = totals['requests'].get((source, outcome))
+        if merged is None:
+            totals['requests'][(source, outcome)] = list(entry)
+        else:
+            for index, value in enumerate(entry):
+                merged[index] += value
+    for error_type, count in snapshot.get('error_types', {}).items():
+        totals['error_types'][error_type] = totals['error_types'].get(error_type, 0) + count
+    if include_in_flight:
+        for source, count in snapshot.get('in_flight', {}).items():
+            totals['in_flight'][source] = totals['in_flight'].get(source, 0) + count
+    for source, stages in snapshot.get('stage_timings', {}).items():
+        source_stages = totals['stage_timings'].setdefault(source, {})
+        for stage, (count, total_ms, max_ms) in stages.items():
+            entry = source_stages.get(stage)
+            if entry is None:
+                source_stages[stage] = [count, total_ms, max_ms]
+            else:
+                entry[0] += count
+                entry[1] += total_ms
+                entry[2] = max(entry[2], max_ms)
+
+
+def _snapshot_from_totals(totals: Dict[str, dict]) -> Dict[str, Any]:
+    """totals转为可写入JSON的快照格式"""
+    return {
+        'requests': [[source, outcome, entry] for (source, outcome), entry in totals['requests'].items()],
+        'error_types': totals['error_types'],
+        'in_flight': totals['in_flight'],
+        'stage_timings': totals['stage_timings']
+    }
+
+
+def _read_snapshot(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path: str, snapshot: Dict[str, Any]):
+    """先写临时文件再替换，读取方不会读到写了一半的快照"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _stage_summary(stage_timings: Dict[str, Dict[str, list]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    return {
+        source: {stage: {'count': count, 'avg_ms': round(total / count, 2), 'max_ms': round(peak, 2)}
+                 for stage, (count, total, peak) in stages.items()}
+        for source, stages in stage_timings.items()
+    }
+
+
+def _prometheus_labels(**labels) -> str:
+    """标签集合，值中的反斜杠、引号和换行按Prometheus文本格式转义"""
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsCollector:
+    """
+    指标收集器
+    
+    请求数和耗时按(数据源, 结果)记录在固定桶的直方图中，分位数由桶估算，内存占用不随请求数增长；
+    计数按线程分到多个分片，每个分片有自己的锁，读取时再合并各分片。
+    
+    多进程部署（gunicorn多个工作进程）时调用enable_shared_store：各进程定期把累计指标写入共享目录下
+    自己的快照文件，读取指标时合并目录中所有进程的快照；已退出进程的快照合并进archive.json，
+    计数器不会因工作进程重启（--max-requests）而回落
+    """
+    
+    def __init__(self, shards: int = 16):
+        self._stage_lock = threading.Lock()
+        self._shard_count = max(1, shards)
+        self._store_dir = None
+        self._store_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._store_pid = None
+        self._store_path = None
+        self._flush_interval = 5.0
         self.reset_metrics()
     
     def reset_metrics(self):
         """重置指标"""
-        self.metrics = {
-            'requests_total': 0,
-            'requests_success': 0,
-            'requests_error': 0,
-            'response_times': [],
-            'source_requests': {},
-            'error_types': {},
-            'start_time': time.time()
-        }
+        with self._stage_lock:
+            # 数据源 -> 阶段 -> [次数, 累计毫秒, 最大毫秒]
+            self.stage_timings: Dict[str, Dict[str, list]] = {}
+        self._shards = [_MetricsShard() for _ in range(self._shard_count)]
+        self.start_time = time.time()
     
-    def record_request(self, source: str = None, success: bool = True, response_time: float = 0, error_type: str = None):
-        """记录请求指标"""
-        self.metrics['requests_total'] += 1
-        
-        if success:
-            self.metrics['requests_success'] += 1
-        else:
-            self.metrics['requests_error'] += 1
-            if error_type:
-                self.metrics['error_types'][error_type] = self.metrics['error_types'].get(error_type, 0) + 1
+    def enable_shared_store(self, directory: str, flush_interval: float = 5.0):
+        """各进程的指标写入directory并在读取时合并，flush_interval为写入快照的间隔（秒）"""
+        os.makedirs(directory, exist_ok=True)
+        self._flush_interval = flush_interval
+        self._store_dir = directory
+        atexit.register(self.flush)
+    
+    def _ensure_store(self):
+        """
+        当前进程第一次记录或读取指标时创建快照文件并启动写入线程
         
-        if response_time > 0:
-            self.metrics['response_times'].append(response_time)
-            # 只保留最近1000个响应时间
-            if len(self.metrics['response_times']) > 1000:
-                self.metrics['response_times'] = self.metrics['response_times'][-1000:]
+        gunicorn --preload时收集器在主进程创建后被fork到各工作进程，线程不会随fork复制，
+        因此按进程ID判断是否需要在新进程中启动
+        """
+        pid = os.getpid()
+        if self._store_dir is None or self._store_pid == pid:
+            return
+        with self._store_lock:
+            if self._store_pid == pid:
+                return
+            if self._store_pid is not None:
+                # 从已记录过指标的进程fork而来，继承的计数已在父进程的快照中
+                self.reset_metrics()
+            self._store_path = os.path.join(self._store_dir, f'metrics_{pid}_{uuid.uuid4().hex[:8]}.json')
+            self._store_pid = pid
+            threading.Thread(target=self._flush_loop, args=(pid,), name='metrics-flush', daemon=True).start()
+    
+    def _flush_loop(self, pid: int):
+        while self._store_pid == pid:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logging.getLogger('do_research_fetch').warning(f"Failed to write metrics snapshot: {e}")
+    
+    def flush(self):
+        """把当前进程的累计指标写入共享目录"""
+        if self._store_dir is None or self._store_pid != os.getpid():
+            return
+        requests, error_types, in_flight = self._merge_shards()
+        with self._stage_lock:
+            stage_timings = {source: {stage: list(entry) for stage, entry in stages.items()}
+                             for source, stages in self.stage_timings.items()}
+        snapshot = _snapshot_from_totals({'requests': requests, 'error_types': error_types,
+                                          'in_flight': in_flight, 'stage_timings': stage_timings})
+        snapshot.update(pid=os.getpid(), started=self.start_time)
+        with self._flush_lock:
+            _write_snapshot(self._store_path, snapshot)
+    
+    @contextmanager
+    def _store_file_lock(self):
+        """进程间互斥地归档和读取快照，避免已退出进程的快照被重复计入或漏计"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._store_dir, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_store(self) -> Dict[str, dict]:
+        """合并共享目录中所有进程的快照，顺便把已退出进程的快照归档"""
+        self._ensure_store()
+        self.flush()
+        archive_path = os.path.join(self._store_dir, 'archive.json')
+        with self._store_file_lock():
+            snapshots = []
+            for path in glob.glob(os.path.join(self._store_dir, 'metrics_*.json')):
+                snapshot = _read_snapshot(path)
+                if snapshot is not None:
+                    snapshots.append((path, snapshot))
+            # 进程ID可能被复用，同一进程ID只有最后启动的快照属于存活的进程
+            latest = {}
+            for path, snapshot in snapshots:
+                current = latest.get(snapshot['pid'])
+                if current is None or snapshot['started'] > current['started']:
+                    latest[snapshot['pid']] = snapshot
+            
+            archive = _empty_totals()
+            _merge_snapshot(archive, _read_snapshot(archive_path) or {}, include_in_flight=False)
+            exited = []
+            for path, snapshot in snapshots:
+                if latest[snapshot['pid']] is not snapshot or not _pid_alive(snapshot['pid']):
+                    _merge_snapshot(archive, snapshot, include_in_flight=False)
+                    exited.append(path)
+            if exited and fcntl is not None:
+                _write_snapshot(archive_path, _snapshot_from_totals(archive))
+                for path in exited:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
         
-        if source:
-            self.metrics['source_requests'][source] = self.metrics['source_requests'].get(source, 0) + 1
+        totals = archive
+        for path, snapshot in snapshots:
+            if path not in exited:
+                _merge_snapshot(totals, snapshot)
+        return totals
+    
+    def _collect(self):
+        """返回(请求直方图, 错误类型计数, 各数据源进行中的请求数, 分阶段耗时)，启用共享目录时为所有进程的合计"""
+        if self._store_dir is not None:
+            totals = self._read_store()
+            return totals['requests'], totals['error_types'], totals['in_flight'], totals['stage_timings']
+        requests, error_types, in_flight = self._merge_shards()
+        with self._stage_lock:
+            stage_timings = {source: {stage: list(entry) for stage, entry in stages.items()}
+                             for source, stages in self.stage_timings.items()}
+        return requests, error_types, in_flight, stage_timings
+    
+    def _shard(self) -> _MetricsShard:
+        # 系统线程ID按创建顺序分配，取模后相邻线程落在不同分片
+        return self._shards[threading.get_native_id() % self._shard_count]
+    
+    def record_request(self, source: str = None, success: bool = True, response_time: float = 0,
+                       error_type: str = None, outcome: str = None):
+        """记录请求指标（response_time为毫秒，为0时只计数不计时；outcome默认按success取success或error）"""
+        outcome = outcome or ('success' if success else 'error')
+        key = (source or 'unknown', outcome)
+        self._ensure_store()
+        shard = self._shard()
+        with shard.lock:
+            entry = shard.requests.get(key)
+            if entry is None:
+                entry = shard.requests[key] = [0, 0, 0.0] + [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            entry[0] += 1
+            if response_time > 0:
+                entry[1] += 1
+                entry[2] += response_time
+                entry[3 + bisect.bisect_left(LATENCY_BUCKETS_MS, response_time)] += 1
+            if not success and error_type:
+                shard.error_types[error_type] = shard.error_types.get(error_type, 0) + 1
+    
+    def _add_in_flight(self, source: str, delta: int):
+        self._ensure_store()
+        shard = self._shard()
+        with shard.lock:
+            shard.in_flight[source] = shard.in_flight.get(source, 0) + delta
+    
+    @contextmanager
+    def track_in_flight(self, source: str):
+        """统计正在向上游抓取的请求（with metrics_collector.track_in_flight(source): ...）"""
+        self._add_in_flight(source, 1)
+        try:
+            yield
+        finally:
+            self._add_in_flight(source, -1)
+    
+    def _merge_shards(self):
+        """合并各分片，返回(请求直方图, 错误类型计数, 各数据源进行中的请求数)"""
+        requests: Dict[tuple, list] = {}
+        error_types: Dict[str, int] = {}
+        in_flight: Dict[str, int] = {}
+        for shard in self._shards:
+            with shard.lock:
+                for key, entry in shard.requests.items():
+                    merged = requests.get(key)
+                    if merged is None:
+                        requests[key] = list(entry)
+                    else:
+                        for index, value in enumerate(entry):
+                            merged[index] += value
+                for error_type, count in shard.error_types.items():
+                    error_types[error_type] = error_types.get(error_type, 0) + count
+                for source, count in shard.in_flight.items():
+                    in_flight[source] = in_flight.get(source, 0) + count
+        return requests, error_types, in_flight
+    
+    def record_stages(self, source: str, trace):
+        """按数据源和阶段汇总一次抓取的分阶段耗时（trace为utils.tracing.Trace）"""
+        self._ensure_store()
+        with self._stage_lock:
+            source_stages = self.stage_timings.setdefault(source, {})
+            for stage, (seconds, _count) in list(trace.stages.items()) + [('total', (trace.total_seconds, 1))]:
+                ms = seconds * 1000
+                entry = source_stages.get(stage)
+                if entry is None:
+                    source_stages[stage] = [1, ms, ms]
+                else:
+                    entry[0] += 1
+                    entry[1] += ms
+                    entry[2] = max(entry[2], ms)
+    
+    def get_stage_timings(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """各数据源各阶段的平均和最大耗时（毫秒），count为包含该阶段的抓取次数"""
+        return _stage_summary(self._collect()[3])
     
     def get_metrics(self) -> Dict[str, Any]:
         """获取当前指标"""
-        uptime = time.time() - self.metrics['start_time']
+        uptime = time.time() - self.start_time
+        requests, error_types, in_flight, stage_timings = self._collect()
         
-        response_times = self.metrics['response_times']
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
+        empty = [0, 0, 0.0] + [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        overall = list(empty)
+        outcome_counts = dict.fromkeys(OUTCOMES, 0)
+        per_source: Dict[str, Dict[str, Any]] = {}
+        for (source, outcome), entry in requests.items():
+            outcome_counts[outcome] += entry[0]
+            for index, value in enumerate(entry):
+                overall[index] += value
+            source_entry = per_source.setdefault(source, {'latency': list(empty), **dict.fromkeys(OUTCOMES, 0)})
+            source_entry[outcome] += entry[0]
+            for index, value in enumerate(entry):
+                source_entry['latency'][index] += value
         
-        success_rate = (self.metrics['requests_success'] / self.metrics['requests_total']) * 100 if self.metrics['requests_total'] > 0 else 0
+        sources = {}
+        for source, entry in per_source.items():
+            total = sum(entry[outcome] for outcome in OUTCOMES)
+            upstream = entry['success'] + entry['error']
+            sources[source] = {
+                'requests': total,
+                'cache_hits': entry['cache_hit'],
+                'cache_hit_ratio': round(entry['cache_hit'] / total, 4) if total else 0.0,
+                'upstream_errors': entry['error'],
+                'upstream_error_rate': round(entry['error'] / upstream, 4) if upstream else 0.0,
+                'in_flight': in_flight.get(source, 0),
+                'latency_ms': _latency_summary(entry['latency'])
+            }
+        
+        requests_total = overall[0]
+        requests_success = outcome_counts['success'] + outcome_counts['cache_hit']
+        upstream_total = outcome_counts['success'] + outcome_counts['error']
+        latency = _latency_summary(overall)
         
         return {
             'uptime_seconds': int(uptime),
-            'requests_total': self.metrics['requests_total'],
-            'requests_success': self.metrics['requests_success'],
-            'requests_error': self.metrics['requests_error'],
-            'success_rate_percent': round(success_rate, 2),
-            'avg_response_time_ms': round(avg_response_time, 2),
-            'source_requests': self.metrics['source_requests'],
-            'error_types': self.metrics['error_types'],
+            'requests_total': requests_total,
+            'requests_success': requests_success,
+            'requests_error': outcome_counts['error'] + outcome_counts['rejected'],
+            'success_rate_percent': round(requests_success / requests_total * 100, 2) if requests_total else 0,
+            'avg_response_time_ms': latency['avg'],
+            'latency_ms': latency,
+            'cache_hit_ratio': round(outcome_counts['cache_hit'] / requests_total, 4) if requests_total else 0.0,
+            'upstream_error_rate': round(outcome_counts['error'] / upstream_total, 4) if upstream_total else 0.0,
+            'in_flight': sum(in_flight.values()),
+            'source_requests': {source: entry['requests'] for source, entry in sources.items()},
+            'sources': sources,
+            'error_types': error_types,
+            'stage_timings': _stage_summary(stage_timings),
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
+    
+    def render_prometheus(self) -> str:
+        """Prometheus文本格式（0.0.4）的指标"""
+        requests, error_types, in_flight, stage_timings = self._collect()
+        lines = []
+        
+        def header(name, kind, help_text):
+            lines.append(f'# HELP {PROMETHEUS_PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {PROMETHEUS_PREFIX}_{name} {kind}')
+        
+        def sample(name, value, **labels):
+            label_text = _prometheus_labels(**labels) if labels else ''
+            lines.append(f'{PROMETHEUS_PREFIX}_{name}{label_text} {value}')
+        
+        header('uptime_seconds', 'gauge', 'Seconds since the collector started.')
+        sample('uptime_seconds', round(time.time() - self.start_time, 3))
+        
+        header('requests_total', 'counter', 'Fetch requests by source and outcome.')
+        for (source, outcome), entry in sorted(requests.items()):
+            sample('requests_total', entry[0], source=source, outcome=outcome)
+        
+        header('request_duration_seconds', 'histogram', 'Fetch request latency by source and outcome.')
+        for (source, outcome), entry in sorted(requests.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS + ('+Inf',), entry[3:]):
+                cumulative += count
+                le = bound if bound == '+Inf' else repr(bound / 1000)
+                sample('request_duration_seconds_bucket', cumulative, source=source, outcome=outcome, le=le)
+            sample('request_duration_seconds_sum', round(entry[2] / 1000, 6), source=source, outcome=outcome)
+            sample('request_duration_seconds_count', entry[1], source=source, outcome=outcome)
+        
+        header('in_flight_requests', 'gauge', 'Upstream fetches currently running by source.')
+        for source, count in sorted(in_flight.items()):
+            sample('in_flight_requests', count, source=source)
+        
+        header('errors_total', 'counter', 'Failed fetch requests by error type.')
+        for error_type, count in sorted(error_types.items()):
+            sample('errors_total', count, type=error_type)
+        
+        header('stage_duration_seconds', 'summary', 'Time spent in each fetch stage by source.')
+        stage_timings = _stage_summary(stage_timings)
+        for source, stages in sorted(stage_timings.items()):
+            for stage, entry in stages.items():
+                sample('stage_duration_seconds_sum', round(entry['avg_ms'] * entry['count'] / 1000, 6),
+                       source=source, stage=stage)
+                sample('stage_duration_seconds_count', entry['count'], source=source, stage=stage)
+        
+        header('stage_duration_max_seconds', 'gauge', 'Slowest observed run of each fetch stage by source.')
+        for source, stages in sorted(stage_timings.items()):
+            for stage, entry in stages.items():
+                sample('stage_duration_max_seconds', round(entry['max_ms'] / 1000, 6), source=source, stage=stage)
+        
+        return '\n'.join(lines) + '\n'
 
 
 # 全局指标收集器实例
 metrics_collector = MetricsCollector()
 
 
-def log_api_call(source: str, params: dict, success: bool, response_time: float, papers_count: int = 0, error: str = None):
-    """记录API调用日志"""
+def log_api_call(source: str, params: dict, success: bool, response_time: float, papers_count: int = 0, error=None,
+                 cache_hit: bool = False):
+    """
+    记录API调用日志
+    
+    error可以是异常对象（按异常类型统计错误）或错误信息；cache_hit为True表示结果由缓存返回，没有请求上游
+    """
     logger = logging.getLogger('do_research_fetch')
     
     log_data = {
@@ -288,16 +711,25 @@ def log_api_call(source: str, params: dict, success: bool, response_time: float,
         'timestamp': datetime.utcnow().isoformat() + 'Z'
     }
     
-    if success:
+    if cache_hit:
+        logger.info(f"API call served from cache: {source}", extra=log_data)
+    elif success:
         logger.info(f"API call successful: {source}", extra=log_data)
     else:
-        log_data['error'] = error
+        log_data['error'] = str(error)
         logger.error(f"API call failed: {source} - {error}", extra=log_data)
     
     # 记录指标
+    if cache_hit:
+        outcome = 'cache_hit'
+    elif isinstance(error, ValidationError):
+        outcome = 'rejected'
+    else:
+        outcome = None
     metrics_collector.record_request(
         source=source,
         success=success,
         response_time=response_time * 1000,  # 转换为毫秒
-        error_type=type(error).__name__ if error else None
+        error_type=type(error).__name__ if isinstance(error, BaseException) else None,
+        outcome=outcome
     )
\ No newline at end of file
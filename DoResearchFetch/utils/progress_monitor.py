@@ -1,17 +1,20 @@
 """
 进度监控和任务状态管理
-支持实时任务进度查询和WebSocket推送
+支持实时任务进度查询和SSE推送
 """
 
 import time
 import uuid
 import json
 import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from utils.tracing import span
+
 
 class TaskStatus(Enum):
     """任务状态枚举"""
@@ -80,17 +83,42 @@ class TaskProgress:
         return data
 
 
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+# 当前线程绑定的任务ID，进度追踪器使用该ID而不是新建ID（异步抓取任务用它关联适配器内部的进度）
+_bound_task = threading.local()
+
+
+@contextmanager
+def bind_task(task_id: str):
+    """在上下文中把当前线程创建的进度追踪器绑定到指定任务ID"""
+    previous = getattr(_bound_task, 'task_id', None)
+    _bound_task.task_id = task_id
+    try:
+        yield
+    finally:
+        _bound_task.task_id = previous
+
+
 class ProgressManager:
     """进度管理器"""
     
     def __init__(self):
         self._tasks: Dict[str, TaskProgress] = {}
         self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._versions: Dict[str, int] = {}
         self._max_history = 100  # 最多保留100个已完成任务
     
-    def create_task(self, source: str, total_items: int, operation: str = "") -> str:
-        """创建新任务"""
-        task_id = str(uuid.uuid4())[:8]
+    def _touch(self, task_id: str):
+        """记录任务有变化并唤醒等待者（调用方需持有锁）"""
+        self._versions[task_id] = self._versions.get(task_id, 0) + 1
+        self._changed.notify_all()
+    
+    def create_task(self, source: str, total_items: int, operation: str = "",
+                    task_id: Optional[str] = None) -> str:
+        """创建新任务，未指定task_id时生成新ID"""
+        task_id = task_id or str(uuid.uuid4())[:8]
         
         with self._lock:
             task = TaskProgress(
@@ -105,6 +133,7 @@ class ProgressManager:
                 current_operation=operation
             )
             self._tasks[task_id] = task
+            self._touch(task_id)
         
         return task_id
     
@@ -116,6 +145,7 @@ class ProgressManager:
                 task.status = TaskStatus.RUNNING
                 task.current_operation = operation
                 task.start_time = time.time()
+                self._touch(task_id)
     
     def update_progress(self, task_id: str, processed: int = None, success: int = None, 
                        failed: int = None, operation: str = None):
@@ -134,6 +164,7 @@ class ProgressManager:
                 task.failed_items = failed
             if operation is not None:
                 task.current_operation = operation
+            self._touch(task_id)
     
     def increment_progress(self, task_id: str, success: bool = True, operation: str = None):
         """递增任务进度"""
@@ -151,6 +182,7 @@ class ProgressManager:
             
             if operation is not None:
                 task.current_operation = operation
+            self._touch(task_id)
     
     def complete_task(self, task_id: str, results: Dict[str, Any] = None):
         """完成任务"""
@@ -165,6 +197,7 @@ class ProgressManager:
             
             if results:
                 task.results = results
+            self._touch(task_id)
             
             # 清理旧任务历史
             self._cleanup_old_tasks()
@@ -180,6 +213,7 @@ class ProgressManager:
             task.end_time = time.time()
             task.error_message = error_message
             task.current_operation = "Failed"
+            self._touch(task_id)
     
     def cancel_task(self, task_id: str):
         """取消任务"""
@@ -192,6 +226,14 @@ class ProgressManager:
                 task.status = TaskStatus.CANCELLED
                 task.end_time = time.time()
                 task.current_operation = "Cancelled"
+                self._touch(task_id)
+    
+    def set_results(self, task_id: str, results: Dict[str, Any]):
+        """设置任务结果数据"""
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id].results = results
+                self._touch(task_id)
     
     def get_task(self, task_id: str) -> Optional[TaskProgress]:
         """获取任务信息"""
@@ -238,6 +280,74 @@ class ProgressManager:
             # 删除最旧的任务
             for task_id, _ in completed_tasks[:-self._max_history]:
                 del self._tasks[task_id]
+                self._versions.pop(task_id, None)
+    
+    def wait_for_update(self, task_id: str, version: int, timeout: float) -> int:
+        """
+        等待任务发生变化
+        
+        Args:
+            task_id: 任务ID
+            version: 调用方已看到的版本号
+            timeout: 最长等待时间（秒）
+            
+        Returns:
+            当前版本号，与传入的相同表示超时前没有变化
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._versions.get(task_id, 0) != version, timeout)
+            return self._versions.get(task_id, 0)
+    
+    def watch(self, task_id: str, fallback: Optional[Callable[[str], Optional[TaskProgress]]] = None,
+              min_interval: float = 0.25, poll_interval: float = 1.0,
+              keepalive: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        跟随任务进度，供推送接口使用
+        
+        任务有变化时产出任务快照，min_interval内的多次更新合并为一次；超过keepalive秒
+        没有变化时产出None（调用方可据此发送保活消息），任务结束后停止。
+        
+        Args:
+            task_id: 任务ID
+            fallback: 本进程中没有该任务或任务已结束时查询任务的函数（如其他进程执行的
+                异步抓取任务），此时每poll_interval秒查询一次
+            min_interval: 两次快照之间的最短间隔（秒）
+            poll_interval: 使用fallback时的查询间隔（秒）
+            keepalive: 没有变化时产出None的间隔（秒）
+        """
+        last_state = None
+        last_yield = 0.0
+        while True:
+            with self._lock:
+                version = self._versions.get(task_id, 0)
+                task = self._tasks.get(task_id)
+                live = task is not None and task.status not in FINISHED_STATUSES
+                snapshot = task.to_dict() if task is not None else None
+            
+            if not live and fallback is not None:
+                fallback_task = fallback(task_id)
+                if fallback_task is not None:
+                    task, snapshot = fallback_task, fallback_task.to_dict()
+            if task is None:
+                return
+            
+            state = tuple(snapshot[key] for key in ('status', 'processed_items', 'success_items',
+                                                    'failed_items', 'current_operation', 'error_message'))
+            if state != last_state:
+                last_state, last_yield = state, time.time()
+                yield snapshot
+            elif time.time() - last_yield >= keepalive:
+                last_yield = time.time()
+                yield None
+            
+            if task.status in FINISHED_STATUSES:
+                return
+            
+            self.wait_for_update(task_id, version, keepalive if live else poll_interval)
+            # 合并间隔内的后续更新
+            remaining = min_interval - (time.time() - last_yield)
+            if remaining > 0:
+                time.sleep(remaining)
 
 
 # 全局进度管理器实例
@@ -254,7 +364,8 @@ class ProgressTracker:
         self.task_id: Optional[str] = None
     
     def __enter__(self):
-        self.task_id = progress_manager.create_task(self.source, self.total_items, self.operation)
+        self.task_id = progress_manager.create_task(self.source, self.total_items, self.operation,
+                                                    task_id=getattr(_bound_task, 'task_id', None))
         progress_manager.start_task(self.task_id, self.operation)
         return self
     
@@ -277,12 +388,20 @@ class ProgressTracker:
         if self.task_id:
             progress_manager.increment_progress(self.task_id, success, operation)
     
+    def stage(self, name: str, operation: str = None):
+        """
+        进入一个计时阶段（with tracker.stage('toc', "获取论文目录数据..."): ...）
+        
+        更新当前操作说明，并把阶段耗时记录到当前抓取的追踪中
+        """
+        if operation is not None:
+            self.update(operation=operation)
+        return span(name)
+    
     def set_results(self, results: Dict[str, Any]):
         """设置结果数据"""
         if self.task_id:
-            task = progress_manager.get_task(self.task_id)
-            if task:
-                task.results = results
+            progress_manager.set_results(self.task_id, results)
 
 
 # 工具函数
@@ -0,0 +1,454 @@
+"""
+上游请求限流
+
+按上游主机维护令牌桶（每分钟、每小时各一个桶），所有适配器和异步摘要抓取在发送请求前
+先取令牌；响应中的Retry-After和Elsevier的X-RateLimit-*头会让该主机暂停到指定时间
+
+- MemoryRateLimitBackend: 进程内状态
+- RedisRateLimitBackend: 基于Redis的共享状态，多个工作进程共用同一组令牌桶
+
+配置了REDIS_URL且Redis可用时使用共享状态，Redis出错时临时退回进程内状态
+"""
+
+import time
+import asyncio
+import threading
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Mapping
+from urllib.parse import urlsplit
+
+from utils.exceptions import RateLimitError
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# 429响应没有Retry-After时的默认暂停时间（秒）
+DEFAULT_RETRY_AFTER = 60
+
+
+@dataclass(frozen=True)
+class HostLimit:
+    """单个主机的限流配置"""
+    per_minute: int
+    per_hour: int
+    burst: int = 1  # 分钟桶容量，即允许的瞬时突发请求数
+    
+    @property
+    def minute_rate(self) -> float:
+        return self.per_minute / 60.0
+    
+    @property
+    def hour_rate(self) -> float:
+        return self.per_hour / 3600.0
+
+
+def make_host_limit(per_minute: int, per_hour: int, burst_seconds: float = 1.0) -> HostLimit:
+    """按突发时长计算分钟桶容量，生成主机限流配置"""
+    burst = max(1, int(per_minute * burst_seconds / 60))
+    return HostLimit(per_minute=per_minute, per_hour=per_hour, burst=burst)
+
+
+def parse_host_limits(spec: str, default_per_hour: int,
+                      burst_seconds: float = 1.0) -> Dict[str, HostLimit]:
+    """
+    解析主机限流配置
+    
+    格式: host=每分钟/每小时,host=每分钟（省略每小时时使用默认值）
+    例如: ieeexplore.ieee.org=600/20000,api.elsevier.com=120
+    """
+    limits = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        host, value = item.split('=', 1)
+        per_minute, _, per_hour = value.partition('/')
+        try:
+            limits[host.strip().lower()] = make_host_limit(
+                int(per_minute), int(per_hour) if per_hour else default_per_hour, burst_seconds
+            )
+        except ValueError:
+            print(f"⚠️ 忽略无效的主机限流配置: {item}")
+    return limits
+
+
+def parse_retry_after(value: Optional[str], now: float) -> Optional[float]:
+    """解析Retry-After头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_host(url: str) -> str:
+    """取URL的主机名，参数本身不是URL时原样作为主机名"""
+    return (urlsplit(url).hostname or url).lower()
+
+
+class MemoryRateLimitBackend:
+    """进程内令牌桶状态"""
+    
+    name = 'memory'
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[str, float]] = {}
+        self._blocked_until: Dict[str, float] = {}
+    
+    def reserve(self, host: str, limit: HostLimit, now: float) -> float:
+        """
+        尝试取一个令牌
+        
+        Returns:
+            0表示已取得令牌，否则为需要等待的秒数（此时不消耗令牌）
+        """
+        with self._lock:
+            blocked_until = self._blocked_until.get(host, 0.0)
+            if blocked_until > now:
+                return blocked_until - now
+            
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = {
+                    'minute': float(limit.burst), 'hour': float(limit.per_hour), 'updated': now
+                }
+            
+            elapsed = max(0.0, now - bucket['updated'])
+            bucket['minute'] = min(float(limit.burst), bucket['minute'] + elapsed * limit.minute_rate)
+            bucket['hour'] = min(float(limit.per_hour), bucket['hour'] + elapsed * limit.hour_rate)
+            bucket['updated'] = now
+            
+            if bucket['minute'] < 1:
+                return (1 - bucket['minute']) / limit.minute_rate
+            if bucket['hour'] < 1:
+                return (1 - bucket['hour']) / limit.hour_rate
+            
+            bucket['minute'] -= 1
+            bucket['hour'] -= 1
+            return 0.0
+    
+    def block(self, host: str, until: float, now: float):
+        """暂停主机的请求直到指定时间"""
+        with self._lock:
+            if until > self._blocked_until.get(host, 0.0):
+                self._blocked_until[host] = until
+
+
+class RedisRateLimitBackend:
+    """
+    基于Redis的共享令牌桶状态
+    
+    每个主机一个哈希，取令牌和暂停都在Lua脚本中原子完成；时间使用调用方的时钟，
+    要求各工作节点时钟基本同步
+    """
+    
+    name = 'redis'
+    
+    # 空闲超过该时间后令牌桶必然已满，删除状态等价于保留
+    STATE_TTL = 7200
+    
+    RESERVE_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'minute', 'hour', 'updated', 'blocked_until')
+local now = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local minute_rate = tonumber(ARGV[3])
+local per_hour = tonumber(ARGV[4])
+local hour_rate = tonumber(ARGV[5])
+
+local blocked_until = tonumber(state[4]) or 0
+if blocked_until > now then
+    return tostring(blocked_until - now)
+end
+
+local minute = tonumber(state[1]) or burst
+local hour = tonumber(state[2]) or per_hour
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+minute = math.min(burst, minute + elapsed * minute_rate)
+hour = math.min(per_hour, hour + elapsed * hour_rate)
+
+local wait = 0
+if minute < 1 then
+    wait = (1 - minute) / minute_rate
+elseif hour < 1 then
+    wait = (1 - hour) / hour_rate
+else
+    minute = minute - 1
+    hour = hour - 1
+end
+
+redis.call('HSET', KEYS[1], 'minute', tostring(minute), 'hour', tostring(hour), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return tostring(wait)
+"""
+    
+    BLOCK_SCRIPT = """
+local until_ts = tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'blocked_until')) or 0
+if until_ts > current then
+    redis.call('HSET', KEYS[1], 'blocked_until', tostring(until_ts))
+end
+local ttl = math.ceil(until_ts - tonumber(ARGV[2])) + tonumber(ARGV[3])
+if ttl > redis.call('TTL', KEYS[1]) then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return 1
+"""
+    
+    def __init__(self, client, key_prefix: str = 'doresearch_fetch:ratelimit:'):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._reserve_script = client.register_script(self.RESERVE_SCRIPT)
+        self._block_script = client.register_script(self.BLOCK_SCRIPT)
+    
+    def reserve(self, host: str, limit: HostLimit, now: float) -> float:
+        wait = self._reserve_script(
+            keys=[self.key_prefix + host],
+            args=[now, limit.burst, limit.minute_rate, limit.per_hour, limit.hour_rate, self.STATE_TTL]
+        )
+        return float(wait)
+    
+    def block(self, host: str, until: float, now: float):
+        self._block_script(keys=[self.key_prefix + host], args=[until, now, self.STATE_TTL])
+
+
+class RateLimiter:
+    """
+    按主机限流的令牌桶限流器
+    
+    同步代码使用acquire，异步代码使用acquire_async；需要等待的时间超过max_wait时
+    不再阻塞，直接抛出RateLimitError
+    """
+    
+    def __init__(self, backend, default_limit: HostLimit,
+                 host_limits: Optional[Dict[str, HostLimit]] = None, max_wait: float = 60):
+        """
+        初始化限流器
+        
+        Args:
+            backend: 令牌桶状态存储
+            default_limit: 未单独配置的主机使用的限流配置
+            host_limits: 按主机名配置的限流，键也可以是上级域名
+            max_wait: 单次请求最长等待时间（秒）
+        """
+        self.backend = backend
+        self.fallback = backend if isinstance(backend, MemoryRateLimitBackend) else MemoryRateLimitBackend()
+        self.default_limit = default_limit
+        self.host_limits = host_limits or {}
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._host_stats: Dict[str, Dict[str, float]] = {}
+        self._backend_errors = 0
+        self._last_error_logged = 0.0
+    
+    def limit_for(self, host: str) -> HostLimit:
+        """查找主机的限流配置，依次匹配主机名和各级上级域名"""
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            limit = self.host_limits.get('.'.join(parts[i:]))
+            if limit is not None:
+                return limit
+        return self.default_limit
+    
+    def _backend_error(self, error: Exception):
+        """记录共享状态出错，Redis持续不可用时每分钟最多打印一次"""
+        with self._lock:
+            self._backend_errors += 1
+            now = time.time()
+            if now - self._last_error_logged < 60:
+                return
+            self._last_error_logged = now
+        print(f"⚠️ 共享限流状态不可用，使用进程内限流: {error}")
+    
+    def _reserve(self, host: str) -> float:
+        limit = self.limit_for(host)
+        now = time.time()
+        try:
+            return self.backend.reserve(host, limit, now)
+        except Exception as e:
+            self._backend_error(e)
+            return self.fallback.reserve(host, limit, now)
+    
+    def _stats_for(self, host: str) -> Dict[str, float]:
+        stats = self._host_stats.get(host)
+        if stats is None:
+            stats = self._host_stats[host] = {'requests': 0, 'delayed': 0, 'wait_seconds': 0.0,
+                                              'throttled': 0, 'rejected': 0}
+        return stats
+    
+    def _check_wait(self, host: str, total_wait: float):
+        """等待时间超过上限时拒绝请求"""
+        if total_wait <= self.max_wait:
+            return
+        with self._lock:
+            self._stats_for(host)['rejected'] += 1
+        raise RateLimitError(
+            f"{host} 请求频率受限，需要等待 {total_wait:.0f} 秒",
+            details={'host': host, 'retry_after': int(total_wait + 0.999)}
+        )
+    
+    def _record_acquired(self, host: str, waited: float):
+        with self._lock:
+            stats = self._stats_for(host)
+            stats['requests'] += 1
+            if waited > 0:
+                stats['delayed'] += 1
+                stats['wait_seconds'] += waited
+    
+    def acquire(self, url: str) -> float:
+        """
+        为请求取一个令牌，必要时阻塞等待
+        
+        Args:
+            url: 请求URL或主机名
+            
+        Returns:
+            等待的秒数
+            
+        Raises:
+            RateLimitError: 需要等待的时间超过max_wait
+        """
+        host = get_host(url)
+        waited = 0.0
+        while True:
+            delay = self._reserve(host)
+            if delay <= 0:
+                self._record_acquired(host, waited)
+                return waited
+            self._check_wait(host, waited + delay)
+            time.sleep(delay)
+            waited += delay
+    
+    async def acquire_async(self, url: str) -> float:
+        """acquire的异步版本，等待期间不阻塞事件循环"""
+        host = get_host(url)
+        waited = 0.0
+        while True:
+            # 共享状态为Redis时一次往返很短，直接在事件循环中执行
+            delay = self._reserve(host)
+            if delay <= 0:
+                self._record_acquired(host, waited)
+                return waited
+            self._check_wait(host, waited + delay)
+            await asyncio.sleep(delay)
+            waited += delay
+    
+    def block(self, url: str, seconds: float):
+        """暂停主机的请求一段时间（如IEEE的418反爬虫响应）"""
+        host = get_host(url)
+        now = time.time()
+        try:
+            self.backend.block(host, now + seconds, now)
+        except Exception as e:
+            self._backend_error(e)
+        # 进程内状态同时记录，共享状态暂时不可用时仍然生效
+        if self.fallback is not self.backend:
+            self.fallback.block(host, now + seconds, now)
+        with self._lock:
+            self._stats_for(host)['throttled'] += 1
+    
+    def update_from_response(self, url: str, status_code: int, headers: Mapping[str, str]) -> float:
+        """
+        根据响应状态和限流头更新主机状态
+        
+        - 429/503响应：按Retry-After暂停，429没有该头时暂停DEFAULT_RETRY_AFTER秒
+        - Elsevier: X-RateLimit-Remaining为0时暂停到X-RateLimit-Reset（Unix时间戳）
+        
+        Returns:
+            主机被暂停的秒数，0表示没有暂停
+        """
+        now = time.time()
+        pause = None
+        if status_code in (429, 503):
+            pause = parse_retry_after(headers.get('Retry-After'), now)
+            if pause is None and status_code == 429:
+                pause = DEFAULT_RETRY_AFTER
+        
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            try:
+                if int(remaining) <= 0:
+                    pause = max(pause or 0.0, float(reset) - now)
+            except ValueError:
+                pass
+        
+        if not pause or pause <= 0:
+            return 0.0
+        self.block(url, pause)
+        return pause
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限流统计信息"""
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._host_stats.items()}
+            backend_errors = self._backend_errors
+        
+        for host, stats in hosts.items():
+            limit = self.limit_for(host)
+            stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+            stats['limit'] = {'per_minute': limit.per_minute, 'per_hour': limit.per_hour, 'burst': limit.burst}
+        
+        return {
+            'backend': self.backend.name,
+            'backend_errors': backend_errors,
+            'max_wait': self.max_wait,
+            'default_limit': {'per_minute': self.default_limit.per_minute,
+                              'per_hour': self.default_limit.per_hour},
+            'hosts': hosts
+        }
+
+
+def create_rate_limiter(redis_url: Optional[str] = None, per_minute: int = 60, per_hour: int = 1000,
+                        host_limits: str = '', burst_seconds: float = 1.0,
+                        max_wait: float = 60) -> RateLimiter:
+    """
+    创建限流器
+    
+    Args:
+        redis_url: Redis连接URL，为空时使用进程内状态
+        per_minute: 默认每分钟请求数
+        per_hour: 默认每小时请求数
+        host_limits: 按主机的限流配置，格式见parse_host_limits
+        burst_seconds: 允许的突发请求数，按多少秒的配额计算
+        max_wait: 单次请求最长等待时间（秒）
+        
+    Returns:
+        Redis可用时使用共享状态的限流器，否则使用进程内状态
+    """
+    default_limit = make_host_limit(per_minute, per_hour, burst_seconds)
+    limits = parse_host_limits(host_limits, per_hour, burst_seconds)
+    backend = MemoryRateLimitBackend()
+    
+    if redis_url and redis is not None:
+        try:
+            client = redis.Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=1)
+            client.ping()
+            backend = RedisRateLimitBackend(client)
+        except Exception as e:
+            print(f"⚠️ 无法连接Redis ({redis_url})，使用进程内限流: {e}")
+    
+    return RateLimiter(backend, default_limit, limits, max_wait=max_wait)
+
+
+def _create_limiter() -> RateLimiter:
+    from config import Config
+    return create_rate_limiter(
+        redis_url=Config.REDIS_URL,
+        per_minute=Config.RATE_LIMIT_PER_MINUTE,
+        per_hour=Config.RATE_LIMIT_PER_HOUR,
+        host_limits=Config.RATE_LIMIT_HOSTS,
+        burst_seconds=Config.RATE_LIMIT_BURST_SECONDS,
+        max_wait=Config.RATE_LIMIT_MAX_WAIT,
+    )
+
+
+# 全局限流器实例（所有适配器和摘要抓取共用）
+rate_limiter = _create_limiter()
@@ -0,0 +1,123 @@
+"""
+请求合并（single-flight）
+
+同一个键同时只执行一次调用，期间到达的相同请求等待该调用完成并共享其结果或异常。
+do()用于普通函数调用；流式抓取等无法包装成单个函数的调用使用acquire()/release()，
+执行者中途放弃时等待者重新竞争执行
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    """一次进行中的调用"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """线程安全的请求合并器"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {
+            'executions': 0,      # 实际执行的调用次数
+            'coalesced': 0,       # 等待并复用其他请求结果的次数
+            'errors': 0,          # 执行失败的调用次数
+            'abandoned': 0,       # 执行者中途放弃、由等待者重新执行的次数
+            'max_waiters': 0      # 单次调用上同时等待的最大请求数
+        }
+    
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行调用，相同键的并发调用只执行一次
+        
+        Args:
+            key: 请求键
+            func: 实际执行的函数
+            
+        Returns:
+            (结果, 是否复用了其他请求的结果)
+            
+        Raises:
+            执行函数抛出的异常，会传递给所有等待者
+        """
+        call, shared = self.acquire(key)
+        if call is None:
+            return shared, True
+        
+        try:
+            result = func()
+        except BaseException as e:
+            self.release(key, call, error=e)
+            raise
+        self.release(key, call, result=result)
+        return result, False
+    
+    def acquire(self, key: str) -> Tuple[Optional[_Call], Any]:
+        """
+        登记为执行者，或等待进行中的相同调用完成
+        
+        Returns:
+            (call, None): 成为执行者，完成后必须调用 release(key, call, ...)
+            (None, 结果): 复用了其他调用的结果
+            
+        Raises:
+            进行中调用抛出的异常
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    self._stats['executions'] += 1
+                    return call, None
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+                self._stats['max_waiters'] = max(self._stats['max_waiters'], call.waiters)
+            
+            call.done.wait()
+            if call.abandoned:
+                continue
+            if call.error is not None:
+                raise call.error
+            return None, call.result
+    
+    def release(self, key: str, call: _Call, result: Any = None,
+                error: Optional[BaseException] = None, abandoned: bool = False) -> None:
+        """
+        结束执行者的调用，把结果或异常交给等待者
+        
+        abandoned为True表示执行者中途放弃（如流式响应的客户端断开），
+        等待者不共享任何结果，重新竞争执行
+        """
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if error is not None:
+                self._stats['errors'] += 1
+            if abandoned:
+                self._stats['abandoned'] += 1
+        call.result = result
+        call.error = error
+        call.abandoned = abandoned
+        call.done.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        with self._lock:
+            requests = self._stats['executions'] + self._stats['coalesced']
+            return {
+                'in_flight': len(self._calls),
+                'waiting': sum(call.waiters for call in self._calls.values()),
+                'requests': requests,
+                'coalesce_rate': round(self._stats['coalesced'] / requests * 100, 2) if requests else 0.0,
+                **self._stats
+            }
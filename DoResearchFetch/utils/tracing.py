@@ -0,0 +1,127 @@
+"""
+抓取流程的分阶段计时
+
+一次抓取开始时用start_trace()开启追踪，适配器和进度追踪器用span(stage)记录各阶段的
+耗时，同一阶段多次执行时累加耗时和次数。当前上下文没有开启追踪时span返回空操作对象，
+热路径上只多一次上下文变量读取
+
+追踪保存在上下文变量中，不会自动传递到其他线程；生成器用traced()包装，
+只在生成器执行时开启追踪，不计入调用方处理每一项的时间
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('fetch_trace', default=None)
+
+
+class Trace:
+    """一次抓取的各阶段耗时"""
+    
+    def __init__(self, source: str):
+        self.source = source
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        # 阶段 -> [累计秒数, 次数]，按首次出现的顺序排列
+        self.stages: Dict[str, list] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, stage: str, seconds: float, count: int = 1):
+        """累加一个阶段的耗时"""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [seconds, count]
+            else:
+                entry[0] += seconds
+                entry[1] += count
+    
+    @property
+    def total_seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为响应中source_info.timings的格式"""
+        with self._lock:
+            stages = {stage: {'ms': round(seconds * 1000, 2), 'count': count}
+                      for stage, (seconds, count) in self.stages.items()}
+        return {'total_ms': round(self.total_seconds * 1000, 2), 'stages': stages}
+
+
+class _Span:
+    __slots__ = ('trace', 'stage', 'start')
+    
+    def __init__(self, trace: Trace, stage: str):
+        self.trace = trace
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.trace.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str):
+    """记录一个阶段的耗时（with span('toc'): ...），没有开启追踪时不做任何事"""
+    trace = _current_trace.get()
+    return _NOOP_SPAN if trace is None else _Span(trace, stage)
+
+
+def current_trace() -> Optional[Trace]:
+    """当前上下文的追踪，没有开启时返回None"""
+    return _current_trace.get()
+
+
+def activate(trace: Trace) -> contextvars.Token:
+    """在当前上下文开启追踪，返回的token交给deactivate()恢复"""
+    return _current_trace.set(trace)
+
+
+def deactivate(token: contextvars.Token) -> Trace:
+    """结束activate()开启的追踪并返回它"""
+    trace = _current_trace.get()
+    trace.finished = time.perf_counter()
+    _current_trace.reset(token)
+    return trace
+
+
+@contextmanager
+def start_trace(source: str) -> Iterator[Trace]:
+    """在上下文中开启一次追踪"""
+    token = activate(Trace(source))
+    try:
+        yield _current_trace.get()
+    finally:
+        deactivate(token)
+
+
+def traced(iterator: Iterator, trace: Trace) -> Iterator:
+    """逐项执行生成器，执行期间开启追踪，返回生成器的返回值"""
+    while True:
+        token = _current_trace.set(trace)
+        try:
+            item = next(iterator)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            _current_trace.reset(token)
+        yield item
@@ -165,6 +165,13 @@ def api_health():
         }
     })
 
+@app.route('/api/tasks/processor')
+def api_task_processor_stats():
+    """获取任务处理器各工作池的排队深度和等待时间"""
+    if not task_processor:
+        return jsonify({'success': False, 'error': '任务处理器未启用'}), 503
+    return jsonify({'success': True, 'data': task_processor.get_pool_stats()})
+
 from middleware.auth_middleware import auth_required, get_current_user_id
 
 @app.route('/api/feeds')
@@ -18,12 +18,29 @@ except ImportError:
         'retry_delay': float(os.getenv('PAPER_FETCHER_RETRY_DELAY', '2.0')),
     }
 
+def _parse_source_concurrency(value: str) -> Dict[str, int]:
+    """解析按源类型的并发上限配置"""
+    limits = {}
+    for item in value.split(','):
+        if ':' not in item:
+            continue
+        source_type, limit = item.split(':', 1)
+        limits[source_type.strip()] = max(1, int(limit))
+    return limits
+
 # 同步服务配置
 SYNC_SERVICE_CONFIG = {
     'check_interval': int(os.getenv('SYNC_CHECK_INTERVAL', '60')),  # 秒
     'batch_size': int(os.getenv('SYNC_BATCH_SIZE', '10')),         # 每次处理的订阅数量
     'max_retry_attempts': int(os.getenv('SYNC_MAX_RETRY', '3')),   # 最大重试次数
     'default_sync_frequency': int(os.getenv('DEFAULT_SYNC_FREQ', '86400')),  # 默认同步频率(24小时)
+    'max_workers': int(os.getenv('SYNC_MAX_WORKERS', '4')),        # 并发同步的工作线程数
+    'default_source_concurrency': int(os.getenv('SYNC_DEFAULT_SOURCE_CONCURRENCY', '2')),  # 单个源类型的默认并发上限
+    # 按源类型覆盖并发上限，格式: ieee:1,elsevier:2
+    'source_concurrency': _parse_source_concurrency(os.getenv('SYNC_SOURCE_CONCURRENCY', 'ieee:1,elsevier:2,dblp:2')),
+    'stream_fetch': os.getenv('SYNC_STREAM_FETCH', 'true').lower() == 'true',  # 以NDJSON流式获取并分批入库
+    'stream_batch_size': int(os.getenv('SYNC_STREAM_BATCH_SIZE', '200')),  # 流式入库时每批的论文数
+    'incremental_fetch': os.getenv('SYNC_INCREMENTAL_FETCH', 'true').lower() == 'true',  # 带上次的水位线只获取新增论文
 }
 
 # 订阅限制配置
@@ -52,7 +69,9 @@ def get_external_service_config() -> Dict[str, Any]:
 
 def get_sync_service_config() -> Dict[str, Any]:
     """获取同步服务配置"""
-    return SYNC_SERVICE_CONFIG.copy()
+    config = SYNC_SERVICE_CONFIG.copy()
+    config['source_concurrency'] = dict(SYNC_SERVICE_CONFIG['source_concurrency'])
+    return config
 
 def get_subscription_limits() -> Dict[str, Any]:
     """获取订阅限制配置"""
@@ -5,6 +5,8 @@
 import sqlite3
 from datetime import datetime
 
+from models.database import create_search_index, rebuild_search_index
+
 
 class MigrationScripts:
     """数据库迁移脚本集合"""
@@ -327,4 +329,28 @@ class MigrationScripts:
         # 对于tasks表
         c.execute('UPDATE tasks SET created_at = ? WHERE created_at IS NULL', (current_time,))
 
-        print("✅ 1.5.0 -> 2.0.0 升级完成")
\ No newline at end of file
+        print("✅ 1.5.0 -> 2.0.0 升级完成")
+
+    @staticmethod
+    def upgrade_from_2_0_0(conn: sqlite3.Connection):
+        """从2.0.0升级到2.1.0"""
+        print("🔄 执行2.0.0 -> 2.1.0升级...")
+        c = conn.cursor()
+
+        # 1. 创建全文检索索引及同步触发器
+        print("   🔍 创建论文全文检索索引...")
+        create_search_index(c)
+
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='papers_fts'")
+        if not c.fetchone():
+            print("   ⚠️ 当前SQLite不支持FTS5，搜索将继续使用LIKE匹配")
+            print("✅ 2.0.0 -> 2.1.0 升级完成")
+            return
+
+        # 2. 回填已有论文
+        print("   🔄 回填已有论文到全文索引...")
+        rebuild_search_index(c)
+        c.execute("SELECT COUNT(*) FROM papers")
+        print(f"      ✅ 已索引 {c.fetchone()[0]} 篇论文")
+
+        print("✅ 2.0.0 -> 2.1.0 升级完成")
@@ -23,7 +23,7 @@ class DatabaseUpgrader:
         
         self.version_info = {
             'current_version': None,
-            'target_version': '2.0.0'
+            'target_version': '2.1.0'
         }
     
     def run_upgrade(self) -> bool:
@@ -62,13 +62,19 @@ class DatabaseUpgrader:
                 self.migration_scripts.upgrade_from_1_0_0(conn)
                 self.migration_scripts.upgrade_from_1_2_0(conn)
                 self.migration_scripts.upgrade_from_1_5_0(conn)
+                self.migration_scripts.upgrade_from_2_0_0(conn)
 
             elif current_version == '1.2.0':
                 self.migration_scripts.upgrade_from_1_2_0(conn)
                 self.migration_scripts.upgrade_from_1_5_0(conn)
+                self.migration_scripts.upgrade_from_2_0_0(conn)
 
             elif current_version == '1.5.0':
                 self.migration_scripts.upgrade_from_1_5_0(conn)
+                self.migration_scripts.upgrade_from_2_0_0(conn)
+
+            elif current_version == '2.0.0':
+                self.migration_scripts.upgrade_from_2_0_0(conn)
 
             # 更新版本信息
             self.version_manager.update_version_info(
@@ -40,6 +40,23 @@ class VersionManager:
         finally:
             conn.close()
     
+    def get_schema_version(self) -> int:
+        """获取表结构初始化版本（PRAGMA user_version）"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            conn.close()
+
+    def set_schema_version(self, version: int):
+        """记录表结构初始化版本（PRAGMA user_version）"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        finally:
+            conn.close()
+    
     def create_version_table(self, conn: sqlite3.Connection):
         """创建版本管理表"""
         c = conn.cursor()
@@ -3,19 +3,134 @@
 """
 import sqlite3
 import os
+import zlib
+import inspect
+import threading
 from typing import Optional
 
+from services.database_service import get_pooled_connection
+
+
+# 全文检索索引覆盖的论文字段（与搜索接口允许的字段一致）
+PAPERS_FTS_COLUMNS = ['title', 'abstract', 'abstract_cn', 'authors', 'journal', 'doi']
+
+
+def create_search_index(cursor) -> bool:
+    """
+    创建论文全文检索索引（FTS5外部内容表）及同步触发器
+
+    Returns:
+        索引表是否为本次新建（新建时需要回填已有数据）；FTS5不可用时返回False
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='papers_fts'")
+    if cursor.fetchone():
+        return False
+
+    columns = ', '.join(PAPERS_FTS_COLUMNS)
+    new_values = ', '.join(f'new.{col}' for col in PAPERS_FTS_COLUMNS)
+    old_values = ', '.join(f'old.{col}' for col in PAPERS_FTS_COLUMNS)
+
+    try:
+        # trigram分词保持与原LIKE '%term%'一致的子串匹配语义（含中文）
+        cursor.execute(f'''CREATE VIRTUAL TABLE papers_fts USING fts5(
+                             {columns},
+                             content='papers',
+                             content_rowid='id',
+                             tokenize='trigram'
+                         )''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ 跳过全文索引创建（FTS5不可用）: {e}")
+        return False
+
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS papers_fts_ai AFTER INSERT ON papers BEGIN
+                         INSERT INTO papers_fts(rowid, {columns}) VALUES (new.id, {new_values});
+                     END''')
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS papers_fts_ad AFTER DELETE ON papers BEGIN
+                         INSERT INTO papers_fts(papers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                     END''')
+    # 只在被索引字段变化时同步，避免状态更新等操作改写索引
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS papers_fts_au AFTER UPDATE OF {columns} ON papers BEGIN
+                         INSERT INTO papers_fts(papers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                         INSERT INTO papers_fts(rowid, {columns}) VALUES (new.id, {new_values});
+                     END''')
+    return True
+
+
+def rebuild_search_index(cursor):
+    """根据papers表重建全文检索索引（回填已有论文）"""
+    cursor.execute("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')")
+
+
+def find_existing_paper_hashes(cursor, hashes, chunk_size: int = 500) -> set:
+    """批量查询已存在的论文哈希（按chunk_size分块的IN查询）"""
+    hashes = list(hashes)
+    existing = set()
+    for start in range(0, len(hashes), chunk_size):
+        chunk = hashes[start:start + chunk_size]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT hash FROM papers WHERE hash IN ({placeholders})', chunk)
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+
+def bulk_insert_papers(cursor, columns, rows) -> int:
+    """
+    批量插入论文，依赖papers.hash的唯一约束跳过已存在的论文
+
+    Returns:
+        实际新增的论文数量
+    """
+    if not rows:
+        return 0
+
+    placeholders = ', '.join('?' * len(columns))
+    cursor.executemany(
+        f'INSERT OR IGNORE INTO papers ({", ".join(columns)}) VALUES ({placeholders})',
+        rows
+    )
+    return cursor.rowcount
+
 
 class Database:
+    # 表结构指纹（记录在PRAGMA user_version中），由定义表结构的代码计算，见_schema_fingerprint
+    SCHEMA_VERSION = 0
+
+    # 本进程内已完成表结构检查的数据库路径
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.init_database()
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        """
+        确保表结构已初始化
+
+        每个进程每个数据库只检查一次；数据库的user_version与SCHEMA_VERSION一致时
+        跳过init_database中的建表、建索引和字段迁移，表结构代码有改动时重新执行
+        """
+        key = os.path.abspath(self.db_path)
+        if key in Database._initialized_paths:
+            return
+
+        with Database._init_lock:
+            if key in Database._initialized_paths:
+                return
+
+            # 延迟导入避免循环依赖（迁移脚本依赖本模块）
+            from database_upgrade.version_manager import VersionManager
+            version_manager = VersionManager(self.db_path)
+
+            if not self.SCHEMA_VERSION or version_manager.get_schema_version() != self.SCHEMA_VERSION:
+                self.init_database()
+                version_manager.set_schema_version(self.SCHEMA_VERSION)
+
+            Database._initialized_paths.add(key)
 
     def get_connection(self):
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """获取数据库连接（来自全局连接池，close()时归还）"""
+        return get_pooled_connection(self.db_path)
 
     def init_database(self):
         """初始化数据库表结构"""
@@ -426,6 +541,10 @@ class Database:
                 else:
                     raise e
 
+        # 全文检索索引（新建时回填已有论文）
+        if create_search_index(c):
+            rebuild_search_index(c)
+
         conn.commit()
         conn.close()
 
@@ -496,6 +615,23 @@ class Database:
             # 为现有tasks设置默认用户ID为1
             cursor.execute('UPDATE tasks SET user_id = 1 WHERE user_id IS NULL')
 
+    @staticmethod
+    def _schema_fingerprint() -> int:
+        """
+        表结构代码的指纹
+
+        由建表、字段迁移和全文索引代码的源码计算，其中任何改动都会使指纹变化，已有数据库在下次启动时
+        重新执行init_database（建表和建索引均为IF NOT EXISTS，字段按需添加，可重复执行）；
+        无法读取源码时返回0，每次启动都执行
+        """
+        try:
+            source = ''.join(inspect.getsource(func) for func in (
+                Database.init_database, Database._add_missing_columns, create_search_index))
+        except (OSError, TypeError):
+            return 0
+        # PRAGMA user_version是32位有符号整数
+        return zlib.crc32(source.encode('utf-8')) & 0x7fffffff or 1
+
     def migrate_read_later_status(self):
         """迁移现有的read_later状态到新表"""
         conn = self.get_connection()
@@ -526,4 +662,7 @@ class Database:
             print(f"❌ 迁移失败: {e}")
             conn.rollback()
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+
+Database.SCHEMA_VERSION = Database._schema_fingerprint()
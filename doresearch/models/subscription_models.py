@@ -4,23 +4,39 @@
 """
 import sqlite3
 import json
+import os
+import threading
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from models.database import Database
+from services.database_service import get_pooled_connection
 
 
 class SubscriptionDatabase:
     """新订阅管理系统数据库类"""
+
+    # 本进程内已完成订阅表初始化的数据库路径
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
     
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.init_tables()
+        self.ensure_tables()
+
+    def ensure_tables(self):
+        """确保订阅相关表已初始化（每个进程每个数据库只执行一次）"""
+        key = os.path.abspath(self.db_path)
+        if key in SubscriptionDatabase._initialized_paths:
+            return
+
+        with SubscriptionDatabase._init_lock:
+            if key not in SubscriptionDatabase._initialized_paths:
+                self.init_tables()
+                SubscriptionDatabase._initialized_paths.add(key)
     
     def get_connection(self):
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """获取数据库连接（来自全局连接池，close()时归还）"""
+        return get_pooled_connection(self.db_path)
     
     def init_tables(self):
         """初始化新订阅管理相关表"""
@@ -89,6 +105,12 @@ class SubscriptionDatabase:
             # 字段已存在，忽略错误
             pass
         
+        # 增量同步的水位线（外部服务上次返回的watermark）
+        try:
+            c.execute('ALTER TABLE user_subscriptions ADD COLUMN sync_watermark TEXT')
+        except sqlite3.OperationalError:
+            pass
+        
         conn.commit()
         conn.close()
         
@@ -435,6 +457,8 @@ class UserSubscriptionManager:
             if 'source_params' in kwargs:
                 update_fields.append('source_params = ?')
                 update_values.append(json.dumps(kwargs['source_params']))
+                # 参数变化后原水位线不再适用，下次同步重新全量抓取
+                update_fields.append('sync_watermark = NULL')
             
             if not update_fields:
                 return {'success': False, 'error': '没有要更新的字段'}
@@ -512,7 +536,7 @@ class UserSubscriptionManager:
             update_fields = []
             update_values = []
             
-            for field in ['last_sync_at', 'next_sync_at', 'error_message', 'status']:
+            for field in ['last_sync_at', 'next_sync_at', 'error_message', 'status', 'sync_watermark']:
                 if field in kwargs:
                     update_fields.append(f'{field} = ?')
                     update_values.append(kwargs[field])
@@ -9,6 +9,7 @@ from typing import Dict, Any
 from configs.subscription_config import get_external_service_config
 from services.subscription_service import NewSubscriptionService
 from services.permission_cache import cached_permission_check
+from services.database_service import get_pooled_connection
 from middleware.auth_middleware import auth_required, get_current_user_id
 from config import DATABASE_PATH
 
@@ -248,8 +249,6 @@ def get_subscription_sync_history(subscription_id: int):
 @handle_api_error
 def get_subscription_stats(subscription_id: int):
     """获取单个订阅的完整统计信息（对等feeds统计）"""
-    import sqlite3
-    
     user_id = get_current_user_id()
     
     # 验证用户是否有权限访问该订阅
@@ -261,8 +260,7 @@ def get_subscription_stats(subscription_id: int):
         }), 404
     
     # ✅ 修复: 使用 papers.db 查询论文数据
-    papers_conn = sqlite3.connect(DATABASE_PATH)
-    papers_conn.row_factory = sqlite3.Row
+    papers_conn = get_pooled_connection(DATABASE_PATH, readonly=True)
     try:
         c = papers_conn.cursor()
         
@@ -340,8 +338,6 @@ def get_subscription_stats(subscription_id: int):
 @handle_api_error
 def get_subscriptions_batch_stats():
     """批量获取多个订阅的统计（对等feeds批量统计）"""
-    import sqlite3
-    
     subscription_ids_str = request.args.get('subscription_ids', '')
     if not subscription_ids_str:
         return jsonify({
@@ -373,8 +369,7 @@ def get_subscriptions_batch_stats():
         })
     
     # ✅ 修复: 使用 papers.db 而不是 subscription_templates.db
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_pooled_connection(DATABASE_PATH, readonly=True)
     try:
         c = conn.cursor()
         
@@ -698,6 +693,17 @@ def get_subscription_stats():
         conn.close()
 
 
+@admin_bp.route('/subscriptions/sync-queue')
+@admin_required
+@handle_api_error
+def get_sync_queue_metrics():
+    """获取订阅同步队列指标（队列深度、等待延迟、各源类型并发）"""
+    return jsonify({
+        'success': True,
+        'data': subscription_service.get_sync_queue_metrics()
+    })
+
+
 @admin_bp.route('/cache/stats')
 @admin_required
 @handle_api_error
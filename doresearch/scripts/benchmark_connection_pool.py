@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+数据库连接池并发基准测试
+用N个并发Flask请求对比每次操作新建连接（原实现）与全局连接池的吞吐和延迟
+
+使用方法：
+python scripts/benchmark_connection_pool.py [--concurrency 32] [--requests 2000]
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from flask import Flask, jsonify
+
+from models.database import Database
+from services.database_service import get_connection_pool, get_pooled_connection
+
+
+def build_database(db_path: str, paper_count: int = 2000):
+    """生成测试数据库"""
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany('INSERT INTO papers (title, status, hash) VALUES (?, ?, ?)',
+                     [(f'Paper {i}', 'unread' if i % 3 else 'read', f'bench-{i}')
+                      for i in range(paper_count)])
+    conn.commit()
+    conn.close()
+
+
+def create_app(db_path: str) -> Flask:
+    """构造模拟接口：读取一页论文并更新一条状态"""
+    app = Flask(__name__)
+
+    def handle(get_conn):
+        conn = get_conn()
+        try:
+            c = conn.cursor()
+            c.execute('SELECT id, title FROM papers WHERE status = ? ORDER BY id DESC LIMIT 20', ('unread',))
+            papers = [dict(row) for row in c.fetchall()]
+            c.execute("UPDATE papers SET status_changed_at = CURRENT_TIMESTAMP WHERE id = ?",
+                      (papers[0]['id'],))
+            conn.commit()
+            return jsonify({'count': len(papers)})
+        finally:
+            conn.close()
+
+    def legacy_connection():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @app.route('/legacy')
+    def legacy():
+        return handle(legacy_connection)
+
+    @app.route('/pooled')
+    def pooled():
+        return handle(lambda: get_pooled_connection(db_path))
+
+    return app
+
+
+def run(app: Flask, path: str, concurrency: int, total: int):
+    """并发发送请求，返回（总耗时秒, 每请求延迟毫秒列表, 失败数）"""
+    def one_request(_):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.get(path)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, status in results if status != 200)
+    return elapsed, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库连接池并发基准测试')
+    parser.add_argument('--concurrency', type=int, default=32, help='并发请求数')
+    parser.add_argument('--requests', type=int, default=2000, help='总请求数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.db')
+        build_database(db_path)
+        app = create_app(db_path)
+
+        print(f"🔧 并发数 {args.concurrency}，总请求数 {args.requests}\n")
+        for name, path in [('新建连接（原实现）', '/legacy'), ('全局连接池', '/pooled')]:
+            elapsed, latencies, failures = run(app, path, args.concurrency, args.requests)
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(f"{name:<16} 吞吐 {args.requests / elapsed:>8.1f} req/s   "
+                  f"中位 {statistics.median(latencies):>7.2f} ms   p99 {p99:>7.2f} ms   失败 {failures}")
+
+        print(f"\n📊 连接池统计: {get_connection_pool(db_path).get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
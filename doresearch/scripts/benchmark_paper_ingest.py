@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+论文批量入库基准测试
+对比逐篇查重+插入（原实现）与PaperProcessor批量入库的耗时
+
+使用方法：
+python scripts/benchmark_paper_ingest.py [--papers 10000] [--duplicate-ratio 0.3]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from models.database import Database
+from services.subscription_service import PaperProcessor
+
+# 订阅系统在papers表上追加的字段（由database_upgrade.py添加）
+SUBSCRIPTION_COLUMNS = [
+    ('subscription_id', 'INTEGER'),
+    ('keywords', 'TEXT'),
+    ('citations', 'INTEGER DEFAULT 0'),
+    ('metadata', 'TEXT'),
+]
+
+
+def prepare_database(db_path: str, preloaded_papers):
+    """创建测试数据库，并预先写入一部分论文用于模拟重复"""
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    for column, column_type in SUBSCRIPTION_COLUMNS:
+        conn.execute(f'ALTER TABLE papers ADD COLUMN {column} {column_type}')
+    conn.commit()
+    conn.close()
+
+    if preloaded_papers:
+        PaperProcessor(db_path).process_papers(preloaded_papers, 0, 'preload')
+
+
+def synthetic_papers(count: int):
+    """生成模拟DBLP返回的论文数据"""
+    rng = random.Random(7)
+    return [{
+        'id': f'dblp-{i}',
+        'title': f'Synthetic Paper {i} on Topic {rng.randint(1, 500)}',
+        'abstract': 'Lorem ipsum ' * 40,
+        'authors': [f'Author {rng.randint(1, 3000)}' for _ in range(4)],
+        'journal': 'Benchmark Venue',
+        'published_date': '2024-06-01',
+        'url': f'https://dblp.org/rec/bench/{i}',
+        'doi': f'10.0000/bench.{i}',
+        'keywords': ['benchmark', 'synthetic'],
+        'source_specific': {},
+    } for i in range(count)]
+
+
+def legacy_process_papers(processor: PaperProcessor, papers, subscription_id: int, feed_name: str):
+    """原实现：逐篇查询哈希后单条插入"""
+    conn = processor.get_connection()
+    try:
+        c = conn.cursor()
+        new_papers = 0
+        for paper_data in papers:
+            if not paper_data.get('title'):
+                continue
+            paper_hash = processor._generate_paper_hash(paper_data)
+            c.execute('SELECT id FROM papers WHERE hash = ?', (paper_hash,))
+            if c.fetchone():
+                continue
+            paper = processor._standardize_paper_data(paper_data, subscription_id, feed_name)
+            columns = PaperProcessor.PAPER_COLUMNS
+            c.execute(f'INSERT INTO papers ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                      tuple(paper[column] for column in columns))
+            new_papers += 1
+        conn.commit()
+        return {'success': True, 'total_papers': len(papers), 'new_papers': new_papers}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='论文批量入库基准测试')
+    parser.add_argument('--papers', type=int, default=10000, help='每批论文数量')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3, help='批次中已存在论文的比例')
+    args = parser.parse_args()
+
+    papers = synthetic_papers(args.papers)
+    preloaded = papers[:int(args.papers * args.duplicate_ratio)]
+
+    print(f"🔧 入库 {args.papers} 篇论文，其中 {len(preloaded)} 篇已存在\n")
+    for name, runner in [
+        ('逐篇插入（原实现）', legacy_process_papers),
+        ('批量入库', lambda processor, *rest: processor.process_papers(*rest)),
+    ]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'benchmark.db')
+            prepare_database(db_path, preloaded)
+            processor = PaperProcessor(db_path)
+
+            start = time.perf_counter()
+            result = runner(processor, papers, 1, 'benchmark')
+            elapsed = time.perf_counter() - start
+
+            print(f"{name:<12} 耗时 {elapsed * 1000:>9.1f} ms   "
+                  f"吞吐 {args.papers / elapsed:>9.0f} 篇/秒   新增 {result['new_papers']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+表结构初始化基准测试
+对比每次构造Database都执行init_database（原实现）与一次性初始化的耗时，
+并模拟auth_required每个请求构造服务实例时的请求延迟
+
+使用方法：
+python scripts/benchmark_schema_bootstrap.py [--iterations 200]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from models.database import Database
+
+
+def simulate_request(db: Database):
+    """模拟一次需要认证的请求：构造服务后执行一条查询"""
+    conn = db.get_connection()
+    try:
+        conn.execute('SELECT id, username FROM users WHERE id = ?', (1,)).fetchone()
+    finally:
+        conn.close()
+
+
+def measure(func, iterations: int):
+    """返回每次调用耗时（毫秒）列表"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<28} 中位 {statistics.median(timings):>8.3f} ms   p95 {p95:>8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='表结构初始化基准测试')
+    parser.add_argument('--iterations', type=int, default=200, help='每项测试的迭代次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.db')
+
+        # 首次构造：执行完整的建表流程（进程启动成本）
+        start = time.perf_counter()
+        Database(db_path)
+        print(f"🚀 首次初始化耗时: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        def legacy_construct():
+            db = Database(db_path)
+            db.init_database()
+            return db
+
+        report('构造Database（原实现）', measure(legacy_construct, args.iterations))
+        report('构造Database（一次性初始化）', measure(lambda: Database(db_path), args.iterations))
+        report('请求延迟（原实现）',
+               measure(lambda: simulate_request(legacy_construct()), args.iterations))
+        report('请求延迟（一次性初始化）',
+               measure(lambda: simulate_request(Database(db_path)), args.iterations))
+
+        # 新进程启动：数据库已标记user_version，跳过全部DDL
+        Database._initialized_paths.clear()
+        start = time.perf_counter()
+        Database(db_path)
+        print(f"\n🔁 已初始化数据库的进程启动耗时: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+搜索结果分页延迟基准测试
+对比逐条查询（N+1）与批量补充结果信息两种方式在不同页大小下的耗时，
+并给出整页搜索（含全文检索、计数和高亮）的延迟
+
+使用方法：
+python scripts/benchmark_search.py [--papers 5000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from models.database import Database
+import services.search_service as search_service_module
+from services.search_service import SearchService
+
+PAGE_SIZES = [50, 200, 1000]
+WORDS = ['graph', 'neural', 'network', 'learning', 'wireless', 'edge', 'federated',
+         'attention', 'anomaly', 'detection', 'optimization', 'blockchain', 'privacy']
+
+
+def build_database(db_path: str, paper_count: int):
+    """生成测试数据库"""
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    rng = random.Random(42)
+
+    papers = []
+    for i in range(paper_count):
+        title = ' '.join(rng.sample(WORDS, 5))
+        abstract = ' '.join(rng.choice(WORDS) for _ in range(80))
+        papers.append((title, abstract, f'Author {i % 97}', 'Benchmark Journal', f'bench-{i}'))
+    c.executemany('''INSERT INTO papers (title, abstract, authors, journal, hash)
+                     VALUES (?, ?, ?, ?, ?)''', papers)
+
+    # 约10%的论文加入稍后阅读，约5%的论文有分析任务
+    c.executemany('INSERT INTO read_later (user_id, paper_id) VALUES (1, ?)',
+                  [(i,) for i in range(1, paper_count + 1) if i % 10 == 0])
+    c.executemany('''INSERT INTO tasks (id, user_id, paper_id, task_type, status)
+                     VALUES (?, 1, ?, 'full_analysis', 'completed')''',
+                  [(f'task-{i}', i) for i in range(1, paper_count + 1) if i % 20 == 0])
+    conn.commit()
+    conn.close()
+
+
+def legacy_enrich(db_path: str, papers):
+    """原实现：每条结果构造一次ReadLaterService（完整执行建表DDL）并新建连接单独查询"""
+    for paper in papers:
+        Database(db_path).init_database()
+        conn = sqlite3.connect(db_path)
+        try:
+            c = conn.cursor()
+            c.execute('SELECT id FROM read_later WHERE paper_id = ?', (paper['id'],))
+            paper['is_read_later'] = c.fetchone() is not None
+        finally:
+            conn.close()
+
+
+def fetch_page(service: SearchService, page_size: int):
+    """取一页未补充附加信息的搜索结果"""
+    conn = service.get_db()
+    try:
+        c = conn.cursor()
+        c.execute('''SELECT p.*, f.name as feed_name
+                     FROM papers p LEFT JOIN feeds f ON p.feed_id = f.id
+                     ORDER BY p.id LIMIT ?''', (page_size,))
+        return [dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
+
+def measure(func, repeat: int) -> float:
+    """返回多次运行的中位耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='搜索结果分页延迟基准测试')
+    parser.add_argument('--papers', type=int, default=5000, help='生成的论文数量')
+    parser.add_argument('--repeat', type=int, default=5, help='每项测试重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.db')
+        print(f"🔧 生成 {args.papers} 篇测试论文...")
+        build_database(db_path, args.papers)
+
+        search_service_module.DATABASE_PATH = db_path
+        service = SearchService()
+
+        print(f"\n{'页大小':>8} {'批量(ms)':>12} {'逐条(ms)':>12} {'加速比':>8} {'整页搜索(ms)':>14}")
+        for page_size in PAGE_SIZES:
+            papers = fetch_page(service, page_size)
+
+            def run_batch():
+                conn = service.get_db()
+                try:
+                    service._enrich_results(conn.cursor(), papers)
+                finally:
+                    conn.close()
+
+            def run_search():
+                result = service.search_papers('network', limit=page_size, order_by='date')
+                assert result['success'], result.get('error')
+
+            batch_ms = measure(run_batch, args.repeat)
+            legacy_ms = measure(lambda: legacy_enrich(db_path, papers), args.repeat)
+            search_ms = measure(run_search, args.repeat)
+            print(f"{page_size:>8} {batch_ms:>12.1f} {legacy_ms:>12.1f} "
+                  f"{legacy_ms / batch_ms:>7.1f}x {search_ms:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
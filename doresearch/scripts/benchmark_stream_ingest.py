@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+流式抓取入库基准测试
+对比一次性获取完整JSON响应后入库（原实现）与NDJSON流式获取、分批入库的
+总耗时和客户端峰值内存；抓取服务由独立进程中的本地HTTP服务模拟
+
+使用方法：
+python scripts/benchmark_stream_ingest.py [--papers 5000] [--upstream-ms 2000] [--batch-size 200]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.subscription_service import ExternalServiceClient, PaperProcessor
+from benchmark_paper_ingest import prepare_database, synthetic_papers
+
+
+def serve(port_queue, paper_count: int, upstream_seconds: float):
+    """模拟抓取服务：按固定速度产生论文，流式请求边产生边返回"""
+    papers = synthetic_papers(paper_count)
+    delay = upstream_seconds / max(1, paper_count // 100)
+
+    def produce():
+        for start in range(0, paper_count, 100):
+            time.sleep(delay)
+            yield papers[start:start + 100]
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if body.get('stream'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.end_headers()
+                for chunk in produce():
+                    self.wfile.write(''.join(json.dumps({'type': 'paper', 'data': paper}) + '\n'
+                                             for paper in chunk).encode())
+                self.wfile.write((json.dumps({'type': 'summary', 'papers_count': paper_count}) + '\n').encode())
+            else:
+                fetched = [paper for chunk in produce() for paper in chunk]
+                payload = json.dumps({'success': True, 'data': {'papers': fetched, 'total_count': paper_count}})
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload.encode())
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def buffered_ingest(client: ExternalServiceClient, processor: PaperProcessor, batch_size: int):
+    """原实现：读取完整响应后一次性入库"""
+    result = client.fetch_papers('dblp', {})
+    papers = result['data']['data']['papers']
+    return processor.process_papers(papers, 1, 'benchmark')
+
+
+def streaming_ingest(client: ExternalServiceClient, processor: PaperProcessor, batch_size: int):
+    """流式获取，每批论文到达后立即入库"""
+    stream = client.stream_papers('dblp', {})
+    return processor.process_paper_stream(stream, [(1, 'benchmark')], batch_size=batch_size)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式抓取入库基准测试')
+    parser.add_argument('--papers', type=int, default=5000, help='抓取的论文数量')
+    parser.add_argument('--upstream-ms', type=int, default=2000, help='模拟上游产生全部论文的耗时（毫秒）')
+    parser.add_argument('--batch-size', type=int, default=200, help='流式入库时每批的论文数')
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, args.papers, args.upstream_ms / 1000),
+                                     daemon=True)
+    server.start()
+    client = ExternalServiceClient(f"http://127.0.0.1:{port_queue.get()}", timeout=60)
+
+    print(f"🔧 抓取 {args.papers} 篇论文，上游耗时 {args.upstream_ms} ms\n")
+    try:
+        for name, runner in [('完整响应（原实现）', buffered_ingest), ('流式分批入库', streaming_ingest)]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_path = os.path.join(tmp_dir, 'benchmark.db')
+                prepare_database(db_path, [])
+                processor = PaperProcessor(db_path)
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                result = runner(client, processor, args.batch_size)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(f"{name:<12} 耗时 {elapsed * 1000:>8.1f} ms   "
+                      f"峰值内存 {peak / 1024 / 1024:>7.1f} MiB   新增 {result['new_papers']}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+任务派发延迟基准测试
+对比按固定间隔轮询（原实现）与任务通知唤醒两种方式下，
+从任务创建到开始执行的延迟，以及期间调度线程查询待处理任务的次数
+
+使用方法：
+python scripts/benchmark_task_dispatch.py [--tasks 20] [--gap-ms 300] [--poll-interval 2]
+"""
+import io
+import os
+import sys
+import time
+import uuid
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+import statistics
+import contextlib
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from models.database import Database
+import services.agent_manager as agent_manager_module
+import services.task_manager as task_manager_module
+import services.task_processor as task_processor_module
+from services.task_processor import TaskProcessor
+
+
+def prepare_database(db_path: str, paper_count: int):
+    """创建测试数据库和论文"""
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany('INSERT INTO papers (id, title, hash) VALUES (?, ?, ?)',
+                     [(i, f'Benchmark Paper {i}', f'bench-{i}') for i in range(1, paper_count + 1)])
+    conn.commit()
+    conn.close()
+
+
+def create_task(db_path: str, paper_id: int) -> str:
+    """与TaskManager.create_pdf_download_task相同：提交任务后发送任务通知"""
+    task_id = str(uuid.uuid4())
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('''INSERT INTO tasks (id, user_id, paper_id, task_type, status)
+                        VALUES (?, 1, ?, 'pdf_download_only', 'pending')''', (task_id, paper_id))
+        conn.commit()
+    finally:
+        conn.close()
+    task_manager_module.notify_task_created(task_id, 'pdf_download_only')
+    return task_id
+
+
+def run(db_path: str, event_driven: bool, args) -> dict:
+    """逐个创建任务，记录每个任务从创建到开始执行的延迟"""
+    for module in (agent_manager_module, task_manager_module, task_processor_module):
+        module.DATABASE_PATH = db_path
+    # 轮询模式下对账间隔即原来的TASK_CHECK_INTERVAL
+    task_processor_module.TASK_RECONCILE_INTERVAL = args.idle_reconcile if event_driven else args.poll_interval
+
+    created_at = {}
+    latencies = []
+    done = threading.Event()
+
+    def start_task(task):
+        # 与TaskProcessor._process_task相同，开始执行时认领任务
+        if not processor.task_manager.claim_task(task['id']):
+            return True
+        latencies.append(time.perf_counter() - created_at[task['id']])
+        if len(latencies) == args.tasks:
+            done.set()
+        return True
+
+    processor = TaskProcessor()
+    processor._process_task = start_task
+    polls = [0]
+    get_pending_tasks = processor.task_manager.get_pending_tasks
+
+    def counted_get_pending_tasks():
+        polls[0] += 1
+        return get_pending_tasks()
+
+    processor.task_manager.get_pending_tasks = counted_get_pending_tasks
+    processor.start()
+    if not event_driven:
+        task_manager_module.remove_task_listener(processor._on_task_created)
+
+    rng = random.Random(11)
+    started = time.perf_counter()
+    for paper_id in range(1, args.tasks + 1):
+        time.sleep(rng.uniform(0, 2 * args.gap_ms / 1000))
+        created_at[create_task(db_path, paper_id)] = time.perf_counter()
+    done.wait(args.poll_interval + 5)
+    elapsed = time.perf_counter() - started
+    processor.stop()
+
+    return {
+        'latencies_ms': sorted(latency * 1000 for latency in latencies),
+        'polls': polls[0],
+        'elapsed': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='任务派发延迟基准测试')
+    parser.add_argument('--tasks', type=int, default=20, help='创建的任务数量')
+    parser.add_argument('--gap-ms', type=int, default=300, help='任务创建的平均间隔（毫秒）')
+    parser.add_argument('--poll-interval', type=float, default=2, help='原实现的轮询间隔（秒）')
+    parser.add_argument('--idle-reconcile', type=float, default=30, help='通知模式下的对账间隔（秒）')
+    args = parser.parse_args()
+
+    print(f"🔧 创建 {args.tasks} 个任务，平均间隔 {args.gap_ms} ms，原轮询间隔 {args.poll_interval} 秒\n")
+    for name, event_driven in [('定时轮询（原实现）', False), ('任务通知唤醒', True)]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'benchmark.db')
+            prepare_database(db_path, args.tasks)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run(db_path, event_driven, args)
+
+            latencies = result['latencies_ms']
+            if len(latencies) < args.tasks:
+                print(f"{name:<12} 仅 {len(latencies)}/{args.tasks} 个任务在等待时间内开始执行")
+                continue
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+            print(f"{name:<12} 延迟 p50 {statistics.median(latencies):>8.1f} ms   "
+                  f"p95 {p95:>8.1f} ms   最大 {latencies[-1]:>8.1f} ms   "
+                  f"查询待处理任务 {result['polls']:>3} 次 / {result['elapsed']:.1f} 秒")
+
+
+if __name__ == '__main__':
+    main()
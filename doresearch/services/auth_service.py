@@ -10,6 +10,7 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 from models.database import Database
+from services.database_service import get_pooled_connection
 from config import DATABASE_PATH
 
 # 会话存储文件路径
@@ -64,9 +65,7 @@ class AuthService:
     
     def get_db(self):
         """获取数据库连接"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(DATABASE_PATH)
     
     def _hash_password(self, password: str, salt: str = None) -> Tuple[str, str]:
         """密码哈希"""
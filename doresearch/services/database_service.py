@@ -2,62 +2,132 @@
 数据库服务层 - 统一连接池管理和查询优化
 解决数据库连接重复创建和查询性能问题
 """
+import os
 import sqlite3
 import threading
 import time
 from typing import Optional, Dict, List, Any, Union
 from contextlib import contextmanager
-from queue import Queue, Empty
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class DatabaseConnection:
-    """数据库连接包装器"""
-    
-    def __init__(self, connection: sqlite3.Connection, pool: 'ConnectionPool'):
-        self.connection = connection
-        self.pool = pool
-        self.in_use = True
-        self.created_at = time.time()
-        self.last_used = time.time()
-    
+class PooledConnection:
+    """
+    池化连接代理
+
+    接口与sqlite3.Connection一致，close()时把连接归还连接池而不是真正关闭，
+    因此原有的 conn = get_db() ... conn.close() 写法可以直接使用连接池
+    """
+
+    def __init__(self, connection: sqlite3.Connection, pool: 'ConnectionPool', readonly: bool):
+        object.__setattr__(self, '_connection', connection)
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, 'readonly', readonly)
+        object.__setattr__(self, '_released', False)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._connection
+
+    def close(self):
+        """归还连接到池中"""
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool.return_connection(self)
+
+    def __getattr__(self, name):
+        if self._released:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
     def __enter__(self):
-        return self.connection
-    
+        self._connection.__enter__()
+        return self
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.pool.return_connection(self)
+        return self._connection.__exit__(exc_type, exc_val, exc_tb)
+
+    def __del__(self):
+        # 兜底：调用方忘记close时也要把连接还回池中
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class _PoolState:
+    """单类连接（读或写）的池状态与统计"""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.idle = []  # [(connection, last_thread_id, last_used)]，末尾为最近归还
+        self.open_count = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.same_thread_reuses = 0
+        self.created = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def get_stats(self) -> Dict:
+        return {
+            'max_connections': self.max_connections,
+            'open_connections': self.open_count,
+            'active_connections': self.in_use,
+            'idle_connections': len(self.idle),
+            'checkouts': self.checkouts,
+            'same_thread_reuses': self.same_thread_reuses,
+            'total_created': self.created,
+            'waits': self.waits,
+            'timeouts': self.timeouts,
+            'avg_wait_ms': round(self.total_wait_time / self.waits * 1000, 3) if self.waits else 0.0,
+            'max_wait_ms': round(self.max_wait_time * 1000, 3)
+        }
 
 
 class ConnectionPool:
-    """SQLite连接池"""
+    """
+    SQLite连接池
+
+    - 读连接与写连接分开管理（读连接开启query_only）
+    - 优先复用当前线程上次归还的连接
+    - 连接已满时在条件变量上有界等待（等待期间不持有锁）
+    - 所有连接统一启用WAL等优化设置
+    """
     
-    def __init__(self, db_path: str, max_connections: int = 10, 
-                 connection_timeout: int = 300, check_interval: int = 60):
+    def __init__(self, db_path: str, max_connections: int = 16, max_read_connections: int = None,
+                 wait_timeout: float = 30.0, connection_timeout: int = 300, check_interval: int = 60):
         self.db_path = db_path
         self.max_connections = max_connections
+        self.wait_timeout = wait_timeout
         self.connection_timeout = connection_timeout
         self.check_interval = check_interval
         
-        self._pool = Queue(maxsize=max_connections)
-        self._active_connections = {}
+        self._write = _PoolState(max_connections)
+        self._read = _PoolState(max_read_connections or max_connections)
         self._lock = threading.RLock()
+        self._available = threading.Condition(self._lock)
         self._closed = False
         
         # 启动连接清理线程
         self._cleanup_thread = threading.Thread(target=self._cleanup_connections, daemon=True)
         self._cleanup_thread.start()
     
-    def _create_connection(self) -> sqlite3.Connection:
+    def _create_connection(self, readonly: bool) -> sqlite3.Connection:
         """创建新的数据库连接"""
         conn = sqlite3.connect(
             self.db_path,
             check_same_thread=False,
             timeout=30.0
         )
-        conn.row_factory = sqlite3.Row
         
         # 优化SQLite设置
         conn.execute('PRAGMA journal_mode=WAL')
@@ -65,81 +135,109 @@ class ConnectionPool:
         conn.execute('PRAGMA cache_size=10000')
         conn.execute('PRAGMA temp_store=MEMORY')
         conn.execute('PRAGMA mmap_size=268435456')  # 256MB
-        conn.execute('PRAGMA foreign_keys=ON')
+        if readonly:
+            conn.execute('PRAGMA query_only=ON')
         
         return conn
     
-    def get_connection(self, timeout: float = 5.0) -> DatabaseConnection:
-        """获取数据库连接"""
-        if self._closed:
-            raise RuntimeError("连接池已关闭")
+    def get_connection(self, readonly: bool = False, timeout: float = None,
+                       row_factory=sqlite3.Row) -> PooledConnection:
+        """获取数据库连接（用完后调用close()归还）"""
+        state = self._read if readonly else self._write
+        timeout = self.wait_timeout if timeout is None else timeout
+        thread_id = threading.get_ident()
+        start_time = time.perf_counter()
+        deadline = start_time + timeout
+        waited = False
+        conn = None
         
-        start_time = time.time()
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                
+                conn = self._take_idle(state, thread_id)
+                if conn is not None:
+                    break
+                
+                # 池中没有空闲连接且未达上限，占位后在锁外创建新连接
+                if state.open_count < state.max_connections:
+                    state.open_count += 1
+                    state.created += 1
+                    break
+                
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    state.timeouts += 1
+                    state.total_wait_time += time.perf_counter() - start_time
+                    raise RuntimeError(f"无法在{timeout}秒内获取数据库连接")
+                
+                if not waited:
+                    waited = True
+                    state.waits += 1
+                self._available.wait(remaining)
+            
+            state.in_use += 1
+            state.checkouts += 1
+            if waited:
+                wait_time = time.perf_counter() - start_time
+                state.total_wait_time += wait_time
+                state.max_wait_time = max(state.max_wait_time, wait_time)
         
-        with self._lock:
-            # 首先尝试从池中获取连接
+        if conn is None:
             try:
-                while time.time() - start_time < timeout:
-                    try:
-                        conn_wrapper = self._pool.get_nowait()
-                        if self._is_connection_valid(conn_wrapper.connection):
-                            conn_wrapper.in_use = True
-                            conn_wrapper.last_used = time.time()
-                            thread_id = threading.get_ident()
-                            self._active_connections[thread_id] = conn_wrapper
-                            return conn_wrapper
-                        else:
-                            # 连接无效，关闭并创建新的
-                            conn_wrapper.connection.close()
-                    except Empty:
-                        break
+                conn = self._create_connection(readonly)
             except Exception as e:
-                logger.error(f"从连接池获取连接失败: {e}")
-            
-            # 如果池中没有可用连接，创建新连接
-            if len(self._active_connections) < self.max_connections:
-                try:
-                    conn = self._create_connection()
-                    conn_wrapper = DatabaseConnection(conn, self)
-                    thread_id = threading.get_ident()
-                    self._active_connections[thread_id] = conn_wrapper
-                    return conn_wrapper
-                except Exception as e:
-                    logger.error(f"创建新数据库连接失败: {e}")
-                    raise
-            
-            raise RuntimeError(f"无法在{timeout}秒内获取数据库连接")
+                logger.error(f"创建新数据库连接失败: {e}")
+                with self._available:
+                    state.open_count -= 1
+                    state.in_use -= 1
+                    self._available.notify()
+                raise
+        
+        conn.row_factory = row_factory
+        return PooledConnection(conn, self, readonly)
     
-    def return_connection(self, conn_wrapper: DatabaseConnection):
+    def _take_idle(self, state: _PoolState, thread_id: int) -> Optional[sqlite3.Connection]:
+        """取出空闲连接，优先当前线程上次使用的连接（调用方需持有锁）"""
+        if not state.idle:
+            return None
+        
+        for index in range(len(state.idle) - 1, -1, -1):
+            if state.idle[index][1] == thread_id:
+                state.same_thread_reuses += 1
+                return state.idle.pop(index)[0]
+        
+        return state.idle.pop()[0]
+    
+    def return_connection(self, pooled: PooledConnection):
         """归还连接到池中"""
-        if self._closed:
-            conn_wrapper.connection.close()
-            return
+        conn = pooled.connection
+        state = self._read if pooled.readonly else self._write
         
-        with self._lock:
-            thread_id = threading.get_ident()
-            if thread_id in self._active_connections:
-                del self._active_connections[thread_id]
-            
-            conn_wrapper.in_use = False
-            conn_wrapper.last_used = time.time()
-            
-            if self._is_connection_valid(conn_wrapper.connection):
-                try:
-                    self._pool.put_nowait(conn_wrapper)
-                except:
-                    # 池已满，关闭连接
-                    conn_wrapper.connection.close()
+        # 与直接关闭连接的语义保持一致：丢弃未提交的事务
+        valid = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            valid = False
+        
+        with self._available:
+            state.in_use -= 1
+            if self._closed or not valid:
+                state.open_count -= 1
+                self._close_quietly(conn)
             else:
-                conn_wrapper.connection.close()
+                state.idle.append((conn, threading.get_ident(), time.time()))
+            self._available.notify()
     
-    def _is_connection_valid(self, conn: sqlite3.Connection) -> bool:
-        """检查连接是否有效"""
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
         try:
-            conn.execute('SELECT 1')
-            return True
-        except:
-            return False
+            conn.close()
+        except Exception:
+            pass
     
     def _cleanup_connections(self):
         """清理过期连接"""
@@ -148,77 +246,70 @@ class ConnectionPool:
                 time.sleep(self.check_interval)
                 current_time = time.time()
                 
-                with self._lock:
-                    # 清理池中的过期连接
-                    expired_connections = []
-                    while not self._pool.empty():
-                        try:
-                            conn_wrapper = self._pool.get_nowait()
-                            if current_time - conn_wrapper.last_used > self.connection_timeout:
-                                expired_connections.append(conn_wrapper)
+                expired_connections = []
+                with self._available:
+                    for state in (self._write, self._read):
+                        keep = []
+                        for item in state.idle:
+                            if current_time - item[2] > self.connection_timeout:
+                                expired_connections.append(item[0])
+                                state.open_count -= 1
                             else:
-                                self._pool.put_nowait(conn_wrapper)
-                        except Empty:
-                            break
-                    
-                    for conn_wrapper in expired_connections:
-                        conn_wrapper.connection.close()
-                    
-                    if expired_connections:
-                        logger.info(f"清理了{len(expired_connections)}个过期数据库连接")
+                                keep.append(item)
+                        state.idle = keep
+                
+                for conn in expired_connections:
+                    self._close_quietly(conn)
+                
+                if expired_connections:
+                    logger.info(f"清理了{len(expired_connections)}个过期数据库连接")
                         
             except Exception as e:
                 logger.error(f"清理数据库连接时出错: {e}")
     
     def close(self):
-        """关闭连接池"""
-        self._closed = True
-        
-        with self._lock:
-            # 关闭所有活跃连接
-            for conn_wrapper in self._active_connections.values():
-                try:
-                    conn_wrapper.connection.close()
-                except:
-                    pass
-            self._active_connections.clear()
-            
-            # 关闭池中的连接
-            while not self._pool.empty():
-                try:
-                    conn_wrapper = self._pool.get_nowait()
-                    conn_wrapper.connection.close()
-                except Empty:
-                    break
+        """关闭连接池（使用中的连接在归还时关闭）"""
+        with self._available:
+            self._closed = True
+            for state in (self._write, self._read):
+                for conn, _, _ in state.idle:
+                    self._close_quietly(conn)
+                state.open_count -= len(state.idle)
+                state.idle = []
+            self._available.notify_all()
     
     def get_stats(self) -> Dict:
         """获取连接池统计信息"""
         with self._lock:
+            write_stats = self._write.get_stats()
+            read_stats = self._read.get_stats()
             return {
-                'active_connections': len(self._active_connections),
-                'pool_size': self._pool.qsize(),
-                'max_connections': self.max_connections,
-                'total_created': len(self._active_connections) + self._pool.qsize()
+                'active_connections': write_stats['active_connections'] + read_stats['active_connections'],
+                'pool_size': write_stats['idle_connections'] + read_stats['idle_connections'],
+                'max_connections': self._write.max_connections + self._read.max_connections,
+                'total_created': write_stats['total_created'] + read_stats['total_created'],
+                'write': write_stats,
+                'read': read_stats
             }
 
 
 class DatabaseService:
     """统一数据库服务"""
     
-    def __init__(self, db_path: str, max_connections: int = 10):
+    def __init__(self, db_path: str):
         self.db_path = db_path
-        self._pool = ConnectionPool(db_path, max_connections)
+        self._pool = get_connection_pool(db_path)
         self._query_cache = {}
         self._cache_lock = threading.RLock()
     
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, readonly: bool = False):
         """获取数据库连接上下文管理器"""
-        conn_wrapper = self._pool.get_connection()
+        conn = self._pool.get_connection(readonly=readonly)
         try:
-            yield conn_wrapper.connection
+            yield conn
         finally:
-            self._pool.return_connection(conn_wrapper)
+            conn.close()
     
     def execute_query(self, query: str, params: tuple = None, 
                      fetch_one: bool = False, fetch_all: bool = True) -> Union[Dict, List[Dict], None]:
@@ -303,11 +394,46 @@ class DatabaseService:
         }
     
     def close(self):
-        """关闭数据库服务"""
-        self._pool.close()
+        """关闭数据库服务（连接池由close_connection_pools统一关闭）"""
         self.clear_cache()
 
 
+# 全局连接池（每个数据库文件一个）
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str = None) -> ConnectionPool:
+    """获取数据库文件对应的全局连接池"""
+    if db_path is None:
+        from config import DATABASE_PATH
+        db_path = DATABASE_PATH
+    
+    key = os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(db_path)
+                _pools[key] = pool
+    return pool
+
+
+def get_pooled_connection(db_path: str = None, readonly: bool = False,
+                          row_factory=sqlite3.Row) -> PooledConnection:
+    """从全局连接池获取连接，用完后调用close()归还"""
+    return get_connection_pool(db_path).get_connection(readonly=readonly, row_factory=row_factory)
+
+
+def close_connection_pools():
+    """关闭所有全局连接池"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
 # 全局数据库服务实例
 _db_service = None
 _db_service_lock = threading.Lock()
@@ -9,21 +9,27 @@ import hashlib
 import re
 from datetime import datetime
 from typing import Dict, List, Optional
-from models.database import Database
+from models.database import Database, find_existing_paper_hashes, bulk_insert_papers
+from services.database_service import get_pooled_connection
 from config import DATABASE_PATH
 
 
 class PaperManager:
     """论文管理服务"""
 
+    # 从论文源更新时写入papers表的字段
+    FEED_PAPER_COLUMNS = (
+        'feed_id', 'title', 'abstract', 'authors', 'journal', 'published_date',
+        'url', 'pdf_url', 'doi', 'status', 'status_changed_at', 'hash', 'external_id',
+        'ieee_article_number'
+    )
+
     def __init__(self):
         self.db = Database(DATABASE_PATH)
 
     def get_db(self):
         """获取数据库连接"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(DATABASE_PATH)
 
     def add_feed(self, name: str, url: str, journal: str = "", user_id: int = None) -> Dict:
         """添加论文源"""
@@ -111,20 +117,29 @@ class PaperManager:
             if not isinstance(papers_data, list):
                 return {'success': False, 'error': 'API响应格式错误，应该是数组格式'}
 
-            new_papers = 0
-
+            # 按哈希在批次内去重，再一次性排除已存在的论文
+            candidates = {}
+            valid_papers = 0
             for paper_data in papers_data:
                 if not paper_data.get('title'):
                     continue
+                valid_papers += 1
 
                 paper_hash = hashlib.md5(
                     (paper_data.get('title', '') +
                      paper_data.get('url', '') +
                      str(paper_data.get('external_id', ''))).encode()
                 ).hexdigest()
+                candidates.setdefault(paper_hash, paper_data)
+
+            existing_hashes = find_existing_paper_hashes(c, candidates.keys())
+
+            # 获取当前时间作为状态变化时间
+            current_time = datetime.now().isoformat()
+            rows = []
 
-                c.execute('SELECT id FROM papers WHERE hash = ?', (paper_hash,))
-                if c.fetchone():
+            for paper_hash, paper_data in candidates.items():
+                if paper_hash in existing_hashes:
                     continue
 
                 # 提取IEEE文章编号
@@ -147,23 +162,21 @@ class PaperManager:
 
                 status = paper_data.get('status', 'unread')
 
-                # 获取当前时间作为状态变化时间
-                current_time = datetime.now().isoformat()
+                rows.append((feed_id, title, abstract, authors, journal,
+                             published_date, url, pdf_url, doi, status, current_time, paper_hash,
+                             external_id, ieee_number))
 
-                c.execute('''INSERT INTO papers
-                             (feed_id, title, abstract, authors, journal, published_date,
-                              url, pdf_url, doi, status, status_changed_at, hash, external_id, ieee_article_number)
-                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                          (feed_id, title, abstract, authors, journal,
-                           published_date, url, pdf_url, doi, status, current_time, paper_hash,
-                           external_id, ieee_number))
-                new_papers += 1
+            new_papers = bulk_insert_papers(c, self.FEED_PAPER_COLUMNS, rows)
 
             c.execute('UPDATE feeds SET last_updated = CURRENT_TIMESTAMP WHERE id = ?',
                       (feed_id,))
 
             conn.commit()
-            return {'success': True, 'new_papers': new_papers}
+            return {
+                'success': True,
+                'new_papers': new_papers,
+                'duplicate_papers': valid_papers - new_papers
+            }
 
         except requests.RequestException as e:
             return {'success': False, 'error': f'网络请求失败: {str(e)}'}
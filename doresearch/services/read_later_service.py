@@ -6,6 +6,7 @@ import sqlite3
 from datetime import datetime
 from typing import Dict, List, Optional
 from models.database import Database
+from services.database_service import get_pooled_connection
 from config import DATABASE_PATH
 
 
@@ -15,9 +16,7 @@ class ReadLaterService:
 
     def get_db(self):
         """获取数据库连接"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(DATABASE_PATH)
 
     def mark_read_later(self, paper_id: int, user_id: int = None, priority: int = 5,
                         notes: str = None, tags: str = None,
@@ -5,19 +5,28 @@
 import sqlite3
 import re
 from typing import Dict, List, Optional, Tuple
-from models.database import Database
+from models.database import Database, PAPERS_FTS_COLUMNS
+from services.database_service import get_pooled_connection
 from config import DATABASE_PATH
 
 
 class SearchService:
+    # 全文检索中各字段的BM25权重（与原LIKE相关性权重保持一致）
+    FTS_COLUMN_WEIGHTS = {'title': 3.0, 'authors': 2.0}
+
+    # trigram分词下可走全文索引的最短词长
+    FTS_MIN_TERM_LENGTH = 3
+
+    # 批量补充结果信息时单条IN查询的最大参数数
+    ENRICH_BATCH_SIZE = 500
+
     def __init__(self):
         self.db = Database(DATABASE_PATH)
+        self._fts_available = None
 
     def get_db(self):
         """获取数据库连接"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(DATABASE_PATH, readonly=True)
 
     def search_papers(self, query: str, search_fields: List[str] = None,
                       filters: Dict = None, limit: int = 50, offset: int = 0,
@@ -52,18 +61,32 @@ class SearchService:
 
         conn = self.get_db()
         try:
+            c = conn.cursor()
+
+            # 优先使用全文索引，不可用时退回LIKE匹配
+            match_expression = None
+            if self._is_fts_available(c):
+                match_expression = self._build_match_expression(query, search_fields)
+
             # 构建搜索查询
-            search_sql, search_params = self._build_search_query(
-                query, search_fields, filters, order_by, limit, offset
-            )
+            if match_expression:
+                search_sql, search_params = self._build_fts_search_query(
+                    query, match_expression, search_fields, filters, order_by, limit, offset
+                )
+                count_sql, count_params = self._build_fts_count_query(
+                    query, match_expression, search_fields, filters
+                )
+            else:
+                search_sql, search_params = self._build_search_query(
+                    query, search_fields, filters, order_by, limit, offset
+                )
+                count_sql, count_params = self._build_count_query(query, search_fields, filters)
 
             # 执行搜索
-            c = conn.cursor()
             c.execute(search_sql, search_params)
             results = c.fetchall()
 
             # 获取总数（用于分页）
-            count_sql, count_params = self._build_count_query(query, search_fields, filters)
             c.execute(count_sql, count_params)
             total_count = c.fetchone()[0]
 
@@ -72,8 +95,8 @@ class SearchService:
             for row in results:
                 paper_dict = dict(row)
 
-                # 计算相关性得分和高亮
-                if order_by == 'relevance':
+                # 全文检索的BM25得分已由SQL返回，LIKE匹配时再计算相关性得分
+                if order_by == 'relevance' and not match_expression:
                     paper_dict['relevance_score'] = self._calculate_relevance_score(
                         query, paper_dict, search_fields
                     )
@@ -83,11 +106,11 @@ class SearchService:
                     query, paper_dict, search_fields
                 )
 
-                # 检查是否在稍后阅读列表中
-                paper_dict['is_read_later'] = self._check_read_later_status(paper_dict['id'])
-
                 papers.append(paper_dict)
 
+            # 批量补充稍后阅读、分析状态等附加信息
+            self._enrich_results(c, papers)
+
             return {
                 'success': True,
                 'data': {
@@ -115,44 +138,133 @@ class SearchService:
         finally:
             conn.close()
 
-    def _build_search_query(self, query: str, search_fields: List[str],
-                            filters: Dict, order_by: str, limit: int, offset: int) -> Tuple[str, List]:
-        """构建搜索SQL查询"""
+    def _is_fts_available(self, cursor) -> bool:
+        """检查全文检索索引是否存在"""
+        if self._fts_available is None:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='papers_fts'")
+            self._fts_available = cursor.fetchone() is not None
+        return self._fts_available
 
-        # 基础查询
-        base_query = '''
-                     SELECT p.*, f.name as feed_name
-                     FROM papers p
-                              LEFT JOIN feeds f ON p.feed_id = f.id \
+    def _build_match_expression(self, query: str, search_fields: List[str]) -> Optional[str]:
+        """
+        构建FTS5 MATCH表达式
+
+        只有长度不小于FTS_MIN_TERM_LENGTH的词能走trigram索引；
+        没有可用词时返回None，由调用方退回LIKE匹配
+        """
+        fts_fields = [field for field in search_fields if field in PAPERS_FTS_COLUMNS]
+        if not fts_fields:
+            return None
+
+        column_filter = '{' + ' '.join(fts_fields) + '}'
+        phrases = []
+        for term in self._parse_search_query(query):
+            if len(term) >= self.FTS_MIN_TERM_LENGTH:
+                escaped = term.replace('"', '""')
+                phrases.append(f'{column_filter}: "{escaped}"')
+
+        return ' AND '.join(phrases) if phrases else None
+
+    def _build_bm25_sql(self) -> str:
+        """构建BM25排序表达式（取负值，得分越高越相关）"""
+        weights = ', '.join(
+            str(self.FTS_COLUMN_WEIGHTS.get(column, 1.0)) for column in PAPERS_FTS_COLUMNS
+        )
+        return f'-bm25(papers_fts, {weights})'
+
+    def _build_fts_search_query(self, query: str, match_expression: str, search_fields: List[str],
+                                filters: Dict, order_by: str, limit: int, offset: int) -> Tuple[str, List]:
+        """构建基于全文索引的搜索SQL查询"""
+        select_fields = 'p.*, f.name as feed_name'
+        if order_by == 'relevance':
+            select_fields += f', {self._build_bm25_sql()} as relevance_score'
+
+        base_query = f'''
+                     SELECT {select_fields}
+                     FROM papers_fts
+                              JOIN papers p ON p.id = papers_fts.rowid
+                              LEFT JOIN feeds f ON p.feed_id = f.id
+                     WHERE papers_fts MATCH ?
                      '''
+        params = [match_expression]
 
-        # 构建WHERE条件
-        where_conditions = []
+        # 过短的词无法走trigram索引，在索引命中结果上继续用LIKE过滤
+        where_conditions, where_params = self._build_short_term_conditions(query, search_fields)
+        filter_conditions, filter_params = self._build_filter_conditions(filters)
+        where_conditions.extend(filter_conditions)
+        params.extend(where_params)
+        params.extend(filter_params)
+
+        if where_conditions:
+            base_query += ' AND ' + ' AND '.join(where_conditions)
+
+        # 排序
+        if order_by == 'relevance':
+            base_query += ' ORDER BY relevance_score DESC, p.published_date DESC'
+        elif order_by == 'title':
+            base_query += ' ORDER BY p.title ASC'
+        elif order_by == 'created_at':
+            base_query += ' ORDER BY p.created_at DESC'
+        else:
+            base_query += ' ORDER BY p.published_date DESC'
+
+        # 分页
+        base_query += ' LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+
+        return base_query, params
+
+    def _build_fts_count_query(self, query: str, match_expression: str,
+                               search_fields: List[str], filters: Dict) -> Tuple[str, List]:
+        """构建基于全文索引的计数查询"""
+        count_query = '''SELECT COUNT(*)
+                         FROM papers_fts
+                                  JOIN papers p ON p.id = papers_fts.rowid
+                         WHERE papers_fts MATCH ?'''
+        params = [match_expression]
+
+        where_conditions, where_params = self._build_short_term_conditions(query, search_fields)
+        filter_conditions, filter_params = self._build_filter_conditions(filters)
+        where_conditions.extend(filter_conditions)
+        params.extend(where_params)
+        params.extend(filter_params)
+
+        if where_conditions:
+            count_query += ' AND ' + ' AND '.join(where_conditions)
+
+        return count_query, params
+
+    def _build_short_term_conditions(self, query: str, search_fields: List[str]) -> Tuple[List[str], List]:
+        """为无法走全文索引的短词构建LIKE条件"""
+        short_terms = [term for term in self._parse_search_query(query)
+                       if len(term) < self.FTS_MIN_TERM_LENGTH]
+        return self._build_like_conditions(short_terms, search_fields)
+
+    def _build_like_conditions(self, terms: List[str], search_fields: List[str]) -> Tuple[List[str], List]:
+        """构建逐词逐字段的LIKE匹配条件"""
+        search_conditions = []
         params = []
 
-        # 搜索条件
-        if query:
-            search_conditions = []
-            search_terms = self._parse_search_query(query)
+        for term in terms:
+            field_conditions = []
 
-            for term in search_terms:
-                field_conditions = []
+            for field in search_fields:
+                if field in ['title', 'abstract', 'authors', 'journal', 'doi', 'abstract_cn']:
+                    field_conditions.append(f'p.{field} LIKE ?')
+                    params.append(f'%{term}%')
 
-                for field in search_fields:
-                    if field in ['title', 'abstract', 'authors', 'journal', 'doi']:
-                        field_conditions.append(f'p.{field} LIKE ?')
-                        params.append(f'%{term}%')
-                    elif field == 'abstract_cn':
-                        field_conditions.append(f'p.abstract_cn LIKE ?')
-                        params.append(f'%{term}%')
+            if field_conditions:
+                search_conditions.append(f'({" OR ".join(field_conditions)})')
 
-                if field_conditions:
-                    search_conditions.append(f'({" OR ".join(field_conditions)})')
+        if search_conditions:
+            return [f'({" AND ".join(search_conditions)})'], params
+        return [], params
 
-            if search_conditions:
-                where_conditions.append(f'({" AND ".join(search_conditions)})')
+    def _build_filter_conditions(self, filters: Dict) -> Tuple[List[str], List]:
+        """构建过滤条件"""
+        where_conditions = []
+        params = []
 
-        # 过滤条件
         if filters.get('status'):
             where_conditions.append('p.status = ?')
             params.append(filters['status'])
@@ -185,6 +297,36 @@ class SearchService:
             else:
                 where_conditions.append('p.analysis_result IS NULL')
 
+        return where_conditions, params
+
+    def _build_search_query(self, query: str, search_fields: List[str],
+                            filters: Dict, order_by: str, limit: int, offset: int) -> Tuple[str, List]:
+        """构建搜索SQL查询（LIKE匹配，全文索引不可用时使用）"""
+
+        # 基础查询
+        base_query = '''
+                     SELECT p.*, f.name as feed_name
+                     FROM papers p
+                              LEFT JOIN feeds f ON p.feed_id = f.id \
+                     '''
+
+        # 构建WHERE条件
+        where_conditions = []
+        params = []
+
+        # 搜索条件
+        if query:
+            search_conditions, search_params = self._build_like_conditions(
+                self._parse_search_query(query), search_fields
+            )
+            where_conditions.extend(search_conditions)
+            params.extend(search_params)
+
+        # 过滤条件
+        filter_conditions, filter_params = self._build_filter_conditions(filters)
+        where_conditions.extend(filter_conditions)
+        params.extend(filter_params)
+
         # 组装WHERE子句
         if where_conditions:
             base_query += ' WHERE ' + ' AND '.join(where_conditions)
@@ -210,7 +352,7 @@ class SearchService:
         return base_query, params
 
     def _build_count_query(self, query: str, search_fields: List[str], filters: Dict) -> Tuple[str, List]:
-        """构建计数查询"""
+        """构建计数查询（LIKE匹配，全文索引不可用时使用）"""
         count_query = 'SELECT COUNT(*) FROM papers p LEFT JOIN feeds f ON p.feed_id = f.id'
 
         where_conditions = []
@@ -218,58 +360,16 @@ class SearchService:
 
         # 搜索条件（与主查询相同）
         if query:
-            search_conditions = []
-            search_terms = self._parse_search_query(query)
-
-            for term in search_terms:
-                field_conditions = []
-
-                for field in search_fields:
-                    if field in ['title', 'abstract', 'authors', 'journal', 'doi']:
-                        field_conditions.append(f'p.{field} LIKE ?')
-                        params.append(f'%{term}%')
-                    elif field == 'abstract_cn':
-                        field_conditions.append(f'p.abstract_cn LIKE ?')
-                        params.append(f'%{term}%')
-
-                if field_conditions:
-                    search_conditions.append(f'({" OR ".join(field_conditions)})')
-
-            if search_conditions:
-                where_conditions.append(f'({" AND ".join(search_conditions)})')
+            search_conditions, search_params = self._build_like_conditions(
+                self._parse_search_query(query), search_fields
+            )
+            where_conditions.extend(search_conditions)
+            params.extend(search_params)
 
         # 过滤条件（与主查询相同）
-        if filters.get('status'):
-            where_conditions.append('p.status = ?')
-            params.append(filters['status'])
-
-        if filters.get('journal'):
-            where_conditions.append('p.journal LIKE ?')
-            params.append(f'%{filters["journal"]}%')
-
-        if filters.get('feed_id'):
-            where_conditions.append('p.feed_id = ?')
-            params.append(filters['feed_id'])
-
-        if filters.get('start_date'):
-            where_conditions.append('DATE(p.published_date) >= ?')
-            params.append(filters['start_date'])
-
-        if filters.get('end_date'):
-            where_conditions.append('DATE(p.published_date) <= ?')
-            params.append(filters['end_date'])
-
-        if filters.get('has_pdf'):
-            if filters['has_pdf']:
-                where_conditions.append('(p.pdf_url IS NOT NULL OR p.pdf_path IS NOT NULL)')
-            else:
-                where_conditions.append('(p.pdf_url IS NULL AND p.pdf_path IS NULL)')
-
-        if filters.get('has_analysis'):
-            if filters['has_analysis']:
-                where_conditions.append('p.analysis_result IS NOT NULL')
-            else:
-                where_conditions.append('p.analysis_result IS NULL')
+        filter_conditions, filter_params = self._build_filter_conditions(filters)
+        where_conditions.extend(filter_conditions)
+        params.extend(filter_params)
 
         if where_conditions:
             count_query += ' WHERE ' + ' AND '.join(where_conditions)
@@ -363,14 +463,40 @@ class SearchService:
 
         return highlights
 
-    def _check_read_later_status(self, paper_id: int) -> bool:
-        """检查论文是否在稍后阅读列表中"""
-        try:
-            from services.read_later_service import ReadLaterService
-            read_later_service = ReadLaterService()
-            return read_later_service.is_marked_read_later(paper_id)
-        except:
-            return False
+    def _enrich_results(self, cursor, papers: List[Dict]):
+        """
+        批量补充搜索结果的附加信息（稍后阅读标记、分析任务状态）
+
+        每页结果只执行一次集合查询（超出SQLite参数上限时分块），
+        替代逐条结果单独查询
+        """
+        if not papers:
+            return
+
+        enrichment = {}
+        paper_ids = [paper['id'] for paper in papers]
+
+        for start in range(0, len(paper_ids), self.ENRICH_BATCH_SIZE):
+            chunk = paper_ids[start:start + self.ENRICH_BATCH_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+                           SELECT p.id,
+                                  EXISTS(SELECT 1 FROM read_later rl WHERE rl.paper_id = p.id) as is_read_later,
+                                  (SELECT t.status
+                                   FROM tasks t
+                                   WHERE t.paper_id = p.id
+                                     AND t.task_type IN ('full_analysis', 'deep_analysis')
+                                   ORDER BY t.created_at DESC LIMIT 1) as analysis_status
+                           FROM papers p
+                           WHERE p.id IN ({placeholders})
+                           ''', chunk)
+            for row in cursor.fetchall():
+                enrichment[row[0]] = row
+
+        for paper in papers:
+            row = enrichment.get(paper['id'])
+            paper['is_read_later'] = bool(row['is_read_later']) if row else False
+            paper['analysis_status'] = row['analysis_status'] if row else None
 
     def get_search_suggestions(self, query: str, limit: int = 10) -> List[str]:
         """获取搜索建议"""
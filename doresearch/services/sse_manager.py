@@ -12,6 +12,8 @@ import os
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from services.database_service import get_pooled_connection
+
 
 class SSETaskManager:
     """SSE任务管理器 - 单例模式"""
@@ -55,7 +57,7 @@ class SSETaskManager:
         """初始化数据库"""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
-        conn = sqlite3.connect(self.db_path)
+        conn = get_pooled_connection(self.db_path, row_factory=None)
         c = conn.cursor()
 
         # 任务表
@@ -96,7 +98,7 @@ class SSETaskManager:
             }
 
         # 保存到数据库
-        conn = sqlite3.connect(self.db_path)
+        conn = get_pooled_connection(self.db_path, row_factory=None)
         c = conn.cursor()
         c.execute('''INSERT OR REPLACE INTO sse_agents 
                      (agent_id, name, capabilities, last_seen, status) 
@@ -146,7 +148,7 @@ class SSETaskManager:
         task_id = str(uuid.uuid4())
 
         # 保存到数据库
-        conn = sqlite3.connect(self.db_path)
+        conn = get_pooled_connection(self.db_path, row_factory=None)
         c = conn.cursor()
         c.execute('''INSERT INTO sse_tasks
                      (id, agent_id, task_type, task_data, created_at)
@@ -192,7 +194,7 @@ class SSETaskManager:
             }
 
         # 保存到数据库
-        conn = sqlite3.connect(self.db_path)
+        conn = get_pooled_connection(self.db_path, row_factory=None)
         c = conn.cursor()
         c.execute('''UPDATE sse_tasks
                      SET status = ?, result = ?, completed_at = ?
@@ -6,6 +6,7 @@ import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from models.database import Database
+from services.database_service import get_pooled_connection
 from config import DATABASE_PATH
 
 
@@ -15,9 +16,7 @@ class StatisticsService:
 
     def get_db(self):
         """获取数据库连接"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(DATABASE_PATH, readonly=True)
 
     def get_reading_statistics(self) -> Dict:
         """获取完整的阅读统计数据"""
@@ -5,18 +5,20 @@
 import json
 import requests
 import hashlib
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple
 from datetime import datetime, timedelta
 from jsonschema import validate, ValidationError
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from models.subscription_models import (
     SubscriptionTemplateManager, 
     UserSubscriptionManager, 
     SyncHistoryManager
 )
-from models.database import Database
+from models.database import Database, find_existing_paper_hashes, bulk_insert_papers
+from configs.subscription_config import get_sync_service_config
 from config import DATABASE_PATH
 
 
@@ -52,13 +54,15 @@ class ExternalServiceClient:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def fetch_papers(self, source: str, source_params: Dict) -> Dict:
-        """从外部服务获取论文数据"""
+    def fetch_papers(self, source: str, source_params: Dict, watermark: Optional[str] = None) -> Dict:
+        """从外部服务获取论文数据，传入上次返回的watermark时只获取之后新增的论文"""
         try:
             payload = {
                 'source': source,
                 'source_params': source_params
             }
+            if watermark is not None:
+                payload['watermark'] = watermark
             
             response = self.session.post(
                 f"{self.base_url}/api/v1/fetch",
@@ -78,6 +82,74 @@ class ExternalServiceClient:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def stream_papers(self, source: str, source_params: Dict, watermark: Optional[str] = None) -> 'PaperStream':
+        """
+        以NDJSON流式模式从外部服务获取论文，边接收边产出
+
+        连接失败或HTTP错误时直接抛出异常
+        """
+        payload = {'source': source, 'source_params': source_params, 'stream': True}
+        if watermark is not None:
+            payload['watermark'] = watermark
+        response = self.session.post(
+            f"{self.base_url}/api/v1/fetch",
+            json=payload,
+            headers={'Accept': 'application/x-ndjson'},
+            timeout=self.timeout,
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return PaperStream(response)
+
+
+class PaperStream:
+    """
+    外部服务的流式抓取结果
+
+    迭代时逐篇产出论文，读完后summary为服务端返回的汇总信息；
+    服务端返回错误行或响应不完整时抛出异常
+    """
+
+    def __init__(self, response: requests.Response):
+        self._response = response
+        self.summary = None
+        self.papers_count = 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        try:
+            if 'application/x-ndjson' not in self._response.headers.get('Content-Type', ''):
+                # 不支持流式返回的外部服务：整体解析后逐篇产出
+                result = self._response.json()
+                data = result.get('data', {})
+                papers = data.get('papers', [])
+                self.summary = {key: value for key, value in data.items() if key != 'papers'}
+                self.summary['source_info'] = result.get('source_info')
+                self.papers_count = len(papers)
+                yield from papers
+                return
+
+            for line in self._response.iter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                item_type = item.get('type')
+                if item_type == 'paper':
+                    self.papers_count += 1
+                    yield item['data']
+                elif item_type == 'summary':
+                    self.summary = item
+                elif item_type == 'error':
+                    raise Exception(item.get('error', {}).get('message', '外部服务抓取失败'))
+
+            if self.summary is None:
+                raise Exception('外部服务响应不完整')
+        finally:
+            self._response.close()
+
 
 class ParameterValidator:
     """参数验证器"""
@@ -96,6 +168,13 @@ class ParameterValidator:
 
 class PaperProcessor:
     """论文数据处理器"""
+
+    # 写入papers表的字段（与_standardize_paper_data的键一致）
+    PAPER_COLUMNS = (
+        'subscription_id', 'title', 'abstract', 'authors', 'journal', 'published_date',
+        'url', 'pdf_url', 'doi', 'status', 'status_changed_at', 'hash', 'external_id',
+        'ieee_article_number', 'keywords', 'citations', 'metadata'
+    )
     
     def __init__(self, db_path: str):
         self.db = Database(db_path)
@@ -106,70 +185,93 @@ class PaperProcessor:
     
     def process_papers(self, papers: List[Dict], subscription_id: int, 
                       feed_name: str) -> Dict:
-        """处理并存储论文数据"""
+        """
+        处理并存储论文数据
+
+        先按哈希在批次内去重，再用一次集合查询排除已存在的论文，
+        剩余论文在同一事务中批量插入
+        """
         conn = self.get_connection()
         try:
             c = conn.cursor()
             
-            new_papers = 0
             total_papers = len(papers)
             
+            # 生成论文哈希用于去重（批次内重复的论文只保留第一篇）
+            candidates = {}
+            valid_papers = 0
             for paper_data in papers:
                 if not paper_data.get('title'):
                     continue
-                
-                # 生成论文哈希用于去重
-                paper_hash = self._generate_paper_hash(paper_data)
-                
-                # 检查论文是否已存在
-                c.execute('SELECT id FROM papers WHERE hash = ?', (paper_hash,))
-                if c.fetchone():
+                valid_papers += 1
+                candidates.setdefault(self._generate_paper_hash(paper_data), paper_data)
+            
+            # 一次性排除已存在的论文，只标准化需要插入的论文
+            existing_hashes = find_existing_paper_hashes(c, candidates.keys())
+            rows = []
+            for paper_hash, paper_data in candidates.items():
+                if paper_hash in existing_hashes:
                     continue
-                
-                # 标准化论文数据
                 standardized_paper = self._standardize_paper_data(
                     paper_data, subscription_id, feed_name
                 )
-                
-                # 插入论文
-                c.execute('''INSERT INTO papers
-                             (subscription_id, title, abstract, authors, journal, published_date,
-                              url, pdf_url, doi, status, status_changed_at, hash, external_id, 
-                              ieee_article_number, keywords, citations, metadata)
-                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                          (
-                              standardized_paper['subscription_id'],
-                              standardized_paper['title'],
-                              standardized_paper['abstract'],
-                              standardized_paper['authors'],
-                              standardized_paper['journal'],
-                              standardized_paper['published_date'],
-                              standardized_paper['url'],
-                              standardized_paper['pdf_url'],
-                              standardized_paper['doi'],
-                              standardized_paper['status'],
-                              standardized_paper['status_changed_at'],
-                              standardized_paper['hash'],
-                              standardized_paper['external_id'],
-                              standardized_paper['ieee_article_number'],
-                              standardized_paper['keywords'],
-                              standardized_paper['citations'],
-                              standardized_paper['metadata']
-                          ))
-                new_papers += 1
+                rows.append(tuple(standardized_paper[column] for column in self.PAPER_COLUMNS))
+            
+            new_papers = bulk_insert_papers(c, self.PAPER_COLUMNS, rows)
             
             conn.commit()
             return {
                 'success': True,
                 'total_papers': total_papers,
-                'new_papers': new_papers
+                'new_papers': new_papers,
+                'duplicate_papers': valid_papers - new_papers
             }
         except Exception as e:
             conn.rollback()
             return {'success': False, 'error': str(e)}
         finally:
             conn.close()
-    
+
+    def process_paper_stream(self, papers: Iterable[Dict], targets: List[Tuple[int, str]],
+                             batch_size: int = 200) -> Dict[int, Dict]:
+        """
+        边接收边入库：每攒够batch_size篇论文就写入一次，内存中只保留当前批次
+
+        Args:
+            papers: 论文迭代器（如PaperStream）
+            targets: (订阅ID, 订阅名称) 列表，每批论文分别写入每个订阅
+            batch_size: 每批入库的论文数
+
+        Returns:
+            以订阅ID为键的处理结果，格式与process_papers相同。
+            读取论文时出错会直接抛出异常，此前已提交的批次保留在数据库中
+        """
+        results = {
+            subscription_id: {'success': True, 'total_papers': 0, 'new_papers': 0, 'duplicate_papers': 0}
+            for subscription_id, _ in targets
+        }
+
+        def flush(chunk):
+            for subscription_id, feed_name in targets:
+                if not results[subscription_id]['success']:
+                    continue
+                chunk_result = self.process_papers(chunk, subscription_id, feed_name)
+                if not chunk_result['success']:
+                    results[subscription_id] = chunk_result
+                    continue
+                for key in ('total_papers', 'new_papers', 'duplicate_papers'):
+                    results[subscription_id][key] += chunk_result[key]
+
+        chunk = []
+        for paper in papers:
+            chunk.append(paper)
+            if len(chunk) >= batch_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+        return results
+
     def _generate_paper_hash(self, paper_data: Dict) -> str:
         """生成论文哈希"""
         hash_content = (
@@ -246,18 +348,55 @@ class PaperProcessor:
 
 
 class SubscriptionSyncService:
-    """订阅同步服务"""
+    """
+    订阅同步服务
+
+    到期订阅按next_sync_at先后进入待同步队列，由有界线程池并发同步，
+    同一源类型同时进行的同步数量不超过配置的上限；
+    源类型和参数相同的订阅合并为一组，只请求一次外部服务
+    """
     
     def __init__(self, db_path: str = DATABASE_PATH, 
-                 external_service_url: str = "http://localhost:8000"):
+                 external_service_url: str = "http://localhost:8000",
+                 sync_config: Optional[Dict] = None):
         self.db_path = db_path
         self.user_subscription_manager = UserSubscriptionManager(db_path)
         self.sync_history_manager = SyncHistoryManager(db_path)
         self.paper_processor = PaperProcessor(db_path)
         self.external_client = ExternalServiceClient(external_service_url)
         
+        config = sync_config or get_sync_service_config()
+        self.check_interval = config['check_interval']
+        self.batch_size = config['batch_size']
+        self.max_workers = max(1, config['max_workers'])
+        self.default_source_concurrency = max(1, config['default_source_concurrency'])
+        self.source_concurrency = config.get('source_concurrency', {})
+        self.stream_fetch = config.get('stream_fetch', True)
+        self.stream_batch_size = max(1, config.get('stream_batch_size', 200))
+        self.incremental_fetch = config.get('incremental_fetch', True)
+
         self._running = False
         self._sync_thread = None
+        self._stop_event = threading.Event()
+        self._executor = None
+        
+        # 待同步队列与进行中的同步（均以订阅ID为键）
+        self._queue_lock = threading.Lock()
+        self._pending = {}
+        self._enqueued_at = {}
+        self._in_flight = {}
+        self._stats = {
+            'dispatched': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'sync_jobs': 0,
+            'total_sync_time': 0.0,
+            'max_dispatch_lag': 0.0,
+            'upstream_fetches': 0,
+            'upstream_fetches_saved': 0,
+            'incremental_fetches': 0,
+            'not_modified': 0,
+        }
     
     def start(self):
         """启动同步服务"""
@@ -265,15 +404,27 @@ class SubscriptionSyncService:
             return
         
         self._running = True
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='subscription-sync')
         self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
         self._sync_thread.start()
-        print("✅ 订阅同步服务已启动")
+        print(f"✅ 订阅同步服务已启动（{self.max_workers} 个同步线程）")
     
     def stop(self):
         """停止同步服务"""
-        self._running = False
+        with self._queue_lock:
+            self._running = False
+            self._pending.clear()
+            self._enqueued_at.clear()
+        self._stop_event.set()
         if self._sync_thread and self._sync_thread.is_alive():
             self._sync_thread.join(timeout=5)
+        if self._executor:
+            # 派发时提交的同步组不超过线程数，没有排队等待取消的任务
+            # （cancel_futures需要Python 3.9，项目仍支持3.8）
+            self._executor.shutdown(wait=False)
+            self._executor = None
         print("⏹️ 订阅同步服务已停止")
     
     def _sync_loop(self):
@@ -281,47 +432,271 @@ class SubscriptionSyncService:
         while self._running:
             try:
                 self._process_pending_syncs()
-                time.sleep(60)  # 每分钟检查一次
             except Exception as e:
                 print(f"❌ 同步循环异常: {e}")
-                time.sleep(60)
+            self._stop_event.wait(self.check_interval)
     
     def _process_pending_syncs(self):
-        """处理待同步的订阅"""
-        subscriptions = self.user_subscription_manager.get_subscriptions_for_sync(10)
+        """将到期订阅加入待同步队列并派发给同步线程"""
+        # 进行中的订阅在同步完成前仍处于到期状态，多取这部分以免占满批次
+        with self._queue_lock:
+            limit = self.batch_size + len(self._in_flight)
+        subscriptions = self.user_subscription_manager.get_subscriptions_for_sync(limit)
         
-        for subscription in subscriptions:
+        now = time.time()
+        with self._queue_lock:
+            for subscription in subscriptions:
+                subscription_id = subscription['id']
+                if subscription_id in self._in_flight:
+                    continue
+                self._pending[subscription_id] = subscription
+                self._enqueued_at.setdefault(subscription_id, now)
+        
+        self._dispatch()
+    
+    def _source_limit(self, source_type: str) -> int:
+        """获取源类型的并发上限"""
+        return self.source_concurrency.get(source_type, self.default_source_concurrency)
+    
+    @staticmethod
+    def _queue_order(subscription: Dict):
+        """队列顺序：从未同步的订阅优先，其余按next_sync_at先后"""
+        next_sync_at = subscription.get('next_sync_at')
+        return (next_sync_at is not None, next_sync_at or '', subscription['id'])
+    
+    def _sync_lag(self, subscription: Dict, now: float) -> float:
+        """订阅已到期但尚未开始同步的时长（秒）"""
+        due_at = self._enqueued_at.get(subscription['id'], now)
+        next_sync_at = subscription.get('next_sync_at')
+        if next_sync_at:
             try:
-                self._sync_subscription(subscription)
-            except Exception as e:
+                due_at = min(due_at, datetime.fromisoformat(str(next_sync_at)).timestamp())
+            except ValueError:
+                pass
+        return max(0.0, now - due_at)
+    
+    @staticmethod
+    def _fetch_key(subscription: Dict) -> tuple:
+        """
+        生成上游请求的规范化键
+
+        参数按键排序、去掉空值和字符串首尾空白，
+        源类型与参数相同的订阅共用一次外部服务调用
+        """
+        params = subscription.get('source_params') or {}
+        canonical = {
+            key: value.strip() if isinstance(value, str) else value
+            for key, value in params.items()
+            if value is not None
+        }
+        return (subscription['source_type'],
+                json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False))
+    
+    def _plan_sync_groups(self) -> List[List[Dict]]:
+        """同步规划：按请求键分组待同步订阅，组的顺序取组内最早到期的订阅"""
+        groups = {}
+        for subscription in sorted(self._pending.values(), key=self._queue_order):
+            groups.setdefault(self._fetch_key(subscription), []).append(subscription)
+        return list(groups.values())
+    
+    def _dispatch(self):
+        """按队列顺序派发同步任务，跳过已达并发上限的源类型"""
+        with self._queue_lock:
+            if not self._running or self._executor is None:
+                return
+            
+            # 并发按上游请求计数，同一组订阅只占一个名额
+            running_keys = {key: source_type for source_type, _, key in self._in_flight.values()}
+            running_by_source = {}
+            for source_type in running_keys.values():
+                running_by_source[source_type] = running_by_source.get(source_type, 0) + 1
+            
+            now = time.time()
+            for group in self._plan_sync_groups():
+                if len(running_keys) >= self.max_workers:
+                    break
+                fetch_key = self._fetch_key(group[0])
+                source_type = group[0]['source_type']
+                # 相同请求正在进行时等待其完成，避免并发重复抓取
+                if fetch_key in running_keys:
+                    continue
+                if running_by_source.get(source_type, 0) >= self._source_limit(source_type):
+                    continue
+                
+                for subscription in group:
+                    subscription_id = subscription['id']
+                    lag = self._sync_lag(subscription, now)
+                    del self._pending[subscription_id]
+                    self._enqueued_at.pop(subscription_id, None)
+                    self._in_flight[subscription_id] = (source_type, now, fetch_key)
+                    self._stats['max_dispatch_lag'] = max(self._stats['max_dispatch_lag'], lag)
+                running_keys[fetch_key] = source_type
+                running_by_source[source_type] = running_by_source.get(source_type, 0) + 1
+                self._stats['dispatched'] += len(group)
+                
+                self._executor.submit(self._run_sync_group, group)
+    
+    def _run_sync_group(self, subscriptions: List[Dict]):
+        """在同步线程中执行一组订阅的同步，完成后释放并发名额并继续派发"""
+        started_at = time.time()
+        succeeded = 0
+        try:
+            succeeded = self._sync_group(subscriptions)
+        except Exception as e:
+            for subscription in subscriptions:
                 print(f"❌ 订阅 {subscription['id']} 同步失败: {e}")
                 self._handle_sync_error(subscription['id'], str(e))
+        finally:
+            with self._queue_lock:
+                for subscription in subscriptions:
+                    self._in_flight.pop(subscription['id'], None)
+                self._stats['succeeded'] += succeeded
+                self._stats['failed'] += len(subscriptions) - succeeded
+                self._stats['sync_jobs'] += 1
+                self._stats['total_sync_time'] += time.time() - started_at
+            self._dispatch()
+    
+    def get_queue_metrics(self) -> Dict:
+        """获取同步队列的深度、延迟、并发和请求去重情况"""
+        with self._queue_lock:
+            now = time.time()
+            pending = list(self._pending.values())
+            lags = [self._sync_lag(subscription, now) for subscription in pending]
+            
+            queue_by_source = {}
+            for subscription in pending:
+                source_type = subscription['source_type']
+                queue_by_source[source_type] = queue_by_source.get(source_type, 0) + 1
+            
+            running_keys = {key: source_type for source_type, _, key in self._in_flight.values()}
+            in_flight_by_source = {}
+            for source_type in running_keys.values():
+                in_flight_by_source[source_type] = in_flight_by_source.get(source_type, 0) + 1
+            
+            fetches = self._stats['upstream_fetches']
+            return {
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'source_concurrency': dict(self.source_concurrency),
+                'default_source_concurrency': self.default_source_concurrency,
+                'queue_depth': len(pending),
+                'queue_depth_by_source': queue_by_source,
+                'in_flight': len(running_keys),
+                'in_flight_subscriptions': len(self._in_flight),
+                'in_flight_by_source': in_flight_by_source,
+                'oldest_lag_seconds': round(max(lags, default=0.0), 3),
+                'avg_lag_seconds': round(sum(lags) / len(lags), 3) if lags else 0.0,
+                'max_dispatch_lag_seconds': round(self._stats['max_dispatch_lag'], 3),
+                'dispatched': self._stats['dispatched'],
+                'succeeded': self._stats['succeeded'],
+                'failed': self._stats['failed'],
+                'avg_sync_seconds': round(self._stats['total_sync_time'] / self._stats['sync_jobs'], 3)
+                                    if self._stats['sync_jobs'] else 0.0,
+                'upstream_fetches': fetches,
+                'upstream_fetches_saved': self._stats['upstream_fetches_saved'],
+                'fetch_dedup_rate': round(self._stats['upstream_fetches_saved'] /
+                                          (fetches + self._stats['upstream_fetches_saved']) * 100, 2)
+                                    if fetches else 0.0,
+                'incremental_fetches': self._stats['incremental_fetches'],
+                'not_modified': self._stats['not_modified'],
+            }
     
-    def _sync_subscription(self, subscription: Dict):
-        """同步单个订阅"""
-        subscription_id = subscription['id']
+    def _sync_subscription(self, subscription: Dict) -> bool:
+        """同步单个订阅，返回是否成功"""
+        return self._sync_group([subscription]) == 1
+    
+    def _sync_group(self, subscriptions: List[Dict]) -> int:
+        """
+        同步一组请求参数相同的订阅，返回成功的订阅数
+
+        外部服务只调用一次，抓取结果分发给组内每个订阅分别入库；
+        组内订阅的水位线一致时增量抓取，只获取上次同步之后新增的论文
+        """
+        lead = subscriptions[0]
+        watermark = self._group_watermark(subscriptions)
         
         # 创建同步记录
-        sync_id = self.sync_history_manager.create_sync_record(subscription_id)
+        sync_ids = {
+            subscription['id']: self.sync_history_manager.create_sync_record(subscription['id'])
+            for subscription in subscriptions
+        }
         
+        service_response = None
+        new_watermark = None
         try:
-            # 调用外部服务获取论文
-            result = self.external_client.fetch_papers(
-                subscription['source_type'], 
-                subscription['source_params']
-            )
-            
-            if not result['success']:
-                raise Exception(result['error'])
-            
-            service_data = result['data']
-            papers = service_data.get('data', {}).get('papers', [])
-            
-            # 处理论文数据
-            process_result = self.paper_processor.process_papers(
-                papers, subscription_id, subscription['name']
+            # 调用外部服务获取论文并入库
+            if self.stream_fetch:
+                outcomes, service_response, summary = self._fetch_and_process_stream(lead, subscriptions, watermark)
+            else:
+                outcomes, service_response, summary = self._fetch_and_process(lead, subscriptions, watermark)
+            new_watermark = summary.get('watermark')
+        except Exception as e:
+            failure = {'success': False, 'error': str(e)}
+            outcomes = {subscription['id']: failure for subscription in subscriptions}
+            summary = {}
+
+        with self._queue_lock:
+            self._stats['upstream_fetches'] += 1
+            self._stats['upstream_fetches_saved'] += len(subscriptions) - 1
+            if watermark is not None:
+                self._stats['incremental_fetches'] += 1
+            if summary.get('not_modified'):
+                self._stats['not_modified'] += 1
+
+        succeeded = 0
+        for subscription in subscriptions:
+            if self._apply_sync_result(subscription, sync_ids[subscription['id']],
+                                       outcomes[subscription['id']], service_response, new_watermark):
+                succeeded += 1
+        return succeeded
+
+    def _group_watermark(self, subscriptions: List[Dict]) -> Optional[str]:
+        """组内订阅的水位线都相同时返回该水位线，否则返回None（全量抓取）"""
+        if not self.incremental_fetch:
+            return None
+        watermarks = {subscription.get('sync_watermark') for subscription in subscriptions}
+        return watermarks.pop() if len(watermarks) == 1 else None
+
+    def _fetch_and_process(self, lead: Dict, subscriptions: List[Dict],
+                           watermark: Optional[str] = None) -> Tuple[Dict[int, Dict], str, Dict]:
+        """一次性获取完整响应后分别写入组内每个订阅，返回(各订阅处理结果, 服务响应, 汇总信息)"""
+        result = self.external_client.fetch_papers(lead['source_type'], lead['source_params'], watermark)
+        if not result['success']:
+            raise Exception(result['error'])
+
+        service_data = result['data']
+        data = service_data.get('data', {})
+        papers = data.get('papers', [])
+        outcomes = {
+            subscription['id']: self.paper_processor.process_papers(
+                papers, subscription['id'], subscription['name']
             )
-            
+            for subscription in subscriptions
+        }
+        return outcomes, json.dumps(service_data), data
+
+    def _fetch_and_process_stream(self, lead: Dict, subscriptions: List[Dict],
+                                  watermark: Optional[str] = None) -> Tuple[Dict[int, Dict], str, Dict]:
+        """
+        流式获取论文，边接收边分批写入组内每个订阅
+
+        服务响应只记录汇总信息，不再保存完整的论文列表
+        """
+        stream = self.external_client.stream_papers(lead['source_type'], lead['source_params'], watermark)
+        outcomes = self.paper_processor.process_paper_stream(
+            stream,
+            [(subscription['id'], subscription['name']) for subscription in subscriptions],
+            batch_size=self.stream_batch_size
+        )
+        return outcomes, json.dumps({'stream': True, 'summary': stream.summary}), stream.summary or {}
+
+    def _apply_sync_result(self, subscription: Dict, sync_id: int,
+                           process_result: Dict, service_response: Optional[str],
+                           watermark: Optional[str] = None) -> bool:
+        """记录单个订阅的同步结果，返回是否成功；成功时保存外部服务返回的水位线"""
+        subscription_id = subscription['id']
+
+        try:
             if not process_result['success']:
                 raise Exception(process_result['error'])
             
@@ -330,22 +705,28 @@ class SubscriptionSyncService:
                 sync_id, 'success',
                 papers_found=process_result['total_papers'],
                 papers_new=process_result['new_papers'],
-                service_response=json.dumps(service_data)
+                service_response=service_response
             )
             
             # 更新订阅的同步状态
             next_sync = self._calculate_next_sync_time(subscription)
+            sync_status = {}
+            if self.incremental_fetch and watermark is not None:
+                sync_status['sync_watermark'] = str(watermark)
             self.user_subscription_manager.update_sync_status(
                 subscription_id,
                 last_sync_at=datetime.now().isoformat(),
                 next_sync_at=next_sync.isoformat(),
                 error_message=None,
-                status='active'
+                status='active',
+                **sync_status
             )
             
             print(f"✅ 订阅 {subscription_id} 同步成功: "
                   f"发现 {process_result['total_papers']} 篇，"
-                  f"新增 {process_result['new_papers']} 篇")
+                  f"新增 {process_result['new_papers']} 篇，"
+                  f"重复 {process_result['duplicate_papers']} 篇")
+            return True
             
         except Exception as e:
             # 更新同步记录为失败
@@ -361,6 +742,7 @@ class SubscriptionSyncService:
             )
             
             print(f"❌ 订阅 {subscription_id} 同步失败: {e}")
+            return False
     
     def _calculate_next_sync_time(self, subscription: Dict) -> datetime:
         """计算下次同步时间"""
@@ -394,8 +776,22 @@ class SubscriptionSyncService:
             if subscription['status'] != 'active':
                 return {'success': False, 'error': '订阅未激活'}
             
+            # 登记为进行中，同步期间派发线程和其他手动同步不会重复同步该订阅
+            with self._queue_lock:
+                if subscription_id in self._in_flight:
+                    return {'success': False, 'error': '订阅正在同步中'}
+                self._pending.pop(subscription_id, None)
+                self._enqueued_at.pop(subscription_id, None)
+                self._in_flight[subscription_id] = (subscription['source_type'], time.time(),
+                                                    self._fetch_key(subscription))
+            
             # 执行同步
-            self._sync_subscription(subscription)
+            try:
+                self._sync_subscription(subscription)
+            finally:
+                with self._queue_lock:
+                    self._in_flight.pop(subscription_id, None)
+                self._dispatch()
             return {'success': True, 'message': '同步已完成'}
             
         except Exception as e:
@@ -491,6 +887,10 @@ class NewSubscriptionService:
         """获取订阅的同步历史"""
         return self.sync_history_manager.get_subscription_history(subscription_id, limit)
     
+    def get_sync_queue_metrics(self) -> Dict:
+        """获取同步队列指标"""
+        return self.sync_service.get_queue_metrics()
+    
     # 系统管理方法
     def check_external_service(self) -> Dict:
         """检查外部服务状态"""
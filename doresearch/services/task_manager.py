@@ -3,12 +3,43 @@
 """
 import json
 import uuid
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from models.database import Database
 from models.task_models import Task, TaskStep, TaskStatus, TaskType
 from config import DATABASE_PATH
 
+# 进程内任务通知：任务创建后立即通知同一进程中的任务处理器，
+# 其他进程创建的任务由任务处理器的对账轮询发现
+_task_listeners: List[Callable[[str, str], None]] = []
+_task_listeners_lock = threading.Lock()
+
+
+def add_task_listener(listener: Callable[[str, str], None]):
+    """注册任务创建监听器，参数为(task_id, task_type)"""
+    with _task_listeners_lock:
+        if listener not in _task_listeners:
+            _task_listeners.append(listener)
+
+
+def remove_task_listener(listener: Callable[[str, str], None]):
+    """移除任务创建监听器"""
+    with _task_listeners_lock:
+        if listener in _task_listeners:
+            _task_listeners.remove(listener)
+
+
+def notify_task_created(task_id: str, task_type: str):
+    """通知监听器有新任务，需在任务事务提交后调用"""
+    with _task_listeners_lock:
+        listeners = list(_task_listeners)
+    for listener in listeners:
+        try:
+            listener(task_id, task_type)
+        except Exception as e:
+            print(f"⚠️ 任务通知失败: {e}")
+
 
 class TaskManager:
     def __init__(self):
@@ -51,6 +82,7 @@ class TaskManager:
                           (task_id, step, TaskStatus.PENDING.value))
 
             conn.commit()
+            notify_task_created(task_id, TaskType.DEEP_ANALYSIS.value)
             return {
                 'success': True, 
                 'task_id': task_id, 
@@ -100,6 +132,7 @@ class TaskManager:
                       (task_id, 'download_pdf', TaskStatus.PENDING.value))
 
             conn.commit()
+            notify_task_created(task_id, TaskType.PDF_DOWNLOAD_ONLY.value)
             return {
                 'success': True, 
                 'task_id': task_id, 
@@ -158,6 +191,7 @@ class TaskManager:
                           (task_id, step_name, TaskStatus.PENDING.value, step_desc))
 
             conn.commit()
+            notify_task_created(task_id, TaskType.FULL_ANALYSIS.value)
             return {
                 'success': True, 
                 'task_id': task_id, 
@@ -186,6 +220,51 @@ class TaskManager:
         finally:
             conn.close()
 
+    def claim_task(self, task_id: str) -> bool:
+        """原子地认领待处理任务，任务已被认领或状态已变化时返回False"""
+        conn = self.db.get_connection()
+        try:
+            c = conn.cursor()
+            c.execute('''UPDATE tasks
+                         SET status = ?, started_at = ?, progress = 0
+                         WHERE id = ? AND status = ?''',
+                      (TaskStatus.IN_PROGRESS.value, datetime.now().isoformat(),
+                       task_id, TaskStatus.PENDING.value))
+            conn.commit()
+            return c.rowcount == 1
+        finally:
+            conn.close()
+
+    def requeue_task(self, task_id: str) -> bool:
+        """将已认领但尚未执行完的任务退回待处理状态"""
+        conn = self.db.get_connection()
+        try:
+            c = conn.cursor()
+            c.execute('''UPDATE tasks
+                         SET status = ?, started_at = NULL, progress = 0
+                         WHERE id = ? AND status IN (?, ?, ?)''',
+                      (TaskStatus.PENDING.value, task_id, TaskStatus.IN_PROGRESS.value,
+                       TaskStatus.DOWNLOADING.value, TaskStatus.ANALYZING.value))
+            conn.commit()
+            return c.rowcount == 1
+        finally:
+            conn.close()
+
+    def recover_interrupted_tasks(self) -> int:
+        """将上次运行中断时遗留的进行中任务退回待处理状态，返回任务数"""
+        conn = self.db.get_connection()
+        try:
+            c = conn.cursor()
+            c.execute('''UPDATE tasks
+                         SET status = ?, started_at = NULL, progress = 0
+                         WHERE status IN (?, ?, ?)''',
+                      (TaskStatus.PENDING.value, TaskStatus.IN_PROGRESS.value,
+                       TaskStatus.DOWNLOADING.value, TaskStatus.ANALYZING.value))
+            conn.commit()
+            return c.rowcount
+        finally:
+            conn.close()
+
     def update_task_status(self, task_id: str, status: str, error_message: str = None,
                            progress: int = None, result: str = None) -> Dict:
         """更新任务状态"""
@@ -1,5 +1,10 @@
 """
 基于SSE的任务处理器 - 使用统一的SSE管理器
+
+调度线程按优先级认领待处理任务，分别交给PDF下载工作池（I/O密集）和
+AI分析工作池执行；分析类任务在下载池中准备好PDF后转入分析池。
+本进程创建的任务通过任务通知立即唤醒调度线程，其他进程创建的任务
+由间隔较长的对账轮询发现
 """
 import os
 import time
@@ -7,16 +12,187 @@ import threading
 import requests
 import base64
 import re
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
 
 # 使用统一的SSE管理器
 from services.sse_manager import sse_manager
-from services.task_manager import TaskManager
+from services.task_manager import TaskManager, add_task_listener, remove_task_listener
 from services.agent_manager import AgentManager
 from services.deepseek_analyzer import DeepSeekAnalyzer
 from models.task_models import TaskStatus
 from models.database import Database
-from config import DATABASE_PATH, TASK_CHECK_INTERVAL, PDF_DIR, AGENT_REQUEST_TIMEOUT
+from config import DATABASE_PATH, PDF_DIR, AGENT_REQUEST_TIMEOUT
+
+try:
+    from config import TASK_DOWNLOAD_WORKERS, TASK_ANALYSIS_WORKERS, TASK_POOL_QUEUE_SIZE
+except ImportError:
+    # 旧的config.py中没有工作池配置时，使用环境变量默认值
+    TASK_DOWNLOAD_WORKERS = int(os.getenv('TASK_DOWNLOAD_WORKERS', '4'))
+    TASK_ANALYSIS_WORKERS = int(os.getenv('TASK_ANALYSIS_WORKERS', '2'))
+    TASK_POOL_QUEUE_SIZE = int(os.getenv('TASK_POOL_QUEUE_SIZE', '8'))
+
+try:
+    from config import TASK_RECONCILE_INTERVAL
+except ImportError:
+    # 旧的config.py中没有对账间隔配置时，使用环境变量默认值
+    TASK_RECONCILE_INTERVAL = int(os.getenv('TASK_RECONCILE_INTERVAL', '30'))
+
+# 仅下载PDF的任务类型
+DOWNLOAD_TASK_TYPES = ('pdf_download_only', 'pdf_download')
+
+# 分析类任务：(分析步骤名, 步骤结果, 任务结果, 失败提示)
+ANALYSIS_TASK_TYPES = {
+    'deep_analysis': ('analyze_with_deepseek', '分析完成', '深度分析完成', '深度分析任务失败'),
+    'full_analysis': ('analyze_with_ai', 'AI分析完成', '完整分析完成', '完整分析任务失败'),
+}
+
+
+def _created_timestamp(created_at) -> Optional[float]:
+    """将任务的created_at（SQLite CURRENT_TIMESTAMP，UTC）转为时间戳"""
+    if not created_at:
+        return None
+    try:
+        created = datetime.fromisoformat(str(created_at))
+    except ValueError:
+        return None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created.timestamp()
+
+
+class WorkerPool:
+    """
+    有界任务工作池
+
+    排队和执行中的任务总数不超过 workers + max_queue，调度线程只在
+    有空位时提交任务，其余任务留在数据库中；统计排队深度和等待时间
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int,
+                 on_done: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._on_done = on_done
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix=f'task-{name}')
+
+        self._lock = threading.Lock()
+        self._queued = {}    # task_id -> 入队时间
+        self._running = {}   # task_id -> 开始执行时间
+        self._reserved = 0   # 已开始处理、稍后才会转入本池的任务数
+        self._closed = False
+        self._backlog = 0
+        self._oldest_backlog_at = None
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'total_run_time': 0.0,
+        }
+
+    def free_slots(self) -> int:
+        """剩余可认领的任务数"""
+        with self._lock:
+            used = len(self._queued) + len(self._running) + self._reserved
+            return self.workers + self.max_queue - used
+
+    def reserve(self):
+        """为稍后转入本池的任务预留名额"""
+        with self._lock:
+            self._reserved += 1
+
+    def release(self):
+        """释放未使用的预留名额"""
+        with self._lock:
+            self._reserved = max(0, self._reserved - 1)
+
+    def has_task(self, task_id: str) -> bool:
+        """任务是否已在本池中排队或执行"""
+        with self._lock:
+            return task_id in self._queued or task_id in self._running
+
+    def has_backlog(self) -> bool:
+        """是否有因本池已满而留在数据库中的任务"""
+        with self._lock:
+            return self._backlog > 0
+
+    def set_backlog(self, count: int, oldest_created_at: Optional[float]):
+        """记录因本池已满而留在数据库中的待处理任务"""
+        with self._lock:
+            self._backlog = count
+            self._oldest_backlog_at = oldest_created_at
+
+    def submit(self, task_id: str, fn: Callable[..., bool], *args, reserved: bool = False):
+        """提交任务，fn返回False或抛出异常时计为失败"""
+        with self._lock:
+            if reserved:
+                self._reserved = max(0, self._reserved - 1)
+            self._queued[task_id] = time.time()
+            self._stats['submitted'] += 1
+        self._executor.submit(self._run, task_id, fn, *args)
+
+    def _run(self, task_id: str, fn: Callable[..., bool], *args):
+        """在工作线程中执行任务，完成后通知调度线程补充任务"""
+        started_at = time.time()
+        with self._lock:
+            if self._closed:
+                return
+            wait_time = started_at - self._queued.pop(task_id, started_at)
+            self._running[task_id] = started_at
+            self._stats['total_wait_time'] += wait_time
+            self._stats['max_wait_time'] = max(self._stats['max_wait_time'], wait_time)
+
+        succeeded = False
+        try:
+            succeeded = fn(*args) is not False
+        except Exception as e:
+            print(f"❌ 工作池 {self.name} 执行任务 {task_id} 出错: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(task_id, None)
+                self._stats['completed' if succeeded else 'failed'] += 1
+                self._stats['total_run_time'] += time.time() - started_at
+            if self._on_done:
+                self._on_done()
+
+    def shutdown(self) -> List[str]:
+        """停止工作池，返回尚未开始执行的任务ID；已排队的任务不再执行"""
+        with self._lock:
+            self._closed = True
+            not_started = list(self._queued)
+            self._queued.clear()
+        self._executor.shutdown(wait=False)
+        return not_started
+
+    def get_stats(self) -> Dict:
+        """获取工作池的排队深度、等待时间和执行时间"""
+        with self._lock:
+            now = time.time()
+            waits = [now - queued_at for queued_at in self._queued.values()]
+            started = self._stats['submitted'] - len(self._queued)
+            finished = self._stats['completed'] + self._stats['failed']
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'queue_depth': len(self._queued),
+                'running': len(self._running),
+                'reserved': self._reserved,
+                'backlog': self._backlog,
+                'oldest_backlog_seconds': round(max(0.0, now - self._oldest_backlog_at), 3)
+                                          if self._oldest_backlog_at else 0.0,
+                'oldest_wait_seconds': round(max(waits, default=0.0), 3),
+                'avg_wait_seconds': round(self._stats['total_wait_time'] / started, 3) if started else 0.0,
+                'max_wait_seconds': round(self._stats['max_wait_time'], 3),
+                'avg_run_seconds': round(self._stats['total_run_time'] / finished, 3) if finished else 0.0,
+                'submitted': self._stats['submitted'],
+                'completed': self._stats['completed'],
+                'failed': self._stats['failed'],
+            }
 
 
 class TaskProcessor:
@@ -27,6 +203,11 @@ class TaskProcessor:
         self.db = Database(DATABASE_PATH)
         self.running = False
         self.thread = None
+        self.download_pool = None
+        self.analysis_pool = None
+
+        # 新任务创建或工作池腾出名额时唤醒调度线程
+        self._wake = threading.Event()
 
         # 使用统一的SSE管理器实例
         self.sse_manager = sse_manager
@@ -37,132 +218,201 @@ class TaskProcessor:
         """启动任务处理器"""
         if not self.running:
             self.running = True
+
+            # 每个数据库只运行一个任务处理器，上次异常退出（崩溃、容器停止）时
+            # 遗留的进行中任务退回待处理状态重新执行
+            recovered = self.task_manager.recover_interrupted_tasks()
+            if recovered:
+                print(f"🔁 {recovered} 个中断的任务已退回待处理状态")
+
+            self.download_pool = WorkerPool('download', TASK_DOWNLOAD_WORKERS,
+                                            TASK_POOL_QUEUE_SIZE, on_done=self._on_worker_done)
+            self.analysis_pool = WorkerPool('analysis', TASK_ANALYSIS_WORKERS,
+                                            TASK_POOL_QUEUE_SIZE, on_done=self._on_worker_done)
+            add_task_listener(self._on_task_created)
             self.thread = threading.Thread(target=self._process_loop, daemon=True)
             self.thread.start()
-            print("📋 任务处理器已启动（SSE模式）")
+            print(f"📋 任务处理器已启动（SSE模式，下载线程 {self.download_pool.workers} 个，"
+                  f"分析线程 {self.analysis_pool.workers} 个）")
 
     def stop(self):
         """停止任务处理器"""
         self.running = False
+        remove_task_listener(self._on_task_created)
+        self._wake.set()
         if self.thread:
             self.thread.join()
+
+        # 下载池中排队的任务尚未认领，仍为待处理状态；
+        # 已下载PDF、在分析池中排队的任务退回待处理状态，下次启动时重新处理
+        if self.download_pool:
+            self.download_pool.shutdown()
+        if self.analysis_pool:
+            for task_id in self.analysis_pool.shutdown():
+                self.task_manager.requeue_task(task_id)
         print("📋 任务处理器已停止")
 
+    def _on_task_created(self, task_id: str, task_type: str):
+        """本进程创建了新任务，立即唤醒调度线程"""
+        self._wake.set()
+
+    def _on_worker_done(self):
+        """工作线程完成任务，有任务因工作池已满而等待时唤醒调度线程"""
+        if any(pool.has_backlog() for pool in (self.download_pool, self.analysis_pool) if pool):
+            self._wake.set()
+
     def _process_loop(self):
-        """任务处理主循环"""
+        """调度主循环：收到任务通知、工作池腾出名额或到达对账间隔时认领待处理任务"""
         while self.running:
+            self._wake.clear()
             try:
                 # 检查传统Agent健康状态
                 self.agent_manager.check_agent_health()
 
-                # 获取待处理任务
-                pending_tasks = self.task_manager.get_pending_tasks()
-
-                if pending_tasks:
-                    print(f"📋 发现 {len(pending_tasks)} 个待处理任务")
-
-                for task in pending_tasks:
-                    if not self.running:
-                        break
-
-                    try:
-                        self._process_task(task)
-                    except Exception as e:
-                        print(f"❌ 处理任务 {task['id']} 失败: {e}")
-                        self.task_manager.update_task_status(
-                            task['id'],
-                            TaskStatus.FAILED.value,
-                            error_message=str(e)
-                        )
+                self._schedule_pending_tasks()
 
-                # 等待下次检查
-                time.sleep(TASK_CHECK_INTERVAL)
+                # 等待任务通知，超时后对账其他进程创建的任务
+                self._wake.wait(TASK_RECONCILE_INTERVAL)
 
             except Exception as e:
                 print(f"❌ 任务处理循环出错: {e}")
                 time.sleep(10)
 
-    def _process_task(self, task: Dict):
-        """处理单个任务"""
+    def _schedule_pending_tasks(self):
+        """
+        按优先级把待处理任务交给对应工作池，工作池已满时任务留在数据库中
+
+        任务在工作线程开始执行时才被认领（标记为进行中），
+        排队中的任务保持待处理状态，进程退出时不会遗留进行中的任务
+        """
+        pending_tasks = self.task_manager.get_pending_tasks()
+
+        if pending_tasks:
+            print(f"📋 发现 {len(pending_tasks)} 个待处理任务")
+
+        backlog = {self.download_pool: [], self.analysis_pool: []}
+        for task in pending_tasks:
+            if not self.running:
+                break
+
+            task_type = task['task_type']
+            is_analysis = task_type in ANALYSIS_TASK_TYPES
+            if self.download_pool.has_task(task['id']):
+                continue
+
+            if task_type not in DOWNLOAD_TASK_TYPES and not is_analysis:
+                if self.task_manager.claim_task(task['id']):
+                    self._fail_task(task['id'], f"未知的任务类型: {task_type}")
+                continue
+
+            if is_analysis and (self.analysis_pool.free_slots() <= 0 or self.download_pool.free_slots() <= 0):
+                backlog[self.analysis_pool].append(task)
+                continue
+            if not is_analysis and self.download_pool.free_slots() <= 0:
+                backlog[self.download_pool].append(task)
+                continue
+
+            if is_analysis:
+                self.analysis_pool.reserve()
+            self.download_pool.submit(task['id'], self._process_task, task)
+
+        for pool, tasks in backlog.items():
+            created = [_created_timestamp(task.get('created_at')) for task in tasks]
+            pool.set_backlog(len(tasks), min((ts for ts in created if ts), default=None))
+
+    def _process_task(self, task: Dict) -> bool:
+        """在下载池中处理任务：仅下载任务直接完成，分析任务准备好PDF后转入分析池"""
         task_id = task['id']
-        paper_id = task['paper_id']
         task_type = task['task_type']
+        is_analysis = task_type in ANALYSIS_TASK_TYPES
 
-        print(f"🔄 开始处理任务: {task_id} - {task['title']}")
+        handed_off = False
+        try:
+            # 开始执行时才原子认领，已被取消或已被认领的任务跳过
+            if not self.task_manager.claim_task(task_id):
+                print(f"⏭️ 任务已不是待处理状态，跳过: {task_id}")
+                return True
 
-        # 更新任务状态为进行中
-        self.task_manager.update_task_status(task_id, TaskStatus.IN_PROGRESS.value, progress=0)
+            print(f"🔄 开始处理任务: {task_id} - {task['title']}")
 
-        try:
-            if task_type == 'deep_analysis':
-                self._process_deep_analysis_task(task)
-            elif task_type == 'pdf_download_only':
-                self._process_pdf_download_task(task)
-            elif task_type == 'full_analysis':
-                self._process_full_analysis_task(task)
-            elif task_type == 'pdf_download':
-                # 兼容旧的pdf_download类型
-                self._process_pdf_download_task(task)
+            if is_analysis:
+                pdf_path = self._prepare_pdf(task)
+                self.analysis_pool.submit(task_id, self._process_analysis, task, pdf_path, reserved=True)
+                handed_off = True
             else:
-                raise Exception(f"未知的任务类型: {task_type}")
+                self._process_pdf_download_task(task)
+            return True
 
         except Exception as e:
-            error_msg = str(e)
-            print(f"❌ 任务失败: {task_id} - {error_msg}")
-            self.task_manager.update_task_status(
-                task_id,
-                TaskStatus.FAILED.value,
-                error_message=error_msg
-            )
+            error_msg = f"{ANALYSIS_TASK_TYPES[task_type][3]}: {e}" if is_analysis else str(e)
+            self._fail_task(task_id, error_msg)
+            return False
+
+        finally:
+            if is_analysis and not handed_off:
+                self.analysis_pool.release()
+
+    def _fail_task(self, task_id: str, error_msg: str):
+        """标记任务失败"""
+        print(f"❌ 任务失败: {task_id} - {error_msg}")
+        self.task_manager.update_task_status(
+            task_id,
+            TaskStatus.FAILED.value,
+            error_message=error_msg
+        )
 
-    def _process_deep_analysis_task(self, task: Dict):
-        """处理深度分析任务"""
+    def _prepare_pdf(self, task: Dict) -> str:
+        """分析任务的步骤1：使用已存在的PDF或下载PDF，返回文件路径"""
         task_id = task['id']
         paper_id = task['paper_id']
 
-        try:
-            # 首先检查是否已经有PDF文件
-            existing_pdf_path = self._check_existing_pdf(paper_id)
-
-            if existing_pdf_path and os.path.exists(existing_pdf_path):
-                print(f"📁 发现已存在的PDF文件: {existing_pdf_path}")
-                self.task_manager.update_task_step(task_id, 'download_pdf', TaskStatus.COMPLETED.value, result=existing_pdf_path)
+        # 首先检查是否已经有PDF文件
+        existing_pdf_path = self._check_existing_pdf(paper_id)
 
-                # 读取现有PDF内容
-                with open(existing_pdf_path, 'rb') as f:
-                    pdf_content = f.read()
+        if existing_pdf_path and os.path.exists(existing_pdf_path):
+            print(f"📁 发现已存在的PDF文件: {existing_pdf_path}")
+            self.task_manager.update_task_step(task_id, 'download_pdf', TaskStatus.COMPLETED.value, result=existing_pdf_path)
+            self.task_manager.update_task_status(task_id, TaskStatus.DOWNLOADING.value, progress=33)
+            return existing_pdf_path
 
-                pdf_path = existing_pdf_path
-                self.task_manager.update_task_status(task_id, TaskStatus.DOWNLOADING.value, progress=33)
+        # 步骤1: 下载PDF
+        print(f"📥 步骤1: 下载PDF...")
+        self.task_manager.update_task_step(task_id, 'download_pdf', TaskStatus.IN_PROGRESS.value)
 
-            else:
-                # 步骤1: 下载PDF
-                print(f"📥 步骤1: 下载PDF...")
-                self.task_manager.update_task_step(task_id, 'download_pdf', TaskStatus.IN_PROGRESS.value)
+        pdf_content = self._download_pdf(task)
+        if not pdf_content:
+            raise Exception("PDF下载失败")
 
-                pdf_content = self._download_pdf(task)
-                if not pdf_content:
-                    raise Exception("PDF下载失败")
+        self.task_manager.update_task_status(task_id, TaskStatus.DOWNLOADING.value, progress=33)
 
-                self.task_manager.update_task_status(task_id, TaskStatus.DOWNLOADING.value, progress=33)
+        # 保存PDF文件
+        pdf_path = self._save_pdf(paper_id, pdf_content)
+        self.task_manager.update_task_step(
+            task_id, 'download_pdf', TaskStatus.COMPLETED.value, result=pdf_path
+        )
+        return pdf_path
 
-                # 保存PDF文件
-                pdf_path = self._save_pdf(paper_id, pdf_content)
-                self.task_manager.update_task_step(
-                    task_id, 'download_pdf', TaskStatus.COMPLETED.value, result=pdf_path
-                )
+    def _process_analysis(self, task: Dict, pdf_path: str) -> bool:
+        """在分析池中执行分析任务的步骤2、3：AI分析并保存结果"""
+        task_id = task['id']
+        paper_id = task['paper_id']
+        step_name, step_result, task_result, error_prefix = ANALYSIS_TASK_TYPES[task['task_type']]
 
-            # 步骤2: DeepSeek分析
-            print(f"🧠 步骤2: DeepSeek深度分析...")
+        try:
+            # 步骤2: AI分析
+            print(f"🧠 步骤2: AI深度分析...")
             self.task_manager.update_task_status(task_id, TaskStatus.ANALYZING.value, progress=66)
-            self.task_manager.update_task_step(task_id, 'analyze_with_deepseek', TaskStatus.IN_PROGRESS.value)
+            self.task_manager.update_task_step(task_id, step_name, TaskStatus.IN_PROGRESS.value)
+
+            with open(pdf_path, 'rb') as f:
+                pdf_content = f.read()
 
-            # 直接使用PDF内容进行分析
+            # 使用DeepSeek分析
             analysis_result = self.deepseek_analyzer.analyze_pdf(pdf_content, task['title'])
 
             self.task_manager.update_task_step(
-                task_id, 'analyze_with_deepseek', TaskStatus.COMPLETED.value,
-                result="分析完成"
+                task_id, step_name, TaskStatus.COMPLETED.value,
+                result=step_result
             )
 
             # 步骤3: 保存结果
@@ -176,13 +426,24 @@ class TaskProcessor:
             # 任务完成
             self.task_manager.update_task_status(
                 task_id, TaskStatus.COMPLETED.value, progress=100,
-                result="深度分析完成"
+                result=task_result
             )
 
             print(f"✅ 任务完成: {task_id}")
+            return True
 
         except Exception as e:
-            raise Exception(f"深度分析任务失败: {e}")
+            self._fail_task(task_id, f"{error_prefix}: {e}")
+            return False
+
+    def get_pool_stats(self) -> Dict:
+        """获取各工作池的排队深度、等待时间和执行情况"""
+        pools = [pool for pool in (self.download_pool, self.analysis_pool) if pool]
+        return {
+            'running': self.running,
+            'reconcile_interval': TASK_RECONCILE_INTERVAL,
+            'pools': {pool.name: pool.get_stats() for pool in pools}
+        }
 
     def _process_pdf_download_task(self, task: Dict):
         """处理仅PDF下载任务"""
@@ -234,77 +495,6 @@ class TaskProcessor:
         except Exception as e:
             raise Exception(f"PDF下载任务失败: {e}")
 
-    def _process_full_analysis_task(self, task: Dict):
-        """处理完整分析任务（下载PDF + AI分析）"""
-        task_id = task['id']
-        paper_id = task['paper_id']
-
-        try:
-            print(f"🔍 开始完整分析任务: {paper_id}")
-
-            # 步骤1: 下载PDF（如果需要）
-            existing_pdf_path = self._check_existing_pdf(paper_id)
-
-            if existing_pdf_path and os.path.exists(existing_pdf_path):
-                print(f"📁 发现已存在的PDF文件: {existing_pdf_path}")
-                self.task_manager.update_task_step(task_id, 'download_pdf', TaskStatus.COMPLETED.value, result=existing_pdf_path)
-
-                # 读取现有PDF内容
-                with open(existing_pdf_path, 'rb') as f:
-                    pdf_content = f.read()
-
-                pdf_path = existing_pdf_path
-                self.task_manager.update_task_status(task_id, TaskStatus.DOWNLOADING.value, progress=33)
-
-            else:
-                # 下载PDF
-                print(f"📥 步骤1: 下载PDF...")
-                self.task_manager.update_task_step(task_id, 'download_pdf', TaskStatus.IN_PROGRESS.value)
-
-                pdf_content = self._download_pdf(task)
-                if not pdf_content:
-                    raise Exception("PDF下载失败")
-
-                self.task_manager.update_task_status(task_id, TaskStatus.DOWNLOADING.value, progress=33)
-
-                # 保存PDF文件
-                pdf_path = self._save_pdf(paper_id, pdf_content)
-                self.task_manager.update_task_step(
-                    task_id, 'download_pdf', TaskStatus.COMPLETED.value, result=pdf_path
-                )
-
-            # 步骤2: AI分析
-            print(f"🧠 步骤2: AI深度分析...")
-            self.task_manager.update_task_status(task_id, TaskStatus.ANALYZING.value, progress=66)
-            self.task_manager.update_task_step(task_id, 'analyze_with_ai', TaskStatus.IN_PROGRESS.value)
-
-            # 使用DeepSeek分析
-            analysis_result = self.deepseek_analyzer.analyze_pdf(pdf_content, task['title'])
-
-            self.task_manager.update_task_step(
-                task_id, 'analyze_with_ai', TaskStatus.COMPLETED.value,
-                result="AI分析完成"
-            )
-
-            # 步骤3: 保存结果
-            print(f"💾 步骤3: 保存分析结果...")
-            self.task_manager.update_task_step(task_id, 'save_results', TaskStatus.IN_PROGRESS.value)
-
-            self._save_analysis_result(paper_id, pdf_path, analysis_result)
-
-            self.task_manager.update_task_step(task_id, 'save_results', TaskStatus.COMPLETED.value)
-
-            # 任务完成
-            self.task_manager.update_task_status(
-                task_id, TaskStatus.COMPLETED.value, progress=100,
-                result="完整分析完成"
-            )
-
-            print(f"✅ 完整分析任务完成: {task_id}")
-
-        except Exception as e:
-            raise Exception(f"完整分析任务失败: {e}")
-
     def _update_pdf_path(self, paper_id: int, pdf_path: str):
         """更新数据库中的PDF路径"""
         conn = self.db.get_connection()
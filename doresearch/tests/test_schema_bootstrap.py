@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+测试表结构初始化：user_version记录表结构代码的指纹，表结构代码改动后已有数据库重新执行建表
+
+python tests/test_schema_bootstrap.py 或 pytest tests/test_schema_bootstrap.py
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+
+
+def index_exists(db_path: str, name: str) -> bool:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=?", (name,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def test_schema_rerun_when_code_changes():
+    """指纹一致时跳过建表，指纹不一致（表结构代码有改动）时补建缺失的索引"""
+    assert Database.SCHEMA_VERSION == Database._schema_fingerprint() != 0
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'schema.db')
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == Database.SCHEMA_VERSION
+
+    # 指纹一致：新进程不会补建被删除的索引
+    conn.execute('DROP INDEX idx_tasks_status')
+    conn.commit()
+    Database._initialized_paths.discard(os.path.abspath(db_path))
+    Database(db_path)
+    assert not index_exists(db_path, 'idx_tasks_status')
+
+    # 模拟旧版本代码初始化的数据库
+    conn.execute(f'PRAGMA user_version = {Database.SCHEMA_VERSION ^ 1}')
+    conn.commit()
+    conn.close()
+    Database._initialized_paths.discard(os.path.abspath(db_path))
+    Database(db_path)
+    assert index_exists(db_path, 'idx_tasks_status')
+    print("✓ 表结构代码改动后重新初始化")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing schema bootstrap...")
+    test_schema_rerun_when_code_changes()
+    print("✅ All schema bootstrap tests passed")
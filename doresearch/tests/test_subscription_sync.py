@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+测试订阅同步服务：手动同步期间订阅登记为进行中，不会被重复同步
+
+python tests/test_subscription_sync.py 或 pytest tests/test_subscription_sync.py
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+from services.subscription_service import SubscriptionSyncService
+
+
+def test_manual_sync_marks_subscription_in_flight():
+    """并发的手动同步只执行一次，同步期间订阅在进行中列表里"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'subscriptions.db')
+    Database(db_path)
+    service = SubscriptionSyncService(db_path)
+    subscription = {'id': 7, 'status': 'active', 'source_type': 'dblp', 'source_params': {'dblp_id': 'icse'}}
+    service.user_subscription_manager.get_subscription = lambda subscription_id, user_id=None: subscription
+
+    in_flight_during_sync = []
+
+    def slow_sync(sub):
+        in_flight_during_sync.append(sub['id'] in service._in_flight)
+        time.sleep(0.2)
+        return True
+
+    service._sync_subscription = slow_sync
+    barrier = threading.Barrier(2)
+    results = []
+
+    def manual_sync():
+        barrier.wait()
+        results.append(service.manual_sync_subscription(7))
+
+    threads = [threading.Thread(target=manual_sync) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert in_flight_during_sync == [True]
+    assert sorted(result['success'] for result in results) == [False, True]
+    assert service._in_flight == {}
+    print("✓ 手动同步登记为进行中")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing subscription sync...")
+    test_manual_sync_marks_subscription_in_flight()
+    print("✅ All subscription sync tests passed")
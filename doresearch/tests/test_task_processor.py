@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+测试任务处理器：任务原子认领、退回待处理、中断任务恢复和工作池上限
+
+python tests/test_task_processor.py 或 pytest tests/test_task_processor.py
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+import services.agent_manager as agent_manager_module
+import services.task_manager as task_manager_module
+import services.task_processor as task_processor_module
+from services.task_manager import TaskManager
+from services.task_processor import TaskProcessor, WorkerPool
+
+
+@contextmanager
+def patched(module, **values):
+    """临时替换模块全局变量，退出时恢复原值"""
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+@contextmanager
+def task_database(task_count: int, task_type: str = 'pdf_download_only'):
+    """创建临时数据库并写入待处理任务，任务处理相关模块在with块内指向该数据库"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'tasks.db')
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    for i in range(1, task_count + 1):
+        conn.execute('INSERT INTO papers (id, title, hash) VALUES (?, ?, ?)', (i, f'Paper {i}', f'hash-{i}'))
+        conn.execute('''INSERT INTO tasks (id, user_id, paper_id, task_type, status, priority)
+                        VALUES (?, 1, ?, ?, 'pending', 5)''', (f'task-{i}', i, task_type))
+    conn.commit()
+    conn.close()
+
+    with patched(agent_manager_module, DATABASE_PATH=db_path), \
+            patched(task_manager_module, DATABASE_PATH=db_path), \
+            patched(task_processor_module, DATABASE_PATH=db_path):
+        yield db_path
+
+
+def task_statuses(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute('SELECT id, status FROM tasks').fetchall())
+    finally:
+        conn.close()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_claim_task_is_atomic():
+    """并发认领同一任务只有一次成功"""
+    with task_database(1) as db_path:
+        manager = TaskManager()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def claim():
+            barrier.wait()
+            results.append(manager.claim_task('task-1'))
+
+        threads = [threading.Thread(target=claim) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results.count(True) == 1
+        assert task_statuses(db_path)['task-1'] == 'in_progress'
+    print("✓ 任务原子认领")
+
+
+def test_requeue_and_recover_interrupted_tasks():
+    """退回和恢复只影响进行中的任务"""
+    with task_database(4) as db_path:
+        manager = TaskManager()
+        assert manager.claim_task('task-1')
+        assert manager.requeue_task('task-1')
+        assert not manager.requeue_task('task-1')
+        assert task_statuses(db_path)['task-1'] == 'pending'
+
+        assert manager.claim_task('task-1')
+        assert manager.claim_task('task-2')
+        manager.update_task_status('task-2', 'analyzing', progress=66)
+        manager.update_task_status('task-3', 'completed', progress=100)
+
+        assert manager.recover_interrupted_tasks() == 2
+        statuses = task_statuses(db_path)
+        assert statuses == {'task-1': 'pending', 'task-2': 'pending', 'task-3': 'completed', 'task-4': 'pending'}
+    print("✓ 退回待处理和中断任务恢复")
+
+
+def test_worker_pool_bound():
+    """工作池排队和执行中的任务数不超过 workers + max_queue"""
+    release = threading.Event()
+    pool = WorkerPool('test', workers=2, max_queue=1)
+    try:
+        for i in range(3):
+            assert pool.free_slots() > 0
+            pool.submit(f'task-{i}', release.wait)
+        assert pool.free_slots() == 0
+        assert wait_for(lambda: pool.get_stats()['running'] == 2)
+
+        stats = pool.get_stats()
+        assert stats['queue_depth'] == 1
+        assert pool.has_task('task-2')
+
+        pool.reserve()
+        assert pool.free_slots() == -1
+        pool.release()
+
+        release.set()
+        assert wait_for(lambda: pool.get_stats()['completed'] == 3)
+        assert pool.free_slots() == 3
+    finally:
+        release.set()
+        pool.shutdown()
+    print("✓ 工作池上限")
+
+
+def test_queued_tasks_stay_pending_until_started():
+    """只有工作线程开始执行的任务被标记为进行中，停止后排队任务仍为待处理"""
+    with task_database(6) as db_path:
+        release = threading.Event()
+        processor = TaskProcessor()
+        processor._process_pdf_download_task = lambda task: release.wait()
+        with patched(task_processor_module, TASK_DOWNLOAD_WORKERS=2, TASK_POOL_QUEUE_SIZE=2):
+            processor.start()
+        try:
+            assert wait_for(lambda: processor.get_pool_stats()['pools']['download']['running'] == 2)
+            stats = processor.get_pool_stats()['pools']['download']
+            assert stats['queue_depth'] == 2
+            assert stats['backlog'] == 2
+
+            statuses = list(task_statuses(db_path).values())
+            assert statuses.count('in_progress') == 2
+            assert statuses.count('pending') == 4
+        finally:
+            processor.stop()
+            release.set()
+
+        # 模拟进程被强制结束：执行中的任务在下次启动时恢复
+        assert TaskManager().recover_interrupted_tasks() == 2
+        assert set(task_statuses(db_path).values()) == {'pending'}
+    print("✓ 排队任务保持待处理状态")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing task processor...")
+    test_claim_task_is_atomic()
+    test_requeue_and_recover_interrupted_tasks()
+    test_worker_pool_bound()
+    test_queued_tasks_stay_pending_until_started()
+    print("✅ All task processor tests passed")
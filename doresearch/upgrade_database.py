@@ -68,6 +68,7 @@ def main():
         print("   📊 高性能统计API")
         print("   🤖 Agent任务系统")
         print("   📝 状态变化时间记录")
+        print("   🔍 论文全文检索（FTS5）")
 
     else:
         print("\n❌ 升级失败")